@@ -44,6 +44,7 @@ from ai_service.utils.llm_client import init_llm_client, close_llm_client
 from ai_service.metrics.ai_mesh_collector import start_metrics_collector, stop_metrics_collector
 from ai_service.utils.tracing import tracing_manager, websocket_tracing_middleware
 from ai_service.metrics.ai_mesh_metrics import update_network_info
+from packages.error_handling.python.transport import transport_registry
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -91,6 +92,9 @@ async def lifespan(app: FastAPI):
     logger.info("Closing LLM client")
     await close_llm_client()
     
+    logger.info("Closing shared HTTP connection pools")
+    await transport_registry.aclose()
+    
     logger.info("Shutting down OpenTelemetry tracing")
     try:
         tracing_manager.shutdown()
@@ -13,6 +13,7 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
 from packages.database.src.redis import get_redis_client
+from ..services.network_store import NetworkStore
 from .ai_mesh_metrics import (
     update_memory_metrics, 
     update_network_info,
@@ -29,6 +30,9 @@ AGENT_KEY_PREFIX = "ai_mesh:agent:"
 TASK_KEY_PREFIX = "ai_mesh:task:"
 MEMORY_KEY_PREFIX = "ai_mesh:memory:"
 
+# Number of networks loaded per index page
+NETWORK_PAGE_SIZE = 100
+
 class AINetworkMetricsCollector:
     """
     Background service that collects and updates metrics for AI Mesh Network
@@ -106,31 +110,16 @@ class AINetworkMetricsCollector:
             # Get list of all networks
             start_time = time.time()
             
-            # Get all network keys
-            network_keys = await self.redis.keys(f"{NETWORK_KEY_PREFIX}*")
+            # Page through the network index
+            store = NetworkStore(self.redis)
+            networks = []
+            for offset in range(0, await store.count(), NETWORK_PAGE_SIZE):
+                networks.extend(await store.list(offset=offset, limit=NETWORK_PAGE_SIZE))
             
             # No networks found
-            if not network_keys:
+            if not networks:
                 return
             
-            # Get network data
-            networks = []
-            pipeline = self.redis.pipeline()
-            
-            for key in network_keys:
-                pipeline.get(key)
-            
-            network_data_list = await pipeline.execute()
-            
-            # Process network data
-            for i, data in enumerate(network_data_list):
-                if data:
-                    try:
-                        network = json.loads(data)
-                        networks.append(network)
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON in network data: {data}")
-            
             # Update network info metric
             update_network_info(networks)
             
@@ -142,7 +131,7 @@ class AINetworkMetricsCollector:
                 
                 # Update task metrics
                 pending_tasks = 0
-                task_ids = network.get("tasks", [])
+                task_ids = await store.members(network_id, "tasks")
                 for task_id in task_ids:
                     task_key = f"{TASK_KEY_PREFIX}{task_id}"
                     task_data = await self.redis.get(task_key)
@@ -159,7 +148,7 @@ class AINetworkMetricsCollector:
                 
                 # Update memory metrics
                 memory_type_counts = {}
-                memory_ids = network.get("memories", [])
+                memory_ids = await store.members(network_id, "memories")
                 for memory_id in memory_ids:
                     memory_key = f"{MEMORY_KEY_PREFIX}{memory_id}"
                     memory_data = await self.redis.get(memory_key)
@@ -179,7 +168,7 @@ class AINetworkMetricsCollector:
                 update_memory_metrics(network_id, memory_type_counts)
                 
                 # Update agent metrics
-                agent_ids = network.get("agents", [])
+                agent_ids = await store.members(network_id, "agents")
                 for agent_id in agent_ids:
                     agent_key = f"{AGENT_KEY_PREFIX}{agent_id}"
                     agent_data = await self.redis.get(agent_key)
@@ -222,9 +222,9 @@ def update_network_info(networks: List[Dict[str, Any]]):
     for network in networks:
         network_id = network.get("id", "unknown")
         network_info[f"network_{network_id}_name"] = network.get("name", "")
-        network_info[f"network_{network_id}_agent_count"] = str(len(network.get("agents", [])))
-        network_info[f"network_{network_id}_task_count"] = str(len(network.get("tasks", [])))
-        network_info[f"network_{network_id}_memory_count"] = str(len(network.get("memories", [])))
+        network_info[f"network_{network_id}_agent_count"] = str(network.get("agent_count", len(network.get("agents", []))))
+        network_info[f"network_{network_id}_task_count"] = str(network.get("task_count", len(network.get("tasks", []))))
+        network_info[f"network_{network_id}_memory_count"] = str(network.get("memory_count", len(network.get("memories", []))))
         network_info[f"network_{network_id}_status"] = network.get("status", "unknown")
     
     NETWORK_INFO.info(network_info)
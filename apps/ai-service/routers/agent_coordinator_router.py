@@ -132,11 +132,13 @@ async def create_network(
 
 @router.get("/mesh/networks", response_model=List[NetworkSummary], tags=["AI Mesh Network"])
 async def list_networks(
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of networks to return"),
+    offset: int = Query(0, ge=0, description="Offset for pagination"),
     coordinator: AgentCoordinator = Depends(get_coordinator)
 ):
-    """List all AI Mesh Networks"""
+    """List AI Mesh Networks, newest first"""
     try:
-        networks = await coordinator.list_networks()
+        networks = await coordinator.list_networks(limit=limit, offset=offset)
         return networks
     except Exception as e:
         logger.error(f"Failed to list networks: {e}")
@@ -369,11 +371,13 @@ async def remove_agent(
 @router.get("/mesh/networks/{network_id}/agents", tags=["AI Mesh Network"])
 async def list_agents(
     network_id: str = Path(..., description="ID of the network"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of agents to return"),
+    offset: int = Query(0, ge=0, description="Offset for pagination"),
     coordinator: AgentCoordinator = Depends(get_coordinator)
 ):
     """List agents for a network"""
     try:
-        agents = await coordinator.get_network_agents(network_id)
+        agents = await coordinator.get_network_agents(network_id, limit=limit, offset=offset)
         return agents
     except Exception as e:
         logger.error(f"Failed to list agents: {e}")
@@ -26,11 +26,18 @@ from sse_starlette.sse import EventSourceResponse
 from ..services.agent_coordinator import get_agent_coordinator, AgentCoordinator
 from ..utils.redis_client import get_redis_client
 from ..utils.llm_client import get_llm_client, LLMClient
+from ..utils.streaming import coalesce_deltas, DEFAULT_FRAME_CHARS, DEFAULT_FRAME_DELAY
 
 logger = logging.getLogger("ai_service.routers.streaming_router")
 
 router = APIRouter()
 
+# Updates buffered per task stream; producers wait when a client falls behind
+TASK_STREAM_QUEUE_SIZE = 256
+
+# Client disconnects are polled at most this often
+DISCONNECT_CHECK_INTERVAL = 1.0
+
 # Task submission queue for streaming tasks
 streaming_tasks = {}  # task_id -> TaskStreamInfo
 
@@ -41,7 +48,7 @@ class TaskStreamInfo:
         self.network_id = network_id
         self.request_id = request_id
         self.status = "pending"
-        self.result_queue = asyncio.Queue()
+        self.result_queue = asyncio.Queue(maxsize=TASK_STREAM_QUEUE_SIZE)
         self.last_update = time.time()
         self.is_complete = False
         self.error = None
@@ -112,61 +119,86 @@ async def cleanup_task_stream(task_id: str, delay: int = 300):
     except Exception as e:
         logger.error(f"Error cleaning up task stream for task {task_id}: {e}")
 
-async def generate_sse_events(task_stream: TaskStreamInfo, request: Request) -> AsyncGenerator[Dict[str, Any], None]:
-    """Generate SSE events for a task stream"""
+class DisconnectMonitor:
+    """Polls for client disconnects at most once per interval"""
+    def __init__(self, request: Request, interval: float = DISCONNECT_CHECK_INTERVAL):
+        self.request = request
+        self.interval = interval
+        self.last_check = time.monotonic()
+        
+    async def is_disconnected(self) -> bool:
+        """Return True if the client has gone away"""
+        now = time.monotonic()
+        if now - self.last_check < self.interval:
+            return False
+        self.last_check = now
+        return await self.request.is_disconnected()
+
+def sse_event(update: Dict[str, Any]) -> Dict[str, str]:
+    """Encode an update once as an SSE event named after its type"""
+    return {"event": update["type"], "data": json.dumps(update)}
+
+async def generate_sse_events(task_stream: TaskStreamInfo, request: Request) -> AsyncGenerator[Dict[str, str], None]:
+    """Generate SSE events for a task stream
+    
+    Each update is serialized to JSON once and yielded as an event/data pair
+    that EventSourceResponse frames directly.
+    """
+    monitor = DisconnectMonitor(request)
     while not task_stream.is_complete:
         # Check if client is disconnected
-        if await request.is_disconnected():
+        if await monitor.is_disconnected():
             logger.info(f"Client disconnected from SSE stream for task {task_stream.task_id}")
             break
             
         # Try to get an update from the queue
         try:
             # Use a timeout to periodically check for client disconnection
-            update = await asyncio.wait_for(task_stream.result_queue.get(), timeout=1.0)
-            yield update
+            update = await asyncio.wait_for(task_stream.result_queue.get(), timeout=DISCONNECT_CHECK_INTERVAL)
+            yield sse_event(update)
         except asyncio.TimeoutError:
             # Send keep-alive ping every 15 seconds
             if time.time() - task_stream.last_update > 15:
-                yield {
+                yield sse_event({
                     "type": "ping",
                     "data": {"timestamp": datetime.utcnow().isoformat()},
                     "timestamp": datetime.utcnow().isoformat()
-                }
+                })
                 task_stream.last_update = time.time()
         except Exception as e:
             logger.error(f"Error generating SSE event for task {task_stream.task_id}: {e}")
-            yield {
+            yield sse_event({
                 "type": "error",
                 "data": {"error": str(e)},
                 "timestamp": datetime.utcnow().isoformat()
-            }
+            })
             break
     
     # If the queue still has items, drain them
     while not task_stream.result_queue.empty():
         try:
             update = task_stream.result_queue.get_nowait()
-            yield update
+            yield sse_event(update)
         except:
             break
             
     # Final event to close the stream
-    yield {
+    yield sse_event({
         "type": "close",
         "data": {"status": task_stream.status},
         "timestamp": datetime.utcnow().isoformat()
-    }
+    })
 
 async def generate_json_stream(task_stream: TaskStreamInfo, request: Request) -> AsyncGenerator[bytes, None]:
     """Generate a JSON stream for a task"""
     # Send the opening of a JSON array
     yield b'[\n'
     first_item = True
+    monitor = DisconnectMonitor(request)
     
     while not task_stream.is_complete:
         # Check if client is disconnected
-        if await request.is_disconnected():
+        if await monitor.is_disconnected():
             logger.info(f"Client disconnected from JSON stream for task {task_stream.task_id}")
             break
             
@@ -387,6 +419,8 @@ async def streaming_generation(
             - model: (Optional) Model to use (defaults to coordinator default)
             - temperature: (Optional) Temperature for generation
             - max_tokens: (Optional) Maximum tokens to generate
+            - frame_delay_ms: (Optional) Longest time a delta is held for coalescing
+            - frame_chars: (Optional) Frame size that is sent immediately
             
     Returns:
         StreamingResponse with generated tokens
@@ -404,32 +438,41 @@ async def streaming_generation(
         temperature = min(max(generation_request.get("temperature", 0.7), 0), 1)  # 0-1 range
         max_tokens = min(generation_request.get("max_tokens", 4000), 10000)  # Cap at 10k tokens
         
+        # Frame budget; small deltas are merged so each write carries more text
+        frame_delay = min(max(generation_request.get("frame_delay_ms", DEFAULT_FRAME_DELAY * 1000), 0), 1000) / 1000
+        frame_chars = min(max(generation_request.get("frame_chars", DEFAULT_FRAME_CHARS), 1), 8192)
+        
         # Function to stream the generated text
         async def generate_text_stream():
             try:
                 # Start streaming with JSON opening
-                yield b'{\n'
-                yield b'  "status": "streaming",\n'
-                yield b'  "tokens": ['
+                yield b'{\n  "status": "streaming",\n  "tokens": ['
                 
-                # Stream the content
+                # Stream the content. Frames are pulled only as fast as the client
+                # accepts them, and the bounded buffer in coalesce_deltas pauses
+                # provider reads when it fills.
                 first_token = True
-                async for chunk in llm_client.generate_text_stream(
-                    prompt=prompt,
-                    model=model,
-                    temperature=temperature,
-                    max_tokens=max_tokens
+                monitor = DisconnectMonitor(request)
+                async for chunk in coalesce_deltas(
+                    llm_client.generate_text_stream(
+                        prompt=prompt,
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    ),
+                    max_delay=frame_delay,
+                    max_chars=frame_chars
                 ):
-                    # Format the token as JSON
+                    # Format the frame as JSON
                     token_data = json.dumps(chunk)
                     prefix = '' if first_token else ','
                     first_token = False
                     
-                    # Yield the token
+                    # Yield the frame
                     yield f"{prefix}{token_data}".encode('utf-8')
                     
                     # Check if client disconnected
-                    if await request.is_disconnected():
+                    if await monitor.is_disconnected():
                         logger.info("Client disconnected from text generation stream")
                         break
                 
@@ -517,23 +560,9 @@ async def get_task_events(
                 # Task is still in progress, start the processor
                 asyncio.create_task(task_result_processor(task_stream, coordinator))
         
-        # Function to generate SSE events with enhanced formatting
-        async def generate_enhanced_sse_events():
-            async for event in generate_sse_events(task_stream, request):
-                event_type = event["type"]
-                event_data = json.dumps(event)
-                
-                # Format as SSE event
-                yield f"event: {event_type}\n"
-                yield f"data: {event_data}\n\n"
-                
-                # For keep-alive
-                if event_type == "ping":
-                    yield ": ping\n\n"
-        
-        # Return the SSE response
+        # Return the SSE response; events are named after their update type
         return EventSourceResponse(
-            generate_enhanced_sse_events(),
+            generate_sse_events(task_stream, request),
             media_type="text/event-stream"
         )
         
@@ -23,6 +23,7 @@ import os
 from ..utils.redis_client import get_redis_client, get_rate_limiter
 from ..utils.llm_client import get_llm_client, LLMClient
 from ..implementations.memory.long_term_memory import get_tiered_memory_storage
+from .network_store import NetworkStore
 # Import the broadcast functions - will be imported later after they're defined
 # to avoid circular imports
 
@@ -51,6 +52,9 @@ MODEL_FALLBACK_CHAIN = ["claude-3-7-sonnet", "gpt-4o", "gemini-2.0"]
 # Default data retention period in days
 DEFAULT_DATA_RETENTION_DAYS = 90
 
+# Newest members of each kind returned with a network's details
+NETWORK_DETAIL_PAGE_SIZE = int(os.getenv("AI_MESH_NETWORK_DETAIL_PAGE_SIZE", "20"))
+
 # Authentication and security models
 class AuthCredential(BaseModel):
     """Authentication credential model for AI Mesh operations"""
@@ -318,6 +322,7 @@ class DataRetentionManager:
     
     def __init__(self, redis_client):
         self.redis = redis_client
+        self.network_store = NetworkStore(redis_client)
         self.retention_period = DEFAULT_DATA_RETENTION_DAYS
     
     async def set_retention_policy(self, retention_days: int) -> None:
@@ -352,22 +357,24 @@ class DataRetentionManager:
                 "audit_logs": 0
             }
             
-            # Get all network keys
-            network_keys = await self.redis.keys(f"{NETWORK_KEY_PREFIX}*")
+            # Index legacy networks first so their expiry is seen
+            await self.network_store.migrate_all()
             
-            # Process networks and their resources
-            for network_key in network_keys:
-                network_data = await self.redis.get(network_key)
-                if not network_data:
-                    continue
-                
-                network = json.loads(network_data)
+            # Networks are indexed by creation time, so expired ones come first
+            processed_ids = set()
+            while True:
+                expired_ids = [
+                    network_id
+                    for network_id in await self.network_store.created_before(cutoff_date)
+                    if network_id not in processed_ids
+                ]
+                if not expired_ids:
+                    break
                 
-                # Check if network is expired
-                created_at = datetime.fromisoformat(network["created_at"].replace("Z", "+00:00"))
-                if created_at < cutoff_date:
+                for network_id in expired_ids:
+                    processed_ids.add(network_id)
                     # Delete network and all associated resources
-                    await self.delete_network_resources(network)
+                    await self.delete_network_resources(network_id)
                     deleted_counts["networks"] += 1
             
             # Clean up audit logs
@@ -390,31 +397,32 @@ class DataRetentionManager:
             logger.error(f"Failed to clean up expired data: {e}")
             return {"error": str(e)}
     
-    async def delete_network_resources(self, network: Dict[str, Any]) -> None:
+    async def delete_network_resources(self, network_id: str) -> None:
         """Delete all resources associated with a network"""
         try:
+            # Delete the network and its membership sets
+            members = await self.network_store.delete(network_id)
+            if not members:
+                return
+            
             # Create a Redis pipeline for batch deletion
             pipeline = self.redis.pipeline()
             
             # Delete tasks
-            for task_id in network.get("tasks", []):
+            for task_id in members["tasks"]:
                 task_key = f"{TASK_KEY_PREFIX}{task_id}"
                 pipeline.delete(task_key)
             
             # Delete agents
-            for agent_id in network.get("agents", []):
+            for agent_id in members["agents"]:
                 agent_key = f"{AGENT_KEY_PREFIX}{agent_id}"
                 pipeline.delete(agent_key)
             
             # Delete memories
-            for memory_id in network.get("memories", []):
+            for memory_id in members["memories"]:
                 memory_key = f"{MEMORY_KEY_PREFIX}{memory_id}"
                 pipeline.delete(memory_key)
             
-            # Delete network itself
-            network_key = f"{NETWORK_KEY_PREFIX}{network['id']}"
-            pipeline.delete(network_key)
-            
             # Execute all deletes in a batch
             await pipeline.execute()
             
@@ -508,6 +516,7 @@ class AgentCoordinator:
         self.agent_cache_ttl = 300  # Time-to-live in seconds (5 minutes)
         
         # Initialize security components
+        self.network_store = NetworkStore(self.redis)
         self.security_manager = SecurityManager(self.redis)
         self.audit_manager = AuditManager(self.redis)
         self.data_retention_manager = DataRetentionManager(self.redis)
@@ -516,6 +525,7 @@ class AgentCoordinator:
         # Start background tasks
         asyncio.create_task(self._cache_cleanup_task())
         asyncio.create_task(self._data_retention_task())
+        asyncio.create_task(self._network_migration_task())
         
     async def create_network(
         self,
@@ -661,11 +671,9 @@ class AgentCoordinator:
                 await self._create_default_agents(network_id, network)
             
             # Store network in Redis with TTL based on retention policy
-            network_key = f"{NETWORK_KEY_PREFIX}{network_id}"
-            await self.redis.set(
-                network_key, 
-                json.dumps(network),
-                ex=60 * 60 * 24 * DEFAULT_DATA_RETENTION_DAYS  # TTL based on retention policy
+            await self.network_store.create(
+                network,
+                ttl=60 * 60 * 24 * DEFAULT_DATA_RETENTION_DAYS  # TTL based on retention policy
             )
             
             # Add to active networks
@@ -844,6 +852,18 @@ class AgentCoordinator:
             # Restart the task
             asyncio.create_task(self._cache_cleanup_task())
             
+    async def _network_migration_task(self):
+        """Background task to index networks still stored as legacy documents"""
+        try:
+            counts = await self.network_store.migrate_all()
+            if counts["scanned"]:
+                logger.info(
+                    f"Migrated {counts['migrated']} of {counts['scanned']} legacy networks "
+                    f"({counts['failed']} failed)"
+                )
+        except Exception as e:
+            logger.error(f"Error in network migration task: {e}")
+    
     async def _data_retention_task(self):
         """Background task to clean up expired data based on retention policy"""
         try:
@@ -932,51 +952,61 @@ class AgentCoordinator:
         
         return agent_id
     
-    async def list_networks(self) -> List[Dict[str, Any]]:
-        """List all AI Mesh Networks"""
+    async def list_networks(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """List AI Mesh Networks, newest first"""
         try:
-            # Get all network keys
-            network_keys = await self.redis.keys(f"{NETWORK_KEY_PREFIX}*")
-            
-            networks = []
-            for key in network_keys:
-                network_data = await self.redis.get(key)
-                if network_data:
-                    network = json.loads(network_data)
-                    # Add summary data only
-                    networks.append({
-                        "id": network["id"],
-                        "name": network["name"],
-                        "description": network["description"],
-                        "created_at": network["created_at"],
-                        "status": network["status"],
-                        "agent_count": len(network["agents"]),
-                        "task_count": len(network["tasks"]),
-                        "memory_count": len(network["memories"])
-                    })
-            
-            return networks
+            # Page through the network index instead of scanning keys
+            networks = await self.network_store.list(offset=offset, limit=limit)
+            
+            # Add summary data only
+            return [
+                {
+                    "id": network["id"],
+                    "name": network["name"],
+                    "description": network["description"],
+                    "created_at": network["created_at"],
+                    "status": network["status"],
+                    "agent_count": network["agent_count"],
+                    "task_count": network["task_count"],
+                    "memory_count": network["memory_count"]
+                }
+                for network in networks
+            ]
             
         except Exception as e:
             logger.error(f"Failed to list networks: {e}")
             return []
     
-    async def get_network(self, network_id: str) -> Optional[Dict[str, Any]]:
-        """Get details of an AI Mesh Network using concurrent fetching and functional patterns"""
+    async def get_network(
+        self,
+        network_id: str,
+        page_size: int = NETWORK_DETAIL_PAGE_SIZE
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get details of an AI Mesh Network with member counts and its newest members
+        
+        Each membership list holds at most ``page_size`` of the most recently
+        added members; the full lists are paged through get_network_agents,
+        list_network_tasks and get_network_memory.
+        """
         try:
             # Import utilities for concurrent processing
             from ..utils.concurrent import process_concurrently
             
-            # Get network from Redis
-            network_key = f"{NETWORK_KEY_PREFIX}{network_id}"
-            network_data = await self.redis.get(network_key)
+            # Get network fields from Redis
+            network = await self.network_store.get(network_id)
             
-            if not network_data:
+            if not network:
                 logger.warning(f"Network {network_id} not found in Redis")
                 return None
             
-            # Parse network data
-            network = json.loads(network_data)
+            # Get member counts and the newest page of member IDs
+            counts, agent_ids, task_ids, memory_ids = await asyncio.gather(
+                self.network_store.counts(network_id),
+                self.network_store.members(network_id, "agents", limit=page_size, newest_first=True),
+                self.network_store.members(network_id, "tasks", limit=page_size, newest_first=True),
+                self.network_store.members(network_id, "memories", limit=page_size, newest_first=True)
+            )
             
             # Define processor functions for each entity type
             async def fetch_agent(agent_id):
@@ -992,14 +1022,14 @@ class AgentCoordinator:
             fetch_tasks = []
             
             # Only fetch if there are entities to fetch
-            if network["agents"]:
-                fetch_tasks.append(('agents', process_concurrently(network["agents"], fetch_agent)))
+            if agent_ids:
+                fetch_tasks.append(('agents', process_concurrently(agent_ids, fetch_agent)))
                 
-            if network["tasks"]:
-                fetch_tasks.append(('tasks', process_concurrently(network["tasks"], fetch_task)))
+            if task_ids:
+                fetch_tasks.append(('tasks', process_concurrently(task_ids, fetch_task)))
                 
-            if network["memories"]:
-                fetch_tasks.append(('memories', process_concurrently(network["memories"], fetch_memory)))
+            if memory_ids:
+                fetch_tasks.append(('memories', process_concurrently(memory_ids, fetch_memory)))
             
             # Execute all fetch operations concurrently
             entity_results = {}
@@ -1018,6 +1048,10 @@ class AgentCoordinator:
                     "id", "name", "description", "created_at", 
                     "updated_at", "status", "max_iterations", "timeout_seconds"
                 ]},
+                "created_by": network.get("created_by"),
+                "agent_count": counts["agents"],
+                "task_count": counts["tasks"],
+                "memory_count": counts["memories"],
                 "agents": entity_results.get("agents", []),
                 "tasks": entity_results.get("tasks", []),
                 "memories": entity_results.get("memories", [])
@@ -1033,22 +1067,19 @@ class AgentCoordinator:
     async def delete_network(self, network_id: str) -> bool:
         """Delete an AI Mesh Network"""
         try:
-            # Get network from Redis
-            network_key = f"{NETWORK_KEY_PREFIX}{network_id}"
-            network_data = await self.redis.get(network_key)
+            # Delete the network and its membership sets
+            members = await self.network_store.delete(network_id)
             
-            if not network_data:
+            if not members:
                 return False
             
-            network = json.loads(network_data)
-            
             # Create a Redis pipeline for batch deletion
             pipeline = self.redis.pipeline()
             
             # Add all delete operations to the pipeline
             
             # Delete agents
-            for agent_id in network["agents"]:
+            for agent_id in members["agents"]:
                 # Remove from cache if present
                 if agent_id in self.agent_instances:
                     del self.agent_instances[agent_id]
@@ -1057,18 +1088,15 @@ class AgentCoordinator:
                 pipeline.delete(agent_key)
             
             # Delete tasks
-            for task_id in network["tasks"]:
+            for task_id in members["tasks"]:
                 task_key = f"{TASK_KEY_PREFIX}{task_id}"
                 pipeline.delete(task_key)
             
             # Delete memories
-            for memory_id in network["memories"]:
+            for memory_id in members["memories"]:
                 memory_key = f"{MEMORY_KEY_PREFIX}{memory_id}"
                 pipeline.delete(memory_key)
             
-            # Delete network
-            pipeline.delete(network_key)
-            
             # Execute all delete operations in a single batch
             await pipeline.execute()
             
@@ -1210,10 +1238,9 @@ class AgentCoordinator:
                 )
             
             # Check if network exists
-            network_key = f"{NETWORK_KEY_PREFIX}{network_id}"
-            network_data = await self.redis.get(network_key)
+            network = await self.network_store.get(network_id)
             
-            if not network_data:
+            if not network:
                 # Log network not found error
                 await self.audit_manager.log_operation(
                     user_id=user_id,
@@ -1228,8 +1255,6 @@ class AgentCoordinator:
                 )
                 raise ValueError(f"Network {network_id} not found")
             
-            network = json.loads(network_data)
-            
             # Additional authorization check: verify user has access to this network
             if api_key and user_id != network.get("created_by") and "admin" not in credential.scopes:
                 # Only network creator or admin can submit tasks
@@ -1300,18 +1325,17 @@ class AgentCoordinator:
                 sanitized_context = self._sanitize_task_context(context)
                 task_obj["context"] = sanitized_context
             
-            # Store task in Redis with TTL based on retention policy
+            # Store task in Redis with TTL based on retention policy and add it
+            # to the network tasks in the same transaction
             task_key = f"{TASK_KEY_PREFIX}{task_id}"
-            await self.redis.set(
+            pipeline = self.redis.pipeline(transaction=True)
+            pipeline.set(
                 task_key, 
                 json.dumps(task_obj),
                 ex=60 * 60 * 24 * network.get("retention_days", DEFAULT_DATA_RETENTION_DAYS)
             )
-            
-            # Update network tasks
-            network["tasks"].append(task_id)
-            network["updated_at"] = datetime.utcnow().isoformat()
-            await self.redis.set(network_key, json.dumps(network))
+            await self.network_store.queue_member(pipeline, network_id, "tasks", task_id, task_obj["created_at"])
+            await pipeline.execute()
             
             # Add to active tasks
             self.active_tasks[task_id] = task_obj
@@ -1428,6 +1452,9 @@ class AgentCoordinator:
         if not network:
             logger.error(f"Network {network_id} not found")
             return task, None
+        
+        # Task processing picks from every agent, not just the newest page
+        network = {**network, "agents": await self.get_network_agents(network_id)}
             
         return task, network
         
@@ -2667,14 +2694,9 @@ Respond only with the JSON object, no additional text.
         """
         try:
             # Check if network exists
-            network_key = f"{NETWORK_KEY_PREFIX}{network_id}"
-            network_data = await self.redis.get(network_key)
-            
-            if not network_data:
+            if not await self.network_store.get(network_id):
                 raise ValueError(f"Network {network_id} not found")
             
-            network = json.loads(network_data)
-            
             # Generate memory ID
             memory_id = f"memory_{uuid.uuid4().hex[:8]}"
             
@@ -2711,9 +2733,7 @@ Respond only with the JSON object, no additional text.
                 raise Exception("Failed to store memory in tiered storage")
             
             # Update network memories reference list
-            network["memories"].append(memory_id)
-            network["updated_at"] = datetime.utcnow().isoformat()
-            await self.redis.set(network_key, json.dumps(network))
+            await self.network_store.add_member(network_id, "memories", memory_id)
             
             # Add to memory indexing system for keyword-based search
             try:
@@ -2843,38 +2863,41 @@ Respond only with the JSON object, no additional text.
             traceback.print_exc()
             return []
     
-    async def get_network_agents(self, network_id: str) -> List[Dict[str, Any]]:
-        """Get agents for a network using pipelined Redis operations"""
+    async def get_network_agents(
+        self,
+        network_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Get agents for a network, in creation order, using pipelined Redis operations"""
         try:
-            # Get network
-            network_key = f"{NETWORK_KEY_PREFIX}{network_id}"
-            network_data = await self.redis.get(network_key)
-            
-            if not network_data:
+            # Check if network exists
+            if not await self.network_store.get(network_id):
                 return []
             
-            network = json.loads(network_data)
+            # Get the requested page of agent IDs
+            agent_ids = await self.network_store.members(network_id, "agents", offset=offset, limit=limit)
             
             # If no agents, return empty list
-            if not network["agents"]:
+            if not agent_ids:
                 return []
                 
             # Check cache first for each agent
-            agents = []
+            agents = {}
             missing_agent_ids = []
             
-            for agent_id in network["agents"]:
+            for agent_id in agent_ids:
                 if agent_id in self.agent_instances:
                     # Get from cache
                     agent, _ = self.agent_instances[agent_id]
-                    agents.append(agent)
+                    agents[agent_id] = agent
                 else:
                     # Need to fetch from Redis
                     missing_agent_ids.append(agent_id)
             
             # If all agents were in cache, return them
             if not missing_agent_ids:
-                return agents
+                return [agents[agent_id] for agent_id in agent_ids]
                 
             # Create Redis pipeline for missing agents
             pipeline = self.redis.pipeline()
@@ -2899,12 +2922,12 @@ Respond only with the JSON object, no additional text.
                 agent_id = missing_agent_ids[i]
                 
                 # Add to results
-                agents.append(agent)
+                agents[agent_id] = agent
                 
                 # Update cache
                 self.agent_instances[agent_id] = (agent, current_time)
             
-            return agents
+            return [agents[agent_id] for agent_id in agent_ids if agent_id in agents]
             
         except Exception as e:
             logger.error(f"Failed to get network agents: {e}")
@@ -2918,50 +2941,32 @@ Respond only with the JSON object, no additional text.
         limit: int = 10,
         offset: int = 0
     ) -> List[Dict[str, Any]]:
-        """List tasks for a network using pipelined Redis operations"""
+        """List tasks for a network, newest first, using pipelined Redis operations"""
         try:
-            # Get network
-            network_key = f"{NETWORK_KEY_PREFIX}{network_id}"
-            network_data = await self.redis.get(network_key)
-            
-            if not network_data:
+            # Check if network exists
+            if not await self.network_store.get(network_id):
                 return []
             
-            network = json.loads(network_data)
-            
-            # If no tasks, return empty list
-            if not network["tasks"]:
-                return []
-                
-            # Create Redis pipeline
-            pipeline = self.redis.pipeline()
-            
-            # Add all task gets to the pipeline
-            task_keys = []
-            for task_id in network["tasks"]:
-                task_key = f"{TASK_KEY_PREFIX}{task_id}"
-                task_keys.append((task_id, task_key))
-                pipeline.get(task_key)
-            
-            # Execute pipeline to get all tasks in a single Redis operation
-            task_values = await pipeline.execute()
+            # Without a status filter the page maps directly onto the task index
+            if not status:
+                task_ids = await self.network_store.members(
+                    network_id, "tasks", offset=offset, limit=limit, newest_first=True
+                )
+                return await self._get_tasks(task_ids)
             
-            # Process the results
+            # Otherwise walk the index newest first until the page is filled
             tasks = []
-            for i, data in enumerate(task_values):
-                if not data:
-                    continue
-                    
-                task = json.loads(data)
-                
-                # Filter by status if specified
-                if status and task["status"] != status:
-                    continue
+            batch_size = max(limit * 2, 50)
+            position = 0
+            while len(tasks) < offset + limit:
+                task_ids = await self.network_store.members(
+                    network_id, "tasks", offset=position, limit=batch_size, newest_first=True
+                )
+                if not task_ids:
+                    break
+                position += len(task_ids)
                 
-                tasks.append(task)
-            
-            # Sort by creation time (newest first)
-            tasks.sort(key=lambda x: x["created_at"], reverse=True)
+                tasks.extend(task for task in await self._get_tasks(task_ids) if task["status"] == status)
             
             # Apply pagination
             return tasks[offset:offset + limit]
@@ -2971,6 +2976,23 @@ Respond only with the JSON object, no additional text.
             traceback.print_exc()
             return []
     
+    async def _get_tasks(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get tasks by ID in a single Redis round trip, skipping missing ones"""
+        if not task_ids:
+            return []
+        
+        # Create Redis pipeline
+        pipeline = self.redis.pipeline()
+        
+        # Add all task gets to the pipeline
+        for task_id in task_ids:
+            pipeline.get(f"{TASK_KEY_PREFIX}{task_id}")
+        
+        # Execute pipeline to get all tasks in a single Redis operation
+        task_values = await pipeline.execute()
+        
+        return [json.loads(data) for data in task_values if data]
+    
     async def add_agent_to_network(
         self,
         network_id: str,
@@ -2979,21 +3001,14 @@ Respond only with the JSON object, no additional text.
         """Add an agent to a network"""
         try:
             # Check if network exists
-            network_key = f"{NETWORK_KEY_PREFIX}{network_id}"
-            network_data = await self.redis.get(network_key)
-            
-            if not network_data:
+            if not await self.network_store.get(network_id):
                 raise ValueError(f"Network {network_id} not found")
             
-            network = json.loads(network_data)
-            
             # Create agent
             agent_id = await self._create_agent(network_id, agent_config)
             
             # Update network agents
-            network["agents"].append(agent_id)
-            network["updated_at"] = datetime.utcnow().isoformat()
-            await self.redis.set(network_key, json.dumps(network))
+            await self.network_store.add_member(network_id, "agents", agent_id)
             
             return agent_id
             
@@ -3009,23 +3024,13 @@ Respond only with the JSON object, no additional text.
         """Remove an agent from a network"""
         try:
             # Check if network exists
-            network_key = f"{NETWORK_KEY_PREFIX}{network_id}"
-            network_data = await self.redis.get(network_key)
-            
-            if not network_data:
+            if not await self.network_store.get(network_id):
                 return False
             
-            network = json.loads(network_data)
-            
-            # Check if agent exists in network
-            if agent_id not in network["agents"]:
+            # Remove agent from network if it is a member
+            if not await self.network_store.remove_member(network_id, "agents", agent_id):
                 return False
             
-            # Remove agent from network
-            network["agents"].remove(agent_id)
-            network["updated_at"] = datetime.utcnow().isoformat()
-            await self.redis.set(network_key, json.dumps(network))
-            
             # Delete agent
             agent_key = f"{AGENT_KEY_PREFIX}{agent_id}"
             await self.redis.delete(agent_key)
@@ -0,0 +1,454 @@
+"""
+Redis storage for AI Mesh Networks
+
+Networks are stored as a small hash of scalar fields plus one sorted set per
+membership list (agents, tasks and memories), scored by creation time. Adding
+a member is a single ZADD inside a MULTI block instead of a read-modify-write
+of the whole network document, and listings page through the sorted sets
+without loading every member ID.
+
+Key layout:
+    ai_mesh:network:{id}            hash of network fields (values JSON-encoded)
+    ai_mesh:network_agents:{id}     sorted set of agent IDs
+    ai_mesh:network_tasks:{id}      sorted set of task IDs
+    ai_mesh:network_memories:{id}   sorted set of memory IDs
+    ai_mesh:networks                sorted set of network IDs
+
+Networks written by older releases as a single JSON string are migrated on
+first access, in bulk when the coordinator starts and before each retention
+run, or by hand with:
+
+    python apps/ai-service/services/network_store.py [--dry-run]
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from redis.exceptions import WatchError
+
+logger = logging.getLogger("ai_service.services.network_store")
+
+# Redis key prefixes
+NETWORK_KEY_PREFIX = "ai_mesh:network:"
+NETWORK_INDEX_KEY = "ai_mesh:networks"
+NETWORK_MEMBERS_KEY_PREFIX = "ai_mesh:network_"
+AGENT_KEY_PREFIX = "ai_mesh:agent:"
+TASK_KEY_PREFIX = "ai_mesh:task:"
+MEMORY_KEY_PREFIX = "ai_mesh:memory:"
+
+# Membership lists and the record prefix of their members
+MEMBER_KINDS = {
+    "agents": AGENT_KEY_PREFIX,
+    "tasks": TASK_KEY_PREFIX,
+    "memories": MEMORY_KEY_PREFIX,
+}
+COUNT_FIELDS = {"agents": "agent_count", "tasks": "task_count", "memories": "memory_count"}
+
+SCHEMA_VERSION = 2
+MIGRATION_BATCH_SIZE = int(os.getenv("AI_MESH_MIGRATION_BATCH_SIZE", "200"))
+MIGRATION_ATTEMPTS = 3
+
+
+def _text(value: Any) -> Any:
+    """Decode a bytes reply from clients created without decode_responses."""
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return value
+
+
+def _timestamp(value: Optional[str], default: Optional[float] = None) -> float:
+    """Convert an ISO timestamp to a sorted set score (UTC epoch seconds)."""
+    if value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.timestamp()
+        except (TypeError, ValueError):
+            pass
+    return time.time() if default is None else default
+
+
+class NetworkStore:
+    """Normalized Redis storage for AI Mesh Networks"""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    def network_key(self, network_id: str) -> str:
+        """Key of the hash holding the network fields"""
+        return f"{NETWORK_KEY_PREFIX}{network_id}"
+
+    def members_key(self, network_id: str, kind: str) -> str:
+        """Key of the sorted set holding one membership list"""
+        if kind not in MEMBER_KINDS:
+            raise ValueError(f"Unknown network member kind: {kind}")
+        return f"{NETWORK_MEMBERS_KEY_PREFIX}{kind}:{network_id}"
+
+    @staticmethod
+    def encode_fields(network: Dict[str, Any]) -> Dict[str, str]:
+        """Encode network fields for a hash, leaving out the membership lists"""
+        fields = {
+            key: json.dumps(value)
+            for key, value in network.items()
+            if key not in MEMBER_KINDS
+        }
+        fields["schema_version"] = json.dumps(SCHEMA_VERSION)
+        return fields
+
+    @staticmethod
+    def decode_fields(raw: Dict[Any, Any]) -> Dict[str, Any]:
+        """Decode a hash reply into network fields"""
+        return {_text(key): json.loads(_text(value)) for key, value in raw.items()}
+
+    async def create(self, network: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """
+        Store a new network with its initial members in one transaction
+
+        Args:
+            network: Network fields; agents, tasks and memories lists become sorted sets
+            ttl: Expiry in seconds applied to the hash and its membership sets
+        """
+        network_id = network["id"]
+        created = _timestamp(network.get("created_at"))
+
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.hset(self.network_key(network_id), mapping=self.encode_fields(network))
+        if ttl:
+            pipeline.expire(self.network_key(network_id), ttl)
+        for kind in MEMBER_KINDS:
+            members = network.get(kind) or []
+            if members:
+                # Initial members share a creation time; offsets keep their order
+                pipeline.zadd(
+                    self.members_key(network_id, kind),
+                    {member_id: created + i / 1e6 for i, member_id in enumerate(members)}
+                )
+                if ttl:
+                    pipeline.expire(self.members_key(network_id, kind), ttl)
+        pipeline.zadd(NETWORK_INDEX_KEY, {network_id: created})
+        await pipeline.execute()
+
+    async def get(self, network_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the fields of a network without its membership lists
+
+        Networks still stored as a legacy JSON document are migrated first.
+        """
+        key = self.network_key(network_id)
+        try:
+            raw = await self.redis.hgetall(key)
+        except Exception as e:
+            if "WRONGTYPE" not in str(e):
+                raise
+            await self.migrate(network_id)
+            raw = await self.redis.hgetall(key)
+
+        if not raw:
+            return None
+        return self.decode_fields(raw)
+
+    async def queue_member(
+        self,
+        pipeline,
+        network_id: str,
+        kind: str,
+        member_id: str,
+        created_at: Optional[str] = None
+    ) -> None:
+        """
+        Queue adding a member on a caller's pipeline, e.g. next to the member record
+
+        Membership sets are created by their first member, so the network
+        hash's remaining TTL is read first and applied to the set in the same
+        transaction; the set then expires together with the network.
+        """
+        members_key = self.members_key(network_id, kind)
+        ttl_ms = await self.redis.pttl(self.network_key(network_id))
+        pipeline.zadd(members_key, {member_id: _timestamp(created_at)})
+        if ttl_ms and ttl_ms > 0:
+            pipeline.pexpire(members_key, ttl_ms)
+        pipeline.hset(
+            self.network_key(network_id),
+            "updated_at",
+            json.dumps(datetime.utcnow().isoformat())
+        )
+
+    async def add_member(
+        self,
+        network_id: str,
+        kind: str,
+        member_id: str,
+        created_at: Optional[str] = None
+    ) -> None:
+        """Add a member to a network atomically"""
+        pipeline = self.redis.pipeline(transaction=True)
+        await self.queue_member(pipeline, network_id, kind, member_id, created_at)
+        await pipeline.execute()
+
+    async def remove_member(self, network_id: str, kind: str, member_id: str) -> bool:
+        """
+        Remove a member from a network atomically
+
+        Returns:
+            True if the member belonged to the network
+        """
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.zrem(self.members_key(network_id, kind), member_id)
+        pipeline.hset(
+            self.network_key(network_id),
+            "updated_at",
+            json.dumps(datetime.utcnow().isoformat())
+        )
+        removed, _ = await pipeline.execute()
+        return bool(removed)
+
+    async def has_member(self, network_id: str, kind: str, member_id: str) -> bool:
+        """Check whether a member belongs to a network"""
+        return await self.redis.zscore(self.members_key(network_id, kind), member_id) is not None
+
+    async def members(
+        self,
+        network_id: str,
+        kind: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        newest_first: bool = False
+    ) -> List[str]:
+        """
+        Get a page of member IDs ordered by creation time
+
+        Args:
+            network_id: ID of the network
+            kind: agents, tasks or memories
+            offset: Number of members to skip
+            limit: Maximum number of members, or None for all remaining
+            newest_first: Order from the most recently added member
+
+        Returns:
+            List of member IDs
+        """
+        if limit is not None and limit <= 0:
+            return []
+        key = self.members_key(network_id, kind)
+        end = -1 if limit is None else offset + limit - 1
+        if newest_first:
+            ids = await self.redis.zrevrange(key, offset, end)
+        else:
+            ids = await self.redis.zrange(key, offset, end)
+        return [_text(member_id) for member_id in ids]
+
+    async def counts(self, network_id: str) -> Dict[str, int]:
+        """Get the size of each membership list"""
+        pipeline = self.redis.pipeline(transaction=False)
+        for kind in MEMBER_KINDS:
+            pipeline.zcard(self.members_key(network_id, kind))
+        return dict(zip(MEMBER_KINDS, await pipeline.execute()))
+
+    async def count(self) -> int:
+        """Get the number of indexed networks"""
+        return await self.redis.zcard(NETWORK_INDEX_KEY)
+
+    async def list(self, offset: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get a page of networks, newest first, with member counts
+
+        Networks whose hash has expired are skipped; the retention cleanup
+        removes them from the index together with their membership sets.
+        """
+        if limit <= 0:
+            return []
+        ids = [
+            _text(network_id)
+            for network_id in await self.redis.zrevrange(NETWORK_INDEX_KEY, offset, offset + limit - 1)
+        ]
+        if not ids:
+            return []
+
+        pipeline = self.redis.pipeline(transaction=False)
+        for network_id in ids:
+            pipeline.hgetall(self.network_key(network_id))
+            for kind in MEMBER_KINDS:
+                pipeline.zcard(self.members_key(network_id, kind))
+        results = await pipeline.execute()
+
+        networks = []
+        step = 1 + len(MEMBER_KINDS)
+        for i, network_id in enumerate(ids):
+            raw, *sizes = results[i * step:(i + 1) * step]
+            if not raw:
+                continue
+            network = self.decode_fields(raw)
+            for kind, size in zip(MEMBER_KINDS, sizes):
+                network[COUNT_FIELDS[kind]] = size
+            networks.append(network)
+        return networks
+
+    async def created_before(self, cutoff: datetime, limit: int = MIGRATION_BATCH_SIZE) -> List[str]:
+        """Get IDs of networks created before a cutoff, oldest first"""
+        if cutoff.tzinfo is None:
+            cutoff = cutoff.replace(tzinfo=timezone.utc)
+        ids = await self.redis.zrangebyscore(
+            NETWORK_INDEX_KEY, "-inf", f"({cutoff.timestamp()}", start=0, num=limit
+        )
+        return [_text(network_id) for network_id in ids]
+
+    async def delete(self, network_id: str) -> Optional[Dict[str, List[str]]]:
+        """
+        Delete a network and its membership sets
+
+        The member records themselves are left to the caller. Membership sets
+        that outlived an expired hash are deleted as well.
+
+        Returns:
+            Member IDs by kind, or None if nothing of the network is left
+        """
+        exists = await self.get(network_id) is not None
+        members = {kind: await self.members(network_id, kind) for kind in MEMBER_KINDS}
+        if not exists and not any(members.values()):
+            await self.redis.zrem(NETWORK_INDEX_KEY, network_id)
+            return None
+
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.delete(
+            self.network_key(network_id),
+            *(self.members_key(network_id, kind) for kind in MEMBER_KINDS)
+        )
+        pipeline.zrem(NETWORK_INDEX_KEY, network_id)
+        await pipeline.execute()
+        return members
+
+    async def migrate(self, network_id: str) -> bool:
+        """
+        Convert a legacy JSON network document to the normalized layout
+
+        Members are scored by their own created_at when their record still
+        exists, otherwise just after the previous member so list order is kept.
+        Members already in the sorted sets are kept. The remaining TTL carries
+        over. The document and its sets are watched, so a concurrent write or
+        migration makes the conversion start over. Safe to run more than once.
+
+        Returns:
+            True if a legacy document was converted by this call
+        """
+        key = self.network_key(network_id)
+        watched = [key, *(self.members_key(network_id, kind) for kind in MEMBER_KINDS)]
+
+        for _ in range(MIGRATION_ATTEMPTS):
+            async with self.redis.pipeline(transaction=True) as pipeline:
+                await pipeline.watch(*watched)
+                if _text(await pipeline.type(key)) != "string":
+                    return False
+
+                data = await pipeline.get(key)
+                if not data:
+                    return False
+                network = json.loads(data)
+                network["id"] = network.get("id", network_id)
+                created = _timestamp(network.get("created_at"))
+                ttl = await pipeline.ttl(key)
+                scores = await self._member_scores(network, created)
+
+                pipeline.multi()
+                pipeline.delete(key)
+                pipeline.hset(key, mapping=self.encode_fields(network))
+                for kind, members in scores.items():
+                    members_key = self.members_key(network_id, kind)
+                    if members:
+                        pipeline.zadd(members_key, members)
+                    if ttl and ttl > 0:
+                        pipeline.expire(members_key, ttl)
+                if ttl and ttl > 0:
+                    pipeline.expire(key, ttl)
+                pipeline.zadd(NETWORK_INDEX_KEY, {network_id: created})
+                try:
+                    await pipeline.execute()
+                except WatchError:
+                    continue
+
+            logger.info(
+                f"Migrated network {network_id} to normalized storage "
+                f"({', '.join(f'{len(m)} {kind}' for kind, m in scores.items())})"
+            )
+            return True
+
+        raise WatchError(f"Network {network_id} kept changing during migration")
+
+    async def _member_scores(self, network: Dict[str, Any], created: float) -> Dict[str, Dict[str, float]]:
+        """Score the members of a legacy document by their records' creation time"""
+        lookup = self.redis.pipeline(transaction=False)
+        for kind, record_prefix in MEMBER_KINDS.items():
+            for member_id in network.get(kind) or []:
+                lookup.get(f"{record_prefix}{member_id}")
+        records = iter(await lookup.execute())
+
+        scores = {}
+        for kind in MEMBER_KINDS:
+            scores[kind] = {}
+            previous = created
+            for member_id in network.get(kind) or []:
+                record = next(records)
+                member_created = None
+                if record:
+                    try:
+                        member_created = json.loads(record).get("created_at")
+                    except (TypeError, ValueError):
+                        pass
+                previous = _timestamp(member_created, default=previous + 1e-3)
+                scores[kind][member_id] = previous
+        return scores
+
+    async def migrate_all(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Migrate every legacy network document
+
+        Args:
+            dry_run: Only count the legacy documents
+
+        Returns:
+            Counts of scanned, migrated and failed networks
+        """
+        counts = {"scanned": 0, "migrated": 0, "failed": 0}
+        async for key in self.redis.scan_iter(match=f"{NETWORK_KEY_PREFIX}*", count=MIGRATION_BATCH_SIZE):
+            key = _text(key)
+            if _text(await self.redis.type(key)) != "string":
+                continue
+            counts["scanned"] += 1
+            if dry_run:
+                continue
+            network_id = key[len(NETWORK_KEY_PREFIX):]
+            try:
+                if await self.migrate(network_id):
+                    counts["migrated"] += 1
+            except Exception as e:
+                counts["failed"] += 1
+                logger.error(f"Failed to migrate network {network_id}: {e}")
+        return counts
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    import redis.asyncio as redis_asyncio
+
+    parser = argparse.ArgumentParser(description="Migrate AI Mesh networks to normalized Redis storage")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    parser.add_argument("--dry-run", action="store_true", help="Only count legacy networks")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        client = redis_asyncio.from_url(args.redis_url, decode_responses=True)
+        try:
+            counts = await NetworkStore(client).migrate_all(dry_run=args.dry_run)
+            print(json.dumps(counts))
+        finally:
+            await client.close()
+
+    asyncio.run(main())
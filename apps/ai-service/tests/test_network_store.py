@@ -0,0 +1,178 @@
+"""
+Tests for normalized AI Mesh Network storage
+
+This module covers the hash and sorted set layout of networks, atomic
+membership updates, paginated listings and migration of legacy documents.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from ..services.network_store import NETWORK_INDEX_KEY, NetworkStore
+
+TEST_NETWORK_ID = "network_12345678"
+
+
+def make_network(network_id=TEST_NETWORK_ID, created_at="2025-01-01T00:00:00", agents=None):
+    return {
+        "id": network_id,
+        "name": "Campaign Mesh",
+        "description": "AI Mesh Network: Campaign Mesh",
+        "created_at": created_at,
+        "updated_at": created_at,
+        "status": "active",
+        "max_iterations": 10,
+        "timeout_seconds": 300,
+        "shared_context": {"brand": "Maily"},
+        "agents": agents or ["agent_1", "agent_2"],
+        "tasks": [],
+        "memories": [],
+        "created_by": "user_1",
+        "retention_days": 90,
+    }
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def store(redis_client):
+    return NetworkStore(redis_client)
+
+
+@pytest.mark.asyncio
+async def test_network_fields_are_stored_in_a_hash(store, redis_client):
+    """Fields round-trip through the hash and members live in sorted sets."""
+    await store.create(make_network(), ttl=3600)
+
+    assert await redis_client.type(store.network_key(TEST_NETWORK_ID)) == "hash"
+    network = await store.get(TEST_NETWORK_ID)
+    assert network["max_iterations"] == 10
+    assert network["shared_context"] == {"brand": "Maily"}
+    assert "agents" not in network
+    assert await store.members(TEST_NETWORK_ID, "agents") == ["agent_1", "agent_2"]
+    assert await redis_client.ttl(store.members_key(TEST_NETWORK_ID, "agents")) > 0
+
+
+@pytest.mark.asyncio
+async def test_adding_members_does_not_rewrite_the_network(store, redis_client):
+    """Every added task is kept and pages come back newest first."""
+    await store.create(make_network())
+
+    for i in range(20):
+        await store.add_member(TEST_NETWORK_ID, "tasks", f"task_{i}", f"2025-01-02T00:00:{i:02d}")
+
+    assert (await store.counts(TEST_NETWORK_ID))["tasks"] == 20
+    assert await store.members(TEST_NETWORK_ID, "tasks", offset=0, limit=3, newest_first=True) == [
+        "task_19", "task_18", "task_17"
+    ]
+    assert await store.members(TEST_NETWORK_ID, "tasks", offset=3, limit=2, newest_first=True) == [
+        "task_16", "task_15"
+    ]
+    assert await store.remove_member(TEST_NETWORK_ID, "tasks", "task_3")
+    assert not await store.has_member(TEST_NETWORK_ID, "tasks", "task_3")
+    assert not await store.remove_member(TEST_NETWORK_ID, "tasks", "task_3")
+
+
+@pytest.mark.asyncio
+async def test_membership_sets_created_later_expire_with_the_network(store, redis_client):
+    """A set created by its first member gets the network's remaining TTL."""
+    await store.create(make_network(), ttl=3600)
+    await store.create(make_network("network_persistent"))
+
+    await store.add_member(TEST_NETWORK_ID, "tasks", "task_1")
+    await store.add_member("network_persistent", "tasks", "task_2")
+
+    network_ttl = await redis_client.pttl(store.network_key(TEST_NETWORK_ID))
+    tasks_ttl = await redis_client.pttl(store.members_key(TEST_NETWORK_ID, "tasks"))
+    assert 0 < tasks_ttl <= network_ttl + 1000
+    assert await redis_client.ttl(store.members_key("network_persistent", "tasks")) == -1
+
+
+@pytest.mark.asyncio
+async def test_networks_are_listed_newest_first_with_counts(store):
+    """Listing pages through the network index."""
+    for day in range(1, 4):
+        await store.create(make_network(f"network_{day}", f"2025-01-0{day}T00:00:00"))
+
+    first_page = await store.list(offset=0, limit=2)
+    second_page = await store.list(offset=2, limit=2)
+
+    assert [network["id"] for network in first_page] == ["network_3", "network_2"]
+    assert [network["id"] for network in second_page] == ["network_1"]
+    assert first_page[0]["agent_count"] == 2
+    assert first_page[0]["task_count"] == 0
+    assert await store.count() == 3
+
+
+@pytest.mark.asyncio
+async def test_legacy_documents_are_migrated_on_read(store, redis_client):
+    """A network stored as one JSON string is converted on first access."""
+    legacy = make_network(agents=["agent_b", "agent_a"])
+    legacy["tasks"] = ["task_old", "task_new"]
+    await redis_client.set(store.network_key(TEST_NETWORK_ID), json.dumps(legacy), ex=3600)
+    await redis_client.set("ai_mesh:task:task_old", json.dumps({"created_at": "2025-01-03T00:00:00"}))
+    await redis_client.set("ai_mesh:task:task_new", json.dumps({"created_at": "2025-01-04T00:00:00"}))
+
+    network = await store.get(TEST_NETWORK_ID)
+
+    assert network["name"] == "Campaign Mesh"
+    assert network["schema_version"] == 2
+    assert await store.members(TEST_NETWORK_ID, "agents") == ["agent_b", "agent_a"]
+    assert await store.members(TEST_NETWORK_ID, "tasks", newest_first=True) == ["task_new", "task_old"]
+    assert await redis_client.ttl(store.network_key(TEST_NETWORK_ID)) > 0
+    assert await redis_client.zscore(NETWORK_INDEX_KEY, TEST_NETWORK_ID) is not None
+
+
+@pytest.mark.asyncio
+async def test_migrate_all_is_idempotent(store, redis_client):
+    """Bulk migration converts legacy documents once and skips migrated ones."""
+    await redis_client.set(store.network_key("network_legacy"), json.dumps(make_network("network_legacy")))
+    await store.create(make_network("network_current"))
+
+    assert await store.migrate_all(dry_run=True) == {"scanned": 1, "migrated": 0, "failed": 0}
+    assert await store.migrate_all() == {"scanned": 1, "migrated": 1, "failed": 0}
+    assert await store.migrate_all() == {"scanned": 0, "migrated": 0, "failed": 0}
+    assert await store.members("network_legacy", "agents") == ["agent_1", "agent_2"]
+
+
+@pytest.mark.asyncio
+async def test_delete_returns_members_and_clears_the_index(store, redis_client):
+    """Deleting a network removes its hash, sets and index entry."""
+    await store.create(make_network(created_at="2025-01-01T00:00:00"))
+    await store.add_member(TEST_NETWORK_ID, "memories", "memory_1")
+
+    assert await store.created_before(datetime(2025, 1, 2)) == [TEST_NETWORK_ID]
+    members = await store.delete(TEST_NETWORK_ID)
+
+    assert members == {"agents": ["agent_1", "agent_2"], "tasks": [], "memories": ["memory_1"]}
+    assert await store.get(TEST_NETWORK_ID) is None
+    assert await redis_client.exists(store.members_key(TEST_NETWORK_ID, "agents")) == 0
+    assert await store.created_before(datetime(2025, 1, 1) + timedelta(days=1)) == []
+    assert await store.delete(TEST_NETWORK_ID) is None
+
+
+@pytest.mark.asyncio
+async def test_migration_restarts_when_the_document_changes(store, redis_client):
+    """A write to the legacy document during migration is not lost."""
+    await redis_client.set(store.network_key(TEST_NETWORK_ID), json.dumps(make_network()))
+    member_scores = store._member_scores
+    writes = []
+
+    async def write_during_first_pass(network, created):
+        if not writes:
+            updated = make_network(agents=["agent_1", "agent_2", "agent_3"])
+            writes.append(await redis_client.set(store.network_key(TEST_NETWORK_ID), json.dumps(updated)))
+        return await member_scores(network, created)
+
+    store._member_scores = write_during_first_pass
+
+    assert await store.migrate(TEST_NETWORK_ID)
+    assert await store.members(TEST_NETWORK_ID, "agents") == ["agent_1", "agent_2", "agent_3"]
+    assert not await store.migrate(TEST_NETWORK_ID)
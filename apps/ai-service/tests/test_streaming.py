@@ -0,0 +1,128 @@
+"""
+Tests for streaming utilities
+
+This module contains tests for incremental SSE decoding, delta
+coalescing and the LLM client's streaming pipeline.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from ..utils.streaming import (
+    SSEDecoder,
+    coalesce_deltas,
+    iter_sse_deltas,
+    parse_anthropic_event,
+    parse_openai_event,
+)
+from ..utils.llm_client import LLMClient
+
+
+def openai_event(text, finish_reason=None):
+    return ("data: " + json.dumps({"choices": [{"delta": {"content": text}, "finish_reason": finish_reason}]}) + "\n\n").encode()
+
+
+async def byte_chunks(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def timed_chunks(items):
+    for delay, chunk in items:
+        await asyncio.sleep(delay)
+        yield chunk
+
+
+def test_decoder_handles_events_split_across_chunks():
+    """Events and multi-byte characters split at any byte boundary are decoded intact"""
+    stream = openai_event("héllo ") + openai_event("wörld 🚀") + b"data: [DONE]\n\n"
+
+    for size in (1, 3, 7, len(stream)):
+        decoder = SSEDecoder()
+        events = []
+        for i in range(0, len(stream), size):
+            events.extend(decoder.feed(stream[i:i + size]))
+        texts = [parse_openai_event(event, data)[0] for event, data in events]
+        assert texts == ["héllo ", "wörld 🚀", None]
+
+
+def test_anthropic_parser_skips_non_delta_events():
+    """Named events without text are skipped before JSON parsing"""
+    assert parse_anthropic_event("ping", b"not json") == (None, None)
+    assert parse_anthropic_event(
+        "content_block_delta", b'{"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hi"}}'
+    ) == ("Hi", None)
+    assert parse_anthropic_event(
+        "message_delta", b'{"type": "message_delta", "delta": {"stop_reason": "end_turn"}}'
+    ) == (None, "end_turn")
+
+
+@pytest.mark.asyncio
+async def test_iter_sse_deltas_yields_text_and_finish_reason():
+    stream = openai_event("a") + openai_event("b") + openai_event("", "stop") + b"data: [DONE]\n\n"
+    deltas = [d async for d in iter_sse_deltas(byte_chunks(stream, 5), parse_openai_event)]
+    assert deltas == [("a", None), ("b", None), (None, "stop")]
+
+
+@pytest.mark.asyncio
+async def test_coalescing_merges_deltas_after_first_token():
+    """The first delta is sent at once; later deltas are merged into frames"""
+    chunks = [(0, {"text": "t0"})] + [(0.001, {"text": f"t{i}"}) for i in range(1, 20)] + [(0, {"text": "", "final": True})]
+
+    frames = [f async for f in coalesce_deltas(timed_chunks(chunks), max_delay=0.5, max_chars=1000)]
+
+    assert frames[0]["text"] == "t0"
+    assert "".join(f["text"] for f in frames[:-1]) == "".join(f"t{i}" for i in range(20))
+    assert len(frames) == 3
+    assert frames[-1]["final"]
+
+
+@pytest.mark.asyncio
+async def test_coalescing_respects_time_and_size_budget():
+    chunks = [(0, {"text": "first"})] + [(0.02, {"text": "x" * 10}) for _ in range(10)]
+
+    frames = [f async for f in coalesce_deltas(timed_chunks(chunks), max_delay=0.03, max_chars=25)]
+
+    assert all(len(f["text"]) <= 30 for f in frames[1:])
+    assert len(frames) > 3
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_applies_backpressure():
+    """A stalled consumer stops upstream reads once the buffer is full"""
+    produced = 0
+
+    async def fast_upstream():
+        nonlocal produced
+        for i in range(1000):
+            produced += 1
+            yield {"text": "x"}
+
+    stream = coalesce_deltas(fast_upstream(), max_delay=0.01, max_chars=10**6, buffer_size=8)
+    await stream.__anext__()
+    await asyncio.sleep(0.05)
+
+    assert produced < 20
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_spaces_concurrent_requests():
+    """Concurrent callers reserve consecutive slots instead of all waking together"""
+    client = LLMClient(api_keys={})
+    client.rate_limits = {"test-model": {"tpm": 1000, "rpm": 600}}  # 0.1s interval
+    starts = []
+
+    async def call():
+        await client._respect_rate_limit("test-model")
+        starts.append(time.monotonic())
+
+    await asyncio.gather(*(call() for _ in range(3)))
+    await client.close()
+
+    starts.sort()
+    assert starts[1] - starts[0] >= 0.09
+    assert starts[2] - starts[1] >= 0.09
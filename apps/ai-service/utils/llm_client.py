@@ -7,14 +7,27 @@ It supports both standard generation and streaming responses for real-time proce
 
 import logging
 import os
-import json
 import httpx
 import asyncio
 import time
-from typing import Dict, Any, List, Optional, Union, AsyncGenerator, AsyncIterator
+from typing import Callable, Dict, Any, List, Optional, Union, AsyncGenerator, AsyncIterator
+
+from packages.error_handling.python.transport import transport_registry
+
+from .streaming import iter_sse_deltas, parse_anthropic_event, parse_google_event, parse_openai_event
 
 logger = logging.getLogger("ai_service.utils.llm_client")
 
+# Provider names used in error messages
+PROVIDER_LABELS = {"anthropic": "Anthropic", "openai": "OpenAI", "google": "Google"}
+
+# API origin per key name, connected to at startup when the key is set
+PROVIDER_ORIGINS = {
+    "claude": "https://api.anthropic.com",
+    "openai": "https://api.openai.com",
+    "google": "https://generativelanguage.googleapis.com",
+}
+
 class LLMClient:
     """Client for interacting with Large Language Models"""
     
@@ -25,35 +38,37 @@ class LLMClient:
             "openai": os.environ.get("OPENAI_API_KEY", ""),
             "google": os.environ.get("GOOGLE_API_KEY", "")
         }
-        self.client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0, read=300.0))
+        # Connections come from the process-wide per-host pools
+        self.client = transport_registry.async_client(timeout=httpx.Timeout(60.0, connect=10.0, read=300.0))
         self.rate_limits = {
             "claude-3-7-sonnet": {"tpm": 100000, "rpm": 500},
             "gpt-4o": {"tpm": 80000, "rpm": 500},
             "gemini-2.0": {"tpm": 60000, "rpm": 300}
         }
-        self.last_request_time = {}
+        # Earliest start time of the next request per model
+        self.next_request_time: Dict[str, float] = {}
     
     async def close(self):
-        """Close the HTTP client"""
+        """Close the HTTP client; the shared connection pools stay open"""
         await self.client.aclose()
     
     async def _respect_rate_limit(self, model: str):
-        """Respect rate limits for the model"""
+        """Respect rate limits for the model
+        
+        Each caller reserves the next free slot before sleeping, so concurrent
+        requests are spaced by the RPM interval instead of all waking together.
+        """
         if model not in self.rate_limits:
             return
         
-        # Check if we need to wait
-        now = time.time()
-        if model in self.last_request_time:
-            last_time = self.last_request_time[model]
-            # Calculate minimum time between requests based on RPM
-            min_interval = 60.0 / self.rate_limits[model]["rpm"]
-            elapsed = now - last_time
-            if elapsed < min_interval:
-                await asyncio.sleep(min_interval - elapsed)
+        # Minimum time between requests based on RPM
+        min_interval = 60.0 / self.rate_limits[model]["rpm"]
+        now = time.monotonic()
+        slot = max(now, self.next_request_time.get(model, 0.0))
+        self.next_request_time[model] = slot + min_interval
         
-        # Update last request time
-        self.last_request_time[model] = time.time()
+        if slot > now:
+            await asyncio.sleep(slot - now)
     
     async def generate_text(
         self,
@@ -339,125 +354,111 @@ class LLMClient:
             logger.error(f"Failed to generate text with Google: {e}")
             raise
             
-    async def _stream_with_anthropic(
+    async def _stream_events(
         self,
-        prompt: str,
+        provider: str,
         model: str,
-        temperature: float,
-        max_tokens: int,
-        system_prompt: Optional[str]
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        parse: Callable
     ) -> AsyncGenerator[Dict[str, Any], None]:
-        """Generate streaming text using Anthropic Claude API"""
+        """Stream text deltas from a provider's Server-Sent Events response
+        
+        Response bytes are decoded incrementally, so events split across
+        network chunks are handled and only event payloads are parsed.
+        Intermediate chunks carry only their delta; the final chunk carries
+        the accumulated text.
+        """
+        start_time = time.time()
+        parts: List[str] = []
+        finish_reason = None
+        first_token_ms = None
+        
         try:
-            api_key = self.api_keys.get("claude")
-            if not api_key:
-                raise ValueError("Anthropic API key not found")
-            
-            # Prepare request
-            url = "https://api.anthropic.com/v1/messages"
-            headers = {
-                "x-api-key": api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json"
-            }
-            
-            # Prepare payload
-            payload = {
-                "model": model,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "stream": True
-            }
-            
-            # Add system prompt if provided
-            if system_prompt:
-                payload["system"] = system_prompt
-            
-            # Start time for tracking
-            start_time = time.time()
-            accumulated_text = ""
-            
             # Make streaming request
             async with self.client.stream("POST", url, headers=headers, json=payload, timeout=300.0) as response:
                 # Check for errors
                 if response.status_code != 200:
-                    error_data = await response.text()
-                    raise ValueError(f"Anthropic API error: {response.status_code} - {error_data}")
+                    error_data = (await response.aread()).decode("utf-8", errors="replace")
+                    raise ValueError(f"{PROVIDER_LABELS.get(provider, provider)} API error: {response.status_code} - {error_data}")
                 
-                # Process chunks
-                async for chunk in response.aiter_bytes():
-                    # Skip empty chunks
-                    if not chunk:
-                        continue
-                    
-                    try:
-                        # Parse the event
-                        chunk_data = chunk.decode("utf-8").strip()
-                        if chunk_data.startswith("data: "):
-                            data_str = chunk_data[6:]  # Remove "data: " prefix
-                            
-                            # Skip end event
-                            if data_str == "[DONE]":
-                                continue
-                                
-                            # Parse JSON data
-                            data = json.loads(data_str)
-                            
-                            # Extract text content if available
-                            delta = ""
-                            if "delta" in data and "text" in data["delta"]:
-                                delta = data["delta"]["text"]
-                            elif "content" in data and len(data["content"]) > 0:
-                                # Some Anthropic responses might be structured differently
-                                if "text" in data["content"][0]:
-                                    delta = data["content"][0]["text"]
-                            
-                            # Only yield if we have content
-                            if delta:
-                                accumulated_text += delta
-                                yield {
-                                    "text": delta,
-                                    "model": model,
-                                    "provider": "anthropic",
-                                    "accumulated_text": accumulated_text,
-                                    "finish_reason": None
-                                }
-                    except json.JSONDecodeError:
-                        # Skip invalid JSON
-                        continue
-                    except Exception as e:
-                        logger.error(f"Error processing Anthropic stream chunk: {e}")
+                async for text, reason in iter_sse_deltas(response.aiter_bytes(), parse):
+                    if reason:
+                        finish_reason = reason
+                    if text:
+                        if first_token_ms is None:
+                            first_token_ms = int((time.time() - start_time) * 1000)
+                        parts.append(text)
                         yield {
-                            "error": str(e),
-                            "text": "",
+                            "text": text,
                             "model": model,
-                            "provider": "anthropic"
+                            "provider": provider,
+                            "finish_reason": reason
                         }
             
             # Final message with metadata
-            duration_ms = int((time.time() - start_time) * 1000)
             yield {
                 "text": "",
                 "model": model,
-                "provider": "anthropic",
-                "duration_ms": duration_ms,
-                "accumulated_text": accumulated_text,
-                "finish_reason": "stop",
+                "provider": provider,
+                "duration_ms": int((time.time() - start_time) * 1000),
+                "time_to_first_token_ms": first_token_ms,
+                "accumulated_text": "".join(parts),
+                "finish_reason": finish_reason or "stop",
                 "final": True
             }
         
         except Exception as e:
-            logger.error(f"Error streaming from Anthropic: {e}")
+            logger.error(f"Error streaming from {provider}: {e}")
             yield {
                 "error": str(e),
                 "text": f"Error: {str(e)}",
                 "model": model,
-                "provider": "anthropic"
+                "provider": provider
             }
     
+    async def _stream_with_anthropic(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: Optional[str]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Generate streaming text using Anthropic Claude API"""
+        api_key = self.api_keys.get("claude")
+        if not api_key:
+            yield {"error": "Anthropic API key not found", "text": "Error: Anthropic API key not found",
+                   "model": model, "provider": "anthropic"}
+            return
+        
+        # Prepare request
+        url = "https://api.anthropic.com/v1/messages"
+        headers = {
+            "x-api-key": api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json"
+        }
+        
+        # Prepare payload
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        
+        # Add system prompt if provided
+        if system_prompt:
+            payload["system"] = system_prompt
+        
+        async for chunk in self._stream_events("anthropic", model, url, headers, payload, parse_anthropic_event):
+            yield chunk
+    
     async def _stream_with_openai(
         self,
         prompt: str,
@@ -467,108 +468,36 @@ class LLMClient:
         system_prompt: Optional[str]
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Generate streaming text using OpenAI API"""
-        try:
-            api_key = self.api_keys.get("openai")
-            if not api_key:
-                raise ValueError("OpenAI API key not found")
-            
-            # Prepare request
-            url = "https://api.openai.com/v1/chat/completions"
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            # Prepare messages
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            # Prepare payload
-            payload = {
-                "model": model,
-                "messages": messages,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "stream": True
-            }
-            
-            # Start time for tracking
-            start_time = time.time()
-            accumulated_text = ""
-            
-            # Make streaming request
-            async with self.client.stream("POST", url, headers=headers, json=payload, timeout=300.0) as response:
-                # Check for errors
-                if response.status_code != 200:
-                    error_data = await response.text()
-                    raise ValueError(f"OpenAI API error: {response.status_code} - {error_data}")
-                
-                # Process chunks
-                async for chunk in response.aiter_bytes():
-                    # Skip empty chunks
-                    if not chunk:
-                        continue
-                    
-                    try:
-                        # Parse the event
-                        chunk_data = chunk.decode("utf-8").strip()
-                        if chunk_data.startswith("data: "):
-                            data_str = chunk_data[6:]  # Remove "data: " prefix
-                            
-                            # Skip end event
-                            if data_str == "[DONE]":
-                                continue
-                                
-                            # Parse JSON data
-                            data = json.loads(data_str)
-                            
-                            # Extract delta text
-                            if "choices" in data and len(data["choices"]) > 0:
-                                choice = data["choices"][0]
-                                if "delta" in choice and "content" in choice["delta"]:
-                                    delta = choice["delta"]["content"]
-                                    accumulated_text += delta
-                                    yield {
-                                        "text": delta,
-                                        "model": model,
-                                        "provider": "openai",
-                                        "accumulated_text": accumulated_text,
-                                        "finish_reason": choice.get("finish_reason")
-                                    }
-                    except json.JSONDecodeError:
-                        # Skip invalid JSON
-                        continue
-                    except Exception as e:
-                        logger.error(f"Error processing OpenAI stream chunk: {e}")
-                        yield {
-                            "error": str(e),
-                            "text": "",
-                            "model": model,
-                            "provider": "openai"
-                        }
-            
-            # Final message with metadata
-            duration_ms = int((time.time() - start_time) * 1000)
-            yield {
-                "text": "",
-                "model": model,
-                "provider": "openai",
-                "duration_ms": duration_ms,
-                "accumulated_text": accumulated_text,
-                "finish_reason": "stop",
-                "final": True
-            }
+        api_key = self.api_keys.get("openai")
+        if not api_key:
+            yield {"error": "OpenAI API key not found", "text": "Error: OpenAI API key not found",
+                   "model": model, "provider": "openai"}
+            return
         
-        except Exception as e:
-            logger.error(f"Error streaming from OpenAI: {e}")
-            yield {
-                "error": str(e),
-                "text": f"Error: {str(e)}",
-                "model": model,
-                "provider": "openai"
-            }
+        # Prepare request
+        url = "https://api.openai.com/v1/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        # Prepare messages
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        # Prepare payload
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        
+        async for chunk in self._stream_events("openai", model, url, headers, payload, parse_openai_event):
+            yield chunk
     
     async def _stream_with_google(
         self,
@@ -579,118 +508,42 @@ class LLMClient:
         system_prompt: Optional[str]
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Generate streaming text using Google Gemini API"""
-        try:
-            api_key = self.api_keys.get("google")
-            if not api_key:
-                raise ValueError("Google API key not found")
-            
-            # Prepare request
-            url = f"https://generativelanguage.googleapis.com/v1/models/{model}:streamGenerateContent?key={api_key}"
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            # Prepare content parts
-            content_parts = []
-            if system_prompt:
-                content_parts.append({"text": f"System: {system_prompt}"})
-            content_parts.append({"text": prompt})
-            
-            # Prepare payload
-            payload = {
-                "contents": [
-                    {
-                        "role": "user",
-                        "parts": content_parts
-                    }
-                ],
-                "generationConfig": {
-                    "temperature": temperature,
-                    "maxOutputTokens": max_tokens,
-                    "topP": 0.95,
-                    "topK": 40
+        api_key = self.api_keys.get("google")
+        if not api_key:
+            yield {"error": "Google API key not found", "text": "Error: Google API key not found",
+                   "model": model, "provider": "google"}
+            return
+        
+        # Prepare request; alt=sse returns one event per chunk instead of a JSON array
+        url = f"https://generativelanguage.googleapis.com/v1/models/{model}:streamGenerateContent?alt=sse&key={api_key}"
+        headers = {
+            "Content-Type": "application/json"
+        }
+        
+        # Prepare content parts
+        content_parts = []
+        if system_prompt:
+            content_parts.append({"text": f"System: {system_prompt}"})
+        content_parts.append({"text": prompt})
+        
+        # Prepare payload
+        payload = {
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": content_parts
                 }
+            ],
+            "generationConfig": {
+                "temperature": temperature,
+                "maxOutputTokens": max_tokens,
+                "topP": 0.95,
+                "topK": 40
             }
-            
-            # Start time for tracking
-            start_time = time.time()
-            accumulated_text = ""
-            
-            # Make streaming request
-            async with self.client.stream("POST", url, headers=headers, json=payload, timeout=300.0) as response:
-                # Check for errors
-                if response.status_code != 200:
-                    error_data = await response.text()
-                    raise ValueError(f"Google API error: {response.status_code} - {error_data}")
-                
-                # Process chunks
-                buffer = b""
-                async for chunk in response.aiter_bytes():
-                    # Append chunk to buffer
-                    buffer += chunk
-                    
-                    # Try to parse complete JSON objects from buffer
-                    try:
-                        # Find a complete JSON object
-                        obj_end = buffer.find(b"}\n")
-                        while obj_end != -1:
-                            obj_data = buffer[:obj_end + 1]
-                            buffer = buffer[obj_end + 2:]  # Move past "}\n"
-                            
-                            # Parse the object
-                            data = json.loads(obj_data)
-                            
-                            # Extract text content
-                            if "candidates" in data and len(data["candidates"]) > 0:
-                                candidate = data["candidates"][0]
-                                if "content" in candidate and "parts" in candidate["content"]:
-                                    parts = candidate["content"]["parts"]
-                                    for part in parts:
-                                        if "text" in part:
-                                            delta = part["text"]
-                                            accumulated_text += delta
-                                            yield {
-                                                "text": delta,
-                                                "model": model,
-                                                "provider": "google",
-                                                "accumulated_text": accumulated_text,
-                                                "finish_reason": candidate.get("finishReason")
-                                            }
-                            
-                            # Look for next object
-                            obj_end = buffer.find(b"}\n")
-                    except json.JSONDecodeError:
-                        # Not enough data for a complete object
-                        continue
-                    except Exception as e:
-                        logger.error(f"Error processing Google stream chunk: {e}")
-                        yield {
-                            "error": str(e),
-                            "text": "",
-                            "model": model,
-                            "provider": "google"
-                        }
-            
-            # Final message with metadata
-            duration_ms = int((time.time() - start_time) * 1000)
-            yield {
-                "text": "",
-                "model": model,
-                "provider": "google",
-                "duration_ms": duration_ms,
-                "accumulated_text": accumulated_text,
-                "finish_reason": "stop",
-                "final": True
-            }
+        }
         
-        except Exception as e:
-            logger.error(f"Error streaming from Google: {e}")
-            yield {
-                "error": str(e),
-                "text": f"Error: {str(e)}",
-                "model": model,
-                "provider": "google"
-            }
+        async for chunk in self._stream_events("google", model, url, headers, payload, parse_google_event):
+            yield chunk
     
     async def get_embedding(
         self,
@@ -863,7 +716,10 @@ def get_llm_client() -> LLMClient:
 async def init_llm_client():
     """Initialize LLM client"""
     client = get_llm_client()
-    # No specific initialization needed for LLM client
+    # Open connections to the configured providers before the first request
+    await transport_registry.warm_up(
+        [PROVIDER_ORIGINS[name] for name, key in client.api_keys.items() if key and name in PROVIDER_ORIGINS]
+    )
     return client
 
 async def close_llm_client():
@@ -0,0 +1,279 @@
+"""
+Streaming utilities for the AI Mesh Network
+
+Incremental decoding of provider Server-Sent Event streams and coalescing
+of small text deltas into client frames.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("ai_service.utils.streaming")
+
+# Frame budget for coalesced deltas
+DEFAULT_FRAME_DELAY = 0.05  # seconds
+DEFAULT_FRAME_CHARS = 512
+
+# Chunks buffered between the provider reader and the client writer. When
+# the client is slow the buffer fills and provider reads pause.
+DEFAULT_STREAM_BUFFER = 64
+
+# (text, finish_reason) extracted from one provider event
+Delta = Tuple[Optional[str], Optional[str]]
+
+_END = object()
+
+
+class SSEDecoder:
+    """
+    Incremental Server-Sent Events decoder.
+
+    Bytes are split into lines without decoding; events can span network
+    chunks and multi-byte characters can be split anywhere. Each event's
+    data is returned as bytes for a single json.loads.
+    """
+
+    def __init__(self):
+        self._tail = b""
+        self._event: Optional[str] = None
+        self._data: List[bytes] = []
+
+    def feed(self, chunk: bytes) -> List[Tuple[Optional[str], bytes]]:
+        """
+        Decode a chunk of the stream.
+
+        Args:
+            chunk: Bytes received from the provider
+
+        Returns:
+            List of (event name, data) for each event completed by the chunk
+        """
+        buffer = self._tail + chunk if self._tail else chunk
+        events = []
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end == -1:
+                break
+            line = buffer[start:end]
+            start = end + 1
+            if line.endswith(b"\r"):
+                line = line[:-1]
+
+            if not line:
+                self._dispatch(events)
+            elif line.startswith(b"data:"):
+                self._data.append(line[6:] if line[5:6] == b" " else line[5:])
+            elif line.startswith(b"event:"):
+                self._event = line[6:].strip().decode("utf-8")
+            # Comments (":") and id/retry fields are not used
+
+        self._tail = buffer[start:]
+        return events
+
+    def flush(self) -> List[Tuple[Optional[str], bytes]]:
+        """Return the last event if the stream ended without a blank line."""
+        events = []
+        if self._tail:
+            self.feed(b"\n")
+        self._dispatch(events)
+        return events
+
+    def _dispatch(self, events: List[Tuple[Optional[str], bytes]]) -> None:
+        if self._data:
+            events.append((self._event, b"\n".join(self._data)))
+        self._event = None
+        self._data = []
+
+
+def parse_anthropic_event(event: Optional[str], data: bytes) -> Delta:
+    """Extract text and stop reason from an Anthropic Messages stream event."""
+    # Named events other than deltas and errors carry no text; skip parsing them
+    if event is not None and event not in ("content_block_delta", "message_delta", "error"):
+        return None, None
+
+    payload = json.loads(data)
+    event_type = payload.get("type")
+    if event_type == "content_block_delta":
+        return payload.get("delta", {}).get("text"), None
+    if event_type == "message_delta":
+        return None, payload.get("delta", {}).get("stop_reason")
+    if event_type == "error":
+        raise ValueError(f"Anthropic stream error: {payload.get('error', {}).get('message', payload)}")
+    return None, None
+
+
+def parse_openai_event(event: Optional[str], data: bytes) -> Delta:
+    """Extract text and finish reason from an OpenAI chat completion chunk."""
+    if data == b"[DONE]":
+        return None, None
+
+    payload = json.loads(data)
+    choices = payload.get("choices")
+    if not choices:
+        return None, None
+    choice = choices[0]
+    return (choice.get("delta") or {}).get("content"), choice.get("finish_reason")
+
+
+def parse_google_event(event: Optional[str], data: bytes) -> Delta:
+    """Extract text and finish reason from a Gemini streamGenerateContent (alt=sse) event."""
+    payload = json.loads(data)
+    candidates = payload.get("candidates")
+    if not candidates:
+        return None, None
+    candidate = candidates[0]
+    parts = (candidate.get("content") or {}).get("parts") or []
+    text = "".join(part.get("text", "") for part in parts)
+    return text or None, candidate.get("finishReason")
+
+
+async def iter_sse_deltas(
+    byte_stream: AsyncIterator[bytes],
+    parse: Callable[[Optional[str], bytes], Delta]
+) -> AsyncIterator[Delta]:
+    """
+    Decode a provider byte stream into text deltas.
+
+    Args:
+        byte_stream: Provider response bytes
+        parse: Provider event parser
+
+    Yields:
+        (text, finish_reason) for each event carrying either
+    """
+    decoder = SSEDecoder()
+    async for chunk in byte_stream:
+        for event, data in decoder.feed(chunk):
+            try:
+                delta = parse(event, data)
+            except json.JSONDecodeError:
+                logger.debug(f"Skipping malformed stream event: {data[:100]!r}")
+                continue
+            if delta[0] or delta[1]:
+                yield delta[0] or None, delta[1]
+
+    for event, data in decoder.flush():
+        try:
+            delta = parse(event, data)
+        except json.JSONDecodeError:
+            continue
+        if delta[0] or delta[1]:
+            yield delta[0] or None, delta[1]
+
+
+def _is_text_chunk(chunk: Dict[str, Any]) -> bool:
+    return bool(chunk.get("text")) and not chunk.get("final") and "error" not in chunk
+
+
+async def coalesce_deltas(
+    chunks: AsyncIterator[Dict[str, Any]],
+    max_delay: float = DEFAULT_FRAME_DELAY,
+    max_chars: int = DEFAULT_FRAME_CHARS,
+    buffer_size: int = DEFAULT_STREAM_BUFFER
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Merge small text chunks into frames on a time and size budget.
+
+    The first text chunk is forwarded immediately to keep time-to-first-token
+    low. Later chunks are merged until max_chars is reached or max_delay has
+    passed since the frame started. Non-text chunks (final, error) flush the
+    pending frame and pass through unchanged.
+
+    Upstream is read by a task into a bounded buffer. A slow consumer lets
+    the buffer fill, which pauses upstream reads, and everything buffered is
+    then sent in fewer, larger frames.
+
+    Args:
+        chunks: Chunks from LLMClient.generate_text_stream
+        max_delay: Longest time a delta waits for others, in seconds
+        max_chars: Frame size that triggers an immediate flush
+        buffer_size: Chunks buffered ahead of the consumer
+
+    Yields:
+        Coalesced chunks
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+
+    async def pump():
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+            await queue.put(_END)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            # Closes the provider response when the client goes away
+            aclose = getattr(chunks, "aclose", None)
+            if aclose:
+                await aclose()
+
+    pump_task = asyncio.create_task(pump())
+    pending: List[Dict[str, Any]] = []
+    pending_chars = 0
+    first_text_sent = False
+
+    def frame() -> Dict[str, Any]:
+        merged = dict(pending[-1])
+        merged["text"] = "".join(chunk["text"] for chunk in pending)
+        return merged
+
+    try:
+        deadline = None
+        while True:
+            if pending:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError
+                    if queue.empty():
+                        item = await asyncio.wait_for(queue.get(), remaining)
+                    else:
+                        item = queue.get_nowait()
+                except asyncio.TimeoutError:
+                    yield frame()
+                    pending, pending_chars = [], 0
+                    continue
+            else:
+                item = await queue.get()
+
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                if pending:
+                    yield frame()
+                raise item
+
+            if not _is_text_chunk(item):
+                if pending:
+                    yield frame()
+                    pending, pending_chars = [], 0
+                yield item
+                continue
+
+            if not first_text_sent:
+                first_text_sent = True
+                yield item
+                continue
+
+            if not pending:
+                deadline = time.monotonic() + max_delay
+            pending.append(item)
+            pending_chars += len(item["text"])
+            if pending_chars >= max_chars:
+                yield frame()
+                pending, pending_chars = [], 0
+
+        if pending:
+            yield frame()
+    finally:
+        pump_task.cancel()
+        try:
+            await pump_task
+        except (asyncio.CancelledError, Exception):
+            pass
@@ -7,6 +7,7 @@ response handling, and error management functions.
 
 import os
 import time
+import inspect
 import logging
 import traceback
 import asyncio
@@ -20,6 +21,7 @@ from packages.error_handling.python.error import (
     ValidationError,
     map_provider_error
 )
+from packages.error_handling.python.transport import transport_registry
 
 T = TypeVar('T')
 
@@ -80,6 +82,12 @@ class AdapterInitializer:
         if hasattr(client_class, 'DEFAULT_TIMEOUT'):
             init_params['timeout'] = timeout
 
+        # SDK clients built on httpx send through the shared per-host pools
+        if 'http_client' not in init_params:
+            http_client = AdapterInitializer._shared_http_client(client_class, timeout)
+            if http_client is not None:
+                init_params['http_client'] = http_client
+
         try:
             # Initialize the client
             return client_class(**init_params)
@@ -96,6 +104,37 @@ class AdapterInitializer:
             else:
                 raise AIServiceError(error_msg, provider=provider_name.lower())
 
+    @staticmethod
+    def _shared_http_client(client_class, timeout: int):
+        """
+        Build an ``http_client`` on the shared pools for a client class.
+
+        Sync SDK classes (e.g. ``OpenAI``, ``Anthropic``) get an
+        ``httpx.Client`` and async ones (``AsyncOpenAI``, ``AsyncAnthropic``)
+        an ``httpx.AsyncClient``, judged by the parameter's annotation or
+        else the class name.
+
+        Returns:
+            The HTTP client, or None if the class takes no ``http_client`` or
+            its kind cannot be told
+        """
+        try:
+            parameter = inspect.signature(client_class).parameters.get('http_client')
+        except (TypeError, ValueError):
+            return None
+        if parameter is None:
+            return None
+
+        annotation = parameter.annotation
+        hint = "" if annotation is inspect.Parameter.empty else str(annotation)
+        if "AsyncClient" in hint:
+            return transport_registry.async_client(timeout=timeout)
+        if "Client" in hint:
+            return transport_registry.client(timeout=timeout)
+        if getattr(client_class, '__name__', '').startswith('Async'):
+            return transport_registry.async_client(timeout=timeout)
+        return None
+
 class ResponseIteratorFactory:
     """
     Factory for creating standard response iterators.
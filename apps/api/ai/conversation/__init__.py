@@ -11,10 +11,22 @@ from .history_manager import (
     Message,
     conversation_manager
 )
+from .storage import (
+    ConversationStore,
+    ConversationSummary,
+    InMemoryConversationStore,
+    RedisConversationStore,
+    create_conversation_store
+)
 
 __all__ = [
     "ConversationHistoryManager",
     "Conversation",
     "Message",
-    "conversation_manager"
+    "conversation_manager",
+    "ConversationStore",
+    "ConversationSummary",
+    "InMemoryConversationStore",
+    "RedisConversationStore",
+    "create_conversation_store"
 ]
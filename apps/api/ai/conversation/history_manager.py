@@ -3,19 +3,53 @@ Conversation History Manager
 
 This module provides a system for managing conversation histories,
 including storing, retrieving, and manipulating conversation threads.
+
+Histories are kept in a ConversationStore (process memory or Redis). Each
+message is stored with its index and token count, and long conversations
+keep a rolling summary, so prompts are assembled from a token-limited
+window without loading the whole thread.
 """
 
-import json
+import asyncio
+import functools
 import logging
-import time
+import os
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from uuid import uuid4
 
 from pydantic import BaseModel, Field
 
+from ..utils.token_counter import count_tokens
+from .storage import ConversationStore, ConversationSummary, InMemoryConversationStore, create_conversation_store
+
 logger = logging.getLogger(__name__)
 
+# Storage settings
+CONVERSATION_STORE_BACKEND = os.getenv("CONVERSATION_STORE_BACKEND", "memory")
+CONVERSATION_TTL = int(os.getenv("CONVERSATION_TTL", "0")) or None
+
+# Messages read per round trip when walking back through a conversation
+MESSAGE_PAGE_SIZE = 50
+
+# Recent messages kept verbatim; older ones are folded into the summary
+SUMMARY_INTERVAL = int(os.getenv("CONVERSATION_SUMMARY_INTERVAL", "50"))
+
+# Model whose tokenizer is used for cached message token counts
+TOKEN_COUNT_MODEL = "gpt-4"
+
+# Formatting overhead per message, as in count_tokens_in_messages
+MESSAGE_TOKEN_OVERHEAD = 4
+
+SUMMARY_PREFIX = "Summary of earlier conversation: "
+
+# Characters kept per message folded into the default summary, and in total
+SUMMARY_LINE_CHARS = 200
+SUMMARY_MAX_CHARS = int(os.getenv("CONVERSATION_SUMMARY_MAX_CHARS", "4000"))
+
+# Summarizer(previous summary, messages to fold in) -> new summary
+Summarizer = Callable[[Optional[str], List["Message"]], str]
+
 
 class Message(BaseModel):
     """Model for a conversation message."""
@@ -24,6 +58,7 @@ class Message(BaseModel):
     content: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     metadata: Dict[str, Any] = {}
+    index: Optional[int] = None
 
 
 class Conversation(BaseModel):
@@ -32,11 +67,40 @@ class Conversation(BaseModel):
     title: str
     user_id: str
     messages: List[Message] = []
+    message_count: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     metadata: Dict[str, Any] = {}
 
 
+def extractive_summary(previous: Optional[str], messages: List[Message]) -> str:
+    """
+    Fold messages into a rolling summary without calling a model.
+
+    Each message becomes one line holding its role and the start of its
+    content. Once the summary exceeds SUMMARY_MAX_CHARS the oldest lines are
+    dropped.
+
+    Args:
+        previous: The current summary, if any.
+        messages: Messages to fold in, oldest first.
+
+    Returns:
+        The new summary.
+    """
+    lines = previous.split("\n") if previous else []
+    for message in messages:
+        text = " ".join(message.content.split())
+        if len(text) > SUMMARY_LINE_CHARS:
+            text = text[:SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+        lines.append(f"{message.role.capitalize()}: {text}")
+
+    size = sum(len(line) + 1 for line in lines)
+    while len(lines) > 1 and size > SUMMARY_MAX_CHARS:
+        size -= len(lines.pop(0)) + 1
+    return "\n".join(lines)
+
+
 class ConversationHistoryManager:
     """
     Manager for conversation histories.
@@ -45,10 +109,74 @@ class ConversationHistoryManager:
     conversation threads.
     """
 
-    def __init__(self):
-        """Initialize the conversation history manager."""
-        self.conversations: Dict[str, Conversation] = {}
-        self.user_conversations: Dict[str, List[str]] = {}
+    def __init__(
+        self,
+        store: Optional[ConversationStore] = None,
+        summarizer: Optional[Summarizer] = None,
+        summary_interval: int = SUMMARY_INTERVAL,
+        token_model: str = TOKEN_COUNT_MODEL
+    ):
+        """
+        Initialize the conversation history manager.
+
+        Args:
+            store: Conversation store; defaults to the configured backend.
+            summarizer: Optional function folding older messages into the
+                rolling summary.
+            summary_interval: Number of recent messages kept out of the summary.
+            token_model: Model whose tokenizer is used for token counts.
+        """
+        self.store = store or self._default_store()
+        self.summarizer = summarizer
+        self.summary_interval = summary_interval
+        self.token_model = token_model
+
+    @staticmethod
+    def _default_store() -> ConversationStore:
+        if CONVERSATION_STORE_BACKEND != "redis":
+            return InMemoryConversationStore()
+        from ...utils.cache_manager import CacheManager
+        return create_conversation_store(CacheManager().redis, backend="redis", ttl=CONVERSATION_TTL)
+
+    async def run(self, method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Call a manager method from async code without blocking the event loop.
+
+        Methods run inline on stores that do not block and in the default
+        executor on stores that do, such as Redis.
+
+        Args:
+            method: Bound method of this manager.
+            *args: Positional arguments for the method.
+            **kwargs: Keyword arguments for the method.
+
+        Returns:
+            The method's return value.
+        """
+        if not self.store.blocking:
+            return method(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(method, *args, **kwargs))
+
+    def _count_message_tokens(self, role: str, content: str) -> int:
+        return count_tokens(content, self.token_model) + count_tokens(role, self.token_model) + MESSAGE_TOKEN_OVERHEAD
+
+    @staticmethod
+    def _to_record(conversation: Conversation) -> Dict[str, Any]:
+        return {
+            "id": conversation.id,
+            "title": conversation.title,
+            "user_id": conversation.user_id,
+            "created_at": conversation.created_at.isoformat(),
+            "updated_at": conversation.updated_at.isoformat(),
+            "metadata": conversation.metadata,
+        }
+
+    def _load_messages(self, conversation_id: str, start: int, end: int) -> List[Message]:
+        return [
+            Message(**data, index=start + offset)
+            for offset, data in enumerate(self.store.get_messages(conversation_id, start, end))
+        ]
 
     def create_conversation(
         self,
@@ -76,44 +204,55 @@ class ConversationHistoryManager:
             metadata=metadata
         )
 
+        # Store conversation
+        self.store.save_conversation(self._to_record(conversation))
+
         # Add initial message if provided
         if initial_message:
+            initial_message.index = self.store.append_message(
+                conversation.id,
+                initial_message,
+                self._count_message_tokens(initial_message.role, initial_message.content)
+            )
             conversation.messages.append(initial_message)
-
-        # Store conversation
-        self.conversations[conversation.id] = conversation
-
-        # Add to user's conversations
-        if user_id not in self.user_conversations:
-            self.user_conversations[user_id] = []
-        self.user_conversations[user_id].append(conversation.id)
+            conversation.message_count = 1
 
         return conversation
 
-    def get_conversation(self, conversation_id: str) -> Optional[Conversation]:
+    def get_conversation(self, conversation_id: str, include_messages: bool = True) -> Optional[Conversation]:
         """
         Get a conversation by ID.
 
         Args:
             conversation_id: The ID of the conversation to get.
+            include_messages: Whether to load the conversation's messages.
+                Ownership checks and listings should pass False.
 
         Returns:
             The conversation, or None if not found.
         """
-        return self.conversations.get(conversation_id)
+        record = self.store.get_conversation(conversation_id)
+        if not record:
+            return None
 
-    def list_conversations(self, user_id: str) -> List[Conversation]:
+        conversation = Conversation(**record)
+        if include_messages:
+            conversation.messages = self._load_messages(conversation_id, 0, conversation.message_count)
+        return conversation
+
+    def list_conversations(self, user_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Conversation]:
         """
-        List all conversations for a user.
+        List conversations for a user, without their messages.
 
         Args:
             user_id: The ID of the user.
+            offset: Number of conversations to skip.
+            limit: Optional maximum number of conversations to return.
 
         Returns:
             A list of conversations.
         """
-        conversation_ids = self.user_conversations.get(user_id, [])
-        return [self.conversations[cid] for cid in conversation_ids if cid in self.conversations]
+        return [Conversation(**record) for record in self.store.list_conversations(user_id, offset, limit)]
 
     def add_message(
         self,
@@ -141,9 +280,8 @@ class ConversationHistoryManager:
         if role not in ["user", "assistant", "system"]:
             raise ValueError(f"Invalid role: {role}")
 
-        # Get conversation
-        conversation = self.get_conversation(conversation_id)
-        if not conversation:
+        # Check the conversation exists
+        if not self.store.get_conversation(conversation_id):
             return None
 
         # Create message
@@ -153,11 +291,12 @@ class ConversationHistoryManager:
             metadata=metadata
         )
 
-        # Add message to conversation
-        conversation.messages.append(message)
+        # Append with its token count; this also updates the conversation timestamp
+        message.index = self.store.append_message(
+            conversation_id, message, self._count_message_tokens(role, content)
+        )
 
-        # Update conversation timestamp
-        conversation.updated_at = datetime.utcnow()
+        self._maybe_summarize(conversation_id, message.index + 1)
 
         return message
 
@@ -165,41 +304,44 @@ class ConversationHistoryManager:
         self,
         conversation_id: str,
         limit: Optional[int] = None,
-        before_id: Optional[str] = None
+        before_id: Optional[str] = None,
+        before_index: Optional[int] = None
     ) -> List[Message]:
         """
         Get messages from a conversation.
 
+        Only the requested page is read from the store. Each returned message
+        carries its index, which can be passed back as before_index to fetch
+        the previous page.
+
         Args:
             conversation_id: The ID of the conversation to get messages from.
             limit: Optional maximum number of messages to return.
             before_id: Optional message ID to get messages before.
+            before_index: Optional message index to get messages before.
 
         Returns:
             A list of messages, or an empty list if the conversation is not found.
         """
-        # Get conversation
-        conversation = self.get_conversation(conversation_id)
-        if not conversation:
+        record = self.store.get_conversation(conversation_id)
+        if not record:
             return []
 
-        # Get messages
-        messages = conversation.messages
+        end = record["message_count"]
 
-        # Filter by before_id if provided
+        # Filter by before_id if provided; an unknown ID returns all messages
         if before_id:
-            try:
-                index = next(i for i, m in enumerate(messages) if m.id == before_id)
-                messages = messages[:index]
-            except StopIteration:
-                # Message not found, return all messages
-                pass
+            index = self.store.find_message_index(conversation_id, before_id)
+            if index is not None:
+                end = index
+
+        if before_index is not None:
+            end = min(end, max(before_index, 0))
 
         # Apply limit if provided
-        if limit is not None and limit > 0:
-            messages = messages[-limit:]
+        start = max(end - limit, 0) if limit is not None and limit > 0 else 0
 
-        return messages
+        return self._load_messages(conversation_id, start, end)
 
     def update_conversation(
         self,
@@ -216,10 +358,10 @@ class ConversationHistoryManager:
             metadata: Optional new metadata for the conversation.
 
         Returns:
-            The updated conversation, or None if not found.
+            The updated conversation without its messages, or None if not found.
         """
-        # Get conversation
-        conversation = self.get_conversation(conversation_id)
+        # Get conversation; only the record is rewritten, so messages are not loaded
+        conversation = self.get_conversation(conversation_id, include_messages=False)
         if not conversation:
             return None
 
@@ -232,6 +374,8 @@ class ConversationHistoryManager:
         # Update timestamp
         conversation.updated_at = datetime.utcnow()
 
+        self.store.save_conversation(self._to_record(conversation))
+
         return conversation
 
     def delete_conversation(self, conversation_id: str) -> bool:
@@ -244,24 +388,7 @@ class ConversationHistoryManager:
         Returns:
             True if successful, False otherwise.
         """
-        # Check if conversation exists
-        if conversation_id not in self.conversations:
-            return False
-
-        # Get user ID
-        user_id = self.conversations[conversation_id].user_id
-
-        # Remove from user's conversations
-        if user_id in self.user_conversations:
-            try:
-                self.user_conversations[user_id].remove(conversation_id)
-            except ValueError:
-                pass
-
-        # Remove conversation
-        del self.conversations[conversation_id]
-
-        return True
+        return self.store.delete_conversation(conversation_id)
 
     def clear_conversation(self, conversation_id: str) -> bool:
         """
@@ -273,24 +400,98 @@ class ConversationHistoryManager:
         Returns:
             True if successful, False otherwise.
         """
-        # Get conversation
-        conversation = self.get_conversation(conversation_id)
-        if not conversation:
-            return False
+        return self.store.clear_messages(conversation_id, datetime.utcnow())
 
-        # Clear messages
-        conversation.messages = []
+    def set_summary(self, conversation_id: str, text: str, end_index: int) -> None:
+        """
+        Store a rolling summary produced outside the manager.
 
-        # Update timestamp
-        conversation.updated_at = datetime.utcnow()
+        Args:
+            conversation_id: The ID of the conversation.
+            text: Summary of the messages before end_index.
+            end_index: Index of the first message not covered by the summary.
+        """
+        token_count = count_tokens(SUMMARY_PREFIX + text, self.token_model) + MESSAGE_TOKEN_OVERHEAD
+        self.store.set_summary(conversation_id, ConversationSummary(text, end_index, token_count))
+
+    def _maybe_summarize(self, conversation_id: str, message_count: int) -> None:
+        """Fold older messages into the rolling summary once enough have accumulated."""
+        if not self.summarizer:
+            return
+
+        summary = self.store.get_summary(conversation_id)
+        summarized = summary.end_index if summary else 0
+        if message_count - summarized < 2 * self.summary_interval:
+            return
+
+        end_index = message_count - self.summary_interval
+        try:
+            messages = self._load_messages(conversation_id, summarized, end_index)
+            text = self.summarizer(summary.text if summary else None, messages)
+            self.set_summary(conversation_id, text, end_index)
+        except Exception as e:
+            logger.warning(f"Failed to update summary for conversation {conversation_id}: {e}")
+
+    def _select_window(
+        self,
+        conversation_id: str,
+        limit: Optional[int],
+        include_system: bool,
+        max_tokens: Optional[int]
+    ) -> Tuple[Optional[ConversationSummary], List[Message]]:
+        """
+        Select the most recent messages that fit a message limit and token budget.
 
-        return True
+        Messages are read backwards one page at a time, using cached token
+        counts. With a token budget the rolling summary is included and the
+        walk stops at the first message it does not cover.
+
+        Returns:
+            The summary to prepend (if any) and the selected messages, oldest first.
+        """
+        record = self.store.get_conversation(conversation_id)
+        if not record:
+            return None, []
+
+        end = record["message_count"]
+        floor = 0
+        summary = None
+        budget = max_tokens
+        if max_tokens is not None:
+            summary = self.store.get_summary(conversation_id)
+            if summary and summary.end_index <= end and summary.token_count <= max_tokens:
+                floor = summary.end_index
+                budget -= summary.token_count
+            else:
+                summary = None
+
+        selected: List[Message] = []
+        while end > floor:
+            start = max(end - MESSAGE_PAGE_SIZE, floor)
+            messages = self._load_messages(conversation_id, start, end)
+            tokens = self.store.get_token_counts(conversation_id, start, end)
+
+            for message, token_count in zip(reversed(messages), reversed(tokens)):
+                if not include_system and message.role == "system":
+                    continue
+                if budget is not None and token_count > budget:
+                    return summary, selected[::-1]
+                selected.append(message)
+                if budget is not None:
+                    budget -= token_count
+                if limit is not None and limit > 0 and len(selected) >= limit:
+                    return summary, selected[::-1]
+
+            end = start
+
+        return summary, selected[::-1]
 
     def format_for_prompt(
         self,
         conversation_id: str,
         limit: Optional[int] = None,
-        include_system: bool = True
+        include_system: bool = True,
+        max_tokens: Optional[int] = None
     ) -> str:
         """
         Format a conversation for use in a prompt.
@@ -299,28 +500,18 @@ class ConversationHistoryManager:
             conversation_id: The ID of the conversation to format.
             limit: Optional maximum number of messages to include.
             include_system: Whether to include system messages.
+            max_tokens: Optional token budget; the most recent messages that
+                fit are included, preceded by the rolling summary.
 
         Returns:
             A formatted string representation of the conversation.
         """
-        # Get conversation
-        conversation = self.get_conversation(conversation_id)
-        if not conversation:
-            return ""
-
-        # Get messages
-        messages = conversation.messages
-
-        # Filter out system messages if not included
-        if not include_system:
-            messages = [m for m in messages if m.role != "system"]
-
-        # Apply limit if provided
-        if limit is not None and limit > 0:
-            messages = messages[-limit:]
+        summary, messages = self._select_window(conversation_id, limit, include_system, max_tokens)
 
         # Format messages
         formatted = []
+        if summary:
+            formatted.append(SUMMARY_PREFIX + summary.text)
         for message in messages:
             formatted.append(f"{message.role.capitalize()}: {message.content}")
 
@@ -330,7 +521,8 @@ class ConversationHistoryManager:
         self,
         conversation_id: str,
         limit: Optional[int] = None,
-        include_system: bool = True
+        include_system: bool = True,
+        max_tokens: Optional[int] = None
     ) -> List[Dict[str, str]]:
         """
         Get messages from a conversation in a format suitable for chat models.
@@ -339,29 +531,19 @@ class ConversationHistoryManager:
             conversation_id: The ID of the conversation to get messages from.
             limit: Optional maximum number of messages to include.
             include_system: Whether to include system messages.
+            max_tokens: Optional token budget; the rolling summary is added as
+                a leading system message.
 
         Returns:
             A list of message dictionaries with "role" and "content" keys.
         """
-        # Get conversation
-        conversation = self.get_conversation(conversation_id)
-        if not conversation:
-            return []
-
-        # Get messages
-        messages = conversation.messages
+        summary, messages = self._select_window(conversation_id, limit, include_system, max_tokens)
 
-        # Filter out system messages if not included
-        if not include_system:
-            messages = [m for m in messages if m.role != "system"]
-
-        # Apply limit if provided
-        if limit is not None and limit > 0:
-            messages = messages[-limit:]
-
-        # Format messages
-        return [{"role": m.role, "content": m.content} for m in messages]
+        chat_messages = [{"role": m.role, "content": m.content} for m in messages]
+        if summary:
+            chat_messages.insert(0, {"role": "system", "content": SUMMARY_PREFIX + summary.text})
+        return chat_messages
 
 
 # Create a singleton instance
-conversation_manager = ConversationHistoryManager()
+conversation_manager = ConversationHistoryManager(summarizer=extractive_summary)
@@ -0,0 +1,374 @@
+"""
+Conversation Storage
+
+This module provides storage backends for conversation histories. Messages
+are appended with a per-conversation index and a cached token count, so
+callers can page through a thread or assemble a prompt window without
+loading every message.
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Appends a message, its token count and its ID index in one round trip
+APPEND_SCRIPT = """
+local n = redis.call('RPUSH', KEYS[1], ARGV[1])
+redis.call('RPUSH', KEYS[2], ARGV[2])
+redis.call('HSET', KEYS[3], ARGV[3], n - 1)
+redis.call('HSET', KEYS[4], 'updated_at', ARGV[4], 'message_count', n)
+local ttl = tonumber(ARGV[5])
+if ttl > 0 then
+    for i = 1, 4 do
+        redis.call('EXPIRE', KEYS[i], ttl)
+    end
+end
+return n - 1
+"""
+
+
+class ConversationSummary:
+    """A rolling summary covering the messages before end_index."""
+
+    def __init__(self, text: str, end_index: int, token_count: int):
+        self.text = text
+        self.end_index = end_index
+        self.token_count = token_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"text": self.text, "end_index": self.end_index, "token_count": self.token_count}
+
+
+def serialize_message(message: Any) -> str:
+    return json.dumps({
+        "id": message.id,
+        "role": message.role,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+        "metadata": message.metadata,
+    })
+
+
+def deserialize_message(raw: Any) -> Dict[str, Any]:
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+    return json.loads(raw)
+
+
+class ConversationStore:
+    """
+    Interface for conversation storage backends.
+
+    Conversations are stored as metadata records (without messages) plus an
+    append-only message log. Message indexes start at 0 and ranges are
+    half-open. Stores whose calls block on I/O set blocking so async callers
+    run them in an executor.
+    """
+
+    blocking = False
+
+    def save_conversation(self, record: Dict[str, Any]) -> None:
+        """Create or replace a conversation's metadata record."""
+        raise NotImplementedError
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Return a conversation's metadata record, including message_count."""
+        raise NotImplementedError
+
+    def list_conversations(self, user_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return a user's conversation records, oldest first."""
+        raise NotImplementedError
+
+    def delete_conversation(self, conversation_id: str) -> bool:
+        """Delete a conversation and its messages."""
+        raise NotImplementedError
+
+    def append_message(self, conversation_id: str, message: Any, token_count: int) -> int:
+        """Append a message and return its index."""
+        raise NotImplementedError
+
+    def get_messages(self, conversation_id: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """Return the messages with indexes in [start, end)."""
+        raise NotImplementedError
+
+    def get_token_counts(self, conversation_id: str, start: int, end: int) -> List[int]:
+        """Return the cached token counts of the messages in [start, end)."""
+        raise NotImplementedError
+
+    def find_message_index(self, conversation_id: str, message_id: str) -> Optional[int]:
+        """Return the index of a message, or None if it is not in the conversation."""
+        raise NotImplementedError
+
+    def clear_messages(self, conversation_id: str, updated_at: datetime) -> bool:
+        """Remove all messages and the summary from a conversation."""
+        raise NotImplementedError
+
+    def get_summary(self, conversation_id: str) -> Optional[ConversationSummary]:
+        """Return the conversation's rolling summary."""
+        raise NotImplementedError
+
+    def set_summary(self, conversation_id: str, summary: ConversationSummary) -> None:
+        """Replace the conversation's rolling summary."""
+        raise NotImplementedError
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local conversation store."""
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._messages: Dict[str, List[str]] = {}
+        self._tokens: Dict[str, List[int]] = {}
+        self._ids: Dict[str, Dict[str, int]] = {}
+        self._summaries: Dict[str, ConversationSummary] = {}
+        self._user_conversations: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def save_conversation(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            conversation_id = record["id"]
+            existing = self._records.get(conversation_id)
+            self._records[conversation_id] = {**record, "message_count": len(self._messages.get(conversation_id, []))}
+            if existing is None:
+                self._messages[conversation_id] = []
+                self._tokens[conversation_id] = []
+                self._ids[conversation_id] = {}
+                self._user_conversations.setdefault(record["user_id"], []).append(conversation_id)
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(conversation_id)
+            return dict(record) if record else None
+
+    def list_conversations(self, user_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            ids = self._user_conversations.get(user_id, [])
+            ids = ids[offset:] if limit is None else ids[offset:offset + limit]
+            return [dict(self._records[cid]) for cid in ids if cid in self._records]
+
+    def delete_conversation(self, conversation_id: str) -> bool:
+        with self._lock:
+            record = self._records.pop(conversation_id, None)
+            if record is None:
+                return False
+            for table in (self._messages, self._tokens, self._ids, self._summaries):
+                table.pop(conversation_id, None)
+            user_ids = self._user_conversations.get(record["user_id"], [])
+            if conversation_id in user_ids:
+                user_ids.remove(conversation_id)
+            return True
+
+    def append_message(self, conversation_id: str, message: Any, token_count: int) -> int:
+        with self._lock:
+            messages = self._messages[conversation_id]
+            index = len(messages)
+            messages.append(serialize_message(message))
+            self._tokens[conversation_id].append(token_count)
+            self._ids[conversation_id][message.id] = index
+            record = self._records[conversation_id]
+            record["message_count"] = index + 1
+            record["updated_at"] = message.created_at.isoformat()
+            return index
+
+    def get_messages(self, conversation_id: str, start: int, end: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            raw = self._messages.get(conversation_id, [])[max(start, 0):max(end, 0)]
+        return [deserialize_message(item) for item in raw]
+
+    def get_token_counts(self, conversation_id: str, start: int, end: int) -> List[int]:
+        with self._lock:
+            return list(self._tokens.get(conversation_id, [])[max(start, 0):max(end, 0)])
+
+    def find_message_index(self, conversation_id: str, message_id: str) -> Optional[int]:
+        with self._lock:
+            return self._ids.get(conversation_id, {}).get(message_id)
+
+    def clear_messages(self, conversation_id: str, updated_at: datetime) -> bool:
+        with self._lock:
+            record = self._records.get(conversation_id)
+            if record is None:
+                return False
+            self._messages[conversation_id] = []
+            self._tokens[conversation_id] = []
+            self._ids[conversation_id] = {}
+            self._summaries.pop(conversation_id, None)
+            record["message_count"] = 0
+            record["updated_at"] = updated_at.isoformat()
+            return True
+
+    def get_summary(self, conversation_id: str) -> Optional[ConversationSummary]:
+        with self._lock:
+            return self._summaries.get(conversation_id)
+
+    def set_summary(self, conversation_id: str, summary: ConversationSummary) -> None:
+        with self._lock:
+            self._summaries[conversation_id] = summary
+
+
+class RedisConversationStore(ConversationStore):
+    """
+    Redis conversation store shared by all replicas.
+
+    Each conversation uses a metadata hash, a message list, a parallel list
+    of token counts, a hash from message ID to index and a summary key. Keys
+    share a hash tag so a conversation lives on one cluster slot. A sorted
+    set per user orders conversations by creation time.
+    """
+
+    blocking = True
+
+    def __init__(self, redis_client: Any, prefix: str = "maily:conversation:", ttl: Optional[int] = None):
+        """
+        Initialize the store.
+
+        Args:
+            redis_client: Synchronous Redis client
+            prefix: Key prefix
+            ttl: Optional expiry in seconds, refreshed on every append
+        """
+        self.redis = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+        self._append = redis_client.register_script(APPEND_SCRIPT)
+
+    def _keys(self, conversation_id: str) -> Tuple[str, str, str, str, str]:
+        base = f"{self.prefix}{{{conversation_id}}}"
+        return f"{base}:messages", f"{base}:tokens", f"{base}:ids", f"{base}:meta", f"{base}:summary"
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self.prefix}user:{user_id}"
+
+    @staticmethod
+    def _record_from_hash(data: Dict[Any, Any]) -> Optional[Dict[str, Any]]:
+        if not data:
+            return None
+        data = {(k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+                for k, v in data.items()}
+        return {
+            "id": data["id"],
+            "title": data["title"],
+            "user_id": data["user_id"],
+            "created_at": data["created_at"],
+            "updated_at": data["updated_at"],
+            "metadata": json.loads(data.get("metadata") or "{}"),
+            "message_count": int(data.get("message_count") or 0),
+        }
+
+    def save_conversation(self, record: Dict[str, Any]) -> None:
+        meta_key = self._keys(record["id"])[3]
+        mapping = {
+            "id": record["id"],
+            "title": record["title"],
+            "user_id": record["user_id"],
+            "created_at": record["created_at"],
+            "updated_at": record["updated_at"],
+            "metadata": json.dumps(record.get("metadata") or {}),
+        }
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(meta_key, mapping=mapping)
+        pipe.hsetnx(meta_key, "message_count", 0)
+        pipe.zadd(self._user_key(record["user_id"]), {record["id"]: datetime.fromisoformat(record["created_at"]).timestamp()}, nx=True)
+        if self.ttl:
+            pipe.expire(meta_key, self.ttl)
+        pipe.execute()
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return self._record_from_hash(self.redis.hgetall(self._keys(conversation_id)[3]))
+
+    def list_conversations(self, user_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        end = -1 if limit is None else offset + limit - 1
+        ids = self.redis.zrange(self._user_key(user_id), offset, end)
+        if not ids:
+            return []
+
+        pipe = self.redis.pipeline(transaction=False)
+        for conversation_id in ids:
+            if isinstance(conversation_id, bytes):
+                conversation_id = conversation_id.decode()
+            pipe.hgetall(self._keys(conversation_id)[3])
+        records = [self._record_from_hash(data) for data in pipe.execute()]
+        return [record for record in records if record]
+
+    def delete_conversation(self, conversation_id: str) -> bool:
+        record = self.get_conversation(conversation_id)
+        if record is None:
+            return False
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(*self._keys(conversation_id))
+        pipe.zrem(self._user_key(record["user_id"]), conversation_id)
+        pipe.execute()
+        return True
+
+    def append_message(self, conversation_id: str, message: Any, token_count: int) -> int:
+        messages_key, tokens_key, ids_key, meta_key, _ = self._keys(conversation_id)
+        index = self._append(
+            keys=[messages_key, tokens_key, ids_key, meta_key],
+            args=[serialize_message(message), token_count, message.id, message.created_at.isoformat(), self.ttl or 0],
+        )
+        return int(index)
+
+    def get_messages(self, conversation_id: str, start: int, end: int) -> List[Dict[str, Any]]:
+        start = max(start, 0)
+        if end <= start:
+            return []
+        raw = self.redis.lrange(self._keys(conversation_id)[0], start, end - 1)
+        return [deserialize_message(item) for item in raw]
+
+    def get_token_counts(self, conversation_id: str, start: int, end: int) -> List[int]:
+        start = max(start, 0)
+        if end <= start:
+            return []
+        return [int(count) for count in self.redis.lrange(self._keys(conversation_id)[1], start, end - 1)]
+
+    def find_message_index(self, conversation_id: str, message_id: str) -> Optional[int]:
+        index = self.redis.hget(self._keys(conversation_id)[2], message_id)
+        return int(index) if index is not None else None
+
+    def clear_messages(self, conversation_id: str, updated_at: datetime) -> bool:
+        messages_key, tokens_key, ids_key, meta_key, summary_key = self._keys(conversation_id)
+        if not self.redis.exists(meta_key):
+            return False
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(messages_key, tokens_key, ids_key, summary_key)
+        pipe.hset(meta_key, mapping={"message_count": 0, "updated_at": updated_at.isoformat()})
+        pipe.execute()
+        return True
+
+    def get_summary(self, conversation_id: str) -> Optional[ConversationSummary]:
+        raw = self.redis.get(self._keys(conversation_id)[4])
+        if not raw:
+            return None
+        data = json.loads(raw)
+        return ConversationSummary(data["text"], data["end_index"], data["token_count"])
+
+    def set_summary(self, conversation_id: str, summary: ConversationSummary) -> None:
+        self.redis.set(self._keys(conversation_id)[4], json.dumps(summary.to_dict()), ex=self.ttl)
+
+
+def create_conversation_store(redis_client: Any = None, backend: Optional[str] = None, **kwargs: Any) -> ConversationStore:
+    """
+    Choose where conversation histories are kept
+
+    Redis lets every replica serve any conversation; process memory only
+    suits a single worker or tests. A client without script support (such as
+    the cache manager's placeholder) falls back to memory with a warning when
+    Redis was requested explicitly.
+
+    Args:
+        redis_client: Synchronous Redis client shared with the cache manager
+        backend: "redis" or "memory"; defaults to redis when a client is available
+        **kwargs: Passed to RedisConversationStore, e.g. prefix and ttl
+
+    Returns:
+        RedisConversationStore or InMemoryConversationStore
+    """
+    usable = redis_client is not None and callable(getattr(type(redis_client), "register_script", None))
+    if backend == "memory" or not usable:
+        if backend == "redis":
+            logger.warning("Redis conversation store requested but Redis is unavailable; using process memory")
+        return InMemoryConversationStore()
+    return RedisConversationStore(redis_client, **kwargs)
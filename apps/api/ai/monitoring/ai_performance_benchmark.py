@@ -2,7 +2,9 @@
 AI Performance Benchmarking Module
 
 This module provides tools for benchmarking AI service performance,
-tracking response times, and generating performance reports.
+tracking response times, and generating performance reports. Live benchmarks
+go through the AI service; the offline suite in offline_benchmark times our
+own layers against stub providers.
 """
 
 import time
@@ -11,21 +13,32 @@ import logging
 import statistics
 import json
 import os
-from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable, Union
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple, Callable, Awaitable, Union
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import numpy as np
 from io import BytesIO
 import base64
 
 # Local imports
 from ..monitoring.ai_metrics_service import AIMetricsService
 from ..adapters.base import ModelRequest, ModelResponse
-from .. import AIService
+from .offline_benchmark import (
+    DEFAULT_ITERATIONS,
+    OfflineBenchmarkSuite,
+    compare_results,
+    load_results,
+    percentile,
+    save_results,
+)
+
+if TYPE_CHECKING:
+    from .. import AIService
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Baseline for the offline suite, kept apart from per-model live baselines
+OFFLINE_BASELINE_PATH = "benchmark_results/offline_baseline.json"
+
 class AIPerformanceBenchmark:
     """
     Benchmark service for AI model performance.
@@ -34,12 +47,12 @@ class AIPerformanceBenchmark:
     including latency, throughput, and quality metrics.
     """
 
-    def __init__(self, ai_service: AIService, metrics_service: Optional[AIMetricsService] = None):
+    def __init__(self, ai_service: Optional["AIService"] = None, metrics_service: Optional[AIMetricsService] = None):
         """
         Initialize the benchmark service.
 
         Args:
-            ai_service: The AI service to benchmark
+            ai_service: The AI service to benchmark; only needed for live benchmarks
             metrics_service: Optional metrics service for recording results
         """
         self.ai_service = ai_service
@@ -115,9 +128,9 @@ class AIPerformanceBenchmark:
                 "max": max(latencies),
                 "mean": statistics.mean(latencies),
                 "median": statistics.median(latencies),
-                "p90": np.percentile(latencies, 90),
-                "p95": np.percentile(latencies, 95),
-                "p99": np.percentile(latencies, 99),
+                "p90": percentile(latencies, 90),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
                 "std_dev": statistics.stdev(latencies) if len(latencies) > 1 else 0
             },
             "tokens_per_second": {
@@ -250,6 +263,78 @@ class AIPerformanceBenchmark:
                 "timestamp": datetime.now().isoformat()
             }
 
+    async def run_offline_benchmark(
+        self,
+        iterations: int = DEFAULT_ITERATIONS,
+        layers: Optional[List[str]] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+        tag: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the offline suite against stub providers and compare with the offline baseline.
+
+        Args:
+            iterations: Timed calls per layer
+            layers: Optional subset of layers to run
+            thresholds: Allowed relative slowdown per statistic
+            tag: Optional tag for the benchmark run
+
+        Returns:
+            Dictionary with per-layer overhead and baseline comparison
+        """
+        suite = OfflineBenchmarkSuite(iterations=iterations)
+        results = await suite.run(layers=layers)
+
+        benchmark_id = f"offline_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        results["id"] = benchmark_id
+        results["model"] = "offline"
+        results["config"]["tag"] = tag
+
+        baseline = load_results(OFFLINE_BASELINE_PATH)
+        if baseline:
+            results["baseline_comparison"] = compare_results(results, baseline, thresholds)
+            if not results["baseline_comparison"]["passed"]:
+                logger.warning(f"Offline benchmark {benchmark_id} regressed: "
+                               f"{results['baseline_comparison']['regressions']}")
+
+        self.benchmark_results[benchmark_id] = results
+        self._save_benchmark_results(benchmark_id, results)
+
+        if self.metrics_service:
+            for layer, stats in results["layers"].items():
+                if "p50_us" in stats:
+                    self.metrics_service.record_metric(
+                        "benchmark_layer_overhead_p50_us",
+                        stats["p50_us"],
+                        {"layer": layer, "tag": tag or "default"}
+                    )
+
+        return results
+
+    def set_offline_baseline(self, benchmark_id: str) -> bool:
+        """
+        Set an offline benchmark run as the baseline for later offline runs.
+
+        Args:
+            benchmark_id: ID of the offline benchmark run
+
+        Returns:
+            True if successful, False otherwise
+        """
+        results = self.get_benchmark_results(benchmark_id)
+        if not results or results.get("suite") != "offline":
+            logger.error(f"Offline benchmark ID {benchmark_id} not found")
+            return False
+
+        try:
+            save_results(results, OFFLINE_BASELINE_PATH)
+        except Exception as e:
+            logger.error(f"Error saving offline baseline: {e}")
+            return False
+
+        logger.info(f"Set benchmark {benchmark_id} as offline baseline")
+        return True
+
     def set_baseline(self, benchmark_id: str) -> bool:
         """
         Set a benchmark run as the baseline for future comparisons.
@@ -265,6 +350,8 @@ class AIPerformanceBenchmark:
             return False
 
         benchmark = self.benchmark_results[benchmark_id]
+        if benchmark.get("suite") == "offline":
+            return self.set_offline_baseline(benchmark_id)
         model_name = benchmark["model"]
 
         self.baseline_results[model_name] = {
@@ -403,16 +490,18 @@ class AIPerformanceBenchmark:
             benchmarks = []
 
             if os.path.exists("benchmark_results"):
-                files = [f for f in os.listdir("benchmark_results") if f.endswith(".json") and f != "baselines.json"]
+                files = [f for f in os.listdir("benchmark_results") if f.endswith(".json") and f not in ("baselines.json", "offline_baseline.json")]
 
                 for file in sorted(files, reverse=True)[:limit * 2]:  # Get more than needed for filtering
                     try:
                         with open(f"benchmark_results/{file}", "r") as f:
                             data = json.load(f)
 
-                            # Filter by model name if specified
+                            # Filter by model name if specified; offline runs have no latency stats
                             if model_name and data.get("model") != model_name:
                                 continue
+                            if data.get("suite") == "offline":
+                                continue
 
                             # Add summary to list
                             benchmarks.append({
@@ -484,6 +573,15 @@ class AIPerformanceBenchmark:
         Returns:
             Base64-encoded PNG image or None if generation fails
         """
+        try:
+            # Imported on first use so the module loads without a plotting backend
+            import matplotlib
+            matplotlib.use("Agg")
+            import matplotlib.pyplot as plt
+        except ImportError:
+            logger.warning("matplotlib is not installed; skipping latency distribution")
+            return None
+
         try:
             # Extract latencies
             latencies = [r.get("latency", 0) for r in benchmark.get("raw_results", [])]
@@ -493,7 +591,7 @@ class AIPerformanceBenchmark:
             plt.hist(latencies, bins=20, alpha=0.7, color='blue')
             plt.axvline(statistics.mean(latencies), color='red', linestyle='dashed', linewidth=1, label=f'Mean: {statistics.mean(latencies):.2f}s')
             plt.axvline(statistics.median(latencies), color='green', linestyle='dashed', linewidth=1, label=f'Median: {statistics.median(latencies):.2f}s')
-            plt.axvline(np.percentile(latencies, 95), color='orange', linestyle='dashed', linewidth=1, label=f'P95: {np.percentile(latencies, 95):.2f}s')
+            plt.axvline(percentile(latencies, 95), color='orange', linestyle='dashed', linewidth=1, label=f'P95: {percentile(latencies, 95):.2f}s')
 
             plt.title(f'Latency Distribution for {benchmark.get("model")}')
             plt.xlabel('Latency (seconds)')
@@ -128,6 +128,25 @@ async def list_benchmarks(
     benchmarks = benchmark_service.list_benchmarks(model_name=model, limit=limit)
     return benchmarks
 
+@router.post("/offline", response_model=Dict[str, Any])
+async def run_offline_benchmark(
+    iterations: int = Query(500, ge=10, le=10000, description="Timed calls per layer"),
+    layers: Optional[List[str]] = Query(None, description="Only run these layers"),
+    tag: Optional[str] = Query(None, description="Optional tag for the benchmark run")
+) -> Dict[str, Any]:
+    """
+    Run the offline benchmark suite against stub providers.
+
+    Args:
+        iterations: Timed calls per layer
+        layers: Optional subset of layers to run
+        tag: Optional tag for the benchmark run
+
+    Returns:
+        Per-layer overhead and comparison with the offline baseline
+    """
+    return await benchmark_service.run_offline_benchmark(iterations=iterations, layers=layers, tag=tag)
+
 @router.get("/{benchmark_id}", response_model=BenchmarkResponse)
 async def get_benchmark(
     benchmark_id: str
@@ -0,0 +1,763 @@
+"""
+Offline AI Path Benchmark
+
+This module benchmarks the AI request path without calling live providers.
+Stub adapters emulate provider latency and streaming from seeded
+distributions, and each of our own layers (routing, throttling, caching,
+fallback, prompt rendering, token counting, serialization) is timed on its
+own. Results are plain JSON so runs can be stored as baselines and compared
+against regression thresholds.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+
+from ..adapters.base import BaseModelAdapter, ModelRequest, ModelResponse
+
+logger = logging.getLogger(__name__)
+
+# Version of the result format; baselines with another version are not compared
+RESULT_VERSION = 1
+
+DEFAULT_SEED = 1234
+DEFAULT_ITERATIONS = 500
+DEFAULT_WARMUP = 50
+
+# Allowed relative slowdown per statistic before a layer counts as regressed
+DEFAULT_REGRESSION_THRESHOLDS = {
+    "p50_us": 0.25,
+    "p95_us": 0.50,
+}
+
+# Differences below this many microseconds are treated as timer noise
+MIN_REGRESSION_US = 5.0
+
+# Words used for deterministic prompts and stub completions
+_WORDS = (
+    "campaign audience subject line open rate click engagement segment launch "
+    "newsletter offer product update customer journey conversion brand voice "
+    "follow up reminder announcement feedback survey holiday discount welcome"
+).split()
+
+
+class ProviderProfile:
+    """
+    Latency and streaming profile for a stub provider.
+
+    Latency is drawn from a lognormal distribution around the median, which
+    matches the long right tail seen from hosted models.
+    """
+
+    def __init__(
+        self,
+        median_latency_ms: float,
+        latency_sigma: float = 0.35,
+        ttft_ms: float = 300.0,
+        tokens_per_second: float = 60.0,
+        chunk_tokens: int = 4,
+        completion_tokens: int = 120,
+        error_rate: float = 0.0,
+        tier: str = "standard",
+        cost_per_1k_tokens: float = 0.01,
+        capabilities: Optional[List[str]] = None
+    ):
+        """
+        Initialize a provider profile.
+
+        Args:
+            median_latency_ms: Median end-to-end latency of a completion
+            latency_sigma: Lognormal sigma of the latency distribution
+            ttft_ms: Median time to first streamed token
+            tokens_per_second: Streaming speed after the first token
+            chunk_tokens: Tokens per streamed chunk
+            completion_tokens: Tokens per completion
+            error_rate: Share of requests that fail
+            tier: Model tier reported to the routing service
+            cost_per_1k_tokens: Cost reported to the routing service
+            capabilities: Capabilities reported to the routing service
+        """
+        self.median_latency_ms = median_latency_ms
+        self.latency_sigma = latency_sigma
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.tier = tier
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self.capabilities = capabilities or ["text_generation", "summarization"]
+
+
+DEFAULT_PROFILES = {
+    "gpt-4": ProviderProfile(2400, ttft_ms=650, tokens_per_second=35, tier="premium",
+                             cost_per_1k_tokens=0.03, error_rate=0.02),
+    "claude-3-sonnet": ProviderProfile(1800, ttft_ms=500, tokens_per_second=55, tier="standard",
+                                       cost_per_1k_tokens=0.015, error_rate=0.02),
+    "gemini-1.5-flash": ProviderProfile(900, ttft_ms=300, tokens_per_second=90, tier="basic",
+                                        cost_per_1k_tokens=0.002, error_rate=0.01),
+    "gpt-3.5-turbo": ProviderProfile(1100, ttft_ms=350, tokens_per_second=80, tier="basic",
+                                     cost_per_1k_tokens=0.002, error_rate=0.01),
+}
+
+
+class StubProviderError(Exception):
+    """Error raised by a stub adapter to emulate a provider failure."""
+
+
+class StubModelAdapter(BaseModelAdapter):
+    """
+    Model adapter that emulates a provider without network calls.
+
+    Latencies, failures and completions come from a seeded random generator,
+    so the same seed produces the same sequence on every run. Emulated time
+    is accumulated rather than slept unless time_scale is set, which keeps
+    benchmarks fast and leaves only our own overhead in wall-clock timings.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        profile: ProviderProfile,
+        seed: int = DEFAULT_SEED,
+        time_scale: float = 0.0
+    ):
+        """
+        Initialize the stub adapter.
+
+        Args:
+            model_name: Model name reported in responses
+            profile: Latency and streaming profile
+            seed: Seed for latency, failure and content generation
+            time_scale: Fraction of emulated time to actually sleep
+        """
+        self.model_name = model_name
+        self.profile = profile
+        self.time_scale = time_scale
+        self._rng = random.Random(f"{seed}:{model_name}")
+
+        self.calls = 0
+        self.errors = 0
+        self.simulated_ms: List[float] = []
+        self.slept_seconds = 0.0
+
+    def _sample_latency_ms(self, median_ms: float) -> float:
+        return self._rng.lognormvariate(0.0, self.profile.latency_sigma) * median_ms
+
+    async def _wait(self, ms: float) -> None:
+        if self.time_scale > 0:
+            seconds = ms / 1000.0 * self.time_scale
+            self.slept_seconds += seconds
+            await asyncio.sleep(seconds)
+        else:
+            await asyncio.sleep(0)
+
+    def _completion_words(self) -> List[str]:
+        # Roughly four characters per token
+        return [self._rng.choice(_WORDS) for _ in range(max(1, self.profile.completion_tokens * 3 // 4))]
+
+    def _maybe_fail(self) -> None:
+        if self._rng.random() < self.profile.error_rate:
+            self.errors += 1
+            raise StubProviderError(f"{self.model_name}: service unavailable (503)")
+
+    async def generate(self, request: ModelRequest) -> ModelResponse:
+        """Return a deterministic completion after emulated provider latency."""
+        self.calls += 1
+        latency_ms = self._sample_latency_ms(self.profile.median_latency_ms)
+        self.simulated_ms.append(latency_ms)
+        await self._wait(latency_ms)
+        self._maybe_fail()
+
+        words = self._completion_words()
+        return ModelResponse(
+            content=" ".join(words),
+            model_name=self.model_name,
+            usage={
+                "prompt_tokens": len(request.prompt) // 4,
+                "completion_tokens": self.profile.completion_tokens,
+                "total_tokens": len(request.prompt) // 4 + self.profile.completion_tokens,
+            },
+            finish_reason="stop",
+            metadata={"simulated_latency_ms": latency_ms},
+        )
+
+    async def stream_generate(self, request: ModelRequest) -> AsyncIterator[ModelResponse]:
+        """Stream a deterministic completion with emulated time to first token and chunk spacing."""
+        self.calls += 1
+        ttft_ms = self._sample_latency_ms(self.profile.ttft_ms)
+        chunk_ms = self.profile.chunk_tokens / self.profile.tokens_per_second * 1000.0
+        await self._wait(ttft_ms)
+        self._maybe_fail()
+
+        words = self._completion_words()
+        words_per_chunk = max(1, self.profile.chunk_tokens * 3 // 4)
+        total_ms = ttft_ms
+        for start in range(0, len(words), words_per_chunk):
+            if start:
+                await self._wait(chunk_ms)
+                total_ms += chunk_ms
+            last = start + words_per_chunk >= len(words)
+            yield ModelResponse(
+                content=" ".join(words[start:start + words_per_chunk]) + ("" if last else " "),
+                model_name=self.model_name,
+                finish_reason="stop" if last else None,
+                metadata={"simulated_ttft_ms": ttft_ms} if not start else {},
+            )
+        self.simulated_ms.append(total_ms)
+
+    async def embed(self, text: Union[str, List[str]]) -> List[List[float]]:
+        """Return deterministic pseudo-embeddings."""
+        texts = [text] if isinstance(text, str) else text
+        return [[random.Random(f"{self.model_name}:{t}").random() for _ in range(8)] for t in texts]
+
+    async def check_health(self) -> Dict[str, Any]:
+        """Report the stub as healthy."""
+        return {"status": "healthy", "model": self.model_name, "stub": True}
+
+    async def get_model_info(self) -> Dict[str, Any]:
+        """Return the emulated profile."""
+        return {"model": self.model_name, "stub": True, "profile": dict(vars(self.profile))}
+
+    # Interface used by the model routing service
+
+    def get_cost_per_1k_tokens(self) -> float:
+        return self.profile.cost_per_1k_tokens
+
+    def get_capabilities(self) -> List[str]:
+        return list(self.profile.capabilities)
+
+    def get_tier(self) -> str:
+        return self.profile.tier
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Linearly interpolated percentile, matching numpy's default method.
+
+    Args:
+        values: Sample values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Percentile value, or 0.0 for an empty sample
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize_us(samples_ns: List[int]) -> Dict[str, Any]:
+    """Summarize per-call timings in nanoseconds as microsecond statistics."""
+    samples_us = [s / 1000.0 for s in samples_ns]
+    return {
+        "iterations": len(samples_us),
+        "mean_us": round(sum(samples_us) / len(samples_us), 3) if samples_us else 0.0,
+        "min_us": round(min(samples_us), 3) if samples_us else 0.0,
+        "p50_us": round(percentile(samples_us, 50), 3),
+        "p95_us": round(percentile(samples_us, 95), 3),
+        "p99_us": round(percentile(samples_us, 99), 3),
+    }
+
+
+async def measure(
+    operation: Callable[[int], Any],
+    iterations: int = DEFAULT_ITERATIONS,
+    warmup: int = DEFAULT_WARMUP
+) -> Dict[str, Any]:
+    """
+    Time an operation per call.
+
+    Args:
+        operation: Callable taking the iteration index; may return an awaitable
+        iterations: Timed calls
+        warmup: Untimed calls made first to fill caches and JIT-free paths
+
+    Returns:
+        Microsecond statistics for the timed calls
+    """
+    for i in range(warmup):
+        result = operation(i)
+        if inspect.isawaitable(result):
+            await result
+
+    samples: List[int] = []
+    perf_counter_ns = time.perf_counter_ns
+    for i in range(iterations):
+        start = perf_counter_ns()
+        result = operation(i)
+        if inspect.isawaitable(result):
+            await result
+        samples.append(perf_counter_ns() - start)
+
+    return summarize_us(samples)
+
+
+def _serialize_response(response: ModelResponse) -> str:
+    return json.dumps({
+        "content": response.content,
+        "model": response.model_name,
+        "usage": response.usage,
+        "finish_reason": response.finish_reason,
+        "metadata": response.metadata,
+    })
+
+
+def _deterministic_prompts(seed: int, count: int = 64) -> List[str]:
+    rng = random.Random(f"{seed}:prompts")
+    return [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(20, 200))) for _ in range(count)]
+
+
+LayerSetup = Callable[["OfflineBenchmarkSuite"], Awaitable[Callable[[int], Any]]]
+
+
+class OfflineBenchmarkSuite:
+    """
+    Deterministic benchmark suite for the AI request path.
+
+    Each layer is registered as a setup coroutine that builds the layer
+    against stub adapters and returns an operation to time. Layers whose
+    modules cannot be imported or set up are reported as skipped rather than
+    failing the run, so the suite still produces comparable results for the
+    remaining layers.
+    """
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, ProviderProfile]] = None,
+        seed: int = DEFAULT_SEED,
+        iterations: int = DEFAULT_ITERATIONS,
+        warmup: int = DEFAULT_WARMUP,
+        time_scale: float = 0.0
+    ):
+        """
+        Initialize the suite.
+
+        Args:
+            profiles: Stub provider profiles by model name
+            seed: Seed for inputs and stub providers
+            iterations: Timed calls per layer
+            warmup: Untimed calls per layer
+            time_scale: Fraction of emulated provider time to actually sleep
+        """
+        self.profiles = profiles or DEFAULT_PROFILES
+        self.seed = seed
+        self.iterations = iterations
+        self.warmup = warmup
+        self.time_scale = time_scale
+
+        self.adapters: Dict[str, StubModelAdapter] = {}
+        self.prompts = _deterministic_prompts(seed)
+        self.layers: "OrderedDict[str, LayerSetup]" = OrderedDict([
+            ("routing", _setup_routing),
+            ("throttling", _setup_throttling),
+            ("caching", _setup_caching),
+            ("fallback", _setup_fallback),
+            ("prompt_rendering", _setup_prompt_rendering),
+            ("token_counting", _setup_token_counting),
+            ("serialization", _setup_serialization),
+        ])
+
+    def register_layer(self, name: str, setup: LayerSetup) -> None:
+        """
+        Register or replace a layer.
+
+        Args:
+            name: Layer name used in results
+            setup: Coroutine taking the suite and returning the operation to time
+        """
+        self.layers[name] = setup
+
+    def _reset_adapters(self) -> None:
+        self.adapters = {
+            name: StubModelAdapter(name, profile, seed=self.seed, time_scale=self.time_scale)
+            for name, profile in self.profiles.items()
+        }
+
+    def request(self, i: int, model_name: Optional[str] = None) -> ModelRequest:
+        """Deterministic request for iteration i."""
+        models = list(self.profiles)
+        return ModelRequest(
+            prompt=self.prompts[i % len(self.prompts)],
+            model_name=model_name or models[i % len(models)],
+            temperature=0.0,
+            max_tokens=256,
+        )
+
+    async def run(self, layers: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Run the suite.
+
+        Args:
+            layers: Optional subset of layer names to run
+
+        Returns:
+            JSON-serializable results
+        """
+        self._reset_adapters()
+        started = time.perf_counter()
+
+        layer_results: Dict[str, Any] = {}
+        operations: "OrderedDict[str, Callable[[int], Any]]" = OrderedDict()
+        for name, setup in self.layers.items():
+            if layers and name not in layers:
+                continue
+            try:
+                operation = await setup(self)
+            except Exception as e:
+                logger.warning(f"Skipping benchmark layer {name}: {e}")
+                layer_results[name] = {"skipped": f"{type(e).__name__}: {e}"}
+                continue
+            try:
+                layer_results[name] = await measure(operation, self.iterations, self.warmup)
+                operations[name] = operation
+            except Exception as e:
+                logger.warning(f"Benchmark layer {name} failed: {e}")
+                layer_results[name] = {"error": f"{type(e).__name__}: {e}"}
+
+        self._reset_adapters()
+        end_to_end = await self._run_end_to_end(operations)
+        streaming = await self._run_streaming()
+
+        return {
+            "suite": "offline",
+            "version": RESULT_VERSION,
+            "timestamp": datetime.now().isoformat(),
+            "config": {
+                "seed": self.seed,
+                "iterations": self.iterations,
+                "warmup": self.warmup,
+                "time_scale": self.time_scale,
+                "models": list(self.profiles),
+            },
+            "environment": {
+                "python": platform.python_version(),
+                "implementation": platform.python_implementation(),
+                "machine": platform.machine(),
+            },
+            "layers": layer_results,
+            "end_to_end": end_to_end,
+            "streaming": streaming,
+            "providers": self._provider_summary(),
+            "duration_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    async def _run_end_to_end(self, operations: Dict[str, Callable[[int], Any]]) -> Dict[str, Any]:
+        """
+        Time full requests through every working layer and a stub provider.
+
+        Provider time is emulated, so the wall-clock time minus any time
+        actually slept is our own overhead per request.
+        """
+        models = list(self.profiles)
+        samples_ns: List[int] = []
+        failures = 0
+        perf_counter_ns = time.perf_counter_ns
+
+        for i in range(self.iterations):
+            slept_before = sum(a.slept_seconds for a in self.adapters.values())
+            start = perf_counter_ns()
+
+            for operation in operations.values():
+                result = operation(i)
+                if inspect.isawaitable(result):
+                    await result
+
+            request = self.request(i)
+            chain = [request.model_name] + [m for m in models if m != request.model_name]
+            for model_name in chain:
+                try:
+                    response = await self.adapters[model_name].generate(request)
+                    _serialize_response(response)
+                    break
+                except StubProviderError:
+                    continue
+            else:
+                failures += 1
+
+            elapsed = perf_counter_ns() - start
+            slept = sum(a.slept_seconds for a in self.adapters.values()) - slept_before
+            samples_ns.append(max(0, elapsed - int(slept * 1e9)))
+
+        overhead = summarize_us(samples_ns)
+        overhead["layers"] = list(operations)
+        overhead["failures"] = failures
+        return overhead
+
+    async def _run_streaming(self) -> Dict[str, Any]:
+        """Time stream consumption per chunk, excluding emulated provider time."""
+        adapter = next(iter(self.adapters.values()))
+        runs = max(1, self.iterations // 10)
+        per_chunk_ns: List[int] = []
+        chunks = 0
+        perf_counter_ns = time.perf_counter_ns
+
+        for i in range(runs):
+            slept_before = adapter.slept_seconds
+            count = 0
+            start = perf_counter_ns()
+            try:
+                async for chunk in adapter.stream_generate(self.request(i, adapter.model_name)):
+                    json.dumps({"text": chunk.content, "finish_reason": chunk.finish_reason})
+                    count += 1
+            except StubProviderError:
+                continue
+            elapsed = perf_counter_ns() - start - int((adapter.slept_seconds - slept_before) * 1e9)
+            if count:
+                per_chunk_ns.append(max(0, elapsed) // count)
+                chunks += count
+
+        result = summarize_us(per_chunk_ns)
+        result["model"] = adapter.model_name
+        result["chunks"] = chunks
+        return result
+
+    def _provider_summary(self) -> Dict[str, Any]:
+        """Emulated provider latency; identical for runs with the same seed."""
+        summary = {}
+        for name, adapter in self.adapters.items():
+            summary[name] = {
+                "calls": adapter.calls,
+                "errors": adapter.errors,
+                "simulated_p50_ms": round(percentile(adapter.simulated_ms, 50), 3),
+                "simulated_p95_ms": round(percentile(adapter.simulated_ms, 95), 3),
+            }
+        return summary
+
+
+async def _setup_routing(suite: OfflineBenchmarkSuite) -> Callable[[int], Any]:
+    from ..routing.model_routing_service import ModelRoutingService
+
+    service = ModelRoutingService(dict(suite.adapters))
+    task_types = ["content_generation", "summarization", "classification"]
+    return lambda i: service.resolve_model_chain(task_types[i % len(task_types)], complexity=1 + i % 2)
+
+
+async def _setup_throttling(suite: OfflineBenchmarkSuite) -> Callable[[int], Any]:
+    from ..throttling.throttle_backend import LocalThrottleBackend
+    from ..throttling.throttling_service import ThrottlingService
+
+    service = ThrottlingService(backend=LocalThrottleBackend())
+    # Limits high enough that every check runs the full path and is allowed
+    service.limits = {name: 10 ** 9 for name in list(suite.profiles) + ["default"]}
+    models = list(suite.profiles)
+    return lambda i: service.check_throttle(models[i % len(models)], user_id=f"user-{i % 16}")
+
+
+async def _setup_caching(suite: OfflineBenchmarkSuite) -> Callable[[int], Any]:
+    from ..adapters.caching import AdapterCache
+
+    cache = AdapterCache(max_size=len(suite.prompts) * 2)
+    requests = [suite.request(i) for i in range(len(suite.prompts))]
+    # Every other request is cached so lookups mix hits and misses
+    for request in requests[::2]:
+        await cache.set(request, ModelResponse(content="cached", model_name=request.model_name))
+    return lambda i: cache.get(requests[i % len(requests)])
+
+
+async def _setup_fallback(suite: OfflineBenchmarkSuite) -> Callable[[int], Any]:
+    from ..fallback import fallback_service
+
+    errors = [
+        "Rate limit exceeded (429)",
+        "Request timed out",
+        "503 service unavailable",
+        "content policy violation",
+    ]
+    models = list(suite.profiles)
+
+    def operation(i: int) -> List[str]:
+        chain = fallback_service.get_fallback_chain(models[i % len(models)])
+        error_type = fallback_service.categorize_error(errors[i % len(errors)])
+        candidates = chain.get_fallback_for_error(error_type) if chain else models
+        return fallback_service.get_available_models(candidates)
+
+    return operation
+
+
+async def _setup_prompt_rendering(suite: OfflineBenchmarkSuite) -> Callable[[int], Any]:
+    from ..prompts.compiled_cache import CompiledPlaceholderTemplate, CompiledTemplateCache
+
+    cache = CompiledTemplateCache()
+    source = (
+        "You are an email copywriter for {{brand}}. Write a {{tone}} email to {{audience}} "
+        "about {{topic}}. Keep it under {{length}} words.\n\nContext: {{context}}"
+    )
+    variables = [
+        {
+            "brand": f"brand-{i % 8}",
+            "tone": ["friendly", "formal", "playful"][i % 3],
+            "audience": f"segment {i % 5}",
+            "topic": suite.prompts[i][:40],
+            "length": 100 + i % 4 * 50,
+            "context": suite.prompts[i],
+        }
+        for i in range(len(suite.prompts))
+    ]
+
+    def operation(i: int) -> str:
+        template = cache.get("benchmark", "email", "1.0.0", source, CompiledPlaceholderTemplate)
+        return template.render(variables[i % len(variables)])
+
+    return operation
+
+
+async def _setup_token_counting(suite: OfflineBenchmarkSuite) -> Callable[[int], Any]:
+    from ..utils.token_counter import count_tokens
+
+    if count_tokens(suite.prompts[0], "gpt-4") is None:
+        raise RuntimeError("tokenizer unavailable")
+    prompts = suite.prompts
+    return lambda i: count_tokens(prompts[i % len(prompts)], "gpt-4")
+
+
+async def _setup_serialization(suite: OfflineBenchmarkSuite) -> Callable[[int], Any]:
+    adapter = StubModelAdapter("serialization", ProviderProfile(1.0), seed=suite.seed)
+    responses = [await adapter.generate(suite.request(i)) for i in range(len(suite.prompts))]
+
+    return lambda i: _serialize_response(responses[i % len(responses)])
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    thresholds: Optional[Dict[str, float]] = None,
+    min_delta_us: float = MIN_REGRESSION_US
+) -> Dict[str, Any]:
+    """
+    Compare suite results against a baseline.
+
+    A statistic regresses when it is slower than the baseline by more than
+    its relative threshold and by more than min_delta_us. A layer that was
+    measured in the baseline but is now skipped or failed also counts as a
+    regression, so a broken import cannot pass the gate by dropping out.
+
+    Args:
+        current: Results from OfflineBenchmarkSuite.run
+        baseline: Baseline results
+        thresholds: Allowed relative slowdown per statistic
+        min_delta_us: Absolute noise floor in microseconds
+
+    Returns:
+        Dictionary with regressions, improvements and a passed flag
+    """
+    thresholds = thresholds or DEFAULT_REGRESSION_THRESHOLDS
+    if baseline.get("version") != current.get("version"):
+        return {"comparable": False, "passed": True, "regressions": [], "improvements": [],
+                "reason": "result format version differs"}
+
+    sections = dict(current.get("layers", {}))
+    sections["end_to_end"] = current.get("end_to_end", {})
+    sections["streaming"] = current.get("streaming", {})
+    baseline_sections = dict(baseline.get("layers", {}))
+    baseline_sections["end_to_end"] = baseline.get("end_to_end", {})
+    baseline_sections["streaming"] = baseline.get("streaming", {})
+
+    regressions = []
+    improvements = []
+    for name, stats in sections.items():
+        previous = baseline_sections.get(name)
+        if not previous:
+            continue
+        status = next((key for key in ("skipped", "error") if key in stats), None)
+        if status:
+            if any(stat in previous for stat in thresholds):
+                regressions.append({
+                    "layer": name,
+                    "stat": "status",
+                    "baseline": "measured",
+                    "current": status,
+                    "reason": stats[status],
+                })
+            continue
+        for stat, threshold in thresholds.items():
+            if stat not in stats or not previous.get(stat):
+                continue
+            delta = stats[stat] - previous[stat]
+            change = delta / previous[stat]
+            entry = {
+                "layer": name,
+                "stat": stat,
+                "baseline": previous[stat],
+                "current": stats[stat],
+                "change_pct": round(change * 100, 2),
+            }
+            if change > threshold and delta > min_delta_us:
+                regressions.append(entry)
+            elif change < -threshold and -delta > min_delta_us:
+                improvements.append(entry)
+
+    return {
+        "comparable": True,
+        "passed": not regressions,
+        "regressions": regressions,
+        "improvements": improvements,
+    }
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    """Write results as JSON, creating parent directories."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> Optional[Dict[str, Any]]:
+    """Read results written by save_results, or None if the file does not exist."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the suite from the command line; exits non-zero on regression."""
+    parser = argparse.ArgumentParser(description="Offline AI path benchmark")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--layers", nargs="*", help="Only run these layers")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results to --baseline")
+    args = parser.parse_args(argv)
+
+    suite = OfflineBenchmarkSuite(seed=args.seed, iterations=args.iterations, warmup=args.warmup)
+    results = asyncio.run(suite.run(layers=args.layers))
+
+    if args.output:
+        save_results(results, args.output)
+
+    exit_code = 0
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        if baseline and not args.update_baseline:
+            comparison = compare_results(results, baseline)
+            results["baseline_comparison"] = comparison
+            exit_code = 0 if comparison["passed"] else 1
+        else:
+            save_results(results, args.baseline)
+
+    json.dump(results, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write("\n")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Compiled Prompt Template Cache
+
+This module keeps compiled prompt templates and rendered token counts so
+rendering a prompt does not re-parse its source on every request. Entries
+are keyed by template ID, version and a hash of the source, and are shared
+by PromptService and TemplateManager.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from jinja2 import Environment, meta
+
+# Default settings match jinja2.Template(source), which templates used before
+_JINJA_ENV = Environment()
+
+# Matches TemplateManager's {{name}} placeholders
+_PLACEHOLDER_PATTERN = re.compile(r"\{\{([^{}]+?)\}\}")
+
+
+def source_digest(source: str) -> str:
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+class CompiledJinjaTemplate:
+    """A parsed Jinja2 template with its undeclared variables."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.digest = source_digest(source)
+        ast = _JINJA_ENV.parse(source)
+        self.variables = sorted(meta.find_undeclared_variables(ast))
+        self.template = _JINJA_ENV.from_string(source)
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        return self.template.render(**variables)
+
+
+class CompiledPlaceholderTemplate:
+    """A {{name}} substitution template pre-split into literal and slot segments."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.digest = source_digest(source)
+        # Odd indexes hold placeholder names, even indexes literal text
+        self.segments = _PLACEHOLDER_PATTERN.split(source)
+        self.variables = sorted(set(self.segments[1::2]))
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        parts = list(self.segments)
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            parts[i] = str(variables[name]) if name in variables else f"{{{{{name}}}}}"
+        return "".join(parts)
+
+
+CompiledTemplate = Union[CompiledJinjaTemplate, CompiledPlaceholderTemplate]
+
+
+class CompiledTemplateCache:
+    """
+    Bounded LRU cache of compiled templates and token counts
+
+    Token counts are taken from the rendered output and cached per
+    (template, version, rendered hash), so a prompt rendered again with the
+    same values is not re-tokenized.
+    """
+
+    def __init__(self, max_size: int = 2048):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of compiled templates kept
+        """
+        self.max_size = max_size
+        self._templates: "OrderedDict[Tuple[str, str, str, str], CompiledTemplate]" = OrderedDict()
+        self._token_counts: "OrderedDict[Tuple[str, str, str, str], int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "compiles": 0, "token_hits": 0, "token_misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _key(namespace: str, template_id: str, version: str, source: str) -> Tuple[str, str, str, str]:
+        return (namespace, template_id, version, source_digest(source))
+
+    def get(
+        self,
+        namespace: str,
+        template_id: str,
+        version: str,
+        source: str,
+        compiler: Callable[[str], CompiledTemplate] = CompiledJinjaTemplate,
+    ) -> CompiledTemplate:
+        """
+        Return the compiled template, compiling it on a miss
+
+        Args:
+            namespace: Owner of the template, e.g. "prompt_service"
+            template_id: Template ID
+            version: Template version
+            source: Template source
+            compiler: Compiled template class
+
+        Returns:
+            Compiled template
+        """
+        key = self._key(namespace, template_id, version, source)
+        with self._lock:
+            compiled = self._templates.get(key)
+            if compiled is not None:
+                self._templates.move_to_end(key)
+                self.stats["hits"] += 1
+                return compiled
+
+        compiled = compiler(source)
+        with self._lock:
+            self.stats["compiles"] += 1
+            self._templates[key] = compiled
+            if len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return compiled
+
+    def compile(
+        self,
+        namespace: str,
+        template_id: str,
+        version: str,
+        source: str,
+        compiler: Callable[[str], CompiledTemplate] = CompiledJinjaTemplate,
+    ) -> CompiledTemplate:
+        """Compile a template eagerly, replacing any cached entry for its version."""
+        self.invalidate(namespace, template_id, version)
+        return self.get(namespace, template_id, version, source, compiler)
+
+    def count_tokens(
+        self,
+        namespace: str,
+        template_id: str,
+        version: str,
+        rendered: str,
+        counter: Callable[[str], int],
+    ) -> int:
+        """
+        Count the tokens of a rendered template
+
+        Args:
+            namespace: Owner of the template
+            template_id: Template ID
+            version: Template version
+            rendered: Rendered text
+            counter: Function counting the tokens in a string
+
+        Returns:
+            Token count of the rendered text
+        """
+        key = self._key(namespace, template_id, version, rendered)
+        with self._lock:
+            tokens = self._token_counts.get(key)
+            if tokens is not None:
+                self._token_counts.move_to_end(key)
+                self.stats["token_hits"] += 1
+                return tokens
+
+        tokens = counter(rendered)
+        with self._lock:
+            self.stats["token_misses"] += 1
+            self._token_counts[key] = tokens
+            if len(self._token_counts) > self.max_size * 4:
+                self._token_counts.popitem(last=False)
+        return tokens
+
+    def invalidate(self, namespace: str, template_id: str, version: Optional[str] = None) -> None:
+        """
+        Drop cached entries for a template
+
+        Args:
+            namespace: Owner of the template
+            template_id: Template ID
+            version: Only drop this version when given
+        """
+        def matches(key: Tuple) -> bool:
+            return key[0] == namespace and key[1] == template_id and (version is None or key[2] == version)
+
+        with self._lock:
+            for key in [k for k in self._templates if matches(k)]:
+                del self._templates[key]
+            for key in [k for k in self._token_counts if matches(k)]:
+                del self._token_counts[key]
+            self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cache statistics."""
+        with self._lock:
+            return {"templates": len(self._templates), "token_counts": len(self._token_counts), **self.stats}
+
+
+# Shared by PromptService and TemplateManager
+compiled_template_cache = CompiledTemplateCache()
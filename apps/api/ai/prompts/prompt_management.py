@@ -6,10 +6,11 @@ from datetime import datetime
 from enum import Enum
 import re
 import json
+import time
 import structlog
 from pydantic import BaseModel, Field, validator
 from sqlalchemy.orm import Session
-from jinja2 import Template, Environment, meta, TemplateSyntaxError
+from jinja2 import Environment, meta, TemplateSyntaxError
 import hashlib
 import uuid
 
@@ -17,6 +18,14 @@ from ...database.transaction import transaction, transactional
 from ...cache.tiered_cache_service import TieredCacheService, CacheTier
 from ...monitoring.performance_metrics import PerformanceMetricsService, MetricType
 from ...errors.maily_error import ResourceNotFoundError, ValidationError
+from ..utils.token_counter import count_tokens
+from .compiled_cache import compiled_template_cache
+
+# Namespace of PromptService templates in the shared compiled template cache
+PROMPT_CACHE_NAMESPACE = "prompt_service"
+
+# Tokenizer used for prompt token counts when no model is given
+DEFAULT_TOKEN_MODEL = "gpt-4"
 
 logger = structlog.get_logger("justmaily.ai.prompts")
 
@@ -99,8 +108,14 @@ class PromptTemplate(BaseModel):
                 else:
                     version = f"v{len(existing_versions) + 1}"
 
-        # Extract variables from template
-        variables = self._extract_variables(template)
+        # Compile eagerly so the first render does not pay for parsing
+        try:
+            variables = compiled_template_cache.compile(
+                PROMPT_CACHE_NAMESPACE, self.id, version, template
+            ).variables
+        except TemplateSyntaxError:
+            # Keep the version; rendering it will report the syntax error
+            variables = self._extract_variables(template)
 
         # Create version
         prompt_version = PromptVersion(
@@ -176,11 +191,44 @@ class PromptTemplate(BaseModel):
 
         # Render template
         try:
-            template = Template(prompt_version.template)
-            return template.render(**variables)
+            return self._compiled(prompt_version).render(variables)
         except Exception as e:
             raise ValueError(f"Error rendering template: {str(e)}")
 
+    def count_rendered_tokens(
+        self,
+        rendered: str,
+        version: Optional[str] = None,
+        model_name: Optional[str] = None
+    ) -> int:
+        """Count the tokens of a rendered prompt.
+
+        Counts are cached per version and rendered text, so repeated renders
+        with the same values are not re-tokenized.
+
+        Args:
+            rendered: Output of render() for this version
+            version: Optional version string or default
+            model_name: Optional model whose tokenizer to use
+
+        Returns:
+            Token count
+        """
+        prompt_version = self.get_version(version)
+        model = model_name or DEFAULT_TOKEN_MODEL
+        return compiled_template_cache.count_tokens(
+            PROMPT_CACHE_NAMESPACE,
+            self.id,
+            prompt_version.version,
+            rendered,
+            lambda text: count_tokens(text, model)
+        )
+
+    def _compiled(self, prompt_version: PromptVersion):
+        return compiled_template_cache.get(
+            PROMPT_CACHE_NAMESPACE, self.id, prompt_version.version, prompt_version.template
+        )
+
     def _extract_variables(self, template_str: str) -> List[str]:
         """Extract variables from a template string.
 
@@ -346,14 +394,14 @@ class PromptService:
             set_as_default=True
         )
 
-        # Store in DB (placeholder - actual DB operation depends on model)
-        # In a real implementation, this would use the appropriate ORM method
-        self._templates[template_id] = prompt_template
-
         # Invalidate cache
         if self.cache:
             self.cache.invalidate(f"prompt:*")
 
+        # Store in DB (placeholder - actual DB operation depends on model)
+        # In a real implementation, this would use the appropriate ORM method
+        self._store_template(prompt_template)
+
         # Log creation
         logger.info(
             "Prompt template created",
@@ -382,7 +430,8 @@ class PromptService:
         Raises:
             ResourceNotFoundError: If template not found
         """
-        # Try cache first
+        # Try the shared cache first so updates made on other replicas are seen;
+        # compiled templates are keyed by source, so a fresh copy reuses them
         if self.cache:
             cache_key = f"prompt:{template_id}"
             cached = self.cache.get(cache_key)
@@ -411,6 +460,22 @@ class PromptService:
         # Not found
         raise ResourceNotFoundError(f"Prompt template {template_id} not found")
 
+    def _store_template(self, prompt_template: PromptTemplate) -> None:
+        """Store a template in memory and the shared cache.
+
+        Args:
+            prompt_template: Template to store
+        """
+        self._templates[prompt_template.id] = prompt_template
+
+        if self.cache:
+            self.cache.set(
+                key=f"prompt:{prompt_template.id}",
+                value=prompt_template.dict(),
+                data_type="prompt_template",
+                tier=CacheTier.NORMAL
+            )
+
     def get_templates(
         self,
         category: Optional[PromptCategory] = None,
@@ -483,13 +548,13 @@ class PromptService:
             set_as_default=set_as_default
         )
 
-        # Update in storage
-        self._templates[template_id] = prompt_template
-
         # Invalidate cache
         if self.cache:
             self.cache.invalidate(f"prompt:{template_id}")
 
+        # Update in storage
+        self._store_template(prompt_template)
+
         # Log version addition
         logger.info(
             "Prompt template version added",
@@ -525,13 +590,21 @@ class PromptService:
         prompt_template.default_version = version
         prompt_template.updated_at = datetime.now()
 
-        # Update in storage
-        self._templates[template_id] = prompt_template
+        # Drop compiled entries and token counts of the template, then compile
+        # the new default eagerly so the switch does not slow the next render
+        compiled_template_cache.invalidate(PROMPT_CACHE_NAMESPACE, template_id)
+        try:
+            prompt_template._compiled(prompt_template.versions[version])
+        except TemplateSyntaxError as e:
+            logger.warning("Default prompt version has a syntax error", template_id=template_id, version=version, error=str(e))
 
         # Invalidate cache
         if self.cache:
             self.cache.invalidate(f"prompt:{template_id}")
 
+        # Update in storage
+        self._store_template(prompt_template)
+
         # Log version change
         logger.info(
             "Prompt template default version changed",
@@ -544,7 +617,8 @@ class PromptService:
         self,
         template_id: str,
         variables: Dict[str, Any],
-        version: Optional[str] = None
+        version: Optional[str] = None,
+        model_name: Optional[str] = None
     ) -> str:
         """Render a prompt with variables.
 
@@ -552,6 +626,7 @@ class PromptService:
             template_id: Template ID
             variables: Dictionary of variables
             version: Optional version string or default
+            model_name: Optional model whose tokenizer counts prompt tokens
 
         Returns:
             Rendered prompt
@@ -561,56 +636,43 @@ class PromptService:
             ValidationError: If missing required variables or rendering fails
         """
         start_time = time.time()
-        rendered_prompt = None
         success = False
+        task_type = "unknown"
+        version_used = version or "unknown"
 
         try:
             # Get template
             prompt_template = self.get_template(template_id, version)
-
-            # Record metric start
-            if self.metrics:
-                self.metrics.record_metric(
-                    metric_type=MetricType.AI,
-                    name="prompt_render_start",
-                    duration_ms=0,
-                    metadata={
-                        "template_id": template_id,
-                        "version": version or prompt_template.default_version,
-                        "task_type": prompt_template.task_type
-                    }
-                )
+            task_type = prompt_template.task_type
+            version_used = version or prompt_template.default_version
 
             # Render template
             try:
-                rendered_prompt = prompt_template.render(variables, version)
-                success = True
+                rendered_prompt = prompt_template.render(variables, version_used)
             except ValueError as e:
                 # Convert to validation error
                 raise ValidationError(f"Error rendering prompt: {str(e)}")
 
+            tokens_in = prompt_template.count_rendered_tokens(
+                rendered_prompt, version_used, model_name
+            )
+            success = True
+
             # Record performance
             self._record_usage(
                 prompt_id=template_id,
-                version=version or prompt_template.default_version,
-                task_type=prompt_template.task_type,
+                version=version_used,
+                task_type=task_type,
                 success=True,
-                tokens_in=len(rendered_prompt) // 4,  # Rough estimate
+                tokens_in=tokens_in,
                 tokens_out=0,
                 latency=time.time() - start_time
             )
 
             return rendered_prompt
 
-        except Exception as e:
+        except Exception:
             # Record performance
-            if template_id in self._templates:
-                task_type = self._templates[template_id].task_type
-                version_used = version or self._templates[template_id].default_version
-            else:
-                task_type = "unknown"
-                version_used = version or "unknown"
-
             self._record_usage(
                 prompt_id=template_id,
                 version=version_used,
@@ -625,7 +687,7 @@ class PromptService:
             raise
 
         finally:
-            # Record metric completion
+            # Record a single metric per render
             if self.metrics:
                 self.metrics.record_metric(
                     metric_type=MetricType.AI,
@@ -633,8 +695,8 @@ class PromptService:
                     duration_ms=(time.time() - start_time) * 1000,
                     metadata={
                         "template_id": template_id,
-                        "version": version_used if 'version_used' in locals() else "unknown",
-                        "task_type": task_type if 'task_type' in locals() else "unknown",
+                        "version": version_used,
+                        "task_type": task_type,
                         "success": success
                     },
                     success=success,
@@ -13,8 +13,13 @@ from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
 from pydantic import BaseModel, Field, validator
 
+from .compiled_cache import CompiledPlaceholderTemplate, compiled_template_cache
+
 logger = logging.getLogger(__name__)
 
+# Namespace of TemplateManager templates in the shared compiled template cache
+TEMPLATE_CACHE_NAMESPACE = "template_manager"
+
 
 class PromptTemplate(BaseModel):
     """Model for a prompt template."""
@@ -71,6 +76,7 @@ class TemplateManager:
                         template_data = json.load(f)
                         template = PromptTemplate(**template_data)
                         self.templates[template.id] = template
+                        self._compile(template)
                 except Exception as e:
                     logger.error(f"Error loading template {filename}: {str(e)}")
 
@@ -94,8 +100,10 @@ class TemplateManager:
             with open(os.path.join(self.templates_dir, f"{template.id}.json"), "w") as f:
                 f.write(template.json(indent=2))
 
-            # Update in-memory cache
+            # Update in-memory cache and replace the compiled form
+            compiled_template_cache.invalidate(TEMPLATE_CACHE_NAMESPACE, template.id)
             self.templates[template.id] = template
+            self._compile(template)
 
             return True
         except Exception as e:
@@ -135,6 +143,7 @@ class TemplateManager:
 
             # Remove from in-memory cache
             del self.templates[template_id]
+            compiled_template_cache.invalidate(TEMPLATE_CACHE_NAMESPACE, template_id)
 
             return True
         except Exception as e:
@@ -173,12 +182,18 @@ class TemplateManager:
         if not template:
             raise ValueError(f"Template {template_id} not found")
 
-        # Simple variable substitution
-        rendered = template.template
-        for key, value in variables.items():
-            rendered = rendered.replace(f"{{{{{key}}}}}", str(value))
-
-        return rendered
+        # Simple variable substitution over the pre-split template
+        return self._compile(template).render(variables)
+
+    def _compile(self, template: PromptTemplate) -> CompiledPlaceholderTemplate:
+        """Return the compiled form of a template from the shared cache."""
+        return compiled_template_cache.get(
+            TEMPLATE_CACHE_NAMESPACE,
+            template.id,
+            template.version,
+            template.template,
+            compiler=CompiledPlaceholderTemplate
+        )
 
     def create_template(
         self,
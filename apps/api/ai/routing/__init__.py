@@ -11,10 +11,12 @@ from .model_routing_service import (
     ModelTier,
     RoutingStrategy
 )
+from .batch_engine import BatchEngine
 
 __all__ = [
     "ModelRoutingService",
     "TaskComplexity",
     "ModelTier",
-    "RoutingStrategy"
+    "RoutingStrategy",
+    "BatchEngine"
 ]
@@ -0,0 +1,565 @@
+"""
+Batch generation engine for the model routing service.
+
+Routes each distinct request shape once, groups prompts by the selected
+model, and runs each group inside a per-provider concurrency window.
+Adapters exposing native batch methods receive chunks of prompts in one
+call. Results stream back in completion order.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncio
+import json
+import time
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Default in-flight calls per provider when not configured
+DEFAULT_PROVIDER_CONCURRENCY = 8
+
+# Prompts per native batch call
+DEFAULT_NATIVE_BATCH_SIZE = 20
+
+# Offline batch job polling
+DEFAULT_BATCH_POLL_INTERVAL = 30.0
+DEFAULT_OFFLINE_BATCH_TIMEOUT = 24 * 3600.0
+
+# Longest single wait when the throttling service asks us to back off
+MAX_THROTTLE_WAIT = 30.0
+
+# Model ID prefixes used to find a model's provider
+PROVIDER_PREFIXES = {
+    "gpt": "openai",
+    "o1": "openai",
+    "text-embedding": "openai",
+    "claude": "anthropic",
+    "gemini": "google",
+    "deepseek": "deepseek",
+}
+
+# Per-item fields that change the routing decision
+ROUTING_FIELDS = ("complexity", "requirements", "override_model")
+
+# Per-item fields passed to the adapter
+GENERATION_FIELDS = ("max_tokens", "temperature", "top_p")
+
+
+class BatchItem:
+    """A prompt in a batch with its resolved settings."""
+
+    __slots__ = ("index", "prompt", "routing", "params", "chain")
+
+    def __init__(self, index: int, prompt: str, routing: Dict[str, Any], params: Dict[str, Any]):
+        self.index = index
+        self.prompt = prompt
+        self.routing = routing
+        self.params = params
+        self.chain: List[str] = []
+
+
+class WindowSlot:
+    """A held slot in a provider's concurrency window; releasing twice is a no-op."""
+
+    __slots__ = ("engine", "provider", "held")
+
+    def __init__(self, engine: "BatchEngine", provider: str):
+        self.engine = engine
+        self.provider = provider
+        self.held = True
+
+    def release(self) -> None:
+        if self.held:
+            self.held = False
+            self.engine._in_flight[self.provider] -= 1
+            self.engine.window(self.provider).release()
+
+
+class GroupFailure:
+    """Queue entry telling run() that a model group stopped before finishing."""
+
+    __slots__ = ("group", "error")
+
+    def __init__(self, group: List[BatchItem], error: BaseException):
+        self.group = group
+        self.error = error
+
+
+class BatchEngine:
+    """Batch generation with per-provider concurrency windows.
+
+    Windows are shared by every batch run through the same routing service,
+    so concurrent batches cannot together exceed a provider's limit.
+
+    Attributes:
+        service: Routing service used for model selection and metrics
+        throttling_service: Optional ThrottlingService consulted before calls
+    """
+
+    def __init__(
+        self,
+        service: Any,
+        throttling_service: Optional[Any] = None,
+        config: Optional[Dict[str, Any]] = None
+    ):
+        """Initialize the batch engine.
+
+        Args:
+            service: ModelRoutingService the engine belongs to
+            throttling_service: Optional throttling service
+            config: Optional settings: provider_concurrency (dict or int),
+                native_batch_size, batch_poll_interval, offline_batch_timeout
+        """
+        self.service = service
+        self.throttling_service = throttling_service
+        config = config or {}
+
+        concurrency = config.get("provider_concurrency", DEFAULT_PROVIDER_CONCURRENCY)
+        if isinstance(concurrency, dict):
+            self.provider_concurrency = dict(concurrency)
+            self.default_concurrency = concurrency.get("default", DEFAULT_PROVIDER_CONCURRENCY)
+        else:
+            self.provider_concurrency = {}
+            self.default_concurrency = int(concurrency)
+
+        self.native_batch_size = config.get("native_batch_size", DEFAULT_NATIVE_BATCH_SIZE)
+        self.poll_interval = config.get("batch_poll_interval", DEFAULT_BATCH_POLL_INTERVAL)
+        self.offline_timeout = config.get("offline_batch_timeout", DEFAULT_OFFLINE_BATCH_TIMEOUT)
+
+        self._windows: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self.stats = {"calls": 0, "native_batches": 0, "offline_jobs": 0, "throttle_waits": 0, "fallbacks": 0}
+
+    def provider_for(self, model_id: str) -> str:
+        """Return the provider a model's calls are counted against."""
+        provider = getattr(self.service.adapters.get(model_id), "provider", None)
+        if isinstance(provider, str):
+            return provider
+        for prefix, name in PROVIDER_PREFIXES.items():
+            if model_id.startswith(prefix):
+                return name
+        return model_id.split("-", 1)[0]
+
+    def window(self, provider: str) -> asyncio.Semaphore:
+        """Return the concurrency window for a provider."""
+        window = self._windows.get(provider)
+        if window is None:
+            window = asyncio.Semaphore(self.window_limit(provider))
+            self._windows[provider] = window
+            self._in_flight[provider] = 0
+        return window
+
+    def window_limit(self, provider: str) -> int:
+        """Return the number of concurrent calls allowed for a provider."""
+        return self.provider_concurrency.get(provider, self.default_concurrency)
+
+    async def acquire_slot(self, provider: str) -> WindowSlot:
+        """Wait for and hold a slot in a provider's window."""
+        await self.window(provider).acquire()
+        self._in_flight[provider] += 1
+        return WindowSlot(self, provider)
+
+    def _build_items(
+        self,
+        prompts: List[Union[str, Dict[str, Any]]],
+        defaults: Dict[str, Any]
+    ) -> List[BatchItem]:
+        items = []
+        for index, entry in enumerate(prompts):
+            fields = dict(entry) if isinstance(entry, dict) else {"prompt": entry}
+            routing = {name: fields.get(name, defaults.get(name)) for name in ROUTING_FIELDS}
+            params = {name: fields.get(name, defaults[name]) for name in GENERATION_FIELDS}
+            items.append(BatchItem(index, fields["prompt"], routing, params))
+        return items
+
+    def _route(
+        self,
+        items: List[BatchItem],
+        task_type: str
+    ) -> Tuple[Dict[str, List[BatchItem]], List[Tuple[BatchItem, Exception]]]:
+        """Resolve each distinct routing shape once and group items by primary model.
+
+        Returns:
+            Items grouped by model ID, and items that could not be routed
+        """
+        decisions: Dict[str, Union[List[str], Exception]] = {}
+        groups: Dict[str, List[BatchItem]] = {}
+        unrouted: List[Tuple[BatchItem, Exception]] = []
+
+        for item in items:
+            key = json.dumps(item.routing, sort_keys=True, default=str)
+            decision = decisions.get(key)
+            if decision is None:
+                try:
+                    decision = self.service.resolve_model_chain(task_type, **item.routing)
+                except Exception as e:
+                    decision = e
+                decisions[key] = decision
+
+            if isinstance(decision, Exception):
+                unrouted.append((item, decision))
+            else:
+                item.chain = decision
+                groups.setdefault(decision[0], []).append(item)
+
+        return groups, unrouted
+
+    async def run(
+        self,
+        prompts: List[Union[str, Dict[str, Any]]],
+        task_type: str,
+        complexity: Any = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        top_p: float = 1.0,
+        requirements: Optional[Dict[str, Any]] = None,
+        override_model: Optional[str] = None,
+        timeout: float = 30.0,
+        urgent: bool = True,
+        user_id: Optional[str] = None,
+        priority: str = "normal"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run a batch and yield results in completion order.
+
+        Args:
+            prompts: Prompts, or dicts with "prompt" and optional per-item
+                complexity, requirements, override_model, max_tokens,
+                temperature and top_p
+            task_type: Type of task
+            complexity: Default task complexity
+            max_tokens: Default maximum tokens to generate
+            temperature: Default temperature
+            top_p: Default top-p
+            requirements: Default routing requirements
+            override_model: Default model to use instead of routing
+            timeout: Timeout in seconds for each online call
+            urgent: When False, adapters with offline batch jobs are used
+            user_id: Optional user ID for throttling
+            priority: Throttling priority
+
+        Yields:
+            Result dictionaries carrying prompt_index
+        """
+        defaults = {
+            "complexity": complexity,
+            "requirements": requirements,
+            "override_model": override_model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p,
+        }
+        items = self._build_items(prompts, defaults)
+        if not items:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        options = {"timeout": timeout, "urgent": urgent, "user_id": user_id, "priority": priority, "task_type": task_type}
+
+        groups, unrouted = self._route(items, task_type)
+        for item, error in unrouted:
+            queue.put_nowait(self._error_result(item, error))
+
+        tasks = []
+        for model_id, group in groups.items():
+            task = asyncio.create_task(self._run_group(model_id, group, options, queue))
+            task.add_done_callback(
+                lambda done, model_id=model_id, group=group: self._on_group_done(done, model_id, group, queue)
+            )
+            tasks.append(task)
+
+        try:
+            seen = set()
+            while len(seen) < len(items):
+                entry = await queue.get()
+                if isinstance(entry, GroupFailure):
+                    # Everything the group produced is already ahead of this
+                    # entry, so its unseen items will never get a result
+                    for item in entry.group:
+                        if item.index not in seen:
+                            seen.add(item.index)
+                            yield self._error_result(item, entry.error)
+                    continue
+                seen.add(entry["prompt_index"])
+                yield entry
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _on_group_done(task: asyncio.Task, model_id: str, group: List[BatchItem], queue: asyncio.Queue) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.error("Batch group failed", model_id=model_id, size=len(group), error=str(task.exception()))
+        queue.put_nowait(GroupFailure(group, task.exception()))
+
+    async def _run_group(
+        self,
+        model_id: str,
+        group: List[BatchItem],
+        options: Dict[str, Any],
+        queue: asyncio.Queue
+    ) -> None:
+        """Dispatch one model's items, holding a window slot per call."""
+        adapter = self.service.adapters[model_id]
+        provider = self.provider_for(model_id)
+        pending: List[asyncio.Task] = []
+
+        if not options["urgent"] and callable(getattr(adapter, "submit_batch", None)):
+            chunks = self._chunks(group, len(group))
+            runner = self._run_offline
+        elif callable(getattr(adapter, "generate_batch", None)):
+            chunks = self._chunks(group, self.native_batch_size)
+            runner = self._run_native
+        else:
+            chunks = [[item] for item in group]
+            runner = self._run_chunk
+
+        try:
+            for chunk in chunks:
+                # Pace online calls before taking the slot, so a throttled
+                # model never holds a slot other models need
+                if runner is not self._run_offline:
+                    await self._throttle(model_id, chunk, options)
+                # Take the slot before creating the task so at most a window's
+                # worth of calls exist per provider, however large the batch
+                slot = await self.acquire_slot(provider)
+                pending.append(asyncio.create_task(
+                    self._dispatch(slot, runner(model_id, chunk, options, queue, slot), model_id, options, queue)
+                ))
+            await asyncio.gather(*pending)
+        except BaseException:
+            # Stop the rest of the group before run() reports its missing items
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            raise
+
+    async def _dispatch(
+        self,
+        slot: WindowSlot,
+        call: Any,
+        model_id: str,
+        options: Dict[str, Any],
+        queue: asyncio.Queue
+    ) -> None:
+        """Run a call in an acquired window slot, then fall back for failed items."""
+        try:
+            failures = await call
+        finally:
+            slot.release()
+
+        # Fallbacks run after the slot is released so a call never holds one
+        # provider's slot while waiting for another's
+        for item, error in failures:
+            await self._fallback(item, model_id, error, options, queue)
+
+    @staticmethod
+    def _chunks(group: List[BatchItem], size: int) -> List[List[BatchItem]]:
+        # Only items with identical generation settings can share a call
+        by_params: Dict[Tuple, List[BatchItem]] = {}
+        for item in group:
+            by_params.setdefault(tuple(sorted(item.params.items())), []).append(item)
+        size = max(size, 1)
+        return [
+            items[i:i + size]
+            for items in by_params.values()
+            for i in range(0, len(items), size)
+        ]
+
+    async def _throttle(self, model_id: str, chunk: List[BatchItem], options: Dict[str, Any]) -> None:
+        """Wait until the throttling service admits the chunk; call before taking a window slot."""
+        if not self.throttling_service:
+            return
+        tokens = sum(len(item.prompt.split()) + item.params["max_tokens"] for item in chunk)
+        while True:
+            throttled, retry_after, reason = await self.throttling_service.check_throttle(
+                model_id, user_id=options["user_id"], priority=options["priority"], tokens=tokens
+            )
+            if not throttled:
+                return
+            self.stats["throttle_waits"] += 1
+            logger.info("Batch throttled, waiting", model_id=model_id, retry_after=retry_after, reason=reason)
+            await asyncio.sleep(min(retry_after or 1.0, MAX_THROTTLE_WAIT))
+
+    async def _run_chunk(
+        self,
+        model_id: str,
+        chunk: List[BatchItem],
+        options: Dict[str, Any],
+        queue: asyncio.Queue,
+        slot: Optional[WindowSlot] = None
+    ) -> List[Tuple[BatchItem, Exception]]:
+        """Generate a single item.
+
+        Returns:
+            The item and its error if the call failed
+        """
+        item = chunk[0]
+        start_time = time.time()
+        try:
+            response = await asyncio.wait_for(
+                self.service.adapters[model_id].generate(item.prompt, **item.params),
+                timeout=options["timeout"]
+            )
+            # A malformed response counts as a failed call on this model
+            result = self._success_result(item, model_id, response, time.time() - start_time)
+        except Exception as e:
+            self.service._update_metrics(model_id, False, time.time() - start_time)
+            return [(item, e)]
+
+        self.stats["calls"] += 1
+        queue.put_nowait(result)
+        return []
+
+    async def _run_native(
+        self,
+        model_id: str,
+        chunk: List[BatchItem],
+        options: Dict[str, Any],
+        queue: asyncio.Queue,
+        slot: Optional[WindowSlot] = None
+    ) -> List[Tuple[BatchItem, Exception]]:
+        """Generate a chunk with the adapter's batch method."""
+        if len(chunk) == 1:
+            return await self._run_chunk(model_id, chunk, options, queue)
+
+        start_time = time.time()
+        try:
+            responses = await asyncio.wait_for(
+                self.service.adapters[model_id].generate_batch([item.prompt for item in chunk], **chunk[0].params),
+                timeout=options["timeout"]
+            )
+            if len(responses) != len(chunk):
+                raise ValueError(f"Batch returned {len(responses)} responses for {len(chunk)} prompts")
+        except Exception as e:
+            logger.warning("Native batch failed, retrying items individually",
+                           model_id=model_id, size=len(chunk), error=str(e))
+            self.service._update_metrics(model_id, False, time.time() - start_time)
+            return [(item, e) for item in chunk]
+
+        self.stats["native_batches"] += 1
+        return self._deliver(model_id, chunk, responses, time.time() - start_time, queue)
+
+    async def _run_offline(
+        self,
+        model_id: str,
+        chunk: List[BatchItem],
+        options: Dict[str, Any],
+        queue: asyncio.Queue,
+        slot: Optional[WindowSlot] = None
+    ) -> List[Tuple[BatchItem, Exception]]:
+        """Submit a non-urgent chunk as an offline batch job and poll for its results.
+
+        The window slot only covers the submission; polling runs without one
+        so a long job does not hold back online calls to the provider.
+        """
+        adapter = self.service.adapters[model_id]
+        start_time = time.time()
+        try:
+            try:
+                job_id = await adapter.submit_batch([item.prompt for item in chunk], **chunk[0].params)
+            finally:
+                if slot is not None:
+                    slot.release()
+            deadline = start_time + self.offline_timeout
+            while True:
+                responses = await adapter.poll_batch(job_id)
+                if responses is not None:
+                    break
+                if time.time() >= deadline:
+                    raise TimeoutError(f"Offline batch {job_id} did not finish in {self.offline_timeout}s")
+                await asyncio.sleep(self.poll_interval)
+            if len(responses) != len(chunk):
+                raise ValueError(f"Batch returned {len(responses)} responses for {len(chunk)} prompts")
+        except Exception as e:
+            logger.warning("Offline batch failed, retrying items online",
+                           model_id=model_id, size=len(chunk), error=str(e))
+            return [(item, e) for item in chunk]
+
+        self.stats["offline_jobs"] += 1
+        return self._deliver(model_id, chunk, responses, time.time() - start_time, queue)
+
+    def _deliver(
+        self,
+        model_id: str,
+        chunk: List[BatchItem],
+        responses: List[Any],
+        duration: float,
+        queue: asyncio.Queue
+    ) -> List[Tuple[BatchItem, Exception]]:
+        """Queue results for a batch's responses.
+
+        Returns:
+            Items whose response could not be turned into a result
+        """
+        # Batch latency is shared by its items for metrics and results
+        per_item = duration / len(chunk)
+        failures = []
+        for item, response in zip(chunk, responses):
+            try:
+                queue.put_nowait(self._success_result(item, model_id, response, per_item))
+            except Exception as e:
+                self.service._update_metrics(model_id, False, per_item)
+                failures.append((item, e))
+        return failures
+
+    async def _fallback(
+        self,
+        item: BatchItem,
+        failed_model: str,
+        error: Exception,
+        options: Dict[str, Any],
+        queue: asyncio.Queue
+    ) -> None:
+        """Retry an item on the next available models in its chain."""
+        # Override models run without fallbacks, as in generate_response
+        if not item.routing.get("override_model"):
+            chain = item.chain
+            position = chain.index(failed_model) + 1 if failed_model in chain else len(chain)
+            for model_id in chain[position:]:
+                if self.service._is_circuit_open(model_id):
+                    continue
+                self.stats["fallbacks"] += 1
+                await self._throttle(model_id, [item], options)
+                slot = await self.acquire_slot(self.provider_for(model_id))
+                try:
+                    failures = await self._run_chunk(model_id, [item], options, queue)
+                finally:
+                    slot.release()
+                if not failures:
+                    return
+                error = failures[0][1]
+
+        queue.put_nowait(self._error_result(item, error))
+
+    def _success_result(self, item: BatchItem, model_id: str, response: Any, duration: float) -> Dict[str, Any]:
+        result = self.service._prepare_result(
+            model_id,
+            response,
+            duration,
+            prompt_tokens=len(item.prompt.split()),
+            completion_tokens=len(response.content.split())
+        )
+        result["prompt_index"] = item.index
+        self.service._update_metrics(model_id, True, duration)
+        return result
+
+    @staticmethod
+    def _error_result(item: BatchItem, error: Exception) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": str(error),
+            "error_type": error.__class__.__name__,
+            "prompt_index": item.index
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return batch engine statistics."""
+        return {
+            **self.stats,
+            "windows": {
+                provider: {"limit": self.window_limit(provider),
+                           "available": self.window_limit(provider) - in_flight}
+                for provider, in_flight in self._in_flight.items()
+            }
+        }
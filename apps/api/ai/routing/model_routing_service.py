@@ -2,7 +2,7 @@
 Intelligent model routing service for AI requests.
 Routes requests to appropriate model adapters based on task characteristics.
 """
-from typing import Dict, List, Any, Optional, Tuple, Union, Set
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple, Union, Set
 from enum import Enum
 import asyncio
 import time
@@ -15,6 +15,7 @@ from ..adapters.base import ModelAdapter, ModelResponse
 from ..errors import AIGenerationError, InvalidInputError, RoutingError, ModelUnavailableError
 from ..fallback import fallback_service, FallbackChain
 from ..monitoring.performance_metrics import MetricType, MetricsService
+from .batch_engine import BatchEngine
 
 logger = structlog.get_logger(__name__)
 
@@ -55,7 +56,8 @@ class ModelRoutingService:
         self,
         model_adapters: Dict[str, ModelAdapter],
         metrics_service: Optional[MetricsService] = None,
-        config: Dict[str, Any] = None
+        config: Dict[str, Any] = None,
+        throttling_service: Optional[Any] = None
     ):
         """Initialize the routing service.
 
@@ -63,6 +65,7 @@ class ModelRoutingService:
             model_adapters: Dict mapping model IDs to adapters
             metrics_service: Optional metrics service for monitoring
             config: Optional configuration settings
+            throttling_service: Optional throttling service used by batches
         """
         self.adapters = model_adapters
         self.metrics = metrics_service
@@ -101,6 +104,9 @@ class ModelRoutingService:
         self.circuit_breaker_threshold = self.config.get("circuit_breaker_threshold", 3)
         self.circuit_breaker_reset_time = self.config.get("circuit_breaker_reset_time", 300) # 5 minutes
 
+        # Batch engine with per-provider concurrency windows
+        self.batch_engine = BatchEngine(self, throttling_service=throttling_service, config=self.config)
+
         logger.info("Model routing service initialized",
                     models_count=len(model_adapters),
                     routing_strategy=self.routing_strategy.value)
@@ -427,47 +433,89 @@ class ModelRoutingService:
 
     async def batch_generate(
         self,
-        prompts: List[str],
+        prompts: List[Union[str, Dict[str, Any]]],
         task_type: str,
         **kwargs
     ) -> List[Dict[str, Any]]:
-        """Generate multiple responses in parallel.
+        """Generate multiple responses through the batch engine.
 
         Args:
-            prompts: List of prompts
+            prompts: List of prompts, or dicts with "prompt" and per-item settings
             task_type: Type of task
-            **kwargs: Additional parameters for generate_response
+            **kwargs: Additional parameters for batch_generate_stream
 
         Returns:
-            List of generation results
+            List of generation results in prompt order
         """
-        # Create tasks for all prompts
-        tasks = [
-            self.generate_response(prompt, task_type, **kwargs)
-            for prompt in prompts
-        ]
-
-        # Run all tasks concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Process results, converting exceptions to error objects
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                # Convert exception to error response
-                processed_results.append({
-                    "success": False,
-                    "error": str(result),
-                    "error_type": result.__class__.__name__,
-                    "prompt_index": i
-                })
-            else:
-                # Add prompt index to successful result
-                result["prompt_index"] = i
-                processed_results.append(result)
-
+        processed_results: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+        async for result in self.batch_generate_stream(prompts, task_type, **kwargs):
+            processed_results[result["prompt_index"]] = result
         return processed_results
 
+    def batch_generate_stream(
+        self,
+        prompts: List[Union[str, Dict[str, Any]]],
+        task_type: str,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Generate multiple responses, yielding each as soon as it completes.
+
+        Prompts are routed once per distinct routing shape and grouped by the
+        selected model. Each provider has a concurrency window, adapters with
+        native batch methods receive chunks of prompts, and non-urgent work
+        (urgent=False) uses offline batch jobs where the adapter offers them.
+
+        Args:
+            prompts: List of prompts, or dicts with "prompt" and per-item settings
+            task_type: Type of task
+            **kwargs: complexity, max_tokens, temperature, top_p, requirements,
+                override_model, timeout, urgent, user_id, priority
+
+        Returns:
+            Async iterator of results carrying prompt_index, in completion order
+        """
+        return self.batch_engine.run(prompts, task_type, **kwargs)
+
+    def resolve_model_chain(
+        self,
+        task_type: str,
+        complexity: Union[TaskComplexity, int, None] = None,
+        requirements: Optional[Dict[str, Any]] = None,
+        override_model: Optional[str] = None
+    ) -> List[str]:
+        """Resolve the models a request would be tried on, in order.
+
+        Args:
+            task_type: Type of task
+            complexity: Task complexity (defaults to medium)
+            requirements: Optional specific requirements
+            override_model: Optional specific model to use
+
+        Returns:
+            List of model IDs in priority order
+
+        Raises:
+            InvalidInputError: If the override model is unknown
+            ModelUnavailableError: If the override model is unavailable
+            RoutingError: If no suitable model found
+        """
+        if override_model:
+            if override_model not in self.adapters:
+                raise InvalidInputError(f"Model '{override_model}' not found")
+            if self._is_circuit_open(override_model):
+                raise ModelUnavailableError(f"Model '{override_model}' is currently unavailable")
+            return [override_model]
+
+        if complexity is None:
+            complexity = TaskComplexity.MEDIUM
+        elif isinstance(complexity, int):
+            complexity = TaskComplexity(complexity)
+
+        model_chain = self._select_model_chain(task_type, complexity, requirements or {})
+        if not model_chain:
+            raise RoutingError("No suitable models available for this request")
+        return model_chain
+
     def get_model_status(self, model_id: Optional[str] = None) -> Dict[str, Any]:
         """Get status information for models.
 
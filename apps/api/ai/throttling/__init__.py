@@ -5,6 +5,19 @@ This module provides throttling mechanisms for AI operations to prevent
 overloading AI services and manage costs effectively.
 """
 
+from .throttle_backend import (
+    LocalThrottleBackend,
+    RedisThrottleBackend,
+    ThrottleBackend,
+    create_throttle_backend
+)
 from .throttling_service import ThrottlingService, throttling_service
 
-__all__ = ["ThrottlingService", "throttling_service"]
+__all__ = [
+    "ThrottlingService",
+    "throttling_service",
+    "ThrottleBackend",
+    "LocalThrottleBackend",
+    "RedisThrottleBackend",
+    "create_throttle_backend"
+]
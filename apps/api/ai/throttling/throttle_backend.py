@@ -0,0 +1,525 @@
+"""
+Throttling State Backends
+
+This module holds the state behind AI throttling decisions: GCRA token
+buckets, sliding-window request counters and daily counters (budget spend,
+user quotas). The in-memory backend limits a single process; the Redis
+backend shares state across replicas using atomic Lua scripts and can lease
+small batches of permits locally so most checks avoid a network round trip.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (window_seconds, limit) pairs checked together by hit_windows
+Windows = Sequence[Tuple[int, float]]
+
+
+def gcra(
+    tat: Optional[float],
+    now: float,
+    interval: float,
+    burst: float,
+    requested: int,
+) -> Tuple[int, float, float]:
+    """
+    Apply the generic cell rate algorithm to a bucket
+
+    Args:
+        tat: Theoretical arrival time stored for the bucket, or None
+        now: Current time in seconds
+        interval: Seconds of capacity consumed by one permit
+        burst: Bucket capacity in permits
+        requested: Maximum number of permits to grant
+
+    Returns:
+        Tuple of (granted, retry_after, new_tat)
+    """
+    tat = max(tat or now, now)
+    tolerance = burst * interval
+    fits = int(math.floor((tolerance - (tat - now)) / interval + 1e-9))
+    granted = max(0, min(requested, fits))
+    if granted == 0:
+        return 0, tat + interval - tolerance - now, tat
+    return granted, 0.0, tat + granted * interval
+
+
+def sliding_window(
+    counts: Sequence[Tuple[float, float]],
+    now: float,
+    windows: Windows,
+    requested: int,
+) -> Tuple[int, float]:
+    """
+    Compute how many hits fit in every window using weighted window counters
+
+    Each window keeps a counter for the current and previous fixed bucket;
+    the previous bucket is weighted by how much of it still overlaps the
+    sliding window.
+
+    Args:
+        counts: (previous, current) bucket counts per window
+        now: Current time in seconds
+        windows: (window_seconds, limit) per window
+        requested: Maximum number of hits to grant
+
+    Returns:
+        Tuple of (granted, retry_after)
+    """
+    granted = requested
+    retry_after = 0.0
+    for (previous, current), (window, limit) in zip(counts, windows):
+        elapsed = (now % window) / window
+        estimate = previous * (1 - elapsed) + current
+        room = int(math.floor(limit - estimate))
+        granted = min(granted, room)
+        if room < 1:
+            if current >= limit or previous <= 0:
+                wait = window - (now % window)
+            else:
+                wait = (estimate - limit + 1) / previous * window
+            retry_after = max(retry_after, wait)
+    return max(0, granted), retry_after
+
+
+class ThrottleBackend:
+    """Interface for throttling state shared by ThrottlingService."""
+
+    name = "base"
+    # Calls make network round trips, so async callers run them off the event loop
+    blocking = False
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Take one permit from a GCRA token bucket
+
+        Args:
+            key: Bucket key
+            rate: Refill rate in permits per second
+            burst: Bucket capacity in permits
+            cost: Capacity consumed by the permit
+
+        Returns:
+            Tuple of (allowed, retry_after)
+        """
+        raise NotImplementedError
+
+    def hit_windows(self, key: str, windows: Windows) -> Tuple[bool, float, Optional[int]]:
+        """
+        Record one hit if it fits in every sliding window
+
+        Args:
+            key: Counter key
+            windows: (window_seconds, limit) pairs
+
+        Returns:
+            Tuple of (allowed, retry_after, index of the exceeded window)
+        """
+        raise NotImplementedError
+
+    def window_counts(self, key: str, windows: Sequence[int]) -> Dict[int, int]:
+        """Return the estimated number of hits in each window."""
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: float = 1.0, ttl: int = 172800) -> None:
+        """Add to a counter, creating it with the given TTL."""
+        raise NotImplementedError
+
+    def get(self, key: str) -> float:
+        """Return the value of a counter (0 if missing)."""
+        raise NotImplementedError
+
+    def claim_once(self, key: str, ttl: int) -> bool:
+        """Return True for the first caller to claim key within ttl seconds."""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Push locally buffered updates to the shared store."""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class LocalThrottleBackend(ThrottleBackend):
+    """Per-process throttling state guarded by a lock."""
+
+    name = "local"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tats: Dict[str, float] = {}
+        self._windows: Dict[str, Dict[int, float]] = {}
+        self._counters: Dict[str, Tuple[float, float]] = {}
+        self._claims: Dict[str, float] = {}
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        with self._lock:
+            granted, retry_after, tat = gcra(self._tats.get(key), time.time(), cost / rate, burst / cost, 1)
+            self._tats[key] = tat
+            return granted > 0, retry_after
+
+    def _bucket_counts(self, key: str, window: int, now: float) -> Tuple[float, float]:
+        buckets = self._windows.get(f"{key}:{window}", {})
+        bucket = int(now // window)
+        return buckets.get(bucket - 1, 0), buckets.get(bucket, 0)
+
+    def hit_windows(self, key: str, windows: Windows) -> Tuple[bool, float, Optional[int]]:
+        with self._lock:
+            now = time.time()
+            counts = [self._bucket_counts(key, window, now) for window, _ in windows]
+            granted, retry_after = sliding_window(counts, now, windows, 1)
+            if not granted:
+                return False, retry_after, _exceeded_window(counts, now, windows)
+
+            for window, _ in windows:
+                bucket = int(now // window)
+                buckets = self._windows.setdefault(f"{key}:{window}", {})
+                buckets[bucket] = buckets.get(bucket, 0) + 1
+                for stale in [b for b in buckets if b < bucket - 1]:
+                    del buckets[stale]
+            return True, 0.0, None
+
+    def window_counts(self, key: str, windows: Sequence[int]) -> Dict[int, int]:
+        with self._lock:
+            now = time.time()
+            return {
+                window: _estimate(*self._bucket_counts(key, window, now), window, now)
+                for window in windows
+            }
+
+    def incr(self, key: str, amount: float = 1.0, ttl: int = 172800) -> None:
+        with self._lock:
+            now = time.time()
+            value, expires_at = self._counters.get(key, (0.0, now + ttl))
+            if expires_at <= now:
+                value, expires_at = 0.0, now + ttl
+            self._counters[key] = (value + amount, expires_at)
+
+    def get(self, key: str) -> float:
+        with self._lock:
+            value, expires_at = self._counters.get(key, (0.0, 0.0))
+            if expires_at <= time.time():
+                self._counters.pop(key, None)
+                return 0.0
+            return value
+
+    def claim_once(self, key: str, ttl: int) -> bool:
+        with self._lock:
+            now = time.time()
+            if self._claims.get(key, 0) > now:
+                return False
+            self._claims[key] = now + ttl
+            return True
+
+
+def _estimate(previous: float, current: float, window: int, now: float) -> int:
+    return int(round(previous * (1 - (now % window) / window) + current))
+
+
+def _exceeded_window(counts: Sequence[Tuple[float, float]], now: float, windows: Windows) -> Optional[int]:
+    for index, ((previous, current), (window, limit)) in enumerate(zip(counts, windows)):
+        if previous * (1 - (now % window) / window) + current >= limit:
+            return index
+    return None
+
+
+# Both scripts read the clock from Redis so replicas with skewed clocks agree.
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local tolerance = burst * interval
+local fits = math.floor((tolerance - (tat - now)) / interval + 1e-9)
+local granted = math.min(requested, fits)
+if granted < 1 then
+  return {0, tostring(tat + interval - tolerance - now)}
+end
+tat = tat + granted * interval
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil((tat - now) * 1000) + 1000)
+return {granted, '0'}
+"""
+
+SLIDING_WINDOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local requested = tonumber(ARGV[1])
+local granted = requested
+local retry = 0
+local exceeded = -1
+local current_keys = {}
+for i = 1, #KEYS do
+  local window = tonumber(ARGV[2 * i])
+  local limit = tonumber(ARGV[2 * i + 1])
+  local bucket = math.floor(now / window)
+  local offset = now - bucket * window
+  local current_key = KEYS[i] .. ':' .. bucket
+  local current = tonumber(redis.call('GET', current_key) or '0')
+  local previous = tonumber(redis.call('GET', KEYS[i] .. ':' .. (bucket - 1)) or '0')
+  local estimate = previous * (1 - offset / window) + current
+  local room = math.floor(limit - estimate)
+  if room < granted then granted = room end
+  if room < 1 then
+    if exceeded < 0 then exceeded = i - 1 end
+    local wait = window - offset
+    if current < limit and previous > 0 then
+      wait = (estimate - limit + 1) / previous * window
+    end
+    if wait > retry then retry = wait end
+  end
+  current_keys[i] = {current_key, window}
+end
+if granted < 1 then
+  return {0, tostring(retry), exceeded}
+end
+for i = 1, #current_keys do
+  redis.call('INCRBY', current_keys[i][1], granted)
+  redis.call('EXPIRE', current_keys[i][1], current_keys[i][2] * 2)
+end
+return {granted, '0', -1}
+"""
+
+
+class RedisThrottleBackend(ThrottleBackend):
+    """
+    Throttling state shared across replicas through Redis
+
+    Bucket and window checks run as single Lua scripts, so concurrent
+    replicas never over-admit. With lease_size > 1 a replica reserves a
+    small batch of permits per round trip and hands them out locally until
+    they run out or the lease expires; the lease is capped at lease_fraction
+    of the limit so replicas cannot starve each other. Counter increments
+    are buffered and flushed every flush_interval seconds.
+    """
+
+    name = "redis"
+    blocking = True
+
+    def __init__(
+        self,
+        redis_client: Any,
+        prefix: str = "maily:ai_throttle:",
+        lease_size: int = 1,
+        lease_ttl: float = 1.0,
+        lease_fraction: float = 0.05,
+        flush_interval: float = 1.0,
+        fallback: Optional[ThrottleBackend] = None,
+    ):
+        """
+        Initialize the Redis backend
+
+        Args:
+            redis_client: Synchronous Redis client with decode_responses enabled
+            prefix: Key prefix for all throttling keys
+            lease_size: Maximum permits reserved per round trip
+            lease_ttl: Seconds a local lease stays valid
+            lease_fraction: Maximum share of a limit one lease may hold
+            flush_interval: Seconds between counter flushes (and counter
+                read refreshes)
+            fallback: Backend used while Redis is unreachable
+        """
+        self.redis = redis_client
+        self.prefix = prefix
+        self.lease_size = max(1, lease_size)
+        self.lease_ttl = lease_ttl
+        self.lease_fraction = lease_fraction
+        self.flush_interval = flush_interval
+        self.fallback = fallback or LocalThrottleBackend()
+
+        self._gcra = redis_client.register_script(GCRA_SCRIPT)
+        self._sliding_window = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+        self._lock = threading.Lock()
+        self._leases: Dict[str, Tuple[int, float]] = {}
+        self._pending: Dict[str, Tuple[float, int]] = {}
+        self._counter_cache: Dict[str, Tuple[float, float]] = {}
+        self._last_flush = time.time()
+        self.stats = {"round_trips": 0, "lease_hits": 0, "fallbacks": 0, "flushes": 0}
+
+    def _key(self, key: str) -> str:
+        # Hash tag keeps every key derived inside a script in one cluster slot
+        return f"{self.prefix}{{{key}}}"
+
+    def _lease_batch(self, limit: float) -> int:
+        return max(1, min(self.lease_size, int(limit * self.lease_fraction)))
+
+    def _take_lease(self, lease_key: str) -> bool:
+        with self._lock:
+            remaining, expires_at = self._leases.get(lease_key, (0, 0.0))
+            if remaining > 0 and expires_at > time.time():
+                self._leases[lease_key] = (remaining - 1, expires_at)
+                self.stats["lease_hits"] += 1
+                return True
+            self._leases.pop(lease_key, None)
+            return False
+
+    def _store_lease(self, lease_key: str, granted: int) -> None:
+        if granted > 1:
+            with self._lock:
+                self._leases[lease_key] = (granted - 1, time.time() + self.lease_ttl)
+
+    def _on_error(self, operation: str, error: Exception) -> None:
+        self.stats["fallbacks"] += 1
+        logger.warning(f"Shared throttle {operation} failed, using local state: {error}")
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        lease_key = f"bucket:{key}:{cost}"
+        if self._take_lease(lease_key):
+            return True, 0.0
+
+        permits = burst / cost
+        try:
+            self.stats["round_trips"] += 1
+            granted, retry_after = self._gcra(
+                keys=[self._key(f"bucket:{key}")],
+                args=[cost / rate, permits, self._lease_batch(permits)],
+            )
+        except Exception as e:
+            self._on_error("bucket check", e)
+            return self.fallback.acquire(key, rate, burst, cost)
+
+        granted = int(granted)
+        self._store_lease(lease_key, granted)
+        return granted > 0, float(retry_after)
+
+    def hit_windows(self, key: str, windows: Windows) -> Tuple[bool, float, Optional[int]]:
+        lease_key = f"window:{key}:{tuple(windows)}"
+        if self._take_lease(lease_key):
+            return True, 0.0, None
+
+        args: List[Any] = [self._lease_batch(min(limit for _, limit in windows))]
+        for window, limit in windows:
+            args.extend([window, limit])
+        try:
+            self.stats["round_trips"] += 1
+            granted, retry_after, exceeded = self._sliding_window(
+                keys=[self._key(f"window:{key}:{window}") for window, _ in windows],
+                args=args,
+            )
+        except Exception as e:
+            self._on_error("window check", e)
+            return self.fallback.hit_windows(key, windows)
+
+        granted = int(granted)
+        self._store_lease(lease_key, granted)
+        if granted > 0:
+            return True, 0.0, None
+        return False, float(retry_after), int(exceeded) if int(exceeded) >= 0 else None
+
+    def window_counts(self, key: str, windows: Sequence[int]) -> Dict[int, int]:
+        now = time.time()
+        keys = []
+        for window in windows:
+            bucket = int(now // window)
+            base = self._key(f"window:{key}:{window}")
+            keys.extend([f"{base}:{bucket - 1}", f"{base}:{bucket}"])
+        try:
+            values = self.redis.mget(keys)
+        except Exception as e:
+            self._on_error("window read", e)
+            return self.fallback.window_counts(key, windows)
+
+        return {
+            window: _estimate(float(values[2 * i] or 0), float(values[2 * i + 1] or 0), window, now)
+            for i, window in enumerate(windows)
+        }
+
+    def incr(self, key: str, amount: float = 1.0, ttl: int = 172800) -> None:
+        with self._lock:
+            pending, _ = self._pending.get(key, (0.0, ttl))
+            self._pending[key] = (pending + amount, ttl)
+        self._maybe_flush()
+
+    def get(self, key: str) -> float:
+        self._maybe_flush()
+        now = time.time()
+        with self._lock:
+            pending = self._pending.get(key, (0.0, 0))[0]
+            cached = self._counter_cache.get(key)
+        if cached and now - cached[1] < self.flush_interval:
+            return cached[0] + pending
+
+        try:
+            self.stats["round_trips"] += 1
+            value = float(self.redis.get(self._key(f"counter:{key}")) or 0)
+        except Exception as e:
+            self._on_error("counter read", e)
+            return self.fallback.get(key) + pending
+
+        with self._lock:
+            self._counter_cache[key] = (value, now)
+        return value + pending
+
+    def _maybe_flush(self) -> None:
+        if time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.time()
+        if not pending:
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, (amount, ttl) in pending.items():
+                redis_key = self._key(f"counter:{key}")
+                pipe.incrbyfloat(redis_key, amount)
+                pipe.expire(redis_key, ttl)
+            self.stats["round_trips"] += 1
+            results = pipe.execute()
+        except Exception as e:
+            self._on_error("counter flush", e)
+            for key, (amount, ttl) in pending.items():
+                self.fallback.incr(key, amount, ttl)
+            return
+
+        self.stats["flushes"] += 1
+        now = time.time()
+        with self._lock:
+            for (key, _), value in zip(pending.items(), results[::2]):
+                self._counter_cache[key] = (float(value), now)
+
+    def claim_once(self, key: str, ttl: int) -> bool:
+        try:
+            self.stats["round_trips"] += 1
+            return bool(self.redis.set(self._key(f"claim:{key}"), "1", nx=True, ex=ttl))
+        except Exception as e:
+            self._on_error("claim", e)
+            return self.fallback.claim_once(key, ttl)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            leases = len(self._leases)
+            pending = len(self._pending)
+        return {"backend": self.name, "active_leases": leases, "pending_counters": pending, **self.stats}
+
+
+def create_throttle_backend(redis_client: Any = None, backend: Optional[str] = None, **kwargs: Any) -> ThrottleBackend:
+    """
+    Create the throttling backend
+
+    Args:
+        redis_client: Redis client; without one (or with the cache manager's
+            placeholder client) the local backend is used
+        backend: "redis" or "local"; defaults to redis when a client is available
+        **kwargs: Options passed to RedisThrottleBackend
+
+    Returns:
+        Throttle backend instance
+    """
+    usable = redis_client is not None and callable(getattr(type(redis_client), "register_script", None))
+    if backend == "local" or not usable:
+        if backend == "redis":
+            logger.warning("Redis throttling backend requested but Redis is unavailable; using local state")
+        return LocalThrottleBackend()
+    return RedisThrottleBackend(redis_client, **kwargs)
@@ -6,20 +6,21 @@ overloading AI services and manage costs effectively.
 """
 
 import asyncio
+import functools
 import logging
 import time
 import random
 import json
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List, Tuple, Set, Union, Callable
+import datetime
+from typing import Dict, Any, Optional, Tuple
 import os
 import threading
-from concurrent.futures import ThreadPoolExecutor
 import uuid
-from collections import deque
 
 from ..monitoring.ai_metrics_service import AIMetricsService
 from ...utils.cache_manager import CacheManager
+from .throttle_backend import ThrottleBackend, create_throttle_backend
+from packages.error_handling.python.transport import transport_registry
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +56,15 @@ THROTTLING_PERIODS = {
 # Burst allowance for short periods
 BURST_ALLOWANCE = 5
 
+# Shared throttling state: "redis" shares limits across replicas, "local" keeps them per process
+THROTTLING_BACKEND = os.environ.get("AI_THROTTLING_BACKEND")
+THROTTLING_LEASE_SIZE = int(os.environ.get("AI_THROTTLING_LEASE_SIZE", "5"))
+THROTTLING_LEASE_TTL = float(os.environ.get("AI_THROTTLING_LEASE_TTL", "1.0"))
+THROTTLING_FLUSH_INTERVAL = float(os.environ.get("AI_THROTTLING_FLUSH_INTERVAL", "1.0"))
+
+# Counters keyed by day expire after two days
+DAILY_COUNTER_TTL = 2 * THROTTLING_PERIODS["daily"]
+
 # Retry settings
 MAX_RETRY_ATTEMPTS = 3
 RETRY_BACKOFF_FACTOR = 1.5
@@ -101,10 +111,31 @@ class ThrottlingService:
     and manage costs effectively by limiting the rate of requests.
     """
 
-    def __init__(self, metrics_service: Optional[AIMetricsService] = None):
-        """Initialize the throttling service."""
+    def __init__(
+        self,
+        metrics_service: Optional[AIMetricsService] = None,
+        backend: Optional[ThrottleBackend] = None
+    ):
+        """
+        Initialize the throttling service.
+
+        Args:
+            metrics_service: Optional metrics service for tracking
+            backend: Optional throttling state backend; defaults to Redis-shared
+                state when Redis is available
+        """
         self.cache_manager = CacheManager()
 
+        # Rate windows, token buckets, quotas and spend live in the backend so
+        # every replica enforces the same limits
+        self.backend = backend or create_throttle_backend(
+            self.cache_manager.redis,
+            backend=THROTTLING_BACKEND,
+            lease_size=THROTTLING_LEASE_SIZE,
+            lease_ttl=THROTTLING_LEASE_TTL,
+            flush_interval=THROTTLING_FLUSH_INTERVAL
+        )
+
         # Load limits from environment or use defaults
         self.limits = self._load_limits_from_env() or DEFAULT_LIMITS
 
@@ -123,7 +154,6 @@ class ThrottlingService:
         # Cost tracking
         self.cost_tracking_enabled = COST_TRACKING_ENABLED
         self.daily_budget = float(os.environ.get("DAILY_AI_BUDGET", "0.0"))
-        self.current_spend = 0.0
         self.spend_by_model = {}
         self.spend_by_user = {}
         self.budget_alerts_sent = set()
@@ -131,9 +161,8 @@ class ThrottlingService:
         # Per-user quotas
         self.user_quotas_enabled = os.environ.get("ENABLE_USER_QUOTAS", "false").lower() == "true"
         self.user_quotas = self._load_user_quotas()
-        self.user_usage = {}
 
-        # Token bucket settings
+        # Token bucket settings (bucket key -> capacity; state lives in the backend)
         self.token_bucket_enabled = os.environ.get("ENABLE_TOKEN_BUCKET", "true").lower() == "true"
         self.token_buckets = {}
 
@@ -168,6 +197,26 @@ class ThrottlingService:
         if self.daily_budget > 0:
             logger.info(f"Daily AI budget set to ${self.daily_budget:.2f}")
 
+    @property
+    def current_spend(self) -> float:
+        """Today's AI spend across all replicas."""
+        return self.backend.get(f"spend:{self._today()}")
+
+    async def get_current_spend_async(self) -> float:
+        """Today's AI spend across all replicas, read without blocking the event loop."""
+        return await self._run_backend(self.backend.get, f"spend:{self._today()}")
+
+    async def _run_backend(self, func, *args: Any) -> Any:
+        """Run a function that reads or writes the backend without blocking the event loop."""
+        if not self.backend.blocking:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.datetime.now().date().isoformat()
+
     def _load_limits_from_env(self) -> Optional[Dict[str, int]]:
         """
         Load throttling limits from environment variables.
@@ -254,8 +303,9 @@ class ThrottlingService:
 
         # Check budget if cost tracking is enabled
         if self.cost_tracking_enabled and self.daily_budget > 0:
+            current_spend = await self._run_backend(self.backend.get, f"spend:{self._today()}")
             with self._cost_lock:
-                if self.current_spend >= self.daily_budget:
+                if current_spend >= self.daily_budget:
                     reason = f"Daily budget of ${self.daily_budget:.2f} exceeded"
                     retry_after = self._get_time_until_budget_reset()
                     logger.warning(f"Request {request_id} throttled: {reason}")
@@ -264,7 +314,7 @@ class ThrottlingService:
 
         # Check user quotas if enabled
         if self.user_quotas_enabled and user_id:
-            throttled, retry_after, reason = self._check_user_quota(user_id, model, tokens)
+            throttled, retry_after, reason = await self._run_backend(self._check_user_quota, user_id, model, tokens)
             if throttled:
                 logger.warning(f"Request {request_id} throttled: {reason}")
                 self._update_metrics(model, True, reason, user_id)
@@ -279,7 +329,7 @@ class ThrottlingService:
 
         # Check token bucket if enabled
         if self.token_bucket_enabled:
-            throttled, retry_after, reason = self._check_token_bucket(model, user_id, priority)
+            throttled, retry_after, reason = await self._run_backend(self._check_token_bucket, model, user_id, priority)
             if throttled:
                 logger.warning(f"Request {request_id} throttled: {reason}")
                 self._update_metrics(model, True, reason, user_id)
@@ -293,63 +343,28 @@ class ThrottlingService:
             self._update_metrics(model, True, reason, user_id)
             return True, retry_after, reason
 
-        # Traditional rate-based throttling
-        with self._rates_lock:
-            # Initialize rates for this model if not exists
-            if model not in self.current_rates:
-                self.current_rates[model] = {
-                    "short": deque(maxlen=THROTTLING_PERIODS["short"]),
-                    "medium": deque(maxlen=THROTTLING_PERIODS["medium"]),
-                    "long": deque(maxlen=THROTTLING_PERIODS["long"]),
-                    "daily": deque(maxlen=THROTTLING_PERIODS["daily"])
-                }
-
-            # Get current time
-            now = time.time()
-
-            # Clean up old timestamps
-            for period in ["short", "medium", "long", "daily"]:
-                while (self.current_rates[model][period] and
-                       now - self.current_rates[model][period][0] >
-                       THROTTLING_PERIODS[period]):
-                    self.current_rates[model][period].popleft()
-
-            # Check if we're over the limit for any period
-            short_count = len(self.current_rates[model]["short"])
-            medium_count = len(self.current_rates[model]["medium"])
-            long_count = len(self.current_rates[model]["long"])
-
-            # Allow short bursts over the limit
-            short_limit = adjusted_limit + BURST_ALLOWANCE
-
-            if short_count >= short_limit:
-                # We're over the short period limit
-                reason = f"Rate limit exceeded for {model}: {short_count}/{adjusted_limit} requests in {THROTTLING_PERIODS['short']}s"
-                retry_after = self._calculate_retry_after(model)
-                logger.warning(f"Request {request_id} throttled: {reason}")
-                self._update_metrics(model, True, reason, user_id)
-                return True, retry_after, reason
-
-            if medium_count >= adjusted_limit * (THROTTLING_PERIODS["medium"] / 60):
-                # We're over the medium period limit
-                reason = f"Rate limit exceeded for {model}: {medium_count}/{adjusted_limit * (THROTTLING_PERIODS['medium'] / 60)} requests in {THROTTLING_PERIODS['medium']}s"
-                retry_after = self._calculate_retry_after(model)
-                logger.warning(f"Request {request_id} throttled: {reason}")
-                self._update_metrics(model, True, reason, user_id)
-                return True, retry_after, reason
-
-            if long_count >= adjusted_limit * (THROTTLING_PERIODS["long"] / 60):
-                # We're over the long period limit
-                reason = f"Rate limit exceeded for {model}: {long_count}/{adjusted_limit * (THROTTLING_PERIODS['long'] / 60)} requests in {THROTTLING_PERIODS['long']}s"
-                retry_after = self._calculate_retry_after(model)
-                logger.warning(f"Request {request_id} throttled: {reason}")
-                self._update_metrics(model, True, reason, user_id)
-                return True, retry_after, reason
+        # Rate-based throttling over sliding windows shared by all replicas
+        windows = [
+            ("short", THROTTLING_PERIODS["short"], adjusted_limit + BURST_ALLOWANCE),  # Allow short bursts
+            ("medium", THROTTLING_PERIODS["medium"], adjusted_limit * (THROTTLING_PERIODS["medium"] / 60)),
+            ("long", THROTTLING_PERIODS["long"], adjusted_limit * (THROTTLING_PERIODS["long"] / 60)),
+        ]
+        allowed, retry_after, exceeded = await self._run_backend(
+            self.backend.hit_windows,
+            f"rate:{model}",
+            [(period, limit) for _, period, limit in windows]
+        )
+        if not allowed:
+            name, period, limit = windows[exceeded if exceeded is not None else 0]
+            count = (await self._run_backend(self.backend.window_counts, f"rate:{model}", [period]))[period]
+            reason = f"Rate limit exceeded for {model}: {count}/{limit:g} requests in {period}s ({name} window)"
+            retry_after = max(retry_after, 1.0) + random.random()  # Add jitter
+            logger.warning(f"Request {request_id} throttled: {reason}")
+            self._update_metrics(model, True, reason, user_id)
+            return True, retry_after, reason
 
-            # If we get here, we're not throttled
-            # Add the current timestamp to all periods
-            for period in ["short", "medium", "long", "daily"]:
-                self.current_rates[model][period].append(now)
+        now = time.time()
+        await self._run_backend(self._count_request, model, user_id)
 
         # Update metrics for non-throttled request
         self._update_metrics(model, False, None, user_id)
@@ -443,22 +458,45 @@ class ThrottlingService:
                 if now - sample["timestamp"] < self.adaptive_window
             ]
 
+    def _count_request(self, model: str, user_id: Optional[str]) -> None:
+        """Add an admitted request to the shared daily counters."""
+        self.backend.incr(f"requests:{model}:{self._today()}", 1, ttl=DAILY_COUNTER_TTL)
+        if self.user_quotas_enabled and user_id:
+            self.backend.incr(f"quota:{user_id}:{self._today()}:requests", 1, ttl=DAILY_COUNTER_TTL)
+
+    async def get_stats_async(self) -> Dict[str, Any]:
+        """
+        Get throttling statistics without blocking the event loop.
+
+        Returns:
+            Dictionary of throttling statistics.
+        """
+        return await self._run_backend(self.get_stats)
+
     def get_stats(self) -> Dict[str, Any]:
         """
         Get throttling statistics.
 
+        This reads the shared backend, so async code should await
+        get_stats_async instead.
+
         Returns:
             Dictionary of throttling statistics.
         """
         with self._rates_lock:
             # Calculate current rates for each model
             current_rates = {}
-            for model, periods in self.current_rates.items():
+            today = self._today()
+            for model in list(self.current_rates):
+                counts = self.backend.window_counts(
+                    f"rate:{model}",
+                    [THROTTLING_PERIODS["short"], THROTTLING_PERIODS["medium"], THROTTLING_PERIODS["long"]]
+                )
                 current_rates[model] = {
-                    "short_period": len(periods["short"]),
-                    "medium_period": len(periods["medium"]),
-                    "long_period": len(periods["long"]),
-                    "daily_period": len(periods["daily"])
+                    "short_period": counts[THROTTLING_PERIODS["short"]],
+                    "medium_period": counts[THROTTLING_PERIODS["medium"]],
+                    "long_period": counts[THROTTLING_PERIODS["long"]],
+                    "daily_period": int(self.backend.get(f"requests:{model}:{today}"))
                 }
 
             # Get circuit breaker status if enabled
@@ -477,10 +515,11 @@ class ThrottlingService:
             cost_stats = {}
             if self.cost_tracking_enabled:
                 with self._cost_lock:
+                    current_spend = self.current_spend
                     cost_stats = {
-                        "current_spend": self.current_spend,
+                        "current_spend": current_spend,
                         "daily_budget": self.daily_budget,
-                        "budget_percentage": (self.current_spend / self.daily_budget * 100) if self.daily_budget > 0 else 0,
+                        "budget_percentage": (current_spend / self.daily_budget * 100) if self.daily_budget > 0 else 0,
                         "spend_by_model": self.spend_by_model,
                         "top_users": dict(sorted(self.spend_by_user.items(), key=lambda x: x[1], reverse=True)[:10])
                     }
@@ -488,12 +527,8 @@ class ThrottlingService:
             # Get token bucket stats if enabled
             token_bucket_stats = {}
             if self.token_bucket_enabled:
-                for key, bucket in self.token_buckets.items():
-                    token_bucket_stats[key] = {
-                        "tokens": bucket["tokens"],
-                        "capacity": bucket["capacity"],
-                        "percentage_full": (bucket["tokens"] / bucket["capacity"]) * 100
-                    }
+                for key, capacity in self.token_buckets.items():
+                    token_bucket_stats[key] = {"capacity": capacity}
 
             return {
                 "limits": self.limits,
@@ -504,6 +539,7 @@ class ThrottlingService:
                 "circuit_breaker_status": circuit_breaker_status,
                 "cost_tracking": cost_stats,
                 "token_buckets": token_bucket_stats,
+                "backend": self.backend.get_stats(),
                 "concurrent_requests": self.current_concurrent_requests,
                 "max_concurrent_requests": self.max_concurrent_requests
             }
@@ -616,40 +652,24 @@ class ThrottlingService:
         Returns:
             Tuple of (should_throttle, retry_after, reason)
         """
-        now = time.time()
         bucket_key = f"{model}:{user_id or 'anonymous'}"
+        capacity = self.limits.get(model, self.limits.get("default", DEFAULT_LIMITS["default"]))
+        self.token_buckets[bucket_key] = capacity
+
+        # Adjust token cost based on priority
+        token_cost = 1.0 / PRIORITY_MULTIPLIERS.get(priority, 1.0)
+
+        # GCRA bucket refilling at the per-minute limit
+        allowed, time_to_refill = self.backend.acquire(
+            f"bucket:{bucket_key}",
+            rate=capacity / 60.0,
+            burst=capacity,
+            cost=token_cost
+        )
+        if not allowed:
+            return True, time_to_refill, f"Token bucket depleted for {model}"
 
-        with self._rates_lock:
-            # Initialize bucket if not exists
-            if bucket_key not in self.token_buckets:
-                model_limit = self.limits.get(model, self.limits.get("default", DEFAULT_LIMITS["default"]))
-                self.token_buckets[bucket_key] = {
-                    "tokens": model_limit,  # Start with full bucket
-                    "capacity": model_limit,
-                    "last_refill": now
-                }
-
-            bucket = self.token_buckets[bucket_key]
-
-            # Refill tokens based on time elapsed
-            time_elapsed = now - bucket["last_refill"]
-            refill_amount = time_elapsed * (bucket["capacity"] / 60.0)  # Refill rate per second
-            bucket["tokens"] = min(bucket["capacity"], bucket["tokens"] + refill_amount)
-            bucket["last_refill"] = now
-
-            # Adjust token cost based on priority
-            token_cost = 1.0 / PRIORITY_MULTIPLIERS.get(priority, 1.0)
-
-            # Check if enough tokens in bucket
-            if bucket["tokens"] < token_cost:
-                # Not enough tokens
-                time_to_refill = (token_cost - bucket["tokens"]) / (bucket["capacity"] / 60.0)
-                reason = f"Token bucket depleted for {model}"
-                return True, time_to_refill, reason
-
-            # Consume tokens
-            bucket["tokens"] -= token_cost
-            return False, None, None
+        return False, None, None
 
     def _check_circuit_breaker(self, model: str) -> bool:
         """
@@ -723,30 +743,8 @@ class ThrottlingService:
         if not self.user_quotas_enabled:
             return False, None, None
 
-        now = time.time()
-        today = datetime.datetime.now().date().isoformat()
-
-        # Initialize user usage if not exists
-        if user_id not in self.user_usage:
-            self.user_usage[user_id] = {
-                "daily_requests": {},
-                "daily_tokens": {},
-                "daily_cost": {}
-            }
-
-        usage = self.user_usage[user_id]
-
-        # Initialize today's usage if not exists
-        if today not in usage["daily_requests"]:
-            usage["daily_requests"][today] = {}
-            usage["daily_tokens"][today] = {}
-            usage["daily_cost"][today] = {}
-
-        # Initialize model usage if not exists
-        if model not in usage["daily_requests"][today]:
-            usage["daily_requests"][today][model] = 0
-            usage["daily_tokens"][today][model] = 0
-            usage["daily_cost"][today][model] = 0.0
+        # Daily usage totals shared by all replicas
+        usage_key = f"quota:{user_id}:{self._today()}"
 
         # Get user quota
         quota = self.user_quotas.get(user_id, self.user_quotas.get("default", {
@@ -756,7 +754,7 @@ class ThrottlingService:
         }))
 
         # Check request limit
-        total_requests = sum(usage["daily_requests"][today].values())
+        total_requests = self.backend.get(f"{usage_key}:requests")
         if total_requests >= quota["daily_request_limit"]:
             reason = f"User {user_id} exceeded daily request limit of {quota['daily_request_limit']}"
             retry_after = self._get_time_until_tomorrow()
@@ -764,7 +762,7 @@ class ThrottlingService:
 
         # Check token limit if tokens provided
         if tokens:
-            total_tokens = sum(usage["daily_tokens"][today].values()) + tokens
+            total_tokens = self.backend.get(f"{usage_key}:tokens") + tokens
             if total_tokens > quota["daily_token_limit"]:
                 reason = f"User {user_id} exceeded daily token limit of {quota['daily_token_limit']}"
                 retry_after = self._get_time_until_tomorrow()
@@ -772,7 +770,7 @@ class ThrottlingService:
 
         # Check cost limit if cost tracking enabled
         if self.cost_tracking_enabled:
-            total_cost = sum(usage["daily_cost"][today].values())
+            total_cost = self.backend.get(f"{usage_key}:cost")
             if total_cost >= quota["cost_limit"]:
                 reason = f"User {user_id} exceeded daily cost limit of ${quota['cost_limit']:.2f}"
                 retry_after = self._get_time_until_tomorrow()
@@ -819,29 +817,43 @@ class ThrottlingService:
                 # Reset daily spend at midnight
                 now = datetime.datetime.now()
                 if now.hour == 0 and now.minute < 10:  # Reset between 12:00 AM and 12:10 AM
+                    # Shared spend counters are keyed by day, so only local breakdowns reset
                     with self._cost_lock:
-                        logger.info(f"Resetting daily AI spend tracking. Previous total: ${self.current_spend:.2f}")
-                        self.current_spend = 0.0
+                        logger.info("Resetting daily AI spend breakdowns")
                         self.spend_by_model = {}
                         self.spend_by_user = {}
                         self.budget_alerts_sent.clear()
 
                 # Check budget alerts
                 if self.cost_tracking_enabled and self.daily_budget > 0:
-                    self._check_budget_alerts()
+                    await self._check_budget_alerts_async()
 
             except Exception as e:
                 logger.error(f"Error in cost tracking task: {e}")
 
+    async def _check_budget_alerts_async(self) -> None:
+        """Check budget alerts from async code.
+
+        Alerts may post to Slack or send email, so the check always runs in the
+        default executor, whichever backend is configured.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._check_budget_alerts)
+
     def _check_budget_alerts(self) -> None:
         """Check and send budget alerts if thresholds are reached."""
         with self._cost_lock:
-            spend_percentage = (self.current_spend / self.daily_budget) * 100 if self.daily_budget > 0 else 0
+            current_spend = self.current_spend
+            spend_percentage = (current_spend / self.daily_budget) * 100 if self.daily_budget > 0 else 0
 
             for threshold in sorted(BUDGET_ALERT_THRESHOLDS):
                 if spend_percentage >= threshold and threshold not in self.budget_alerts_sent:
-                    logger.warning(f"BUDGET ALERT: AI spend has reached {threshold}% of daily budget (${self.current_spend:.2f}/{self.daily_budget:.2f})")
                     self.budget_alerts_sent.add(threshold)
+                    # Only one replica sends each alert
+                    if not self.backend.claim_once(f"budget_alert:{self._today()}:{threshold}", DAILY_COUNTER_TTL):
+                        continue
+
+                    logger.warning(f"BUDGET ALERT: AI spend has reached {threshold}% of daily budget (${current_spend:.2f}/{self.daily_budget:.2f})")
 
                     # Send notification to admin/monitoring system
                     self._send_admin_notification(
@@ -850,7 +862,7 @@ class ThrottlingService:
                         message=f"AI Budget Alert: {threshold}% of daily budget reached",
                         details={
                             "threshold": threshold,
-                            "current_spend": self.current_spend,
+                            "current_spend": current_spend,
                             "daily_budget": self.daily_budget,
                             "percentage": spend_percentage,
                             "timestamp": datetime.datetime.now().isoformat()
@@ -974,8 +986,6 @@ class ThrottlingService:
             details: Additional alert details
         """
         try:
-            import httpx
-            
             # Format Slack message
             color = "#ff0000" if severity == "high" else "#ffcc00" if severity == "medium" else "#36a64f"
             
@@ -1004,12 +1014,13 @@ class ThrottlingService:
                 ]
             }
             
-            # Send to Slack webhook
-            response = requests.post(
-                webhook_url,
-                json=payload,
-                headers={"Content-Type": "application/json"}
-            )
+            # Send to Slack webhook over the shared connection pool
+            with transport_registry.client(timeout=10.0) as client:
+                response = client.post(
+                    webhook_url,
+                    json=payload,
+                    headers={"Content-Type": "application/json"}
+                )
             
             if response.status_code != 200:
                 logger.warning(f"Failed to send Slack notification: {response.status_code} {response.text}")
@@ -1105,6 +1116,34 @@ class ThrottlingService:
         """
         Update cost tracking for a completed request.
 
+        This blocks on the backend and on budget alert notifications, so async
+        code should await update_cost_tracking_async instead.
+
+        Args:
+            model: The AI model used
+            input_tokens: Number of input tokens
+            output_tokens: Number of output tokens
+            user_id: Optional user ID for per-user cost tracking
+        """
+        if not self.cost_tracking_enabled:
+            return
+
+        self._record_cost(model, input_tokens, output_tokens, user_id)
+
+        # Check budget alerts
+        if self.daily_budget > 0:
+            self._check_budget_alerts()
+
+    async def update_cost_tracking_async(
+        self,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        user_id: Optional[str] = None
+    ) -> None:
+        """
+        Update cost tracking for a completed request without blocking the event loop.
+
         Args:
             model: The AI model used
             input_tokens: Number of input tokens
@@ -1114,17 +1153,30 @@ class ThrottlingService:
         if not self.cost_tracking_enabled:
             return
 
+        await self._run_backend(self._record_cost, model, input_tokens, output_tokens, user_id)
+
+        # Check budget alerts
+        if self.daily_budget > 0:
+            await self._check_budget_alerts_async()
+
+    def _record_cost(self, model: str, input_tokens: int, output_tokens: int, user_id: Optional[str]) -> None:
+        """Add a request's cost to the shared counters and this replica's breakdowns."""
         # Calculate cost based on model pricing
         model_costs = MODEL_COSTS.get(model, MODEL_COSTS.get("default"))
         input_cost = (input_tokens / 1000) * model_costs["input"]
         output_cost = (output_tokens / 1000) * model_costs["output"]
         total_cost = input_cost + output_cost
 
-        with self._cost_lock:
-            # Update global spend
-            self.current_spend += total_cost
+        today = self._today()
+        self.backend.incr(f"spend:{today}", total_cost, ttl=DAILY_COUNTER_TTL)
+
+        # Update user quota usage
+        if user_id and self.user_quotas_enabled:
+            self.backend.incr(f"quota:{user_id}:{today}:cost", total_cost, ttl=DAILY_COUNTER_TTL)
+            self.backend.incr(f"quota:{user_id}:{today}:tokens", input_tokens + output_tokens, ttl=DAILY_COUNTER_TTL)
 
-            # Update spend by model
+        with self._cost_lock:
+            # Update this replica's spend by model
             if model not in self.spend_by_model:
                 self.spend_by_model[model] = 0.0
             self.spend_by_model[model] += total_cost
@@ -1135,22 +1187,6 @@ class ThrottlingService:
                     self.spend_by_user[user_id] = 0.0
                 self.spend_by_user[user_id] += total_cost
 
-                # Update user quota usage
-                if self.user_quotas_enabled:
-                    today = datetime.datetime.now().date().isoformat()
-                    if user_id in self.user_usage and today in self.user_usage[user_id]["daily_cost"]:
-                        if model not in self.user_usage[user_id]["daily_cost"][today]:
-                            self.user_usage[user_id]["daily_cost"][today][model] = 0.0
-                        self.user_usage[user_id]["daily_cost"][today][model] += total_cost
-
-                        if model not in self.user_usage[user_id]["daily_tokens"][today]:
-                            self.user_usage[user_id]["daily_tokens"][today][model] = 0
-                        self.user_usage[user_id]["daily_tokens"][today][model] += input_tokens + output_tokens
-
-        # Check budget alerts
-        if self.daily_budget > 0:
-            self._check_budget_alerts()
-
     def record_circuit_breaker_result(self, model: str, success: bool) -> None:
         """
         Record success or failure for circuit breaker tracking.
@@ -1294,7 +1330,7 @@ async with throttling_service.throttle(
         response = await ai_service.generate_response(...)
 
         # Update cost tracking
-        throttling_service.update_cost_tracking(
+        await throttling_service.update_cost_tracking_async(
             model="gpt-4",
             input_tokens=1500,
             output_tokens=500,
@@ -1307,7 +1343,7 @@ async with throttling_service.throttle(
         logger.warning(f"Request throttled: {reason}. Retry after {retry_after} seconds.")
 
 # Get throttling statistics
-stats = throttling_service.get_stats()
+stats = await throttling_service.get_stats_async()
 logger.info(f"Throttling stats: {stats}")
 
 # Health check
@@ -6,14 +6,20 @@ including token counting, cost estimation, and text processing.
 """
 
 from .token_counter import (
+    ConversationTokenCounter,
     count_tokens,
+    count_tokens_batch,
+    count_tokens_batch_async,
     count_tokens_in_messages,
     estimate_cost,
     truncate_text_to_token_limit
 )
 
 __all__ = [
+    "ConversationTokenCounter",
     "count_tokens",
+    "count_tokens_batch",
+    "count_tokens_batch_async",
     "count_tokens_in_messages",
     "estimate_cost",
     "truncate_text_to_token_limit"
@@ -3,11 +3,22 @@ Token Counter Utility
 
 This module provides utilities for counting tokens in text for different AI models,
 which is useful for cost estimation and request validation.
+
+Token counts are cached per tokenizer and content, so the same conversation
+history counted by routing, throttling and cost estimation is only encoded
+once. Batch counting and incremental conversation counting build on the
+same cache.
 """
 
+import asyncio
+import hashlib
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Sequence, Tuple, Union, Any
+
 import tiktoken
-from typing import Dict, List, Optional, Union, Any
 
 # Default tokenizer for fallback
 DEFAULT_TOKENIZER = "cl100k_base"  # GPT-4 tokenizer
@@ -34,6 +45,18 @@ MODEL_TO_TOKENIZER = {
 # Cache for tokenizers to avoid reloading
 _TOKENIZER_CACHE = {}
 
+# Cache of token counts keyed by (tokenizer name, content key)
+TOKEN_COUNT_CACHE_SIZE = 50000
+_TOKEN_COUNT_CACHE: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+_TOKEN_COUNT_LOCK = threading.Lock()
+_TOKEN_COUNT_STATS = {"hits": 0, "misses": 0}
+
+# Texts longer than this are keyed by digest instead of by value
+_INLINE_KEY_LENGTH = 256
+
+# Extra tokens required past the limit before a prefix encoding is trusted
+_TRUNCATION_MARGIN = 16
+
 
 def get_tokenizer(model_name: str):
     """
@@ -80,13 +103,130 @@ def count_tokens(text: str, model_name: Optional[str] = None) -> int:
     if model_name:
         tokenizer = get_tokenizer(model_name)
         if tokenizer:
-            return len(tokenizer.encode(text))
+            tokenizer_name = _tokenizer_name(model_name)
+            key = _content_key(text)
+            cached = _get_cached_count(tokenizer_name, key)
+            if cached is not None:
+                return cached
+            count = len(tokenizer.encode(text))
+            _set_cached_count(tokenizer_name, key, count)
+            return count
 
     # Fallback to approximation if no tokenizer available
     # This is a rough approximation: ~4 characters per token for English text
     return len(text) // 4
 
 
+def count_tokens_batch(
+    texts: Sequence[str],
+    model_name: Optional[str] = None,
+    num_threads: int = 8
+) -> List[int]:
+    """
+    Count tokens for many strings at once.
+
+    Cached strings are answered from the cache; the rest are encoded in a
+    single batch call, which tiktoken spreads over native threads.
+
+    Args:
+        texts: Strings to count.
+        model_name: Optional model name to use specific tokenizer.
+        num_threads: Threads used by the tokenizer for the batch.
+
+    Returns:
+        Token counts in the same order as texts.
+    """
+    tokenizer = get_tokenizer(model_name) if model_name else None
+    if not tokenizer:
+        return [len(text) // 4 if text else 0 for text in texts]
+
+    tokenizer_name = _tokenizer_name(model_name)
+    counts: List[Optional[int]] = [0] * len(texts)
+    pending: Dict[str, List[int]] = {}
+
+    for index, text in enumerate(texts):
+        if not text:
+            continue
+        key = _content_key(text)
+        cached = _get_cached_count(tokenizer_name, key)
+        if cached is not None:
+            counts[index] = cached
+        else:
+            # Duplicate misses are encoded once
+            pending.setdefault(text, []).append(index)
+
+    if pending:
+        unique = list(pending)
+        encoded = tokenizer.encode_batch(unique, num_threads=num_threads)
+        for text, tokens in zip(unique, encoded):
+            _set_cached_count(tokenizer_name, _content_key(text), len(tokens))
+            for index in pending[text]:
+                counts[index] = len(tokens)
+
+    return counts
+
+
+async def count_tokens_batch_async(
+    texts: Sequence[str],
+    model_name: Optional[str] = None,
+    executor: Optional[Executor] = None
+) -> List[int]:
+    """
+    Count tokens for many strings without blocking the event loop.
+
+    Args:
+        texts: Strings to count.
+        model_name: Optional model name to use specific tokenizer.
+        executor: Optional executor; defaults to the loop's thread pool.
+
+    Returns:
+        Token counts in the same order as texts.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, count_tokens_batch, list(texts), model_name)
+
+
+def get_token_cache_stats() -> Dict[str, int]:
+    """Return token count cache statistics."""
+    with _TOKEN_COUNT_LOCK:
+        return {"size": len(_TOKEN_COUNT_CACHE), **_TOKEN_COUNT_STATS}
+
+
+def clear_token_cache() -> None:
+    """Empty the token count cache."""
+    with _TOKEN_COUNT_LOCK:
+        _TOKEN_COUNT_CACHE.clear()
+        _TOKEN_COUNT_STATS.update(hits=0, misses=0)
+
+
+def _tokenizer_name(model_name: Optional[str]) -> str:
+    return MODEL_TO_TOKENIZER.get(model_name, DEFAULT_TOKENIZER)
+
+
+def _content_key(text: str) -> str:
+    if len(text) <= _INLINE_KEY_LENGTH:
+        return text
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest() + f":{len(text)}"
+
+
+def _get_cached_count(tokenizer_name: str, key: str) -> Optional[int]:
+    with _TOKEN_COUNT_LOCK:
+        count = _TOKEN_COUNT_CACHE.get((tokenizer_name, key))
+        if count is None:
+            _TOKEN_COUNT_STATS["misses"] += 1
+            return None
+        _TOKEN_COUNT_CACHE.move_to_end((tokenizer_name, key))
+        _TOKEN_COUNT_STATS["hits"] += 1
+        return count
+
+
+def _set_cached_count(tokenizer_name: str, key: str, count: int) -> None:
+    with _TOKEN_COUNT_LOCK:
+        _TOKEN_COUNT_CACHE[(tokenizer_name, key)] = count
+        if len(_TOKEN_COUNT_CACHE) > TOKEN_COUNT_CACHE_SIZE:
+            _TOKEN_COUNT_CACHE.popitem(last=False)
+
+
 def count_tokens_in_messages(messages: List[Dict[str, str]], model_name: Optional[str] = None) -> int:
     """
     Count tokens in a list of chat messages.
@@ -102,25 +242,94 @@ def count_tokens_in_messages(messages: List[Dict[str, str]], model_name: Optiona
         return 0
 
     # Count tokens in each message
-    total_tokens = 0
+    total_tokens = sum(_count_message_tokens(messages, model_name))
+
+    # Add tokens for overall formatting (approximation)
+    total_tokens += 2
+
+    return total_tokens
+
+
+def _count_message_tokens(messages: Sequence[Dict[str, Any]], model_name: Optional[str]) -> List[int]:
+    """Count each message's content, role and formatting overhead in one batch."""
+    texts = []
     for message in messages:
-        # Add tokens for message content
         content = message.get('content', '')
-        if isinstance(content, str):
-            total_tokens += count_tokens(content, model_name)
+        texts.append(content if isinstance(content, str) else '')
+        texts.append(message.get('role', ''))
 
-        # Add tokens for role (approximation)
-        role = message.get('role', '')
-        total_tokens += count_tokens(role, model_name)
+    counts = count_tokens_batch(texts, model_name)
 
-        # Add overhead tokens (approximation)
-        # Each message has some overhead tokens for formatting
-        total_tokens += 4
+    # Each message has some overhead tokens for formatting (approximation)
+    return [counts[2 * i] + counts[2 * i + 1] + 4 for i in range(len(messages))]
 
-    # Add tokens for overall formatting (approximation)
-    total_tokens += 2
 
-    return total_tokens
+class ConversationTokenCounter:
+    """
+    Incremental token counter for append-only conversations.
+
+    Per-message counts are remembered, so counting a conversation that
+    grew by one message only tokenizes the new message. If the history no
+    longer extends the counted prefix (edited or truncated), it is
+    recounted.
+    """
+
+    def __init__(self, model_name: Optional[str] = None):
+        """
+        Initialize the counter.
+
+        Args:
+            model_name: Optional model name to use specific tokenizer.
+        """
+        self.model_name = model_name
+        self.message_counts: List[int] = []
+        self._last_message: Optional[Tuple[Any, Any]] = None
+
+    @property
+    def total(self) -> int:
+        """Tokens in the counted messages, including overall formatting."""
+        return sum(self.message_counts) + 2 if self.message_counts else 0
+
+    def add(self, messages: Sequence[Dict[str, Any]]) -> int:
+        """
+        Count newly appended messages.
+
+        Args:
+            messages: Messages appended since the last call.
+
+        Returns:
+            The running total.
+        """
+        if messages:
+            self.message_counts.extend(_count_message_tokens(messages, self.model_name))
+            last = messages[-1]
+            self._last_message = (last.get('role'), last.get('content'))
+        return self.total
+
+    def count(self, messages: Sequence[Dict[str, Any]]) -> int:
+        """
+        Count a conversation, reusing counts for the prefix already seen.
+
+        Args:
+            messages: The full conversation so far.
+
+        Returns:
+            Token count, equal to count_tokens_in_messages(messages).
+        """
+        counted = len(self.message_counts)
+        if counted and (len(messages) < counted or self._message_key(messages[counted - 1]) != self._last_message):
+            self.reset()
+            counted = 0
+        return self.add(messages[counted:])
+
+    def reset(self) -> None:
+        """Forget all counted messages."""
+        self.message_counts = []
+        self._last_message = None
+
+    @staticmethod
+    def _message_key(message: Dict[str, Any]) -> Tuple[Any, Any]:
+        return (message.get('role'), message.get('content'))
 
 
 def estimate_cost(
@@ -187,8 +396,26 @@ def truncate_text_to_token_limit(text: str, max_tokens: int, model_name: Optiona
     tokenizer = get_tokenizer(model_name) if model_name else None
 
     if tokenizer:
+        # Every token covers at least one byte, so short texts always fit
+        if len(text) <= max_tokens and len(text.encode("utf-8")) <= max_tokens:
+            return text
+
+        cached = _get_cached_count(_tokenizer_name(model_name), _content_key(text))
+        if cached is not None and cached <= max_tokens:
+            return text
+
+        # Encode growing prefixes; tokens well before the cut are the same as
+        # in the full encoding, so a prefix with enough spare tokens suffices
+        window = max_tokens * 4 + 64
+        while window < len(text):
+            tokens = tokenizer.encode(text[:window])
+            if len(tokens) >= max_tokens + _TRUNCATION_MARGIN:
+                return tokenizer.decode(tokens[:max_tokens])
+            window *= 2
+
         # Use tiktoken for accurate truncation
         tokens = tokenizer.encode(text)
+        _set_cached_count(_tokenizer_name(model_name), _content_key(text), len(tokens))
         if len(tokens) <= max_tokens:
             return text
 
@@ -8,6 +8,10 @@ class OPASettings(BaseSettings):
     URL: str = Field(..., env="OPA_URL")
     POLICY_PATH: str = Field(default="v1/data/maily/authz", env="OPA_POLICY_PATH")
     TIMEOUT: int = Field(default=5, env="OPA_TIMEOUT")
+    MAX_CONNECTIONS: int = Field(default=20, env="OPA_MAX_CONNECTIONS")
+    DECISION_CACHE_TTL: int = Field(default=30, env="OPA_DECISION_CACHE_TTL")
+    DECISION_CACHE_SIZE: int = Field(default=10000, env="OPA_DECISION_CACHE_SIZE")
+    LOCAL_POLICY: bool = Field(default=False, env="OPA_LOCAL_POLICY")
 
     class Config:
         """Pydantic config."""
@@ -64,31 +64,26 @@ from packages.error_handling.python.error import (
     ServerError, RateLimitExceededError, AIError
 )
 from packages.error_handling.python.middleware import setup_error_handling, handle_common_exceptions
+from packages.error_handling.python.transport import transport_registry
+
+from apps.api.utils.lazy_loading import LazyRouterRegistry, import_profiler
 
 # Import project modules
+_core_import_start = time.perf_counter()
 try:
     # Try to import from apps.api
     from apps.api.config import Settings
     from apps.api.config.settings import get_settings
-    from apps.api.routers import router
     from apps.api.middleware.security import (
         security_middleware,
         waf_middleware,
     )
-    from apps.api.middleware.rate_limiting import add_rate_limiting_middleware, rate_limit_middleware
+    from apps.api.middleware.rate_limiting import add_rate_limiting_middleware
     from apps.api.middleware.owasp_middleware import setup_owasp_middleware
     from apps.api.middleware.security_headers import EnhancedSecurityHeadersMiddleware, SecurityConfig
     from apps.api.utils.openapi_generator import setup_openapi_documentation
     from apps.api.monitoring.metrics import MetricsManager
-    from apps.api.routers import (
-        integrations, auth, policies, campaigns, templates,
-        health, privacy, models, platforms, contacts, canvas, websocket,
-        ai, ai_cached, blockchain, mailydocs_certificates, documents, 
-        conversation, api_keys, evaluation, graphql, analytics_router
-    )
-    from apps.api.endpoints import users, analytics, mailydocs
     from apps.api.metrics.prometheus import initialize_metrics_endpoint
-    from apps.api.ai.monitoring.ai_dashboard import register_ai_dashboard
 
     # Import adapter-related modules if available
     try:
@@ -119,14 +114,9 @@ except ImportError:
     def get_settings():
         return Settings()
 
-    router = None
-
     async def security_middleware(request, call_next):
         return await call_next(request)
 
-    async def rate_limit_middleware(request, call_next):
-        return await call_next(request)
-
     async def waf_middleware(request, call_next):
         return await call_next(request)
 
@@ -139,7 +129,6 @@ except ImportError:
         def shutdown(self): pass
 
     def initialize_metrics_endpoint(app): pass
-    def register_ai_dashboard(app): pass
     def setup_owasp_middleware(app): pass
     def setup_openapi_documentation(app): pass
 
@@ -148,19 +137,37 @@ except ImportError:
     
     adapter_modules_available = False
 
-# Try to import AI service
-try:
-    from apps.api.ai.service import AIService
-except ImportError:
-    # Mock AI service if not available
-    class MockAIService:
-        async def generate_text(self, prompt, **kwargs):
-            return {"text": "This is a mock response because the AI service is not available."}
-        
-        async def check_health(self):
-            return {"status": "Not available (mock)"}
-    
-    AIService = MockAIService
+import_profiler.record("startup.core_modules", (time.perf_counter() - _core_import_start) * 1000)
+
+
+# Mock AI service used when the AI service is not available
+class MockAIService:
+    async def generate_text(self, prompt, **kwargs):
+        return {"text": "This is a mock response because the AI service is not available."}
+
+    async def check_health(self):
+        return {"status": "Not available (mock)"}
+
+
+_ai_service_class = None
+
+
+def get_ai_service_class():
+    """
+    Returns the AI service class, importing it on first use.
+
+    The AI service pulls in every model adapter and provider SDK, so it is
+    not imported at startup.
+    """
+    global _ai_service_class
+    if _ai_service_class is None:
+        try:
+            with import_profiler.measure("apps.api.ai.service"):
+                from apps.api.ai.service import AIService
+            _ai_service_class = AIService
+        except ImportError:
+            _ai_service_class = MockAIService
+    return _ai_service_class
 
 # Configure settings
 load_dotenv()
@@ -219,6 +226,12 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Routers are registered at the bottom of this module. The lazy router
+# middleware is added first so it sits innermost: only requests that pass the
+# security middleware below can trigger a router import.
+router_registry = LazyRouterRegistry(profiler=import_profiler)
+router_registry.add_middleware(app)
+
 # Add middleware in correct order (most general to most specific)
 # 1. Trusted Host middleware (security)
 app.add_middleware(
@@ -313,21 +326,6 @@ async def security_middleware_wrapper(request: Request, call_next):
             content={"detail": "Authentication error"}
         )
 
-# 12. Rate limit middleware
-@app.middleware("http")
-async def rate_limit_middleware_wrapper(request: Request, call_next):
-    try:
-        return await rate_limit_middleware(request, call_next)
-    except HTTPException as e:
-        # Re-raise HTTP exceptions for proper status codes
-        raise
-    except Exception as e:
-        error(f"Rate limiting error: {str(e)}")
-        return JSONResponse(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            content={"detail": "Rate limit exceeded"}
-        )
-
 # Add OpenAPI documentation
 setup_openapi_documentation(app)
 
@@ -450,7 +448,7 @@ async def check_health():
     uptime = time.time() - float(start_time)
     
     # Check AI service health
-    ai_service = AIService()
+    ai_service = get_ai_service_class()()
     ai_health = await ai_service.check_health()
     
     # Build response
@@ -633,7 +631,7 @@ async def generate_campaign_content(campaign_id: str, task: str, model_name: str
         info(f"Generating campaign content: {campaign_id}", task=task, model=model_name)
         
         # Initialize AI service
-        ai_service = AIService()
+        ai_service = get_ai_service_class()()
         
         # Generate content
         result = await ai_service.generate_text(prompt=task, model=model_name)
@@ -757,17 +755,22 @@ async def startup_event():
     # Initialize metrics endpoint
     initialize_metrics_endpoint(app)
     
-    # Register AI dashboard if available
-    try:
-        register_ai_dashboard(app)
-    except Exception as e:
-        warning(f"Failed to register AI dashboard: {str(e)}")
-    
-    # Include router and endpoints
-    if router:
-        app.include_router(router)
-    
-    info(f"Maily API started successfully in {APP_MODE} mode")
+    # Optionally mount lazy routers in the background so the first request
+    # to each of them does not pay the import cost
+    if os.environ.get("API_PRELOAD_ROUTERS", "false").lower() == "true":
+        asyncio.create_task(router_registry.preload())
+
+    # Open connections to the origins in HTTP_WARM_UP_URLS in the background
+    # so the first outbound requests do not pay for TCP and TLS handshakes
+    asyncio.create_task(transport_registry.warm_up())
+
+    startup_imports = import_profiler.report(top=5)
+    info(
+        f"Maily API started successfully in {APP_MODE} mode",
+        import_ms=startup_imports["total_ms"],
+        slowest_imports=[entry["name"] for entry in startup_imports["entries"]],
+        pending_routers=[spec.name for spec in router_registry.pending],
+    )
 
 
 @app.on_event("shutdown")
@@ -778,7 +781,8 @@ async def shutdown_event():
     """
     info("Maily API shutting down")
     
-    # Perform additional cleanup here if needed
+    # Close the shared outbound connection pools
+    await transport_registry.aclose()
     
     info("Maily API shutdown complete")
 
@@ -796,39 +800,68 @@ def cleanup():
 
 atexit.register(cleanup)
 
-# Include routers
-try:
-    # Import and include canvas WebSocket router for real-time collaboration
-    from apps.api.routers.canvas_websocket import router as canvas_websocket_router
-    app.include_router(canvas_websocket_router)
-    info("Canvas WebSocket router successfully included")
-except ImportError as e:
-    warning(f"Canvas WebSocket router not available: {str(e)}")
-
-app.include_router(auth.router)
-app.include_router(health.router)
-app.include_router(ai.router)
-app.include_router(ai_cached.router)
-app.include_router(integrations.router)
-app.include_router(policies.router)
-app.include_router(campaigns.router)
-app.include_router(templates.router)
-app.include_router(privacy.router)
-app.include_router(models.router)
-app.include_router(platforms.router)
-app.include_router(contacts.router)
-app.include_router(canvas.router)
-app.include_router(websocket.router)
-app.include_router(analytics.router)
-app.include_router(analytics_router.router)
-app.include_router(mailydocs.router)
-app.include_router(blockchain.router)
-app.include_router(mailydocs_certificates.router)
-app.include_router(documents.router)
-app.include_router(conversation.router)
-app.include_router(api_keys.router)
-app.include_router(evaluation.router)
-app.include_router(graphql.router)
+@app.get("/system/startup", tags=["System"])
+async def startup_report(api_key: str = Depends(verify_api_key)):
+    """
+    Reports per-module startup import cost and the state of every router.
+
+    Args:
+        api_key: The validated API key.
+
+    Returns:
+        Router loading modes and states plus the recorded import profile.
+    """
+    return router_registry.report()
+
+
+@app.get("/system/http-pools", tags=["System"])
+async def http_pool_report(api_key: str = Depends(verify_api_key)):
+    """
+    Reports the shared outbound connection pools per origin.
+
+    Args:
+        api_key: The validated API key.
+
+    Returns:
+        Request counts, latency, connections and TLS handshakes per origin.
+    """
+    return transport_registry.stats()
+
+
+# Register routers. Core routers are mounted at startup; optional and rarely
+# used ones are mounted on the first request under their prefix. Any router
+# can be forced eager, lazy or off with API_ROUTER_<NAME>, and
+# API_LAZY_ROUTERS=false mounts everything at startup.
+router_registry.register("canvas_websocket", "apps.api.routers.canvas_websocket", prefix="/ws/canvas", mode="lazy")
+router_registry.register("auth", "apps.api.routers.auth")
+router_registry.register("health", "apps.api.routers.health")
+router_registry.register("ai", "apps.api.routers.ai", prefix="/ai", mode="lazy")
+router_registry.register("ai_cached", "apps.api.routers.ai_cached", prefix="/ai/cached", mode="lazy")
+router_registry.register("ai_dashboard", "apps.api.ai.monitoring.ai_dashboard", prefix="/ai/monitoring", mode="lazy")
+router_registry.register("integrations", "apps.api.routers.integrations", prefix="/integrations", mode="lazy")
+router_registry.register("policies", "apps.api.routers.policies")
+router_registry.register("campaigns", "apps.api.routers.campaigns")
+router_registry.register("templates", "apps.api.routers.templates")
+router_registry.register("privacy", "apps.api.routers.privacy")
+router_registry.register("models", "apps.api.routers.models")
+router_registry.register("platforms", "apps.api.routers.platforms")
+router_registry.register("contacts", "apps.api.routers.contacts")
+router_registry.register("canvas", "apps.api.routers.canvas", prefix="/v1/canvas", mode="lazy")
+router_registry.register("websocket", "apps.api.routers.websocket")
+router_registry.register("analytics", "apps.api.routers.analytics_router", prefix="/analytics", mode="lazy")
+router_registry.register("mailydocs", "apps.api.endpoints.mailydocs", prefix="/mailydocs", mode="lazy")
+router_registry.register("blockchain", "apps.api.routers.blockchain", prefix="/v1/blockchain", mode="lazy")
+router_registry.register(
+    "mailydocs_certificates", "apps.api.routers.mailydocs_certificates",
+    prefix="/v1/mailydocs/certificates", mode="lazy",
+)
+router_registry.register("documents", "apps.api.routers.documents", prefix="/documents", mode="lazy")
+router_registry.register("conversation", "apps.api.routers.conversation", prefix="/conversations", mode="lazy")
+router_registry.register("api_keys", "apps.api.routers.api_keys")
+router_registry.register("evaluation", "apps.api.routers.evaluation", prefix="/evaluation", mode="lazy")
+router_registry.register("graphql", "apps.api.routers.graphql", prefix="/graphql", mode="lazy")
+
+router_registry.mount(app)
 
 # If running as main script
 if __name__ == "__main__":
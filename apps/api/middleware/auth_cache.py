@@ -0,0 +1,364 @@
+"""Process-wide caches for JWT authentication.
+
+Verifying a JWT needs the issuer's signing keys, and turning the verified
+claims into a user needs a database lookup. Doing both on every request puts a
+network round-trip and a query on the hot path, so this module keeps:
+
+- ``JWKSCache``: the issuer's JWKS, refreshed in the background and refetched
+  (rate limited) when a token arrives with an unknown ``kid``.
+- ``VerifiedTokenCache``: claims of tokens that already passed verification,
+  keyed by a hash of the token and never kept past the token's ``exp``.
+- ``UserProfileCache``: the user profile returned by authentication, keyed by
+  Auth0 ID and invalidated when the user is updated.
+
+Set ``AUTH0_JWKS_URL`` to point at a local JWKS file server instead of Auth0.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+JWKS_REFRESH_SECONDS = float(os.getenv("AUTH_JWKS_REFRESH_SECONDS", "600"))
+JWKS_MIN_REFETCH_SECONDS = float(os.getenv("AUTH_JWKS_MIN_REFETCH_SECONDS", "30"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "60"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+
+
+class JWKSUnavailableError(Exception):
+    """Raised when no signing keys could be loaded."""
+
+
+class JWKSCache:
+    """Signing keys of one issuer, shared by every request in the process."""
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float = JWKS_REFRESH_SECONDS,
+        min_refetch_interval: float = JWKS_MIN_REFETCH_SECONDS,
+        timeout: float = 5.0,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        """Initialize the cache.
+
+        Args:
+            url: JWKS endpoint.
+            refresh_interval: Seconds between background refreshes.
+            min_refetch_interval: Minimum seconds between fetches triggered by
+                unknown key IDs, so forged tokens cannot hammer the issuer.
+            timeout: HTTP timeout in seconds.
+            client: HTTP client to use instead of a private one.
+        """
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self._client = client
+        self._owns_client = client is None
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at = 0.0
+        self._last_attempt = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "kid_misses": 0, "fetches": 0, "fetch_errors": 0}
+
+    @property
+    def key_ids(self):
+        """Key IDs currently cached."""
+        return list(self._keys)
+
+    async def get_key(self, kid: str) -> Optional[Dict[str, Any]]:
+        """Get the JWK for a key ID.
+
+        Args:
+            kid: Key ID from the token header.
+
+        Returns:
+            The JWK, or None if the issuer does not publish the key.
+
+        Raises:
+            JWKSUnavailableError: If no keys have ever been loaded.
+        """
+        if not self._keys or self._needs_inline_refresh():
+            await self.refresh()
+            if not self._keys:
+                raise JWKSUnavailableError(f"No signing keys available from {self.url}")
+
+        key = self._keys.get(kid)
+        if key is not None:
+            self.stats["hits"] += 1
+            return key
+
+        # The issuer may have rotated keys since the last fetch
+        self.stats["kid_misses"] += 1
+        if time.monotonic() - self._last_attempt >= self.min_refetch_interval:
+            await self.refresh()
+        return self._keys.get(kid)
+
+    async def refresh(self) -> bool:
+        """Fetch the JWKS, coalescing concurrent callers into one request.
+
+        Keys already cached are kept if the fetch fails.
+
+        Returns:
+            True if the keys were fetched, or were fetched by a concurrent
+            caller while waiting.
+        """
+        requested_at = time.monotonic()
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._last_attempt >= requested_at:
+                return self._fetched_at >= requested_at
+
+            self._last_attempt = time.monotonic()
+            self.stats["fetches"] += 1
+            try:
+                response = await self._get_client().get(self.url, timeout=self.timeout)
+                response.raise_for_status()
+                keys = {
+                    key["kid"]: key
+                    for key in response.json().get("keys", [])
+                    if key.get("kid")
+                }
+            except Exception as e:
+                self.stats["fetch_errors"] += 1
+                logger.warning(f"Failed to fetch JWKS from {self.url}: {str(e)}")
+                return False
+
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            return True
+
+    def start(self) -> None:
+        """Start refreshing the keys in the background.
+
+        Must be called from a running event loop; does nothing if the refresh
+        task is already running.
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        """Stop the background refresh and close the HTTP client."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            # Jitter keeps workers from refreshing in lockstep
+            await asyncio.sleep(self.refresh_interval * random.uniform(0.8, 1.0))
+            await self.refresh()
+
+    def _needs_inline_refresh(self) -> bool:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return False
+        now = time.monotonic()
+        # While the issuer is unreachable, keep serving cached keys between retries
+        return (
+            now - self._fetched_at > self.refresh_interval
+            and now - self._last_attempt >= self.min_refetch_interval
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient()
+        return self._client
+
+
+class VerifiedTokenCache:
+    """Claims of verified tokens, keyed by token hash and bounded by expiry."""
+
+    def __init__(self, ttl: float = TOKEN_CACHE_TTL_SECONDS, max_size: int = CACHE_MAX_SIZE):
+        """Initialize the cache.
+
+        Args:
+            ttl: Maximum seconds to keep claims.
+            max_size: Maximum number of tokens to keep.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        """Hash a token so raw credentials are never kept as cache keys."""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Get the claims of a previously verified token.
+
+        Args:
+            token: Raw JWT.
+
+        Returns:
+            The verified claims, or None if unknown or expired.
+        """
+        key = self.token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        """Remember the claims of a token that passed verification.
+
+        Args:
+            token: Raw JWT.
+            claims: Verified claims.
+        """
+        now = time.time()
+        expires_at = now + self.ttl
+        exp = claims.get("exp")
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+
+        key = self.token_key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every cached token."""
+        with self._lock:
+            self._entries.clear()
+
+
+class UserProfileCache:
+    """Authenticated user profiles keyed by Auth0 ID.
+
+    Invalidation is local to the process, so ``ttl`` bounds how long other
+    workers can serve a profile after the user is updated.
+    """
+
+    def __init__(self, ttl: float = USER_CACHE_TTL_SECONDS, max_size: int = CACHE_MAX_SIZE):
+        """Initialize the cache.
+
+        Args:
+            ttl: Seconds to keep a profile.
+            max_size: Maximum number of profiles to keep.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._auth0_ids: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, auth0_id: str) -> Optional[Dict[str, Any]]:
+        """Get a cached profile.
+
+        Args:
+            auth0_id: Auth0 subject.
+
+        Returns:
+            A copy of the profile, or None if unknown or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(auth0_id)
+            if entry is None:
+                return None
+            profile, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(auth0_id)
+                return None
+            self._entries.move_to_end(auth0_id)
+            return dict(profile)
+
+    def put(self, auth0_id: str, profile: Dict[str, Any]) -> None:
+        """Cache a profile.
+
+        Args:
+            auth0_id: Auth0 subject.
+            profile: Profile with at least an ``id`` key.
+        """
+        with self._lock:
+            self._remove(auth0_id)
+            self._entries[auth0_id] = (dict(profile), time.monotonic() + self.ttl)
+            if profile.get("id") is not None:
+                self._auth0_ids[profile["id"]] = auth0_id
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, auth0_id: Optional[str] = None, user_id: Any = None) -> None:
+        """Drop a profile after the user changed.
+
+        Args:
+            auth0_id: Auth0 subject.
+            user_id: Database ID, for callers that do not know the subject.
+        """
+        with self._lock:
+            if auth0_id is None and user_id is not None:
+                auth0_id = self._auth0_ids.get(user_id)
+            if auth0_id is not None:
+                self._remove(auth0_id)
+
+    def clear(self) -> None:
+        """Forget every cached profile."""
+        with self._lock:
+            self._entries.clear()
+            self._auth0_ids.clear()
+
+    def _remove(self, auth0_id: str) -> None:
+        entry = self._entries.pop(auth0_id, None)
+        if entry is not None:
+            self._auth0_ids.pop(entry[0].get("id"), None)
+
+
+_jwks_caches: Dict[str, JWKSCache] = {}
+
+
+def get_jwks_cache(url: str) -> JWKSCache:
+    """Get the process-wide JWKS cache for an endpoint.
+
+    The background refresh starts the first time the cache is requested
+    from a running event loop.
+
+    Args:
+        url: JWKS endpoint.
+
+    Returns:
+        The shared cache.
+    """
+    cache = _jwks_caches.get(url)
+    if cache is None:
+        cache = _jwks_caches[url] = JWKSCache(url)
+    try:
+        cache.start()
+    except RuntimeError:
+        # No running loop; keys are refreshed on demand instead
+        pass
+    return cache
+
+
+# Global instances
+verified_token_cache = VerifiedTokenCache()
+user_profile_cache = UserProfileCache()
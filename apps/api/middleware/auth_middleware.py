@@ -1,6 +1,7 @@
 """Authentication middleware for the API."""
 import logging
 import os
+from datetime import datetime
 from typing import Optional, Dict, Any, Callable
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -9,7 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.session import get_db
 from services.user_service import get_user_by_auth0_id, create_user_from_auth0
-from services.api_key_service import get_user_by_api_key
+from .auth_cache import get_jwks_cache, user_profile_cache, verified_token_cache
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,8 @@ logger = logging.getLogger(__name__)
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN", "")
 AUTH0_AUDIENCE = os.getenv("AUTH0_AUDIENCE", "")
 AUTH0_ALGORITHMS = ["RS256"]
+# Defaults to the tenant's JWKS; override to use a local JWKS server
+AUTH0_JWKS_URL = os.getenv("AUTH0_JWKS_URL") or f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
 
 # Security scheme for JWT authentication
 security = HTTPBearer()
@@ -77,18 +80,26 @@ async def _authenticate_with_jwt(token: str, db: AsyncSession) -> Dict[str, Any]
         )
 
     try:
-        # Verify and decode the JWT
-        jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-        jwks_client = jwt.PyJWKClient(jwks_url)
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
-
-        payload = jwt.decode(
-            token,
-            signing_key.key,
-            algorithms=AUTH0_ALGORITHMS,
-            audience=AUTH0_AUDIENCE,
-            issuer=f"https://{AUTH0_DOMAIN}/"
-        )
+        # Tokens seen recently skip signature verification until they expire
+        payload = verified_token_cache.get(token)
+        if payload is None:
+            kid = jwt.get_unverified_header(token).get("kid")
+            signing_key = await get_jwks_cache(AUTH0_JWKS_URL).get_key(kid) if kid else None
+            if signing_key is None:
+                logger.warning(f"JWT signed with unknown key: {kid}")
+                raise HTTPException(
+                    status_code=401,
+                    detail="Invalid authentication credentials"
+                )
+
+            payload = jwt.decode(
+                token,
+                signing_key,
+                algorithms=AUTH0_ALGORITHMS,
+                audience=AUTH0_AUDIENCE,
+                issuer=f"https://{AUTH0_DOMAIN}/"
+            )
+            verified_token_cache.put(token, payload)
 
         # Extract user information from the token
         auth0_id = payload.get("sub")
@@ -98,37 +109,34 @@ async def _authenticate_with_jwt(token: str, db: AsyncSession) -> Dict[str, Any]
                 detail="Invalid authentication credentials"
             )
 
-        # Get the user from the database
-        user = await get_user_by_auth0_id(auth0_id, db)
-
-        # If the user doesn't exist, create a new user
-        if not user:
-            # Extract user information from the token
-            email = payload.get("email")
-            name = payload.get("name")
-
-            if not email:
-                raise HTTPException(
-                    status_code=401,
-                    detail="Invalid authentication credentials"
-                )
-
-            # Create a new user
-            user = await create_user_from_auth0(
-                auth0_id=auth0_id,
-                email=email,
-                name=name,
-                db=db
-            )
+        profile = user_profile_cache.get(auth0_id)
+        if profile is None:
+            # Get the user from the database
+            user = await get_user_by_auth0_id(auth0_id, db)
+
+            # If the user doesn't exist, create a new user
+            if not user:
+                if not payload.get("email"):
+                    raise HTTPException(
+                        status_code=401,
+                        detail="Invalid authentication credentials"
+                    )
+
+                # Create a new user from the token claims
+                user = await create_user_from_auth0(payload, db)
+
+            profile = {
+                "id": user.id,
+                "email": user.email,
+                "name": user.name,
+                "is_admin": user.is_admin,
+            }
+            user_profile_cache.put(auth0_id, profile)
 
         # Return the user information
-        return {
-            "id": user.id,
-            "email": user.email,
-            "name": user.name,
-            "is_admin": user.is_admin,
-            "auth0_id": auth0_id
-        }
+        return {**profile, "auth0_id": auth0_id}
+    except HTTPException:
+        raise
     except JWTError as e:
         logger.error(f"JWT authentication error: {str(e)}")
         raise HTTPException(
@@ -158,9 +166,9 @@ async def _authenticate_with_api_key(api_key: str, db: AsyncSession) -> Dict[str
     """
     try:
         # Import api_key_service functions here to avoid circular imports
-        from services.api_key_service import validate_api_key, get_api_key_scopes, get_user_by_api_key
-        
-        # Validate the API key first
+        from services.api_key_service import validate_api_key
+
+        # Validate the API key; repeated keys are served from the cache
         is_valid, key_data = await validate_api_key(api_key)
         
         if not is_valid or not key_data:
@@ -170,12 +178,8 @@ async def _authenticate_with_api_key(api_key: str, db: AsyncSession) -> Dict[str
                 detail="Invalid authentication credentials"
             )
         
-        # Get API key scopes for authorization
-        scopes = await get_api_key_scopes(api_key)
-        
         # Check if key is expired
         if "expires_at" in key_data and key_data["expires_at"]:
-            from datetime import datetime
             import dateutil.parser
             expires_at = dateutil.parser.parse(key_data["expires_at"])
             if expires_at < datetime.utcnow():
@@ -185,9 +189,8 @@ async def _authenticate_with_api_key(api_key: str, db: AsyncSession) -> Dict[str
                     detail="API key has expired"
                 )
         
-        # Get the user from the database using the user_id from key_data
-        user_id = key_data.get("user_id")
-        user = await get_user_by_api_key(api_key, db)
+        # The key's owner is returned with the key data
+        user = key_data.get("user")
         
         if not user:
             logger.warning(f"User not found for API key: {key_data['id']}")
@@ -198,13 +201,13 @@ async def _authenticate_with_api_key(api_key: str, db: AsyncSession) -> Dict[str
         
         # Return the user information with additional API key data
         return {
-            "id": user.id,
-            "email": user.email,
-            "name": user.name,
-            "is_admin": user.is_admin,
+            "id": user["id"],
+            "email": user["email"],
+            "name": user["name"],
+            "is_admin": user["is_admin"],
             "auth_method": "api_key",
             "key_id": key_data["id"],
-            "scopes": scopes,
+            "scopes": key_data.get("scopes", []),
             "authenticated_at": datetime.utcnow().isoformat()
         }
     except Exception as e:
@@ -9,6 +9,55 @@ from middleware.auth0 import get_current_user
 from services.opa_service import opa_service
 
 
+def get_decision_memo(request: Request) -> Dict:
+    """Get the decisions already made while handling this request.
+
+    Several permission dependencies on one route, or a dependency plus checks
+    in the handler, share the memo so each decision is evaluated once.
+
+    Args:
+        request: The FastAPI request object.
+
+    Returns:
+        The request-scoped decision memo.
+    """
+    memo = getattr(request.state, "opa_decisions", None)
+    if memo is None:
+        memo = {}
+        request.state.opa_decisions = memo
+    return memo
+
+
+async def filter_permitted(
+    request: Request,
+    user: Dict[str, Any],
+    action: str,
+    resource: str,
+    resource_ids: List[Union[str, int]],
+) -> List[Union[str, int]]:
+    """Filter a page of resources with one batched policy evaluation.
+
+    List endpoints should call this instead of checking each item.
+
+    Args:
+        request: The FastAPI request object.
+        user: The current user.
+        action: The action to check permission for.
+        resource: The resource type.
+        resource_ids: IDs of the resources on the page.
+
+    Returns:
+        The IDs the user may access, in their original order.
+    """
+    return await opa_service.filter_allowed(
+        user=user,
+        action=action,
+        resource=resource,
+        resource_ids=resource_ids,
+        memo=get_decision_memo(request),
+    )
+
+
 class PermissionDependency:
     """Dependency for checking permissions with OPA."""
 
@@ -69,6 +118,7 @@ class PermissionDependency:
             resource=self.resource,
             resource_id=resource_id,
             context=context,
+            memo=get_decision_memo(request),
         )
 
         if not has_permission:
@@ -197,6 +247,7 @@ class BulkPermissionDependency:
         permission_results = await opa_service.check_bulk_permissions(
             user=user,
             permissions=self.permissions,
+            memo=get_decision_memo(request),
         )
 
         return permission_results
@@ -265,6 +316,7 @@ def permission_required(
                 resource=resource,
                 resource_id=resource_id,
                 context=context,
+                memo=get_decision_memo(request),
             )
 
             if not has_permission:
@@ -1,13 +1,9 @@
 """API Key Authentication Provider implementation."""
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime
-
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any
 
 from ..standardized_auth import APIKeyProvider, APIKeyVerificationError
-from database.session import get_db
-from services.api_key_service import get_user_by_api_key, update_api_key_last_used
+from services.api_key_service import validate_api_key
 
 logger = logging.getLogger(__name__)
 
@@ -32,29 +28,27 @@ class DatabaseAPIKeyProvider(APIKeyProvider):
             if not api_key.startswith("mil_"):
                 raise APIKeyVerificationError("Invalid API key format")
 
-            # Get the user from the database
-            async with get_db() as db:
-                user, api_key_obj = await get_user_by_api_key(api_key, db, return_api_key=True)
-
-                if not user:
-                    raise APIKeyVerificationError("Invalid API key")
-
-                # Check if the API key has the required scopes for the request
-                # This will be implemented when handling scopes in the request
-
-                # Update last used timestamp
-                await update_api_key_last_used(api_key_obj.id, db)
-
-                # Return the user information
-                return {
-                    "id": user.id,
-                    "email": user.email,
-                    "name": user.name,
-                    "is_admin": user.is_admin,
-                    "auth_method": "api_key",
-                    "api_key_id": api_key_obj.id,
-                    "api_key_scopes": api_key_obj.scopes if hasattr(api_key_obj, "scopes") else []
-                }
+            # Validate the key; repeated keys are served from the cache and
+            # the last used timestamp is recorded for the next bulk flush
+            is_valid, key_data = await validate_api_key(api_key)
+            user = key_data.get("user") if is_valid and key_data else None
+
+            if not user:
+                raise APIKeyVerificationError("Invalid API key")
+
+            # Check if the API key has the required scopes for the request
+            # This will be implemented when handling scopes in the request
+
+            # Return the user information
+            return {
+                "id": user["id"],
+                "email": user["email"],
+                "name": user["name"],
+                "is_admin": user["is_admin"],
+                "auth_method": "api_key",
+                "api_key_id": key_data["id"],
+                "api_key_scopes": key_data.get("scopes", [])
+            }
         except APIKeyVerificationError:
             raise
         except Exception as e:
@@ -9,6 +9,11 @@ This module provides sophisticated rate limiting capabilities:
 5. Client fingerprinting to prevent circumvention
 6. Adaptive rate limiting based on server load
 7. IP reputation tracking to penalize bad actors
+
+Limiter state lives behind a RateLimitState backend. The local backend keeps
+bounded LRU tables (with a count-min sketch remembering quota usage of
+evicted clients) so memory stays flat under scans from many addresses; the
+Redis backend shares state across pods with one atomic script per request.
 """
 
 import time
@@ -19,8 +24,11 @@ import re
 import math
 import json
 import asyncio
+import os
+from array import array
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from collections import defaultdict
+from collections import OrderedDict, deque
 from typing import Dict, List, Optional, Set, Tuple, Any, Callable, Union
 
 from fastapi import Request, Response, status
@@ -74,22 +82,96 @@ REPUTATION_PENALTY_DURATION = 24 * 60 * 60  # 24 hours in seconds
 MAX_VIOLATIONS_BEFORE_PENALTY = 5
 VIOLATION_RESET_PERIOD = 60 * 60  # 1 hour in seconds
 
+# Upper bound on clients tracked per table by the local backend
+MAX_TRACKED_CLIENTS = int(os.environ.get("RATE_LIMIT_MAX_TRACKED_CLIENTS", "100000"))
+
+# State backend: "local" (per process) or "redis" (shared across pods)
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "local")
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+
+
+def seconds_until_midnight() -> int:
+    """
+    Calculate seconds until midnight UTC.
+
+    Returns:
+        Seconds until midnight
+    """
+    now = datetime.now(timezone.utc)
+    midnight = datetime(now.year, now.month, now.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return int((midnight - now).total_seconds())
+
+
+class CountMinSketch:
+    """
+    Fixed-size approximate counter.
+
+    Estimates never undercount; they may overcount by a small amount that
+    depends on the total mass added and the table width.
+    """
+
+    def __init__(self, width: int = 16384, depth: int = 4):
+        """
+        Initialize the sketch.
+
+        Args:
+            width: Counters per row
+            depth: Number of independent rows
+        """
+        self.width = width
+        self.depth = depth
+        self.tables = [array("L", [0]) * width for _ in range(depth)]
+
+    def _indexes(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return [int.from_bytes(digest[4 * i:4 * i + 4], "little") % self.width for i in range(self.depth)]
+
+    def add(self, key: str, amount: int = 1) -> None:
+        """Add amount to the counters for key."""
+        for table, index in zip(self.tables, self._indexes(key)):
+            table[index] += amount
+
+    def estimate(self, key: str) -> int:
+        """Return the estimated total added for key."""
+        return min(table[index] for table, index in zip(self.tables, self._indexes(key)))
+
+    def clear(self) -> None:
+        """Reset all counters."""
+        self.tables = [array("L", [0]) * self.width for _ in range(self.depth)]
+
 
 class QuotaTracker:
-    """Tracks daily API usage quotas for users."""
+    """
+    Tracks daily API usage quotas for users.
+
+    Recently active keys are counted exactly in an LRU table of at most
+    max_keys entries. Usage of evicted keys is folded into a count-min
+    sketch, so a returning client resumes from an estimate that never
+    undercounts while memory stays bounded.
+    """
     
-    def __init__(self):
-        """Initialize the quota tracker."""
-        self.daily_quotas = defaultdict(int)  # {user_key: usage_count}
+    def __init__(self, max_keys: int = MAX_TRACKED_CLIENTS, sketch_width: int = 16384, sketch_depth: int = 4):
+        """
+        Initialize the quota tracker.
+
+        Args:
+            max_keys: Maximum number of keys counted exactly
+            sketch_width: Counters per row in the eviction sketch
+            sketch_depth: Rows in the eviction sketch
+        """
+        self.max_keys = max_keys
+        self.daily_quotas: "OrderedDict[str, List[int]]" = OrderedDict()  # {user_key: [usage, base_from_sketch]}
+        self.evicted = CountMinSketch(sketch_width, sketch_depth)
         self.last_reset = datetime.now(timezone.utc).date()
     
-    def increment(self, key: str, amount: int = 1) -> Tuple[int, int]:
+    def increment(self, key: str, amount: int = 1, daily_quota: Optional[int] = None) -> Tuple[int, int]:
         """
         Increment the usage count for a key and return current usage and quota.
         
         Args:
             key: The user identifier
             amount: The amount to increment by
+            daily_quota: Quota to report; looked up from the key's tier if omitted
             
         Returns:
             Tuple of (current_usage, daily_quota)
@@ -97,21 +179,29 @@ class QuotaTracker:
         # Reset quotas if it's a new day
         self._check_reset()
         
-        # Get the tier for this key
-        tier = get_user_tier(key)
-        _, daily_quota, _, _ = RATE_LIMIT_TIERS.get(tier, RATE_LIMIT_TIERS[DEFAULT_TIER])
+        entry = self.daily_quotas.get(key)
+        if entry is None:
+            base = self.evicted.estimate(key)
+            entry = [base, base]
+            self.daily_quotas[key] = entry
+            if len(self.daily_quotas) > self.max_keys:
+                evicted_key, (usage, evicted_base) = self.daily_quotas.popitem(last=False)
+                self.evicted.add(evicted_key, usage - evicted_base)
+        else:
+            self.daily_quotas.move_to_end(key)
         
         # Increment the usage
-        self.daily_quotas[key] += amount
+        entry[0] += amount
         
-        return self.daily_quotas[key], daily_quota
+        return entry[0], self._quota_for(key, daily_quota)
     
-    def get_usage(self, key: str) -> Tuple[int, int]:
+    def get_usage(self, key: str, daily_quota: Optional[int] = None) -> Tuple[int, int]:
         """
         Get the current usage and quota for a key.
         
         Args:
             key: The user identifier
+            daily_quota: Quota to report; looked up from the key's tier if omitted
             
         Returns:
             Tuple of (current_usage, daily_quota)
@@ -119,11 +209,16 @@ class QuotaTracker:
         # Reset quotas if it's a new day
         self._check_reset()
         
-        # Get the tier for this key
+        entry = self.daily_quotas.get(key)
+        usage = entry[0] if entry is not None else self.evicted.estimate(key)
+        return usage, self._quota_for(key, daily_quota)
+    
+    @staticmethod
+    def _quota_for(key: str, daily_quota: Optional[int]) -> int:
+        if daily_quota is not None:
+            return daily_quota
         tier = get_user_tier(key)
-        _, daily_quota, _, _ = RATE_LIMIT_TIERS.get(tier, RATE_LIMIT_TIERS[DEFAULT_TIER])
-        
-        return self.daily_quotas.get(key, 0), daily_quota
+        return RATE_LIMIT_TIERS.get(tier, RATE_LIMIT_TIERS[DEFAULT_TIER])[1]
     
     def _check_reset(self):
         """Reset all quotas if it's a new day (UTC)."""
@@ -131,16 +226,24 @@ class QuotaTracker:
         if today > self.last_reset:
             logger.info(f"Resetting daily quotas at {today}")
             self.daily_quotas.clear()
+            self.evicted.clear()
             self.last_reset = today
 
 
 class IPReputationTracker:
     """Tracks IP reputation and applies penalties for suspicious behavior."""
     
-    def __init__(self):
-        """Initialize the IP reputation tracker."""
-        self.violations = defaultdict(list)  # {ip: [timestamps]}
-        self.penalties = {}  # {ip: expiry_timestamp}
+    def __init__(self, max_keys: int = MAX_TRACKED_CLIENTS):
+        """
+        Initialize the IP reputation tracker.
+
+        Args:
+            max_keys: Maximum number of IPs kept in each table; the least
+                recently seen IPs are dropped first
+        """
+        self.max_keys = max_keys
+        self.violations: "OrderedDict[str, deque]" = OrderedDict()  # {ip: recent timestamps}
+        self.penalties: "OrderedDict[str, float]" = OrderedDict()  # {ip: expiry_timestamp}
         self.last_cleanup = time.time()
     
     def record_violation(self, ip: str) -> bool:
@@ -161,20 +264,29 @@ class IPReputationTracker:
             self.last_cleanup = now
         
         # Check if IP is already penalized
-        if ip in self.penalties and self.penalties[ip] > now:
+        if self.is_penalized(ip):
             return True
         
-        # Add current violation
-        self.violations[ip].append(now)
+        # Add current violation; only the last MAX_VIOLATIONS_BEFORE_PENALTY matter
+        timestamps = self.violations.get(ip)
+        if timestamps is None:
+            timestamps = deque(maxlen=MAX_VIOLATIONS_BEFORE_PENALTY)
+            self.violations[ip] = timestamps
+            if len(self.violations) > self.max_keys:
+                self.violations.popitem(last=False)
+        else:
+            self.violations.move_to_end(ip)
+        timestamps.append(now)
         
-        # Filter recent violations only
+        # Check if threshold exceeded within the reset period
         cutoff = now - VIOLATION_RESET_PERIOD
-        self.violations[ip] = [t for t in self.violations[ip] if t > cutoff]
-        
-        # Check if threshold exceeded
-        if len(self.violations[ip]) >= MAX_VIOLATIONS_BEFORE_PENALTY:
+        if len(timestamps) >= MAX_VIOLATIONS_BEFORE_PENALTY and timestamps[0] > cutoff:
             # Apply penalty
             self.penalties[ip] = now + REPUTATION_PENALTY_DURATION
+            self.penalties.move_to_end(ip)
+            if len(self.penalties) > self.max_keys:
+                self.penalties.popitem(last=False)
+            del self.violations[ip]
             logger.warning(f"Applied rate limit penalty to IP {ip} for {REPUTATION_PENALTY_DURATION//3600} hours")
             return True
         
@@ -190,8 +302,26 @@ class IPReputationTracker:
         Returns:
             True if penalized, False otherwise
         """
-        now = time.time()
-        return ip in self.penalties and self.penalties[ip] > now
+        return self.penalty_remaining(ip) > 0
+    
+    def penalty_remaining(self, ip: str) -> float:
+        """
+        Get the seconds left on an IP's penalty.
+
+        Args:
+            ip: The IP address
+
+        Returns:
+            Seconds until the penalty expires, 0 if not penalized
+        """
+        expiry = self.penalties.get(ip)
+        if expiry is None:
+            return 0.0
+        remaining = expiry - time.time()
+        if remaining <= 0:
+            del self.penalties[ip]
+            return 0.0
+        return remaining
     
     def get_violation_count(self, ip: str) -> int:
         """
@@ -205,7 +335,7 @@ class IPReputationTracker:
         """
         now = time.time()
         cutoff = now - VIOLATION_RESET_PERIOD
-        return len([t for t in self.violations.get(ip, []) if t > cutoff])
+        return len([t for t in self.violations.get(ip, ()) if t > cutoff])
     
     def _cleanup(self):
         """Clean up expired violations and penalties."""
@@ -214,8 +344,7 @@ class IPReputationTracker:
         # Clean up violations
         cutoff = now - VIOLATION_RESET_PERIOD
         for ip in list(self.violations.keys()):
-            self.violations[ip] = [t for t in self.violations[ip] if t > cutoff]
-            if not self.violations[ip]:
+            if self.violations[ip][-1] <= cutoff:
                 del self.violations[ip]
         
         # Clean up penalties
@@ -326,6 +455,22 @@ def is_exempt_path(path: str) -> bool:
     return any(path.startswith(exempt) for exempt in EXEMPT_PATHS)
 
 
+def get_rate_limited_endpoint(path: str) -> str:
+    """
+    Get the endpoint group a path is rate limited under.
+    
+    Args:
+        path: The request path
+        
+    Returns:
+        The matching ENDPOINT_RATE_LIMITS prefix, or "default"
+    """
+    for endpoint in ENDPOINT_RATE_LIMITS:
+        if path.startswith(endpoint):
+            return endpoint
+    return "default"
+
+
 def get_endpoint_limits(path: str, tier: str) -> Tuple[float, int, bool, float]:
     """
     Get rate limits for a specific endpoint and tier.
@@ -384,6 +529,369 @@ class TokenBucket:
             return True
         
         return False
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of a rate limit check."""
+    allowed: bool
+    reason: Optional[str] = None  # "penalized", "quota" or "rate" when denied
+    remaining: float = 0.0
+    quota_usage: int = 0
+    retry_after: float = 0.0
+
+
+class RateLimitState:
+    """Storage backend for token buckets, daily quotas and IP reputation."""
+
+    name = "base"
+
+    async def check(
+        self,
+        bucket_key: str,
+        quota_key: str,
+        client_ip: str,
+        rate: float,
+        capacity: float,
+        daily_quota: int,
+        check_penalty: bool = True,
+    ) -> RateLimitDecision:
+        """
+        Check penalty, quota and token bucket, consuming a token and a unit
+        of quota when the request is allowed.
+
+        Args:
+            bucket_key: Token bucket identifier
+            quota_key: Daily quota identifier
+            client_ip: Client IP address for reputation checks
+            rate: Token refill rate per second
+            capacity: Token bucket capacity
+            daily_quota: Daily request quota
+            check_penalty: Whether to deny penalized IPs
+
+        Returns:
+            The rate limit decision
+        """
+        raise NotImplementedError
+
+    async def record_violation(self, ip: str) -> bool:
+        """Record a violation for an IP; returns True if it is now penalized."""
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class LocalRateLimitState(RateLimitState):
+    """
+    Per-process limiter state with bounded memory.
+
+    Token buckets are kept in an LRU table; a bucket evicted after being
+    idle would have refilled anyway, so eviction rarely changes a decision.
+    """
+
+    name = "local"
+
+    def __init__(self, max_clients: int = MAX_TRACKED_CLIENTS):
+        """
+        Initialize the local state.
+
+        Args:
+            max_clients: Maximum entries per table
+        """
+        self.max_clients = max_clients
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.quota_tracker = QuotaTracker(max_keys=max_clients)
+        self.reputation_tracker = IPReputationTracker(max_keys=max_clients)
+
+    async def check(
+        self,
+        bucket_key: str,
+        quota_key: str,
+        client_ip: str,
+        rate: float,
+        capacity: float,
+        daily_quota: int,
+        check_penalty: bool = True,
+    ) -> RateLimitDecision:
+        return self.check_now(bucket_key, quota_key, client_ip, rate, capacity, daily_quota, check_penalty)
+
+    def check_now(
+        self,
+        bucket_key: str,
+        quota_key: str,
+        client_ip: str,
+        rate: float,
+        capacity: float,
+        daily_quota: int,
+        check_penalty: bool = True,
+    ) -> RateLimitDecision:
+        """Synchronous form of check()."""
+        if check_penalty:
+            penalty = self.reputation_tracker.penalty_remaining(client_ip)
+            if penalty > 0:
+                return RateLimitDecision(False, "penalized", retry_after=penalty)
+
+        usage, _ = self.quota_tracker.get_usage(quota_key, daily_quota)
+        if usage >= daily_quota:
+            return RateLimitDecision(False, "quota", quota_usage=usage, retry_after=seconds_until_midnight())
+
+        bucket = self.buckets.get(bucket_key)
+        if bucket is None:
+            bucket = TokenBucket(rate, capacity)
+            self.buckets[bucket_key] = bucket
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(bucket_key)
+            # Adaptive limits may change the refill rate between requests
+            bucket.rate = rate
+
+        if not bucket.consume():
+            return RateLimitDecision(
+                False, "rate",
+                remaining=bucket.tokens,
+                quota_usage=usage,
+                retry_after=(1.0 - bucket.tokens) / rate,
+            )
+
+        usage, _ = self.quota_tracker.increment(quota_key, daily_quota=daily_quota)
+        return RateLimitDecision(True, remaining=bucket.tokens, quota_usage=usage)
+
+    async def record_violation(self, ip: str) -> bool:
+        return self.reputation_tracker.record_violation(ip)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "buckets": len(self.buckets),
+            "quota_keys": len(self.quota_tracker.daily_quotas),
+            "violation_keys": len(self.reputation_tracker.violations),
+            "penalties": len(self.reputation_tracker.penalties),
+        }
+
+
+# Penalty check, quota check, token bucket and quota increment in one round trip.
+# Returns {status, tokens, usage, retry_after}; status 0 = allowed,
+# 1 = penalized, 2 = quota exceeded, 3 = rate limited.
+CHECK_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+if ARGV[6] == '1' then
+  local penalty = redis.call('PTTL', KEYS[3])
+  if penalty > 0 then
+    return {1, '0', 0, tostring(penalty / 1000)}
+  end
+end
+local usage = tonumber(redis.call('GET', KEYS[2]) or '0')
+if usage >= tonumber(ARGV[3]) then
+  return {2, '0', usage, ARGV[4]}
+end
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local status = 3
+if tokens >= 1 then
+  tokens = tokens - 1
+  status = 0
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+if status == 3 then
+  return {3, tostring(tokens), usage, tostring((1 - tokens) / rate)}
+end
+usage = redis.call('INCR', KEYS[2])
+if usage == 1 then
+  redis.call('EXPIRE', KEYS[2], tonumber(ARGV[4]) + tonumber(ARGV[5]))
+end
+return {0, tostring(tokens), usage, '0'}
+"""
+
+# Returns 1 when the violation puts the IP over the threshold
+VIOLATION_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+  redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+if count >= tonumber(ARGV[1]) then
+  redis.call('SET', KEYS[2], '1', 'EX', ARGV[3])
+  redis.call('DEL', KEYS[1])
+  return 1
+end
+return 0
+"""
+
+DECISION_REASONS = {1: "penalized", 2: "quota", 3: "rate"}
+
+
+class RedisRateLimitState(RateLimitState):
+    """
+    Limiter state shared across pods through Redis.
+
+    Each request costs a single script call. Keys carry a Redis Cluster hash
+    tag: a client's bucket and quota are tagged with the client ID and an
+    IP's penalty and violations with the IP, so every script only touches
+    one slot. When the client ID is not the IP, the penalty is read in a
+    separate call first. Penalized IPs and clients that exhausted their
+    daily quota are also remembered in a bounded local table until their
+    denial expires, so abusive traffic is rejected without a network round
+    trip. Redis errors fall back to local state.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        redis: Any,
+        prefix: str = "maily:rate_limit:",
+        max_cached_denials: int = MAX_TRACKED_CLIENTS,
+        fallback: Optional[RateLimitState] = None,
+    ):
+        """
+        Initialize the Redis state.
+
+        Args:
+            redis: Async Redis client (redis.asyncio)
+            prefix: Key prefix
+            max_cached_denials: Maximum denials remembered locally
+            fallback: State used while Redis is unreachable
+        """
+        self.redis = redis
+        self.prefix = prefix
+        self.max_cached_denials = max_cached_denials
+        self.fallback = fallback or LocalRateLimitState()
+        self._check_script = redis.register_script(CHECK_SCRIPT)
+        self._violation_script = redis.register_script(VIOLATION_SCRIPT)
+        self._denials: "OrderedDict[str, Tuple[RateLimitDecision, float]]" = OrderedDict()
+        self.stats = {"round_trips": 0, "local_denials": 0, "fallbacks": 0}
+
+    def _tagged(self, tag: str) -> str:
+        """Key prefix whose hash tag keeps keys sharing the tag in one cluster slot."""
+        return f"{self.prefix}{{{tag}}}"
+
+    def _cached_denial(self, key: str) -> Optional[RateLimitDecision]:
+        cached = self._denials.get(key)
+        if cached is None:
+            return None
+        decision, until = cached
+        remaining = until - time.time()
+        if remaining <= 0:
+            del self._denials[key]
+            return None
+        self.stats["local_denials"] += 1
+        return RateLimitDecision(False, decision.reason, quota_usage=decision.quota_usage, retry_after=remaining)
+
+    def _cache_denial(self, key: str, decision: RateLimitDecision) -> None:
+        self._denials[key] = (decision, time.time() + decision.retry_after)
+        self._denials.move_to_end(key)
+        if len(self._denials) > self.max_cached_denials:
+            self._denials.popitem(last=False)
+
+    async def check(
+        self,
+        bucket_key: str,
+        quota_key: str,
+        client_ip: str,
+        rate: float,
+        capacity: float,
+        daily_quota: int,
+        check_penalty: bool = True,
+    ) -> RateLimitDecision:
+        denial = (check_penalty and self._cached_denial(f"ip:{client_ip}")) or self._cached_denial(f"quota:{quota_key}")
+        if denial:
+            return denial
+
+        day = datetime.now(timezone.utc).date().isoformat()
+        client = self._tagged(quota_key)
+        keys = [f"{client}:bucket:{bucket_key}", f"{client}:quota:{day}"]
+        penalty_key = f"{self._tagged(client_ip)}:penalty"
+        # The script can only read the penalty when it shares the client's slot
+        penalty_in_script = check_penalty and client_ip == quota_key
+        if penalty_in_script:
+            keys.append(penalty_key)
+        try:
+            if check_penalty and not penalty_in_script:
+                self.stats["round_trips"] += 1
+                penalty_ms = await self.redis.pttl(penalty_key)
+                if penalty_ms and penalty_ms > 0:
+                    decision = RateLimitDecision(False, "penalized", retry_after=penalty_ms / 1000)
+                    self._cache_denial(f"ip:{client_ip}", decision)
+                    return decision
+
+            self.stats["round_trips"] += 1
+            status_code, tokens, usage, retry_after = await self._check_script(
+                keys=keys,
+                args=[rate, capacity, daily_quota, seconds_until_midnight(), 3600, "1" if penalty_in_script else "0"],
+            )
+        except Exception as e:
+            self.stats["fallbacks"] += 1
+            logger.warning(f"Shared rate limit check failed, using local state: {e}")
+            return await self.fallback.check(
+                bucket_key, quota_key, client_ip, rate, capacity, daily_quota, check_penalty
+            )
+
+        status_code = int(status_code)
+        decision = RateLimitDecision(
+            allowed=status_code == 0,
+            reason=DECISION_REASONS.get(status_code),
+            remaining=float(tokens),
+            quota_usage=int(usage),
+            retry_after=float(retry_after),
+        )
+        if decision.reason == "penalized":
+            self._cache_denial(f"ip:{client_ip}", decision)
+        elif decision.reason == "quota":
+            self._cache_denial(f"quota:{quota_key}", decision)
+        return decision
+
+    async def record_violation(self, ip: str) -> bool:
+        try:
+            self.stats["round_trips"] += 1
+            penalized = await self._violation_script(
+                keys=[f"{self._tagged(ip)}:violations", f"{self._tagged(ip)}:penalty"],
+                args=[MAX_VIOLATIONS_BEFORE_PENALTY, VIOLATION_RESET_PERIOD, REPUTATION_PENALTY_DURATION],
+            )
+        except Exception as e:
+            self.stats["fallbacks"] += 1
+            logger.warning(f"Shared violation tracking failed, using local state: {e}")
+            return await self.fallback.record_violation(ip)
+
+        if int(penalized):
+            logger.warning(f"Applied rate limit penalty to IP {ip} for {REPUTATION_PENALTY_DURATION//3600} hours")
+            self._cache_denial(
+                f"ip:{ip}",
+                RateLimitDecision(False, "penalized", retry_after=REPUTATION_PENALTY_DURATION),
+            )
+            return True
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "cached_denials": len(self._denials), **self.stats}
+
+
+def create_rate_limit_state(backend: Optional[str] = None) -> RateLimitState:
+    """
+    Create the configured rate limit state backend.
+
+    Args:
+        backend: "local" or "redis"; defaults to RATE_LIMIT_BACKEND
+
+    Returns:
+        The state backend, falling back to local state if Redis is unavailable
+    """
+    backend = backend or RATE_LIMIT_BACKEND
+    if backend == "redis":
+        try:
+            import redis.asyncio as aioredis
+
+            client = aioredis.from_url(RATE_LIMIT_REDIS_URL, decode_responses=True)
+            return RedisRateLimitState(client)
+        except ImportError:
+            logger.warning("redis package not installed; using local rate limit state")
+    return LocalRateLimitState()
     
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
@@ -398,6 +906,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         enable_client_fingerprinting: bool = True,
         enable_adaptive_limits: bool = True,
         enable_reputation_tracking: bool = True,
+        state: Optional[RateLimitState] = None,
     ):
         """
         Initialize the rate limit middleware.
@@ -410,6 +919,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             enable_client_fingerprinting: Whether to use client fingerprinting
             enable_adaptive_limits: Whether to adjust limits based on server load
             enable_reputation_tracking: Whether to track and penalize suspicious IPs
+            state: Limiter state backend; defaults to create_rate_limit_state()
         """
         super().__init__(app)
         self.api_key_header = api_key_header
@@ -419,18 +929,12 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         self.enable_adaptive_limits = enable_adaptive_limits
         self.enable_reputation_tracking = enable_reputation_tracking
         
-        # Initialize rate limiters
-        self.buckets = {}  # {key: TokenBucket}
-        
-        # Initialize quota tracker
-        self.quota_tracker = QuotaTracker()
-        
-        # Initialize IP reputation tracker
-        self.reputation_tracker = IPReputationTracker()
+        # Token buckets, quotas and IP reputation
+        self.state = state or create_rate_limit_state()
         
         # For tracking system load
         self.current_load_factor = 1.0
-        self.request_times = []
+        self.request_times = deque(maxlen=10000)  # (timestamp, duration), bounded
         self.last_load_check = time.time()
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
@@ -458,22 +962,14 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         else:
             client_id = api_key if api_key else client_ip
         
-        # Check IP reputation if enabled
-        if self.enable_reputation_tracking and self.reputation_tracker.is_penalized(client_ip):
-            logger.warning(f"Request denied due to IP reputation penalty: {client_ip}")
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={
-                    "detail": "Rate limit exceeded due to previous violations",
-                    "retry_after": int(time.time() - self.reputation_tracker.penalties[client_ip]),
-                }
-            )
-        
         # Get user tier based on API key
         tier = get_user_tier(api_key)
+        tier_rps, tier_quota, _, _ = RATE_LIMIT_TIERS.get(tier, RATE_LIMIT_TIERS[DEFAULT_TIER])
         
         # Get appropriate limits for this endpoint and tier
-        rps, daily_quota, burst_allowed, burst_rate = get_endpoint_limits(request.url.path, tier)
+        endpoint = get_rate_limited_endpoint(request.url.path)
+        rps, _, burst_allowed, burst_rate = get_endpoint_limits(request.url.path, tier)
+        capacity = burst_rate if burst_allowed else rps
         
         # Apply adaptive limits if enabled
         if self.enable_adaptive_limits:
@@ -483,44 +979,51 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 logger.debug(f"Adjusting rate limit due to load: {rps} -> {adjusted_rps:.2f}")
                 rps = adjusted_rps
         
-        # Check daily quota
-        current_usage, quota_limit = self.quota_tracker.get_usage(client_id)
-        if current_usage >= quota_limit:
-            # Record violation for IP reputation
-            if self.enable_reputation_tracking:
-                self.reputation_tracker.record_violation(client_ip)
-            
-            # Return quota exceeded response
-            retry_after = self._get_seconds_until_midnight()
+        # Check reputation, daily quota and token bucket in one step
+        decision = await self.state.check(
+            bucket_key=f"{client_id}:{endpoint}",
+            quota_key=client_id,
+            client_ip=client_ip,
+            rate=rps,
+            capacity=capacity,
+            daily_quota=tier_quota,
+            check_penalty=self.enable_reputation_tracking,
+        )
+        
+        if decision.reason == "penalized":
+            logger.warning(f"Request denied due to IP reputation penalty: {client_ip}")
             return JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
-                    "detail": "Daily API quota exceeded",
-                    "limit": quota_limit,
-                    "current": current_usage,
-                    "retry_after": retry_after,
+                    "detail": "Rate limit exceeded due to previous violations",
+                    "retry_after": int(math.ceil(decision.retry_after)),
                 }
             )
         
-        # Get or create token bucket
-        if client_id not in self.buckets:
-            capacity = burst_rate if burst_allowed else rps
-            self.buckets[client_id] = TokenBucket(rps, capacity)
-        
-        # Try to consume a token
-        if not self.buckets[client_id].consume():
+        if not decision.allowed:
             # Record violation for IP reputation
             if self.enable_reputation_tracking:
-                self.reputation_tracker.record_violation(client_ip)
+                await self.state.record_violation(client_ip)
+            
+            if decision.reason == "quota":
+                # Return quota exceeded response
+                return JSONResponse(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    content={
+                        "detail": "Daily API quota exceeded",
+                        "limit": tier_quota,
+                        "current": decision.quota_usage,
+                        "retry_after": int(math.ceil(decision.retry_after)),
+                    }
+                )
             
             # Return rate limit exceeded response
-            retry_after = int(1.0 / rps)
             return JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
                     "detail": "Rate limit exceeded",
                     "limit": rps,
-                    "retry_after": retry_after,
+                    "retry_after": int(math.ceil(decision.retry_after)),
                 }
             )
         
@@ -529,18 +1032,12 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         response = await call_next(request)
         request_time = time.time() - start_time
         
-        # Update quota usage
-        self.quota_tracker.increment(client_id)
-        
         # Add rate limit headers to response
-        tier_rps, tier_quota, _, _ = RATE_LIMIT_TIERS.get(tier, RATE_LIMIT_TIERS[DEFAULT_TIER])
-        current_usage, _ = self.quota_tracker.get_usage(client_id)
-        
         response.headers["X-RateLimit-Limit"] = str(tier_rps)
-        response.headers["X-RateLimit-Remaining"] = str(max(0, self.buckets[client_id].tokens))
+        response.headers["X-RateLimit-Remaining"] = str(int(max(0, decision.remaining)))
         response.headers["X-RateLimit-Reset"] = str(int(time.time() + (1.0 / tier_rps)))
         response.headers["X-Daily-Quota-Limit"] = str(tier_quota)
-        response.headers["X-Daily-Quota-Remaining"] = str(max(0, tier_quota - current_usage))
+        response.headers["X-Daily-Quota-Remaining"] = str(max(0, tier_quota - decision.quota_usage))
         response.headers["X-Daily-Quota-Reset"] = str(self._get_seconds_until_midnight())
         
         # Store request timing for load calculation
@@ -556,11 +1053,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         Returns:
             Seconds until midnight
         """
-        now = datetime.now(timezone.utc)
-        midnight = datetime(
-            now.year, now.month, now.day, tzinfo=timezone.utc
-        ) + timedelta(days=1)
-        return int((midnight - now).total_seconds())
+        return seconds_until_midnight()
     
     def _add_request_time(self, request_time: float):
         """
@@ -576,7 +1069,8 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         self.request_times.append((now, request_time))
         
         # Remove old data
-        self.request_times = [(t, rt) for t, rt in self.request_times if t > cutoff]
+        while self.request_times and self.request_times[0][0] <= cutoff:
+            self.request_times.popleft()
     
     def _update_load_factor(self):
         """Update the load factor based on recent request times."""
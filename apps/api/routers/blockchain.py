@@ -58,7 +58,11 @@ async def verify_content(
         
         return {
             "success": True,
-            "message": "Content verified successfully",
+            "message": (
+                "Content queued for verification"
+                if verification_data.get("status") == "pending"
+                else "Content verified successfully"
+            ),
             "data": verification_data
         }
     except Exception as e:
@@ -171,7 +175,11 @@ async def create_token(
         
         return {
             "success": True,
-            "message": "Token created successfully",
+            "message": (
+                "Token submitted, awaiting confirmation"
+                if token_data.get("status") == "pending"
+                else "Token created successfully"
+            ),
             "data": token_data
         }
     except Exception as e:
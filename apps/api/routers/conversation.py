@@ -5,6 +5,7 @@ This module provides endpoints for managing conversation histories,
 including creating, retrieving, and manipulating conversation threads.
 """
 
+import os
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from pydantic import BaseModel, Field
@@ -21,6 +22,9 @@ from ..dependencies import get_model_service
 # Create router
 router = APIRouter(prefix="/conversations", tags=["Conversations"])
 
+# Token budget for the conversation history sent with each chat message
+CHAT_CONTEXT_TOKENS = int(os.getenv("CONVERSATION_CHAT_CONTEXT_TOKENS", "3000"))
+
 # Get consolidated service instance
 consolidated_ai_service = get_model_service()
 
@@ -53,6 +57,7 @@ class MessageResponse(BaseModel):
     content: str
     created_at: str
     metadata: Dict[str, Any]
+    index: Optional[int] = None
 
 
 class ConversationResponse(BaseModel):
@@ -119,7 +124,8 @@ async def create_conversation(
         )
 
     # Create conversation
-    conversation = conversation_manager.create_conversation(
+    conversation = await conversation_manager.run(
+        conversation_manager.create_conversation,
         title=request.title,
         user_id=str(current_user.id),
         initial_message=initial_message,
@@ -149,19 +155,25 @@ async def create_conversation(
 
 @router.get("", response_model=List[ConversationSummaryResponse])
 async def list_conversations(
+    offset: int = Query(0, ge=0, description="Number of conversations to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of conversations to return"),
     current_user: User = Depends(get_current_user)
 ):
     """
     List all conversations for the current user.
 
     Args:
+        offset: Number of conversations to skip.
+        limit: Optional maximum number of conversations to return.
         current_user: The current authenticated user.
 
     Returns:
         A list of conversation summaries.
     """
     # Get conversations
-    conversations = conversation_manager.list_conversations(str(current_user.id))
+    conversations = await conversation_manager.run(
+        conversation_manager.list_conversations, str(current_user.id), offset=offset, limit=limit
+    )
 
     # Convert to response format
     return [
@@ -169,7 +181,7 @@ async def list_conversations(
             id=c.id,
             title=c.title,
             user_id=c.user_id,
-            message_count=len(c.messages),
+            message_count=c.message_count,
             created_at=c.created_at.isoformat(),
             updated_at=c.updated_at.isoformat(),
             metadata=c.metadata
@@ -197,7 +209,7 @@ async def get_conversation(
         HTTPException: If the conversation is not found or does not belong to the user.
     """
     # Get conversation
-    conversation = conversation_manager.get_conversation(conversation_id)
+    conversation = await conversation_manager.run(conversation_manager.get_conversation, conversation_id)
     if not conversation:
         raise HTTPException(status_code=404, detail=f"Conversation {conversation_id} not found")
 
@@ -247,7 +259,9 @@ async def update_conversation(
         HTTPException: If the conversation is not found or does not belong to the user.
     """
     # Get conversation
-    conversation = conversation_manager.get_conversation(conversation_id)
+    conversation = await conversation_manager.run(
+        conversation_manager.get_conversation, conversation_id, include_messages=False
+    )
     if not conversation:
         raise HTTPException(status_code=404, detail=f"Conversation {conversation_id} not found")
 
@@ -256,12 +270,16 @@ async def update_conversation(
         raise HTTPException(status_code=403, detail="You do not have permission to update this conversation")
 
     # Update conversation
-    updated = conversation_manager.update_conversation(
+    updated = await conversation_manager.run(
+        conversation_manager.update_conversation,
         conversation_id=conversation_id,
         title=request.title,
         metadata=request.metadata
     )
 
+    # The update does not load messages; read them for the response
+    messages = await conversation_manager.run(conversation_manager.get_messages, conversation_id)
+
     # Convert to response format
     return ConversationResponse(
         id=updated.id,
@@ -275,7 +293,7 @@ async def update_conversation(
                 created_at=m.created_at.isoformat(),
                 metadata=m.metadata
             )
-            for m in updated.messages
+            for m in messages
         ],
         created_at=updated.created_at.isoformat(),
         updated_at=updated.updated_at.isoformat(),
@@ -302,7 +320,9 @@ async def delete_conversation(
         HTTPException: If the conversation is not found or does not belong to the user.
     """
     # Get conversation
-    conversation = conversation_manager.get_conversation(conversation_id)
+    conversation = await conversation_manager.run(
+        conversation_manager.get_conversation, conversation_id, include_messages=False
+    )
     if not conversation:
         raise HTTPException(status_code=404, detail=f"Conversation {conversation_id} not found")
 
@@ -311,7 +331,7 @@ async def delete_conversation(
         raise HTTPException(status_code=403, detail="You do not have permission to delete this conversation")
 
     # Delete conversation
-    success = conversation_manager.delete_conversation(conversation_id)
+    success = await conversation_manager.run(conversation_manager.delete_conversation, conversation_id)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to delete conversation")
 
@@ -339,7 +359,9 @@ async def add_message(
         HTTPException: If the conversation is not found or does not belong to the user.
     """
     # Get conversation
-    conversation = conversation_manager.get_conversation(conversation_id)
+    conversation = await conversation_manager.run(
+        conversation_manager.get_conversation, conversation_id, include_messages=False
+    )
     if not conversation:
         raise HTTPException(status_code=404, detail=f"Conversation {conversation_id} not found")
 
@@ -349,7 +371,8 @@ async def add_message(
 
     try:
         # Add message
-        message = conversation_manager.add_message(
+        message = await conversation_manager.run(
+            conversation_manager.add_message,
             conversation_id=conversation_id,
             role=request.role,
             content=request.content,
@@ -376,6 +399,7 @@ async def get_messages(
     conversation_id: str,
     limit: Optional[int] = Query(None, description="Maximum number of messages to return"),
     before_id: Optional[str] = Query(None, description="Get messages before this message ID"),
+    before_index: Optional[int] = Query(None, ge=0, description="Get messages before this message index"),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -385,6 +409,7 @@ async def get_messages(
         conversation_id: The ID of the conversation to get messages from.
         limit: Optional maximum number of messages to return.
         before_id: Optional message ID to get messages before.
+        before_index: Optional message index to get messages before.
         current_user: The current authenticated user.
 
     Returns:
@@ -394,7 +419,9 @@ async def get_messages(
         HTTPException: If the conversation is not found or does not belong to the user.
     """
     # Get conversation
-    conversation = conversation_manager.get_conversation(conversation_id)
+    conversation = await conversation_manager.run(
+        conversation_manager.get_conversation, conversation_id, include_messages=False
+    )
     if not conversation:
         raise HTTPException(status_code=404, detail=f"Conversation {conversation_id} not found")
 
@@ -403,10 +430,12 @@ async def get_messages(
         raise HTTPException(status_code=403, detail="You do not have permission to access this conversation")
 
     # Get messages
-    messages = conversation_manager.get_messages(
+    messages = await conversation_manager.run(
+        conversation_manager.get_messages,
         conversation_id=conversation_id,
         limit=limit,
-        before_id=before_id
+        before_id=before_id,
+        before_index=before_index
     )
 
     # Convert to response format
@@ -416,7 +445,8 @@ async def get_messages(
             role=m.role,
             content=m.content,
             created_at=m.created_at.isoformat(),
-            metadata=m.metadata
+            metadata=m.metadata,
+            index=m.index
         )
         for m in messages
     ]
@@ -446,7 +476,9 @@ async def chat(
         HTTPException: If the conversation is not found or does not belong to the user.
     """
     # Get conversation
-    conversation = conversation_manager.get_conversation(conversation_id)
+    conversation = await conversation_manager.run(
+        conversation_manager.get_conversation, conversation_id, include_messages=False
+    )
     if not conversation:
         raise HTTPException(status_code=404, detail=f"Conversation {conversation_id} not found")
 
@@ -456,7 +488,8 @@ async def chat(
 
     try:
         # Add user message
-        user_message = conversation_manager.add_message(
+        user_message = await conversation_manager.run(
+            conversation_manager.add_message,
             conversation_id=conversation_id,
             role="user",
             content=request.message,
@@ -466,16 +499,17 @@ async def chat(
         if not user_message:
             raise HTTPException(status_code=500, detail="Failed to add user message")
 
-        # Get chat history
-        chat_messages = conversation_manager.get_chat_messages(
+        # Recent messages that fit the context budget, after the rolling summary
+        prompt = await conversation_manager.run(
+            conversation_manager.format_for_prompt,
             conversation_id=conversation_id,
-            limit=10,  # Limit to last 10 messages for context
-            include_system=True
+            include_system=True,
+            max_tokens=CHAT_CONTEXT_TOKENS
         )
 
         # Generate AI response
         ai_response = await consolidated_ai_service.generate_text(
-            prompt=request.message,
+            prompt=prompt,
             model_name=request.model_name,
             temperature=request.temperature,
             max_tokens=request.max_tokens,
@@ -487,7 +521,8 @@ async def chat(
         )
 
         # Add AI response to conversation
-        assistant_message = conversation_manager.add_message(
+        assistant_message = await conversation_manager.run(
+            conversation_manager.add_message,
             conversation_id=conversation_id,
             role="assistant",
             content=ai_response.content,
@@ -545,7 +580,9 @@ async def clear_conversation(
         HTTPException: If the conversation is not found or does not belong to the user.
     """
     # Get conversation
-    conversation = conversation_manager.get_conversation(conversation_id)
+    conversation = await conversation_manager.run(
+        conversation_manager.get_conversation, conversation_id, include_messages=False
+    )
     if not conversation:
         raise HTTPException(status_code=404, detail=f"Conversation {conversation_id} not found")
 
@@ -554,7 +591,7 @@ async def clear_conversation(
         raise HTTPException(status_code=403, detail="You do not have permission to clear this conversation")
 
     # Clear conversation
-    success = conversation_manager.clear_conversation(conversation_id)
+    success = await conversation_manager.run(conversation_manager.clear_conversation, conversation_id)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to clear conversation")
 
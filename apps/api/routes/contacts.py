@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Body, Path
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, List, Optional
 import logging
 from datetime import datetime
@@ -10,12 +11,26 @@ from enum import Enum
 from ..services.contact_service import contact_service
 from ..services.blockchain import blockchain_service
 from api.models.contact import Contact, ContactHealthScore
-from api.utils.email_validator import bulk_validate_emails
 from api.auth.dependencies import get_current_user_id
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 logger = logging.getLogger(__name__)
 
+# Maximum list size accepted by the streaming validation endpoint
+MAX_STREAMING_VALIDATION = 100000
+
+# Common domain typos mapped to their correct domain
+DOMAIN_TYPO_CORRECTIONS = {
+    typo: correct_domain
+    for correct_domain, typos in {
+        "gmail.com": ["gmal.com", "gamil.com", "gmial.com", "gmaill.com", "gmail.co", "gmail.net"],
+        "yahoo.com": ["yaho.com", "yahooo.com", "yhaoo.com", "yahoo.co", "yahoo.net"],
+        "hotmail.com": ["hotmial.com", "hotamail.com", "hotmail.co", "hotmial.com"],
+        "outlook.com": ["outook.com", "outlok.com", "outlook.co", "outlook.net"]
+    }.items()
+    for typo in typos
+}
+
 # Models
 class ComplianceStatus(str, Enum):
     COMPLIANT = "compliant"
@@ -522,10 +537,47 @@ async def bulk_validate_contacts(
         )
 
     # Perform bulk validation
-    validation_results = await bulk_validate_emails(emails)
+    validation_results = await contact_service.bulk_validate_emails(emails)
 
     return validation_results
 
+@router.post("/bulk-validate/stream")
+async def stream_bulk_validate_contacts(
+    emails: List[str] = Body(...),
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """
+    Validate a large list of email addresses, streaming results as they complete.
+
+    Returns newline-delimited JSON: one line per validated address followed by
+    a final summary line. Domain-level checks are shared across addresses on
+    the same domain.
+    """
+    if len(emails) > MAX_STREAMING_VALIDATION:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot validate more than {MAX_STREAMING_VALIDATION} emails at once"
+        )
+
+    async def generate():
+        total = len(set(email.strip() for email in emails))
+        processed = 0
+        valid = 0
+        async for result in contact_service.stream_bulk_validation(emails):
+            processed += 1
+            valid += 1 if result["valid"] else 0
+            yield json.dumps({"type": "result", "processed": processed, "total": total, "result": result}) + "\n"
+        yield json.dumps({
+            "type": "summary",
+            "processed": processed,
+            "total": total,
+            "valid": valid,
+            "invalid": processed - valid,
+            "cache": contact_service.bulk_validator.get_stats()
+        }) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @router.post("/{contact_id}/health-score", response_model=ContactHealthScore)
 async def calculate_health_score(
     contact_id: str = Path(..., description="Contact ID"),
@@ -689,6 +741,7 @@ async def clean_contact_list(
     - remove_duplicates: Remove duplicate contacts
     - remove_disposable: Remove contacts with disposable email domains
     - repair_typos: Fix common typos in email domains
+    - remove_undeliverable: Remove contacts that fail DNS/SMTP validation
     """
     cleaning_results = {
         "original_count": len(contacts),
@@ -698,11 +751,13 @@ async def clean_contact_list(
             "low_health": 0,
             "low_engagement": 0,
             "duplicates": 0,
-            "disposable": 0
+            "disposable": 0,
+            "undeliverable": 0
         },
         "repaired": {
             "typos": 0
         },
+        "unverified": 0,
         "cleaned_contacts": []
     }
 
@@ -713,6 +768,7 @@ async def clean_contact_list(
     remove_duplicates = options.get("remove_duplicates", True)
     remove_disposable = options.get("remove_disposable", False)
     repair_typos = options.get("repair_typos", True)
+    remove_undeliverable = options.get("remove_undeliverable", False)
 
     # Convert contacts to Contact objects
     contact_objects = [Contact(**contact) for contact in contacts]
@@ -766,20 +822,11 @@ async def clean_contact_list(
             local_part, domain = contact.email.rsplit("@", 1)
             domain = domain.lower()
 
-            # Check for common typos
-            common_domains = {
-                "gmail.com": ["gmal.com", "gamil.com", "gmial.com", "gmaill.com", "gmail.co", "gmail.net"],
-                "yahoo.com": ["yaho.com", "yahooo.com", "yhaoo.com", "yahoo.co", "yahoo.net"],
-                "hotmail.com": ["hotmial.com", "hotamail.com", "hotmail.co", "hotmial.com"],
-                "outlook.com": ["outook.com", "outlok.com", "outlook.co", "outlook.net"]
-            }
-
-            for correct_domain, typos in common_domains.items():
-                if domain in typos:
-                    contact.email = f"{local_part}@{correct_domain}"
-                    cleaning_results["repaired"]["typos"] += 1
-                    repaired = True
-                    break
+            correct_domain = DOMAIN_TYPO_CORRECTIONS.get(domain)
+            if correct_domain:
+                contact.email = f"{local_part}@{correct_domain}"
+                cleaning_results["repaired"]["typos"] += 1
+                repaired = True
 
         # Add contact to cleaned list if it passes all filters
         if keep_contact:
@@ -789,6 +836,24 @@ async def clean_contact_list(
             # Add to cleaned contacts
             cleaning_results["cleaned_contacts"].append(contact)
 
+    # Validate deliverability once per remaining address, sharing domain checks
+    if remove_undeliverable and cleaning_results["cleaned_contacts"]:
+        validation = await contact_service.bulk_validate_emails(
+            [contact.email for contact in cleaning_results["cleaned_contacts"]]
+        )
+        deliverable = []
+        for contact in cleaning_results["cleaned_contacts"]:
+            result = validation.get(contact.email.strip())
+            if result is None or result.get("status") == "unknown":
+                # Checks could not complete; keep the contact but report it
+                cleaning_results["unverified"] += 1
+                deliverable.append(contact)
+            elif not result["valid"]:
+                cleaning_results["removed"]["undeliverable"] += 1
+            else:
+                deliverable.append(contact)
+        cleaning_results["cleaned_contacts"] = deliverable
+
     # Update final count
     cleaning_results["cleaned_count"] = len(cleaning_results["cleaned_contacts"])
 
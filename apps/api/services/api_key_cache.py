@@ -0,0 +1,334 @@
+"""
+Caching for API key authentication.
+
+Machine-to-machine clients authenticate thousands of times per second with
+the same few keys. This module keeps validated keys in a per-process LRU
+backed by a shared Redis cache, both keyed by the SHA-256 of the key, and
+buffers ``last_used_at`` updates so they are written in bulk instead of on
+every request.
+
+Revoking a key deletes the Redis entry and publishes the hash on an
+invalidation channel so every process drops its local copy immediately; the
+short local TTL bounds staleness if a process misses the message.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+API_KEY_CACHE_TTL = int(os.getenv("API_KEY_CACHE_TTL", "300"))
+API_KEY_LOCAL_CACHE_TTL = float(os.getenv("API_KEY_LOCAL_CACHE_TTL", "30"))
+API_KEY_NEGATIVE_CACHE_TTL = float(os.getenv("API_KEY_NEGATIVE_CACHE_TTL", "30"))
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", "10000"))
+LAST_USED_FLUSH_INTERVAL = float(os.getenv("API_KEY_LAST_USED_FLUSH_SECONDS", "60"))
+
+INVALIDATION_CHANNEL = "api_key:invalidate"
+
+# Marker cached for hashes that matched no active key
+INVALID_KEY = {"is_valid": False}
+
+
+class ApiKeyCache:
+    """
+    Two-level cache of API key lookups keyed by the hashed key.
+    """
+
+    def __init__(
+        self,
+        redis: Any = None,
+        ttl: int = API_KEY_CACHE_TTL,
+        local_ttl: float = API_KEY_LOCAL_CACHE_TTL,
+        negative_ttl: float = API_KEY_NEGATIVE_CACHE_TTL,
+        max_size: int = API_KEY_CACHE_SIZE,
+        channel: str = INVALIDATION_CHANNEL,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            redis: Shared Redis client (``get_json``/``set_json``/``delete``/
+                ``publish``/``get_pubsub``), or None for a local-only cache
+            ttl: Seconds to keep entries in Redis
+            local_ttl: Seconds to keep entries in this process
+            negative_ttl: Seconds to remember unknown keys in this process
+            max_size: Maximum number of local entries
+            channel: Redis channel used to broadcast invalidations
+        """
+        self.redis = redis
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.channel = channel
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._listener: Optional[asyncio.Task] = None
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _redis_key(key_hash: str) -> str:
+        return f"api_key:{key_hash}"
+
+    async def get(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached key data.
+
+        Args:
+            key_hash: SHA-256 of the API key
+
+        Returns:
+            The key data, ``INVALID_KEY`` for a known-bad key, or None on a miss
+        """
+        data = self._get_local(key_hash)
+        if data is not None:
+            self.stats["local_hits"] += 1
+            return data
+
+        if self.redis is not None:
+            try:
+                data = await self.redis.get_json(self._redis_key(key_hash))
+            except Exception as e:
+                logger.warning(f"Redis error reading API key cache: {str(e)}")
+                data = None
+            if data is not None:
+                self.stats["redis_hits"] += 1
+                self._set_local(key_hash, data, self.local_ttl, data.get("expires_at"))
+                return data
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key_hash: str, data: Dict[str, Any]) -> None:
+        """
+        Cache validated key data locally and in Redis.
+
+        Entries never outlive the key's ``expires_at``.
+
+        Args:
+            key_hash: SHA-256 of the API key
+            data: JSON-serializable key data
+        """
+        expires_at = data.get("expires_at")
+        self._set_local(key_hash, data, self.local_ttl, expires_at)
+
+        if self.redis is not None:
+            ttl = self.ttl
+            remaining = _seconds_until(expires_at)
+            if remaining is not None:
+                ttl = min(ttl, int(remaining))
+            if ttl <= 0:
+                return
+            try:
+                await self.redis.set_json(self._redis_key(key_hash), data, ttl)
+            except Exception as e:
+                logger.warning(f"Redis error writing API key cache: {str(e)}")
+
+    def set_invalid(self, key_hash: str) -> None:
+        """
+        Remember locally that a hash matched no active key.
+
+        Args:
+            key_hash: SHA-256 of the API key
+        """
+        self._set_local(key_hash, INVALID_KEY, self.negative_ttl, None)
+
+    async def invalidate(self, key_hash: str) -> None:
+        """
+        Drop a key everywhere, e.g. after it was revoked.
+
+        Args:
+            key_hash: SHA-256 of the API key
+        """
+        self.discard_local(key_hash)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.delete(self._redis_key(key_hash))
+            await self.redis.publish(self.channel, key_hash)
+        except Exception as e:
+            logger.warning(f"Redis error invalidating API key cache: {str(e)}")
+
+    def discard_local(self, key_hash: str) -> None:
+        """
+        Drop a key from this process only.
+
+        Args:
+            key_hash: SHA-256 of the API key
+        """
+        with self._lock:
+            if self._entries.pop(key_hash, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def start_listener(self) -> None:
+        """
+        Subscribe to invalidations from other processes.
+
+        Must be called from a running event loop; does nothing without Redis
+        or if the listener is already running.
+        """
+        if self.redis is None or (self._listener is not None and not self._listener.done()):
+            return
+        self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop_listener(self) -> None:
+        """Stop the invalidation listener."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = await self.redis.get_pubsub()
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    key_hash = message["data"]
+                    if isinstance(key_hash, bytes):
+                        key_hash = key_hash.decode("utf-8")
+                    self.discard_local(key_hash)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"API key invalidation listener error: {str(e)}")
+                # Entries may have been missed; fall back to the local TTL and retry
+                await asyncio.sleep(5)
+
+    def _get_local(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key_hash]
+                return None
+            self._entries.move_to_end(key_hash)
+            return data
+
+    def _set_local(self, key_hash: str, data: Dict[str, Any], ttl: float, key_expires_at: Optional[str]) -> None:
+        remaining = _seconds_until(key_expires_at)
+        if remaining is not None:
+            ttl = min(ttl, remaining)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key_hash] = (data, time.monotonic() + ttl)
+            self._entries.move_to_end(key_hash)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class LastUsedBuffer:
+    """
+    Coalesces ``last_used_at`` updates and writes them in bulk.
+
+    Only the latest timestamp per key is kept, so a key used thousands of
+    times between flushes costs one row update.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[Dict[Any, datetime]], Awaitable[None]],
+        flush_interval: float = LAST_USED_FLUSH_INTERVAL,
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            writer: Coroutine that persists ``{api_key_id: last_used_at}``
+            flush_interval: Seconds between background flushes
+        """
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self._pending: Dict[Any, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of keys waiting to be written."""
+        return len(self._pending)
+
+    def record(self, api_key_id: Any, used_at: Optional[datetime] = None) -> None:
+        """
+        Record that a key was used.
+
+        Args:
+            api_key_id: ID of the API key
+            used_at: Time of use, defaults to now
+        """
+        self._pending[api_key_id] = used_at or datetime.utcnow()
+
+    async def flush(self) -> int:
+        """
+        Write all buffered timestamps.
+
+        On failure the timestamps are put back, unless a newer use was
+        recorded in the meantime.
+
+        Returns:
+            Number of keys written
+        """
+        if not self._pending:
+            return 0
+        updates, self._pending = self._pending, {}
+        try:
+            await self.writer(updates)
+        except Exception as e:
+            logger.error(f"Error flushing API key last used timestamps: {str(e)}")
+            for api_key_id, used_at in updates.items():
+                current = self._pending.get(api_key_id)
+                if current is None or current < used_at:
+                    self._pending[api_key_id] = used_at
+            return 0
+        return len(updates)
+
+    def start(self) -> None:
+        """
+        Start flushing in the background.
+
+        Must be called from a running event loop; does nothing if already running.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stop the background flush and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+def _seconds_until(iso_timestamp: Optional[str]) -> Optional[float]:
+    if not iso_timestamp:
+        return None
+    try:
+        # Stored timestamps are naive UTC
+        expires_at = datetime.fromisoformat(iso_timestamp)
+    except ValueError:
+        return None
+    if expires_at.tzinfo is not None:
+        expires_at = expires_at.replace(tzinfo=None) - expires_at.utcoffset()
+    return (expires_at - datetime.utcnow()).total_seconds()
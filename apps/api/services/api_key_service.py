@@ -11,90 +11,120 @@ import secrets
 import hashlib
 import uuid
 from datetime import datetime, timedelta
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-import time
-import base64
 
 # Redis for caching
 try:
-    from packages.database.src.redis.redis_client import get_redis_client
+    from packages.database.src.redis.redis_client import redis_client
     REDIS_AVAILABLE = True
 except ImportError:
+    redis_client = None
     REDIS_AVAILABLE = False
 
 from models.api_key import ApiKey
 from models.user import User
 from database.session import get_db
 from packages.error_handling.python.error import ResourceNotFoundError, DatabaseError, UnauthorizedError
+from .api_key_cache import ApiKeyCache, LastUsedBuffer
 
 logger = logging.getLogger(__name__)
 
 
+def hash_api_key(api_key: str) -> str:
+    """Hash an API key the way it is stored."""
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+async def _write_last_used(updates: Dict[Any, datetime]) -> None:
+    """Persist buffered last-used timestamps in one bulk UPDATE."""
+    async with get_db() as session:
+        await session.execute(
+            update(ApiKey),
+            [{"id": api_key_id, "last_used_at": used_at} for api_key_id, used_at in updates.items()],
+        )
+        await session.commit()
+
+
+api_key_cache = ApiKeyCache(redis=redis_client)
+last_used_buffer = LastUsedBuffer(_write_last_used)
+
+
+def _start_background_tasks() -> None:
+    """Start the invalidation listener and last-used flusher on first use."""
+    try:
+        api_key_cache.start_listener()
+        last_used_buffer.start()
+    except RuntimeError:
+        # No running event loop
+        pass
+
+
+def _key_data(db_key: ApiKey, db_user: User) -> Dict[str, Any]:
+    """Serialize an API key and its owner for the caches."""
+    return {
+        "id": str(db_key.id),
+        "user_id": str(db_user.id),
+        "name": db_key.name,
+        "scopes": db_key.scopes or [],
+        "expires_at": db_key.expires_at.isoformat() if db_key.expires_at else None,
+        "created_at": db_key.created_at.isoformat() if db_key.created_at else None,
+        "is_valid": True,
+        "user": {
+            "id": db_user.id,
+            "email": db_user.email,
+            "name": db_user.name,
+            "is_admin": db_user.is_admin,
+        },
+    }
+
+
 async def validate_api_key(api_key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
     """
     Validate an API key and return its associated data.
-    
+
+    Lookups are served from the local and Redis caches when possible; the
+    key's use is recorded and written to the database in bulk later.
+
     Args:
         api_key: The API key to validate
         
     Returns:
-        Tuple of (is_valid, key_data or None)
+        Tuple of (is_valid, key_data or None). key_data includes the owner
+        under "user".
     """
-    # Try to get from cache first
-    if REDIS_AVAILABLE:
-        try:
-            key_hash = hashlib.sha256(api_key.encode()).hexdigest()
-            redis_client = await get_redis_client()
-            cached_data = await redis_client.get(f"api_key:{key_hash}")
-            
-            if cached_data:
-                # Key exists in cache, return success with minimal data
-                key_data = base64.b64decode(cached_data).decode('utf-8')
-                import json
-                return True, json.loads(key_data)
-        except Exception as e:
-            logger.warning(f"Redis error during API key validation: {str(e)}")
-
-    # Fall back to database
-    db_user, db_key = await get_user_by_api_key(api_key, return_api_key=True)
-    
-    if not db_user or not db_key:
+    _start_background_tasks()
+    key_hash = hash_api_key(api_key)
+
+    key_data = await api_key_cache.get(key_hash)
+    if key_data is None:
+        row = None
+        if api_key.startswith("mil_"):
+            try:
+                async with get_db() as session:
+                    row = await _select_api_key_with_user(key_hash, session)
+            except Exception as e:
+                # Not cached: the key may be valid once the database is back
+                logger.error(f"Error validating API key: {str(e)}")
+                return False, None
+        if not row:
+            api_key_cache.set_invalid(key_hash)
+            return False, None
+        db_key, db_user = row
+        key_data = _key_data(db_key, db_user)
+        await api_key_cache.set(key_hash, key_data)
+
+    if not key_data.get("is_valid"):
         return False, None
-        
-    # Cache the result for faster future validation
-    if REDIS_AVAILABLE and db_key:
-        try:
-            key_hash = hashlib.sha256(api_key.encode()).hexdigest()
-            redis_client = await get_redis_client()
-            key_data = {
-                "id": str(db_key.id),
-                "user_id": str(db_user.id),
-                "scopes": db_key.scopes,
-                "is_valid": True
-            }
-            import json
-            await redis_client.setex(
-                f"api_key:{key_hash}", 
-                300,  # 5 minutes TTL
-                base64.b64encode(json.dumps(key_data).encode('utf-8'))
-            )
-        except Exception as e:
-            logger.warning(f"Failed to cache API key: {str(e)}")
-    
-    # Return the key data
-    if db_key:
-        return True, {
-            "id": str(db_key.id),
-            "user_id": str(db_user.id),
-            "name": db_key.name,
-            "scopes": db_key.scopes,
-            "expires_at": db_key.expires_at.isoformat() if db_key.expires_at else None,
-            "created_at": db_key.created_at.isoformat() if db_key.created_at else None,
-            "is_valid": True,
-        }
-    
-    return False, None
+
+    expires_at = key_data.get("expires_at")
+    if expires_at and datetime.fromisoformat(expires_at) <= datetime.utcnow():
+        api_key_cache.discard_local(key_hash)
+        return False, None
+
+    last_used_buffer.record(key_data["id"])
+    return True, dict(key_data)
 
 
 async def get_api_key_scopes(api_key: str) -> List[str]:
@@ -150,27 +180,11 @@ async def _get_user_by_api_key(api_key: str, db: AsyncSession, return_api_key: b
             logger.debug("Invalid API key format (doesn't start with 'mil_')")
             return None
 
-        # Hash the API key for lookup
-        hashed_key = hashlib.sha256(api_key.encode()).hexdigest()
-
-        # Find the API key in the database
-        result = await db.execute(
-            select(ApiKey).where(
-                ApiKey.hashed_key == hashed_key,
-                ApiKey.expires_at > datetime.utcnow(),
-                ApiKey.is_active == True
-            )
-        )
-        api_key_obj = result.scalars().first()
-
-        if not api_key_obj:
+        row = await _select_api_key_with_user(hash_api_key(api_key), db)
+        if not row:
             return None
 
-        # Get the user associated with the API key
-        result = await db.execute(
-            select(User).where(User.id == api_key_obj.user_id)
-        )
-        user = result.scalars().first()
+        api_key_obj, user = row
 
         if return_api_key:
             return user, api_key_obj
@@ -181,20 +195,41 @@ async def _get_user_by_api_key(api_key: str, db: AsyncSession, return_api_key: b
         return None
 
 
-async def update_api_key_last_used(api_key_id: str, db: AsyncSession) -> None:
-    """Update the last used timestamp of an API key.
+async def _select_api_key_with_user(hashed_key: str, db: AsyncSession) -> Optional[Tuple[ApiKey, User]]:
+    """Find an active API key and its owner in one query.
 
     Args:
-        api_key_id: The ID of the API key.
+        hashed_key: SHA-256 of the API key.
         db: Database session.
+
+    Returns:
+        (api_key, user) or None if no active key matches.
     """
-    try:
-        api_key_obj = await db.get(ApiKey, api_key_id)
-        if api_key_obj:
-            api_key_obj.last_used_at = datetime.utcnow()
-            await db.commit()
-    except Exception as e:
-        logger.error(f"Error updating API key last used: {str(e)}")
+    result = await db.execute(
+        select(ApiKey, User)
+        .join(User, User.id == ApiKey.user_id)
+        .where(
+            ApiKey.hashed_key == hashed_key,
+            ApiKey.expires_at > datetime.utcnow(),
+            ApiKey.is_active == True
+        )
+    )
+    row = result.first()
+    return tuple(row) if row else None
+
+
+async def update_api_key_last_used(api_key_id: str, db: Optional[AsyncSession] = None) -> None:
+    """Record that an API key was used.
+
+    The timestamp is buffered and written together with other keys' updates
+    by the background flush, so no query runs on the request path.
+
+    Args:
+        api_key_id: The ID of the API key.
+        db: Unused; kept for backwards compatibility.
+    """
+    _start_background_tasks()
+    last_used_buffer.record(api_key_id)
 
 
 async def create_api_key(user_id: str, name: str, db: Optional[AsyncSession] = None, scopes: List[str] = None, expires_in_days: int = 90) -> Dict[str, Any]:
@@ -241,7 +276,7 @@ async def _create_api_key(user_id: str, name: str, db: AsyncSession, scopes: Lis
 
         # Generate a new API key
         api_key = f"mil_{secrets.token_urlsafe(32)}"
-        hashed_key = hashlib.sha256(api_key.encode()).hexdigest()
+        hashed_key = hash_api_key(api_key)
 
         # Create expiration date
         expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
@@ -327,6 +362,9 @@ async def _revoke_api_key(api_key_id: str, user_id: str, db: AsyncSession) -> No
         api_key.is_active = False
 
         await db.commit()
+
+        # Stop every process from accepting the key straight away
+        await api_key_cache.invalidate(api_key.hashed_key)
         logger.info(f"API key {api_key_id} revoked by user {user_id}")
     except (ResourceNotFoundError, UnauthorizedError):
         raise
@@ -0,0 +1,323 @@
+"""
+Batched Merkle-root anchoring for blockchain content verification
+
+Instead of sending one transaction per content hash, pending hashes are
+collected into a batch, a Merkle tree is built over them and only the root
+is anchored on-chain. Each content hash receives an inclusion proof that can
+be checked offline against the anchored root.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger("api.services.blockchain_anchoring")
+
+# Domain separation prefixes so a leaf can never be confused with an inner node
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def _to_bytes(value: str) -> bytes:
+    """Decode a hex digest (with or without 0x) or fall back to UTF-8 bytes."""
+    hex_value = value[2:] if value.startswith("0x") else value
+    try:
+        return bytes.fromhex(hex_value)
+    except ValueError:
+        return value.encode()
+
+
+def merkle_leaf(content_hash: str) -> bytes:
+    """Return the Merkle leaf for a content hash."""
+    return hashlib.sha256(LEAF_PREFIX + _to_bytes(content_hash)).digest()
+
+
+def _merkle_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_merkle_tree(content_hashes: List[str]) -> List[List[bytes]]:
+    """
+    Build a Merkle tree over content hashes
+
+    Odd nodes are paired with themselves. The last level holds the root.
+
+    Args:
+        content_hashes: Content hashes in batch order
+
+    Returns:
+        Tree levels from leaves to root
+    """
+    if not content_hashes:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    levels = [[merkle_leaf(content_hash) for content_hash in content_hashes]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        next_level = []
+        for i in range(0, len(level), 2):
+            left = level[i]
+            right = level[i + 1] if i + 1 < len(level) else left
+            next_level.append(_merkle_node(left, right))
+        levels.append(next_level)
+    return levels
+
+
+def merkle_root(levels: List[List[bytes]]) -> str:
+    """Return the hex-encoded root of a tree built by build_merkle_tree."""
+    return "0x" + levels[-1][0].hex()
+
+
+def merkle_proof(levels: List[List[bytes]], index: int) -> List[Dict[str, str]]:
+    """
+    Build the inclusion proof for the leaf at index
+
+    Args:
+        levels: Tree levels from build_merkle_tree
+        index: Leaf index
+
+    Returns:
+        List of sibling hashes with their side ("left" or "right")
+    """
+    proof = []
+    for level in levels[:-1]:
+        sibling_index = index ^ 1
+        if sibling_index >= len(level):
+            sibling_index = index
+        proof.append({
+            "hash": level[sibling_index].hex(),
+            "position": "left" if sibling_index < index else "right",
+        })
+        index //= 2
+    return proof
+
+
+def verify_merkle_proof(content_hash: str, proof: List[Dict[str, str]], root: str) -> bool:
+    """
+    Check a Merkle inclusion proof offline
+
+    Args:
+        content_hash: Content hash being proven
+        proof: Proof from merkle_proof
+        root: Hex-encoded Merkle root anchored on-chain
+
+    Returns:
+        True if the content hash is included under root
+    """
+    node = merkle_leaf(content_hash)
+    try:
+        for step in proof:
+            sibling = bytes.fromhex(step["hash"])
+            if step["position"] == "left":
+                node = _merkle_node(sibling, node)
+            else:
+                node = _merkle_node(node, sibling)
+    except (KeyError, ValueError):
+        return False
+    expected = root[2:] if root.startswith("0x") else root
+    return node.hex() == expected.lower()
+
+
+class NonceManager:
+    """
+    Locally managed transaction nonce for a single sending account
+
+    The nonce is read from the chain once and then incremented locally so
+    consecutive transactions don't each need a get_transaction_count call.
+    The read runs in the default executor so it does not block the event loop.
+    """
+
+    def __init__(self, fetch_nonce: Callable[[], int]):
+        """
+        Initialize the nonce manager
+
+        Args:
+            fetch_nonce: Callable returning the account's pending nonce from the chain
+        """
+        self._fetch_nonce = fetch_nonce
+        self._next_nonce: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    async def next(self) -> int:
+        """Reserve and return the next nonce."""
+        async with self._lock:
+            if self._next_nonce is None:
+                loop = asyncio.get_running_loop()
+                self._next_nonce = await loop.run_in_executor(None, self._fetch_nonce)
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    async def reset(self) -> None:
+        """Forget the local nonce so it is re-read from the chain on next use."""
+        async with self._lock:
+            self._next_nonce = None
+
+
+@dataclass
+class PendingAnchor:
+    """A content hash waiting to be included in the next batch."""
+    content_hash: str
+    metadata: Dict[str, Any]
+    user_id: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+# Submitter receives (merkle_root, batch_size) and returns transaction details
+# containing at least transaction_id, block_number and timestamp.
+Submitter = Callable[[str, int], Awaitable[Dict[str, Any]]]
+
+
+class AnchoringQueue:
+    """
+    Collects content hashes and anchors them in Merkle-root batches
+
+    A batch is flushed when it reaches max_batch_size or when the oldest
+    pending entry has waited max_wait_seconds, whichever happens first.
+    """
+
+    def __init__(
+        self,
+        submitter: Submitter,
+        on_anchored: Optional[Callable[[PendingAnchor, Dict[str, Any]], Awaitable[None]]] = None,
+        max_batch_size: int = 256,
+        max_wait_seconds: float = 5.0,
+    ):
+        """
+        Initialize the anchoring queue
+
+        Args:
+            submitter: Coroutine anchoring a Merkle root on-chain
+            on_anchored: Optional coroutine called with each anchored entry and its record
+            max_batch_size: Maximum content hashes per transaction
+            max_wait_seconds: Maximum time an entry waits before its batch is flushed
+        """
+        self.submitter = submitter
+        self.on_anchored = on_anchored
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: List[PendingAnchor] = []
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        # Background tasks are referenced until done so they are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches_submitted = 0
+        self.hashes_anchored = 0
+
+    async def submit(self, content_hash: str, metadata: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        """
+        Queue a content hash and wait for its batch to be anchored
+
+        Args:
+            content_hash: Content hash to anchor
+            metadata: Verification metadata stored alongside the proof
+            user_id: ID of the user requesting verification
+
+        Returns:
+            Verification record including the Merkle root and inclusion proof
+        """
+        future = await self.enqueue(content_hash, metadata, user_id)
+        return await future
+
+    async def enqueue(self, content_hash: str, metadata: Dict[str, Any], user_id: str) -> asyncio.Future:
+        """
+        Queue a content hash without waiting for anchoring
+
+        Returns:
+            Future resolved with the verification record once anchored
+        """
+        future = asyncio.get_running_loop().create_future()
+        batch = None
+        async with self._lock:
+            self._pending.append(PendingAnchor(content_hash, metadata, user_id, future))
+            if len(self._pending) >= self.max_batch_size:
+                batch = self._take_batch()
+            elif self._flush_task is None or self._flush_task.done():
+                self._flush_task = self._spawn(self._flush_after_delay())
+
+        if batch:
+            self._spawn(self._anchor_batch(batch))
+        return future
+
+    def _spawn(self, coro: Awaitable[None]) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Anchoring task failed: {task.exception()}")
+
+    def _take_batch(self) -> List[PendingAnchor]:
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        return batch
+
+    async def _flush_after_delay(self) -> None:
+        await asyncio.sleep(self.max_wait_seconds)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Anchor everything currently pending."""
+        while True:
+            async with self._lock:
+                if not self._pending:
+                    return
+                batch = self._take_batch()
+            await self._anchor_batch(batch)
+
+    async def _anchor_batch(self, batch: List[PendingAnchor]) -> None:
+        # Duplicate hashes in one batch share a leaf
+        unique_hashes = list(dict.fromkeys(entry.content_hash for entry in batch))
+        levels = build_merkle_tree(unique_hashes)
+        root = merkle_root(levels)
+        leaf_index = {content_hash: i for i, content_hash in enumerate(unique_hashes)}
+
+        try:
+            transaction = await self.submitter(root, len(unique_hashes))
+        except Exception as e:
+            logger.error(f"Failed to anchor batch of {len(batch)} hashes: {e}")
+            for entry in batch:
+                if not entry.future.done():
+                    entry.future.set_exception(e)
+            return
+
+        self.batches_submitted += 1
+        self.hashes_anchored += len(unique_hashes)
+        logger.info(f"Anchored {len(unique_hashes)} content hashes under root {root}")
+
+        for entry in batch:
+            index = leaf_index[entry.content_hash]
+            record = {
+                **transaction,
+                "content_hash": entry.content_hash,
+                "merkle_root": root,
+                "merkle_proof": merkle_proof(levels, index),
+                "leaf_index": index,
+                "batch_size": len(unique_hashes),
+                "metadata": entry.metadata,
+                "user_id": entry.user_id,
+            }
+            if self.on_anchored:
+                try:
+                    await self.on_anchored(entry, record)
+                except Exception as e:
+                    logger.error(f"Failed to persist anchor for {entry.content_hash}: {e}")
+            if not entry.future.done():
+                entry.future.set_result(record)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return queue statistics."""
+        return {
+            "pending": len(self._pending),
+            "batches_submitted": self.batches_submitted,
+            "hashes_anchored": self.hashes_anchored,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
@@ -0,0 +1,200 @@
+"""
+Two-level cache for blockchain reads
+
+An in-process cache (TimedCache) sits in front of a shared Redis tier so
+that a value fetched from the RPC node by one pod is reused by every pod.
+Concurrent misses for the same key are coalesced into a single load, misses
+are cached briefly (negative caching) under a separate key prefix so that
+scans of a namespace only see real values, and values that can no longer change,
+such as finalized blocks and transactions, are cached without expiry.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("api.services.blockchain_cache")
+
+# Marker stored in both tiers for keys known not to exist
+MISSING_MARKER = {"__missing__": True}
+
+# Redis prefix for cached misses, kept outside every namespace's keyspace
+MISSING_KEY_PREFIX = "cache:missing"
+
+
+class TieredCache:
+    """
+    Local cache in front of a shared Redis cache with request coalescing
+
+    Loaders return a value (or None when the item does not exist). A loader
+    may also return a (value, immutable) tuple to mark the value as final.
+    """
+
+    def __init__(
+        self,
+        local_cache: Any,
+        redis: Any,
+        namespace: str,
+        ttl: int = 3600,
+        local_ttl: Optional[int] = None,
+        negative_ttl: int = 30,
+        immutable_local_ttl: Optional[int] = None,
+    ):
+        """
+        Initialize the tiered cache
+
+        Args:
+            local_cache: In-process cache with async get/set/delete (TimedCache)
+            redis: Shared Redis client
+            namespace: Key prefix in both tiers
+            ttl: Redis TTL in seconds for mutable values
+            local_ttl: Local TTL in seconds for mutable values (defaults to ttl)
+            negative_ttl: TTL in seconds for cached misses
+            immutable_local_ttl: Local TTL in seconds for immutable values
+                (defaults to local_ttl)
+        """
+        self.local = local_cache
+        self.redis = redis
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_ttl = local_ttl if local_ttl is not None else ttl
+        self.negative_ttl = negative_ttl
+        self.immutable_local_ttl = immutable_local_ttl or self.local_ttl
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {"local_hits": 0, "redis_hits": 0, "loads": 0, "coalesced": 0, "negative_hits": 0}
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    @staticmethod
+    def _missing_key(full_key: str) -> str:
+        return f"{MISSING_KEY_PREFIX}:{full_key}"
+
+    @staticmethod
+    def _unwrap(value: Any) -> Any:
+        return None if value == MISSING_MARKER else value
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Optional[Any]:
+        """
+        Return the cached value for key, loading it once on a miss
+
+        Args:
+            key: Cache key within the namespace
+            loader: Coroutine factory fetching the value from the source
+
+        Returns:
+            Cached or loaded value, or None if the item does not exist
+        """
+        full_key = self._key(key)
+
+        value = await self.local.get(full_key)
+        if value is not None:
+            self.stats["local_hits"] += 1
+            if value == MISSING_MARKER:
+                self.stats["negative_hits"] += 1
+            return self._unwrap(value)
+
+        in_flight = self._in_flight.get(full_key)
+        if in_flight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[full_key] = future
+        try:
+            value = await self._load_through_redis(full_key, loader)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(full_key, None)
+
+    async def _load_through_redis(self, full_key: str, loader: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        try:
+            cached = await self.redis.get(full_key)
+            missing = None if cached else await self.redis.get(self._missing_key(full_key))
+        except Exception as e:
+            logger.warning(f"Shared cache read failed for {full_key}: {e}")
+            cached = missing = None
+
+        if cached:
+            value = json.loads(cached)
+            self.stats["redis_hits"] += 1
+            await self.local.set(full_key, value, ttl=self.local_ttl)
+            return value
+
+        if missing:
+            self.stats["redis_hits"] += 1
+            self.stats["negative_hits"] += 1
+            await self.local.set(full_key, MISSING_MARKER, ttl=self.negative_ttl)
+            return None
+
+        self.stats["loads"] += 1
+        result = await loader()
+        immutable = False
+        if isinstance(result, tuple):
+            result, immutable = result
+
+        if result is None:
+            await self.local.set(full_key, MISSING_MARKER, ttl=self.negative_ttl)
+            try:
+                await self.redis.set(
+                    self._missing_key(full_key), json.dumps(MISSING_MARKER), expire=self.negative_ttl
+                )
+            except Exception as e:
+                logger.warning(f"Shared cache write failed for {full_key}: {e}")
+            return None
+
+        if immutable:
+            await self._store(full_key, result, None, self.immutable_local_ttl)
+        else:
+            await self._store(full_key, result, self.ttl, self.local_ttl)
+        return result
+
+    async def _store(self, full_key: str, value: Any, redis_ttl: Optional[int], local_ttl: int) -> None:
+        await self.local.set(full_key, value, ttl=local_ttl)
+        try:
+            if redis_ttl is None:
+                await self.redis.set(full_key, json.dumps(value))
+            else:
+                await self.redis.set(full_key, json.dumps(value), expire=redis_ttl)
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {full_key}: {e}")
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, immutable: bool = False) -> None:
+        """
+        Store a value in both tiers
+
+        Args:
+            key: Cache key within the namespace
+            value: JSON-serializable value
+            ttl: Redis TTL override in seconds
+            immutable: Store without expiry
+        """
+        if immutable:
+            await self._store(self._key(key), value, None, self.immutable_local_ttl)
+        else:
+            await self._store(self._key(key), value, ttl or self.ttl, self.local_ttl)
+
+    async def invalidate(self, key: str) -> None:
+        """Remove a key from both tiers."""
+        full_key = self._key(key)
+        await self.local.delete(full_key)
+        try:
+            await self.redis.delete(full_key)
+            await self.redis.delete(self._missing_key(full_key))
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed for {full_key}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit and load counters."""
+        return {"namespace": self.namespace, **self.stats, "in_flight": len(self._in_flight)}
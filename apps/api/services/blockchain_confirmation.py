@@ -0,0 +1,359 @@
+"""
+Background confirmation watcher for blockchain transactions
+
+Request handlers submit transactions and return immediately with a pending
+status. The watcher follows new blocks, matches their transactions against
+every pending hash at once, and once a transaction has enough confirmations
+it fetches the receipt, hands it to the registered handler (which updates the
+Redis records) and notifies waiting clients. Hashes that the block scan cannot
+see (tracked after their block was scanned, or reorged out) are looked up by
+receipt instead, and a transaction is only failed after a final receipt
+lookup confirms it was never mined.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+try:
+    from web3.exceptions import TransactionNotFound
+except ImportError:
+    class TransactionNotFound(Exception):
+        """Raised by web3 when a transaction has no receipt."""
+
+logger = logging.getLogger("api.services.blockchain_confirmation")
+
+PENDING_TX_PREFIX = "blockchain:pending_tx:"
+PENDING_TX_INDEX_KEY = "blockchain:pending_txs"
+
+# Handler receives the pending transaction and its receipt (None when dropped)
+ConfirmationHandler = Callable[["PendingTransaction", Optional[Any]], Awaitable[None]]
+Notifier = Callable[["PendingTransaction", str], Awaitable[None]]
+
+
+@dataclass
+class PendingTransaction:
+    """A submitted transaction waiting for confirmation."""
+    tx_hash: str
+    kind: str
+    subjects: List[str] = field(default_factory=list)
+    notify: Set[str] = field(default_factory=set)
+    submitted_at: float = field(default_factory=time.time)
+    included_in_block: Optional[int] = None
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "tx_hash": self.tx_hash,
+            "kind": self.kind,
+            "subjects": self.subjects,
+            "notify": sorted(self.notify),
+            "submitted_at": self.submitted_at,
+        })
+
+    @classmethod
+    def from_json(cls, data: str) -> "PendingTransaction":
+        parsed = json.loads(data)
+        return cls(
+            tx_hash=parsed["tx_hash"],
+            kind=parsed["kind"],
+            subjects=parsed.get("subjects", []),
+            notify=set(parsed.get("notify", [])),
+            submitted_at=parsed.get("submitted_at", time.time()),
+        )
+
+
+def _normalize_hash(tx_hash: Any) -> str:
+    value = tx_hash.hex() if hasattr(tx_hash, "hex") and not isinstance(tx_hash, str) else str(tx_hash)
+    value = value.lower()
+    return value if value.startswith("0x") else f"0x{value}"
+
+
+class ConfirmationWatcher:
+    """
+    Tracks pending transactions and resolves them as blocks arrive
+
+    Each new block is fetched once and its transaction list is intersected
+    with all pending hashes, so the RPC cost per poll is proportional to the
+    number of new blocks rather than the number of pending transactions.
+    """
+
+    def __init__(
+        self,
+        get_web3: Callable[[], Awaitable[Any]],
+        redis: Any,
+        handlers: Dict[str, ConfirmationHandler],
+        notifier: Optional[Notifier] = None,
+        poll_interval: float = 2.0,
+        confirmations: int = 3,
+        timeout_seconds: float = 900.0,
+        max_blocks_per_poll: int = 50,
+    ):
+        """
+        Initialize the confirmation watcher
+
+        Args:
+            get_web3: Coroutine function returning a connected Web3 instance
+            redis: Redis client used to persist pending transactions across restarts
+            handlers: Handler per transaction kind, called on confirmation or failure
+            notifier: Optional coroutine notifying clients of a status change
+            poll_interval: Seconds between block polls
+            confirmations: Blocks required on top of the inclusion block
+            timeout_seconds: Seconds after which an unseen transaction is dropped
+            max_blocks_per_poll: Maximum blocks scanned per poll before falling
+                back to direct receipt lookups
+        """
+        self.get_web3 = get_web3
+        self.redis = redis
+        self.handlers = handlers
+        self.notifier = notifier
+        self.poll_interval = poll_interval
+        self.confirmations = confirmations
+        self.timeout_seconds = timeout_seconds
+        self.max_blocks_per_poll = max_blocks_per_poll
+        self.pending: Dict[str, PendingTransaction] = {}
+        # Hashes to look up by receipt because the block scan may have passed them
+        self._unlocated: Set[str] = set()
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._last_scanned_block: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._recovered = False
+        self.confirmed_count = 0
+        self.failed_count = 0
+
+    async def track(
+        self,
+        tx_hash: Any,
+        kind: str,
+        subject: Optional[str] = None,
+        notify: Optional[str] = None,
+    ) -> None:
+        """
+        Start tracking a submitted transaction
+
+        Repeated calls for the same hash add subjects and notification
+        targets, so a batch transaction can cover many records.
+
+        Args:
+            tx_hash: Transaction hash
+            kind: Handler key, e.g. "verification" or "token"
+            subject: Record identifier affected by the transaction
+            notify: Client ID to notify on status changes
+        """
+        tx_hash = _normalize_hash(tx_hash)
+        pending = self.pending.get(tx_hash)
+        if pending is None:
+            pending = PendingTransaction(tx_hash=tx_hash, kind=kind)
+            self.pending[tx_hash] = pending
+            self._unlocated.add(tx_hash)
+        if subject and subject not in pending.subjects:
+            pending.subjects.append(subject)
+        if notify:
+            pending.notify.add(str(notify))
+
+        await self.redis.set(
+            f"{PENDING_TX_PREFIX}{tx_hash}",
+            pending.to_json(),
+            expire=int(self.timeout_seconds * 2)
+        )
+        await self.redis.sadd(PENDING_TX_INDEX_KEY, tx_hash)
+        self.start()
+
+    def wait_for(self, tx_hash: Any) -> asyncio.Future:
+        """Return a future resolved with the final status of a tracked transaction."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(_normalize_hash(tx_hash), []).append(future)
+        return future
+
+    def start(self) -> None:
+        """Start the background polling task if it is not running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background polling task."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def recover(self) -> int:
+        """
+        Reload pending transactions persisted by a previous process
+
+        Returns:
+            Number of transactions recovered
+        """
+        recovered = 0
+        expired = []
+        for tx_hash in await self.redis.smembers(PENDING_TX_INDEX_KEY):
+            data = await self.redis.get(f"{PENDING_TX_PREFIX}{tx_hash}")
+            if not data:
+                expired.append(tx_hash)
+                continue
+            pending = PendingTransaction.from_json(data)
+            if pending.tx_hash not in self.pending:
+                self.pending[pending.tx_hash] = pending
+                self._unlocated.add(pending.tx_hash)
+                recovered += 1
+        if expired:
+            await self.redis.srem(PENDING_TX_INDEX_KEY, *expired)
+        if recovered:
+            logger.info(f"Recovered {recovered} pending blockchain transactions")
+        return recovered
+
+    async def _run(self) -> None:
+        if not self._recovered:
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"Failed to recover pending transactions: {e}")
+            self._recovered = True
+
+        while self.pending:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Error polling for transaction confirmations: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def poll_once(self) -> int:
+        """
+        Scan new blocks and resolve confirmed transactions
+
+        Returns:
+            Number of transactions resolved in this poll
+        """
+        if not self.pending:
+            return 0
+
+        w3 = await self.get_web3()
+        loop = asyncio.get_running_loop()
+        latest = await loop.run_in_executor(None, lambda: w3.eth.block_number)
+
+        if self._last_scanned_block is None or latest - self._last_scanned_block > self.max_blocks_per_poll:
+            # Too far behind to scan block by block; look receipts up directly
+            unlocated = [p for p in self.pending.values() if p.included_in_block is None]
+        else:
+            for number in range(self._last_scanned_block + 1, latest + 1):
+                block = await loop.run_in_executor(None, w3.eth.get_block, number)
+                for tx in block.transactions:
+                    pending = self.pending.get(_normalize_hash(tx))
+                    if pending is not None:
+                        pending.included_in_block = number
+            # Hashes tracked or reorged out since the last poll may sit in blocks already scanned
+            unlocated = [
+                self.pending[tx_hash] for tx_hash in self._unlocated
+                if tx_hash in self.pending and self.pending[tx_hash].included_in_block is None
+            ]
+        self._unlocated = {pending.tx_hash for pending in await self._locate_by_receipts(w3, loop, unlocated)}
+        self._last_scanned_block = latest
+
+        resolved = 0
+        now = time.time()
+        expired = [
+            pending for pending in self.pending.values()
+            if pending.included_in_block is None and now - pending.submitted_at > self.timeout_seconds
+        ]
+        if expired:
+            # Only fail transactions a final receipt lookup cannot find
+            retry = {pending.tx_hash for pending in await self._locate_by_receipts(w3, loop, expired)}
+            for pending in expired:
+                if pending.included_in_block is not None or pending.tx_hash in retry:
+                    continue
+                logger.warning(f"Transaction {pending.tx_hash} not mined after {self.timeout_seconds}s")
+                await self._resolve(pending, None)
+                resolved += 1
+
+        ready = [
+            pending for pending in self.pending.values()
+            if pending.included_in_block is not None
+            and latest - pending.included_in_block + 1 >= self.confirmations
+        ]
+        if ready:
+            receipts = await self._fetch_receipts(w3, loop, ready)
+            for pending, receipt in zip(ready, receipts):
+                if isinstance(receipt, Exception):
+                    # Transient RPC error; the inclusion block is kept and the receipt retried
+                    logger.debug(f"Receipt lookup for {pending.tx_hash} failed: {receipt}")
+                    continue
+                if receipt is None:
+                    # Reorged out; it may be re-included in a block that was already scanned
+                    pending.included_in_block = None
+                    self._unlocated.add(pending.tx_hash)
+                    continue
+                await self._resolve(pending, receipt)
+                resolved += 1
+
+        return resolved
+
+    async def _fetch_receipts(
+        self, w3: Any, loop: asyncio.AbstractEventLoop, pending_list: List[PendingTransaction]
+    ) -> List[Any]:
+        """Fetch receipts concurrently; None when not found, the exception on other errors."""
+        receipts = await asyncio.gather(*[
+            loop.run_in_executor(None, w3.eth.get_transaction_receipt, pending.tx_hash)
+            for pending in pending_list
+        ], return_exceptions=True)
+        return [None if isinstance(receipt, TransactionNotFound) else receipt for receipt in receipts]
+
+    async def _locate_by_receipts(
+        self, w3: Any, loop: asyncio.AbstractEventLoop, pending_list: List[PendingTransaction]
+    ) -> List[PendingTransaction]:
+        """Set the inclusion block from receipts and return the lookups that errored."""
+        failed = []
+        if not pending_list:
+            return failed
+        for pending, receipt in zip(pending_list, await self._fetch_receipts(w3, loop, pending_list)):
+            if isinstance(receipt, Exception):
+                failed.append(pending)
+            elif receipt is not None:
+                pending.included_in_block = receipt.blockNumber
+        return failed
+
+    async def _resolve(self, pending: PendingTransaction, receipt: Optional[Any]) -> None:
+        self.pending.pop(pending.tx_hash, None)
+        self._unlocated.discard(pending.tx_hash)
+        status = "confirmed" if receipt is not None and receipt.status == 1 else "failed"
+        if status == "confirmed":
+            self.confirmed_count += 1
+        else:
+            self.failed_count += 1
+
+        handler = self.handlers.get(pending.kind)
+        if handler:
+            try:
+                await handler(pending, receipt)
+            except Exception as e:
+                logger.error(f"Confirmation handler for {pending.tx_hash} failed: {e}")
+
+        if self.notifier:
+            try:
+                await self.notifier(pending, status)
+            except Exception as e:
+                logger.error(f"Failed to notify clients about {pending.tx_hash}: {e}")
+
+        try:
+            await self.redis.delete(f"{PENDING_TX_PREFIX}{pending.tx_hash}")
+            await self.redis.srem(PENDING_TX_INDEX_KEY, pending.tx_hash)
+        except Exception as e:
+            logger.warning(f"Failed to clear pending transaction {pending.tx_hash}: {e}")
+
+        for future in self._waiters.pop(pending.tx_hash, []):
+            if not future.done():
+                future.set_result(status)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return watcher statistics."""
+        return {
+            "pending": len(self.pending),
+            "confirmed": self.confirmed_count,
+            "failed": self.failed_count,
+            "last_scanned_block": self._last_scanned_block,
+            "running": self._task is not None and not self._task.done(),
+        }
@@ -12,7 +12,7 @@ import base64
 import time
 import asyncio
 import functools
-from typing import Dict, Any, List, Optional, Tuple, Callable, MutableMapping
+from typing import Dict, Any, List, Optional, Tuple, Callable, MutableMapping, Set
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 from functools import wraps, lru_cache
@@ -23,11 +23,15 @@ from eth_account.messages import encode_defunct
 try:
     from web3 import Web3
     from web3.middleware import geth_poa_middleware
+    from web3.exceptions import BlockNotFound, TransactionNotFound
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
 
 from ..utils.encryption import encrypt_data, decrypt_data
+from .blockchain_anchoring import AnchoringQueue, NonceManager, PendingAnchor, verify_merkle_proof
+from .blockchain_cache import TieredCache
+from .blockchain_confirmation import ConfirmationWatcher, PendingTransaction
 from ..cache.redis_client import get_redis_client
 from ..utils.resilience import circuit_breaker, retry_with_backoff
 from ..config.settings import settings
@@ -40,6 +44,14 @@ MOCK_TRANSACTIONS = {}
 MOCK_BLOCKS = {}
 MOCK_BLOCK_NUMBER = 12345678
 
+# Last block whose CertificateIssued events were applied to the recipient index
+RECIPIENT_INDEX_CURSOR_KEY = "blockchain:recipient_index:last_block"
+
+# Recipient index sets of token IDs; the sentinel member marks an index
+# loaded from the contract, so recipients with no tokens are cached too
+RECIPIENT_INDEX_PREFIX = "blockchain:recipient_tokens:"
+RECIPIENT_INDEX_SENTINEL = "-"
+
 class TimedCache:
     """
     Time-based cache implementation for blockchain data
@@ -231,6 +243,8 @@ class BlockchainService:
     
     def __init__(self):
         self.redis = get_redis_client()
+        # Background tasks are referenced until done so they are not garbage collected
+        self._background_tasks: Set[asyncio.Task] = set()
         self.contract_address = "0x1234567890123456789012345678901234567890"
         self.network = "polygon"
         self.gas_limit = 50000  # Maximum gas limit for transactions
@@ -241,6 +255,56 @@ class BlockchainService:
         self.transaction_cache = TimedCache(max_size=2000, default_ttl=86400)  # 24 hour TTL
         self.block_cache = TimedCache(max_size=500, default_ttl=604800)        # 1 week TTL
         
+        # Local caches above are fronted by a shared Redis tier with request coalescing;
+        # finalized blocks and transactions are cached there without expiry
+        self.finality_depth = getattr(settings, 'BLOCKCHAIN_CONFIRMATIONS', 3)
+        self.head_cache_seconds = 2.0
+        self._latest_block: Optional[Tuple[int, float]] = None
+        self.transaction_store = TieredCache(
+            self.transaction_cache, self.redis, "blockchain:cache:tx",
+            ttl=60, negative_ttl=15, immutable_local_ttl=86400
+        )
+        self.block_store = TieredCache(
+            self.block_cache, self.redis, "blockchain:cache:block",
+            ttl=60, negative_ttl=5, immutable_local_ttl=604800
+        )
+        self.token_store = TieredCache(
+            TimedCache(max_size=5000, default_ttl=60), self.redis, "blockchain:token",
+            ttl=86400 * 7, local_ttl=60, negative_ttl=60
+        )
+        
+        # Recipient index is kept current from CertificateIssued events
+        self.index_sync_interval = 30.0
+        self.index_sync_chunk = 2000
+        self._last_index_sync = 0.0
+        self._index_sync_lock = asyncio.Lock()
+        
+        # Shared provider connection and locally managed nonce
+        self._web3 = None
+        self._web3_lock = asyncio.Lock()
+        self._nonce_manager: Optional[NonceManager] = None
+        
+        # Content hashes are anchored in Merkle-root batches, one transaction per batch
+        self.anchoring_queue = AnchoringQueue(
+            submitter=self._submit_merkle_root,
+            on_anchored=self._store_anchored_verification,
+            max_batch_size=getattr(settings, 'BLOCKCHAIN_ANCHOR_BATCH_SIZE', 256),
+            max_wait_seconds=getattr(settings, 'BLOCKCHAIN_ANCHOR_MAX_WAIT_SECONDS', 5.0),
+        )
+        
+        # Receipts are resolved in the background instead of inside request handlers
+        self.confirmation_watcher = ConfirmationWatcher(
+            get_web3=self._get_web3,
+            redis=self.redis,
+            handlers={
+                "verification": self._on_verification_confirmed,
+                "token": self._on_token_confirmed,
+            },
+            notifier=self._notify_transaction_status,
+            poll_interval=getattr(settings, 'BLOCKCHAIN_CONFIRMATION_POLL_SECONDS', 2.0),
+            confirmations=getattr(settings, 'BLOCKCHAIN_CONFIRMATIONS', 3),
+        )
+        
         # Start background task for cache maintenance
         self._schedule_cache_maintenance()
         
@@ -260,7 +324,19 @@ class BlockchainService:
                     await asyncio.sleep(60)
         
         # Run in background
-        asyncio.create_task(maintenance_task())
+        self._spawn_background(maintenance_task())
+    
+    def _spawn_background(self, coro) -> asyncio.Task:
+        """Start a background task and keep a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_done)
+        return task
+    
+    def _on_background_done(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background blockchain task failed: {task.exception()}")
     
     async def _cleanup_caches(self):
         """Clean up expired items from all caches"""
@@ -268,8 +344,9 @@ class BlockchainService:
         certificate_count = await self.certificate_cache.cleanup_expired()
         transaction_count = await self.transaction_cache.cleanup_expired() 
         block_count = await self.block_cache.cleanup_expired()
+        token_count = await self.token_store.local.cleanup_expired()
         
-        total_count = verification_count + certificate_count + transaction_count + block_count
+        total_count = verification_count + certificate_count + transaction_count + block_count + token_count
         
         logger.info(f"Cache maintenance completed: {total_count} expired items removed")
         
@@ -284,124 +361,292 @@ class BlockchainService:
                      f"transaction={t_stats['size']}/{t_stats['max_size']}, "
                      f"block={b_stats['size']}/{b_stats['max_size']}")
         
-    @circuit_breaker(failure_threshold=5, reset_timeout=300)
-    @retry_with_backoff(max_retries=3, base_delay=1, max_delay=10)
-    async def verify_content(
-        self, 
-        content_hash: str,
-        metadata: Dict[str, Any],
-        user_id: str
-    ) -> Dict[str, Any]:
-        """Verify content by storing its hash on the blockchain"""
-        try:
-            if not WEB3_AVAILABLE:
-                raise ImportError("Web3 library is not available. Please install with: pip install web3")
-            
-            # Initialize Web3 connection
-            w3 = Web3(Web3.HTTPProvider(settings.POLYGON_RPC_URL))
-            
-            # Apply middleware for Polygon (PoS chain)
-            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-            
-            # Check if connected
-            if not w3.is_connected():
-                raise ConnectionError(f"Failed to connect to blockchain node at {settings.POLYGON_RPC_URL}")
-            
-            # Get account from private key
-            account = w3.eth.account.from_key(settings.BLOCKCHAIN_PRIVATE_KEY)
-            
-            # Initialize the verification contract
-            contract = w3.eth.contract(
-                address=self.contract_address, 
-                abi=settings.VERIFICATION_CONTRACT_ABI
+    async def _get_web3(self):
+        """Return the shared Web3 connection, creating it on first use"""
+        if not WEB3_AVAILABLE:
+            raise ImportError("Web3 library is not available. Please install with: pip install web3")
+        
+        if self._web3 is not None:
+            return self._web3
+        
+        async with self._web3_lock:
+            if self._web3 is None:
+                w3 = Web3(Web3.HTTPProvider(
+                    settings.POLYGON_RPC_URL,
+                    request_kwargs={"timeout": getattr(settings, 'BLOCKCHAIN_RPC_TIMEOUT', 30)}
+                ))
+                
+                # Apply middleware for Polygon (PoS chain)
+                w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+                
+                # The connection check is an RPC round trip, so keep it off the event loop
+                connected = await asyncio.get_running_loop().run_in_executor(None, w3.is_connected)
+                if not connected:
+                    raise ConnectionError(f"Failed to connect to blockchain node at {settings.POLYGON_RPC_URL}")
+                
+                self._web3 = w3
+        
+        return self._web3
+    
+    def _get_nonce_manager(self, w3, address: str) -> NonceManager:
+        """Return the nonce manager for the service account"""
+        if self._nonce_manager is None:
+            self._nonce_manager = NonceManager(
+                lambda: w3.eth.get_transaction_count(address, "pending")
             )
-            
-            # Prepare transaction parameters
-            nonce = w3.eth.get_transaction_count(account.address)
+        return self._nonce_manager
+    
+    async def _submit_merkle_root(self, merkle_root: str, batch_size: int) -> Dict[str, Any]:
+        """Send the transaction anchoring a batch Merkle root; confirmation is tracked separately"""
+        w3 = await self._get_web3()
+        loop = asyncio.get_running_loop()
+        
+        # Get account from private key
+        account = w3.eth.account.from_key(settings.BLOCKCHAIN_PRIVATE_KEY)
+        nonce_manager = self._get_nonce_manager(w3, account.address)
+        
+        # Initialize the verification contract
+        contract = w3.eth.contract(
+            address=self.contract_address, 
+            abi=settings.VERIFICATION_CONTRACT_ABI
+        )
+        
+        # The root is stored through the existing verifyContent entry point;
+        # the batch descriptor takes the place of the per-item metadata hash
+        batch_descriptor = json.dumps({"type": "merkle_batch", "size": batch_size}, sort_keys=True)
+        batch_hash = hashlib.sha256(batch_descriptor.encode()).hexdigest()
+        
+        try:
+            nonce = await nonce_manager.next()
             
             # Get gas price with 10% buffer
-            gas_price = w3.eth.gas_price
-            gas_price_with_buffer = int(gas_price * 1.1)
-            
-            # Prepare metadata for on-chain storage
-            # For larger metadata, we'd use IPFS and only store the hash
-            metadata_json = json.dumps(metadata)
-            metadata_hash = hashlib.sha256(metadata_json.encode()).hexdigest()
+            gas_price = await loop.run_in_executor(None, lambda: w3.eth.gas_price)
             
-            # Prepare transaction for content verification
             tx = contract.functions.verifyContent(
-                content_hash,
-                metadata_hash,
-                str(user_id)
+                merkle_root,
+                batch_hash,
+                "merkle-batch"
             ).build_transaction({
                 'from': account.address,
                 'gas': self.gas_limit,
-                'gasPrice': gas_price_with_buffer,
+                'gasPrice': int(gas_price * 1.1),
                 'nonce': nonce,
             })
             
-            # Sign the transaction
+            # Sign and send without blocking the event loop
             signed_tx = account.sign_transaction(tx)
+            tx_hash = await loop.run_in_executor(
+                None, w3.eth.send_raw_transaction, signed_tx.rawTransaction
+            )
+        except Exception:
+            # Nonce may be out of sync with the chain; re-read it next time
+            await nonce_manager.reset()
+            raise
+        
+        return {
+            "transaction_id": tx_hash.hex(),
+            "block_number": None,
+            "submitted_at": datetime.utcnow().isoformat(),
+            "network": self.network,
+            "contract_address": self.contract_address,
+            "status": "pending",
+        }
+    
+    async def _store_anchored_verification(self, entry: PendingAnchor, record: Dict[str, Any]) -> None:
+        """Persist the verification record and inclusion proof for an anchored hash"""
+        verification_key = f"blockchain:verification:{entry.content_hash}"
+        await self.redis.set(
+            verification_key,
+            json.dumps({**record, "anchored_at": datetime.utcnow().isoformat()}),
+            expire=86400 * 365  # 1 year
+        )
+        await self.verification_cache.delete(f"verification:{entry.content_hash}")
+        
+        await self.confirmation_watcher.track(
+            record["transaction_id"],
+            kind="verification",
+            subject=entry.content_hash,
+            notify=entry.user_id
+        )
+    
+    async def _mark_verification_failed(self, content_hash: str, user_id: str, error: str) -> None:
+        """Record that a queued verification could not be anchored"""
+        verification_key = f"blockchain:verification:{content_hash}"
+        existing = await self.redis.get(verification_key)
+        record = json.loads(existing) if existing else {"content_hash": content_hash}
+        record.update({"status": "failed", "error": error, "updated_at": datetime.utcnow().isoformat()})
+        await self.redis.set(verification_key, json.dumps(record), expire=86400 * 7)
+        await self.verification_cache.delete(f"verification:{content_hash}")
+        
+        await self._notify_transaction_status(
+            PendingTransaction(tx_hash="", kind="verification", subjects=[content_hash], notify={user_id}),
+            "failed"
+        )
+    
+    async def _on_verification_confirmed(self, pending: PendingTransaction, receipt: Optional[Any]) -> None:
+        """Update verification records once their batch transaction is final"""
+        block_timestamp = None
+        if receipt is not None and receipt.status == 1:
+            w3 = await self._get_web3()
+            block = await asyncio.get_running_loop().run_in_executor(None, w3.eth.get_block, receipt.blockNumber)
+            block_timestamp = datetime.fromtimestamp(block.timestamp).isoformat()
+        
+        for content_hash in pending.subjects:
+            verification_key = f"blockchain:verification:{content_hash}"
+            existing = await self.redis.get(verification_key)
+            if not existing:
+                continue
+            record = json.loads(existing)
+            if receipt is not None and receipt.status == 1:
+                record.update({
+                    "status": "verified",
+                    "block_number": receipt.blockNumber,
+                    "timestamp": block_timestamp,
+                })
+            else:
+                record["status"] = "failed"
+            await self.redis.set(verification_key, json.dumps(record), expire=86400 * 365)
+            await self.verification_cache.delete(f"verification:{content_hash}")
+    
+    async def _on_token_confirmed(self, pending: PendingTransaction, receipt: Optional[Any]) -> None:
+        """Update token records once their issuance transaction is final"""
+        chain_certificate_id = None
+        if receipt is not None and receipt.status == 1 and receipt.logs:
+            try:
+                contract = (await self._get_web3()).eth.contract(
+                    address=settings.CERTIFICATE_CONTRACT_ADDRESS, 
+                    abi=settings.CERTIFICATE_CONTRACT_ABI
+                )
+                certificate_events = contract.events.CertificateIssued().process_receipt(receipt)
+                if certificate_events:
+                    chain_certificate_id = certificate_events[0]['args']['certificateId']
+            except Exception as e:
+                logger.warning(f"Error extracting certificate ID from events: {e}")
+        
+        for token_id in pending.subjects:
+            existing = await self.redis.get(f"blockchain:token:{token_id}")
+            if not existing:
+                continue
+            token_data = json.loads(existing)
+            if receipt is not None and receipt.status == 1:
+                token_data.update({"status": "active", "block_number": receipt.blockNumber})
+                if chain_certificate_id is not None:
+                    token_data["chain_certificate_id"] = chain_certificate_id
+            else:
+                token_data["status"] = "failed"
+            await self.token_store.set(token_id, token_data, ttl=86400 * 365 * 2)
+    
+    async def _notify_transaction_status(self, pending: PendingTransaction, status: str) -> None:
+        """Push a transaction status change to waiting WebSocket clients"""
+        from .websocket_service import get_connection_manager, MessageType, WebSocketMessage
+        
+        connection_manager = await get_connection_manager()
+        message = WebSocketMessage(
+            type=MessageType.VERIFICATION,
+            data={
+                "kind": pending.kind,
+                "status": status,
+                "transaction_id": pending.tx_hash,
+                "subjects": pending.subjects,
+                "network": self.network,
+                "timestamp": datetime.utcnow().isoformat(),
+            },
+            sender="blockchain_service"
+        )
+        for client_id in pending.notify:
+            await connection_manager.send_personal_message(message, client_id)
+        for subject in pending.subjects:
+            await connection_manager.broadcast(message, f"blockchain:{subject}")
+    
+    def verify_inclusion(self, content_hash: str, verification_data: Dict[str, Any]) -> bool:
+        """
+        Check offline that a content hash is included in its anchored batch
+        
+        Args:
+            content_hash: Content hash to check
+            verification_data: Verification record from get_verification
             
-            # Send the transaction
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            
-            # Wait for transaction receipt
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-            
-            if receipt.status != 1:
-                raise Exception(f"Transaction failed with status {receipt.status}")
-            
-            # Get block information
-            block = w3.eth.get_block(receipt.blockNumber)
-            
-            # Construct transaction data for our records
-            transaction_id = tx_hash.hex()
-            block_number = receipt.blockNumber
+        Returns:
+            True if the record's Merkle proof links the hash to the anchored root
+        """
+        proof = verification_data.get("merkle_proof")
+        root = verification_data.get("merkle_root")
+        if proof is None or not root:
+            return False
+        return verify_merkle_proof(content_hash, proof, root)
+    
+    @circuit_breaker(failure_threshold=5, reset_timeout=300)
+    @retry_with_backoff(max_retries=3, base_delay=1, max_delay=10)
+    async def verify_content(
+        self, 
+        content_hash: str,
+        metadata: Dict[str, Any],
+        user_id: str
+    ) -> Dict[str, Any]:
+        """
+        Verify content by anchoring its hash on the blockchain
+        
+        The hash is queued and anchored together with other pending hashes
+        under a single Merkle root. The call returns immediately with a pending
+        status; the stored record gains the transaction, inclusion proof and
+        final status once the batch is mined and confirmed.
+        """
+        try:
+            if not WEB3_AVAILABLE:
+                raise ImportError("Web3 library is not available. Please install with: pip install web3")
             
-            # Extract events from receipt (if any)
-            events = []
-            if hasattr(contract.events, 'ContentVerified'):
-                try:
-                    content_verified_events = contract.events.ContentVerified().process_receipt(receipt)
-                    events.extend(content_verified_events)
-                except Exception as e:
-                    logger.warning(f"Error processing ContentVerified events: {e}")
+            user_id = str(user_id)
+            queued_at = datetime.utcnow().isoformat()
             
-            # Store in Redis for persistence and fast retrieval
+            # Record the pending verification so lookups see it before anchoring
             verification_key = f"blockchain:verification:{content_hash}"
             await self.redis.set(
                 verification_key,
                 json.dumps({
                     "content_hash": content_hash,
-                    "transaction_id": transaction_id,
-                    "block_number": block_number,
-                    "timestamp": datetime.utcnow().isoformat(),
+                    "status": "pending",
+                    "queued_at": queued_at,
                     "network": self.network,
                     "contract_address": self.contract_address,
                     "metadata": metadata,
-                    "events": [str(e) for e in events],
+                    "user_id": user_id,
                 }),
-                expire=86400 * 365  # 1 year
+                expire=86400 * 7  # Replaced with the anchored record once submitted
             )
+            await self.verification_cache.delete(f"verification:{content_hash}")
+            
+            future = await self.anchoring_queue.enqueue(content_hash, metadata, user_id)
+            
+            def _on_anchor_done(done: asyncio.Future) -> None:
+                if not done.cancelled() and done.exception() is not None:
+                    self._spawn_background(
+                        self._mark_verification_failed(content_hash, user_id, str(done.exception()))
+                    )
             
-            # Return verification data
+            future.add_done_callback(_on_anchor_done)
+            
+            # Return immediately; clients are notified over WebSocket on confirmation
             return {
-                "transaction_id": transaction_id,
-                "block_number": block_number,
-                "timestamp": datetime.fromtimestamp(block.timestamp).isoformat(),
+                "content_hash": content_hash,
+                "transaction_id": None,
+                "block_number": None,
+                "timestamp": queued_at,
                 "network": self.network,
                 "contract_address": self.contract_address,
-                "status": "verified" if receipt.status == 1 else "failed",
+                "status": "pending",
             }
             
         except Exception as e:
             logger.error(f"Failed to verify content on blockchain: {e}")
             raise
     
-    @async_lru_cache(maxsize=500, ttl=3600)
     async def get_verification(self, content_hash: str) -> Optional[Dict[str, Any]]:
-        """Get verification data for a content hash with caching"""
+        """
+        Get verification data for a content hash with caching
+        
+        Uses the invalidatable verification cache only, since the record
+        changes as a pending verification is anchored and confirmed.
+        """
         try:
             # Check memory cache first
             cache_key = f"verification:{content_hash}"
@@ -429,156 +674,172 @@ class BlockchainService:
             logger.error(f"Failed to get verification data: {e}")
             return None
     
-    @async_lru_cache(maxsize=500, ttl=86400)  # Cache for 24 hours
+    async def _latest_block_number(self) -> int:
+        """Return the chain head, cached briefly to avoid an RPC call per read"""
+        now = time.monotonic()
+        if self._latest_block is None or now - self._latest_block[1] > self.head_cache_seconds:
+            w3 = await self._get_web3()
+            number = await asyncio.get_running_loop().run_in_executor(None, lambda: w3.eth.block_number)
+            self._latest_block = (number, now)
+        return self._latest_block[0]
+    
+    async def _is_finalized(self, block_number: Optional[int]) -> bool:
+        """Whether a block is deep enough that its contents will not change"""
+        if block_number is None:
+            return False
+        latest = await self._latest_block_number()
+        return latest - block_number + 1 >= self.finality_depth
+    
     @circuit_breaker(failure_threshold=5, reset_timeout=300)
     async def get_transaction(self, transaction_id: str) -> Optional[Dict[str, Any]]:
-        """Get transaction details with caching"""
+        """
+        Get transaction details with caching
+        
+        Reads go through the local cache, then the shared Redis tier, then the
+        RPC node. Finalized transactions are cached without expiry.
+        """
         try:
-            # Check memory cache first
-            cache_key = f"transaction:{transaction_id}"
-            cached_data = await self.transaction_cache.get(cache_key)
-            if cached_data:
-                logger.debug(f"Cache hit for transaction: {transaction_id}")
-                return cached_data
-            
-            # Initialize Web3 and query blockchain
-            if not WEB3_AVAILABLE:
-                raise ImportError("Web3 library is not available. Please install with: pip install web3")
-            
-            # Initialize Web3 connection
-            w3 = Web3(Web3.HTTPProvider(settings.POLYGON_RPC_URL))
-            
-            # Apply middleware for Polygon (PoS chain)
-            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-            
-            # Check if connected
-            if not w3.is_connected():
-                raise ConnectionError(f"Failed to connect to blockchain node at {settings.POLYGON_RPC_URL}")
-            
-            # Query transaction
             tx_hash = transaction_id
             if not tx_hash.startswith('0x'):
                 tx_hash = f"0x{tx_hash}"
-                
-            # Get transaction
-            transaction = w3.eth.get_transaction(tx_hash)
             
-            if not transaction:
-                logger.debug(f"Transaction not found on blockchain: {transaction_id}")
-                return None
-                
-            # Get transaction receipt for additional data
-            receipt = w3.eth.get_transaction_receipt(tx_hash)
-            
-            # Format transaction data
-            transaction_data = {
-                "hash": transaction_id,
-                "from": transaction['from'],
-                "to": transaction['to'],
-                "value": str(transaction['value']),
-                "gasPrice": str(transaction['gasPrice']),
-                "gas": str(transaction['gas']),
-                "nonce": transaction['nonce'],
-                "input": transaction['input'],
-                "blockHash": transaction['blockHash'].hex(),
-                "blockNumber": transaction['blockNumber'],
-                "transactionIndex": transaction['transactionIndex'],
-            }
-            
-            # Add receipt data if available
-            if receipt:
-                transaction_data.update({
-                    "status": receipt['status'],
-                    "gasUsed": str(receipt['gasUsed']),
-                    "effectiveGasPrice": str(receipt.get('effectiveGasPrice', 0)),
-                    "cumulativeGasUsed": str(receipt['cumulativeGasUsed']),
-                    "logs": [log.hex() if isinstance(log, bytes) else str(log) for log in receipt.get('logs', [])],
-                })
-            
-            # Get block for timestamp
-            try:
-                block = w3.eth.get_block(transaction['blockNumber'])
-                transaction_data["timestamp"] = datetime.fromtimestamp(block['timestamp']).isoformat()
-            except Exception as e:
-                logger.warning(f"Could not get block timestamp for transaction {transaction_id}: {e}")
-                transaction_data["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Store in memory cache
-            await self.transaction_cache.set(cache_key, transaction_data)
-            
-            # Return formatted transaction data
-            return transaction_data
+            return await self.transaction_store.get_or_load(
+                tx_hash.lower(),
+                lambda: self._load_transaction(transaction_id, tx_hash)
+            )
             
         except Exception as e:
             logger.error(f"Failed to get transaction {transaction_id}: {e}")
             return None
     
-    @async_lru_cache(maxsize=200, ttl=604800)  # Cache for 1 week
+    async def _load_transaction(self, transaction_id: str, tx_hash: str):
+        """Fetch a transaction from the RPC node"""
+        # Initialize Web3 and query blockchain
+        if not WEB3_AVAILABLE:
+            raise ImportError("Web3 library is not available. Please install with: pip install web3")
+        
+        # Reuse the shared Web3 connection
+        w3 = await self._get_web3()
+        loop = asyncio.get_running_loop()
+        
+        # Get transaction
+        try:
+            transaction = await loop.run_in_executor(None, w3.eth.get_transaction, tx_hash)
+        except TransactionNotFound:
+            transaction = None
+        
+        if not transaction:
+            logger.debug(f"Transaction not found on blockchain: {transaction_id}")
+            return None
+        
+        # Get transaction receipt for additional data
+        try:
+            receipt = await loop.run_in_executor(None, w3.eth.get_transaction_receipt, tx_hash)
+        except TransactionNotFound:
+            receipt = None
+        
+        # Format transaction data
+        transaction_data = {
+            "hash": transaction_id,
+            "from": transaction['from'],
+            "to": transaction['to'],
+            "value": str(transaction['value']),
+            "gasPrice": str(transaction['gasPrice']),
+            "gas": str(transaction['gas']),
+            "nonce": transaction['nonce'],
+            "input": transaction['input'],
+            "blockHash": transaction['blockHash'].hex() if transaction['blockHash'] else None,
+            "blockNumber": transaction['blockNumber'],
+            "transactionIndex": transaction['transactionIndex'],
+        }
+        
+        # Add receipt data if available
+        if receipt:
+            transaction_data.update({
+                "status": receipt['status'],
+                "gasUsed": str(receipt['gasUsed']),
+                "effectiveGasPrice": str(receipt.get('effectiveGasPrice', 0)),
+                "cumulativeGasUsed": str(receipt['cumulativeGasUsed']),
+                "logs": [log.hex() if isinstance(log, bytes) else str(log) for log in receipt.get('logs', [])],
+            })
+        
+        # Get block for timestamp (served from the block cache when possible)
+        block_data = None
+        if transaction['blockNumber'] is not None:
+            block_data = await self.get_block(transaction['blockNumber'])
+        if block_data:
+            transaction_data["timestamp"] = block_data["timestamp"]
+        else:
+            logger.warning(f"Could not get block timestamp for transaction {transaction_id}")
+            transaction_data["timestamp"] = datetime.utcnow().isoformat()
+        
+        finalized = receipt is not None and await self._is_finalized(transaction['blockNumber'])
+        return transaction_data, finalized
+    
     @circuit_breaker(failure_threshold=5, reset_timeout=300)
     async def get_block(self, block_number: int) -> Optional[Dict[str, Any]]:
-        """Get block details with caching"""
+        """
+        Get block details with caching
+        
+        Finalized blocks are cached without expiry in the shared tier; recent
+        blocks that may still be reorganized use a short TTL.
+        """
         try:
-            # Check memory cache first
-            cache_key = f"block:{block_number}"
-            cached_data = await self.block_cache.get(cache_key)
-            if cached_data:
-                logger.debug(f"Cache hit for block: {block_number}")
-                return cached_data
-            
-            # Initialize Web3 and query blockchain
-            if not WEB3_AVAILABLE:
-                raise ImportError("Web3 library is not available. Please install with: pip install web3")
-            
-            # Initialize Web3 connection
-            w3 = Web3(Web3.HTTPProvider(settings.POLYGON_RPC_URL))
-            
-            # Apply middleware for Polygon (PoS chain)
-            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-            
-            # Check if connected
-            if not w3.is_connected():
-                raise ConnectionError(f"Failed to connect to blockchain node at {settings.POLYGON_RPC_URL}")
-            
-            # Get block
-            block = w3.eth.get_block(block_number, full_transactions=False)
-            
-            if not block:
-                logger.debug(f"Block not found: {block_number}")
-                return None
-            
-            # Format block data
-            block_data = {
-                "number": block['number'],
-                "hash": block['hash'].hex(),
-                "parentHash": block['parentHash'].hex(),
-                "nonce": block['nonce'].hex() if hasattr(block['nonce'], 'hex') else str(block['nonce']),
-                "sha3Uncles": block['sha3Uncles'].hex(),
-                "logsBloom": block['logsBloom'].hex(),
-                "transactionsRoot": block['transactionsRoot'].hex(),
-                "stateRoot": block['stateRoot'].hex(),
-                "receiptsRoot": block['receiptsRoot'].hex(),
-                "miner": block['miner'],
-                "difficulty": str(block['difficulty']),
-                "totalDifficulty": str(block['totalDifficulty']),
-                "extraData": block['extraData'].hex(),
-                "size": block['size'],
-                "gasLimit": block['gasLimit'],
-                "gasUsed": block['gasUsed'],
-                "timestamp": datetime.fromtimestamp(block['timestamp']).isoformat(),
-                "transactions": [tx.hex() if isinstance(tx, bytes) else tx for tx in block['transactions']],
-                "uncles": [uncle.hex() if isinstance(uncle, bytes) else uncle for uncle in block['uncles']],
-            }
-            
-            # Store in memory cache (blocks are immutable, so longer TTL)
-            await self.block_cache.set(cache_key, block_data, ttl=604800)  # 1 week
-            
-            # Return formatted block data
-            return block_data
+            return await self.block_store.get_or_load(
+                str(block_number),
+                lambda: self._load_block(block_number)
+            )
             
         except Exception as e:
             logger.error(f"Failed to get block {block_number}: {e}")
             return None
     
+    async def _load_block(self, block_number: int):
+        """Fetch a block from the RPC node"""
+        # Initialize Web3 and query blockchain
+        if not WEB3_AVAILABLE:
+            raise ImportError("Web3 library is not available. Please install with: pip install web3")
+        
+        # Reuse the shared Web3 connection
+        w3 = await self._get_web3()
+        
+        # Get block
+        try:
+            block = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(w3.eth.get_block, block_number, full_transactions=False)
+            )
+        except BlockNotFound:
+            block = None
+        
+        if not block:
+            logger.debug(f"Block not found: {block_number}")
+            return None
+        
+        # Format block data
+        block_data = {
+            "number": block['number'],
+            "hash": block['hash'].hex(),
+            "parentHash": block['parentHash'].hex(),
+            "nonce": block['nonce'].hex() if hasattr(block['nonce'], 'hex') else str(block['nonce']),
+            "sha3Uncles": block['sha3Uncles'].hex(),
+            "logsBloom": block['logsBloom'].hex(),
+            "transactionsRoot": block['transactionsRoot'].hex(),
+            "stateRoot": block['stateRoot'].hex(),
+            "receiptsRoot": block['receiptsRoot'].hex(),
+            "miner": block['miner'],
+            "difficulty": str(block['difficulty']),
+            "totalDifficulty": str(block['totalDifficulty']),
+            "extraData": block['extraData'].hex(),
+            "size": block['size'],
+            "gasLimit": block['gasLimit'],
+            "gasUsed": block['gasUsed'],
+            "timestamp": datetime.fromtimestamp(block['timestamp']).isoformat(),
+            "transactions": [tx.hex() if isinstance(tx, bytes) else tx for tx in block['transactions']],
+            "uncles": [uncle.hex() if isinstance(uncle, bytes) else uncle for uncle in block['uncles']],
+        }
+        
+        return block_data, await self._is_finalized(block_number)
+    
     @circuit_breaker(failure_threshold=5, reset_timeout=300)
     @retry_with_backoff(max_retries=3, base_delay=1, max_delay=10)
     async def create_token(
@@ -587,20 +848,18 @@ class BlockchainService:
         metadata: Dict[str, Any],
         user_id: str
     ) -> Dict[str, Any]:
-        """Create a token for a recipient using the certificate contract"""
+        """
+        Create a token for a recipient using the certificate contract
+        
+        Returns as soon as the transaction is sent, with status "pending".
+        The token record is marked active once the transaction is confirmed.
+        """
         try:
             if not WEB3_AVAILABLE:
                 raise ImportError("Web3 library is not available. Please install with: pip install web3")
             
-            # Initialize Web3 connection
-            w3 = Web3(Web3.HTTPProvider(settings.POLYGON_RPC_URL))
-            
-            # Apply middleware for Polygon (PoS chain)
-            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-            
-            # Check if connected
-            if not w3.is_connected():
-                raise ConnectionError(f"Failed to connect to blockchain node at {settings.POLYGON_RPC_URL}")
+            # Reuse the shared Web3 connection
+            w3 = await self._get_web3()
             
             # Get account from private key
             account = w3.eth.account.from_key(settings.BLOCKCHAIN_PRIVATE_KEY)
@@ -638,59 +897,48 @@ class BlockchainService:
                 private_key=settings.BLOCKCHAIN_PRIVATE_KEY
             ).signature.hex()
             
-            # Prepare transaction parameters
-            nonce = w3.eth.get_transaction_count(account.address)
-            
-            # Get gas price with 10% buffer
-            gas_price = w3.eth.gas_price
-            gas_price_with_buffer = int(gas_price * 1.1)
+            loop = asyncio.get_running_loop()
+            nonce_manager = self._get_nonce_manager(w3, account.address)
             
             # Determine certificate type from metadata
             certificate_type = metadata.get('certificate_type', 0)  # Default to type 0
             
-            # Prepare transaction for certificate issuance
-            tx = contract.functions.issueCertificate(
-                certificate_type,
-                account.address,  # Issuer is our service account
-                recipient,
-                now,  # Issuance timestamp
-                expiry,  # Expiry timestamp
-                metadata_hash,  # Metadata URI/hash
-                signature  # Cryptographic signature
-            ).build_transaction({
-                'from': account.address,
-                'gas': 300000,  # Gas limit
-                'gasPrice': gas_price_with_buffer,
-                'nonce': nonce,
-            })
-            
-            # Sign the transaction
-            signed_tx = account.sign_transaction(tx)
-            
-            # Send the transaction
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            
-            # Wait for transaction receipt
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-            
-            if receipt.status != 1:
-                raise Exception(f"Transaction failed with status {receipt.status}")
-            
-            # Get certificate ID from event logs
-            certificate_id = None
-            if receipt.logs:
-                # Parse logs for CertificateIssued event
-                try:
-                    certificate_events = contract.events.CertificateIssued().process_receipt(receipt)
-                    if certificate_events:
-                        certificate_id = certificate_events[0]['args']['certificateId']
-                except Exception as e:
-                    logger.warning(f"Error extracting certificate ID from events: {e}")
+            try:
+                nonce = await nonce_manager.next()
+                
+                # Get gas price with 10% buffer
+                gas_price = await loop.run_in_executor(None, lambda: w3.eth.gas_price)
+                gas_price_with_buffer = int(gas_price * 1.1)
+                
+                # Prepare transaction for certificate issuance
+                tx = contract.functions.issueCertificate(
+                    certificate_type,
+                    account.address,  # Issuer is our service account
+                    recipient,
+                    now,  # Issuance timestamp
+                    expiry,  # Expiry timestamp
+                    metadata_hash,  # Metadata URI/hash
+                    signature  # Cryptographic signature
+                ).build_transaction({
+                    'from': account.address,
+                    'gas': 300000,  # Gas limit
+                    'gasPrice': gas_price_with_buffer,
+                    'nonce': nonce,
+                })
+                
+                # Sign and send the transaction without waiting for the receipt
+                signed_tx = account.sign_transaction(tx)
+                tx_hash = await loop.run_in_executor(
+                    None, w3.eth.send_raw_transaction, signed_tx.rawTransaction
+                )
+            except Exception:
+                # Nonce may be out of sync with the chain; re-read it next time
+                await nonce_manager.reset()
+                raise
             
-            # If we couldn't get certificate ID from events, generate a deterministic one
-            if not certificate_id:
-                certificate_id = f"cert-{hashlib.sha256(f'{recipient}:{now}:{tx_hash.hex()}'.encode()).hexdigest()[:16]}"
-                logger.warning(f"Could not extract certificate ID from events, using deterministic ID: {certificate_id}")
+            # Deterministic ID available before mining; the on-chain certificate ID
+            # is attached as chain_certificate_id once the receipt is processed
+            certificate_id = f"cert-{hashlib.sha256(f'{recipient}:{now}:{tx_hash.hex()}'.encode()).hexdigest()[:16]}"
             
             # Format token data
             token_data = {
@@ -705,33 +953,31 @@ class BlockchainService:
                 "transaction_id": tx_hash.hex(),
                 "network": self.network,
                 "contract_address": settings.CERTIFICATE_CONTRACT_ADDRESS,
-                "block_number": receipt.blockNumber,
-                "status": "active",
+                "block_number": None,
+                "status": "pending",
                 "signature": signature,
             }
             
-            # Store token data in Redis for quick lookups
-            token_key = f"blockchain:token:{certificate_id}"
+            # Store token data in both cache tiers for quick lookups
+            await self.token_store.set(certificate_id, token_data, ttl=86400 * 365 * 2)  # 2 years
+            
+            # Map the issuing transaction to the token so CertificateIssued
+            # events can be attributed when syncing the recipient index
             await self.redis.set(
-                token_key,
-                json.dumps(token_data),
+                f"blockchain:token_tx:{tx_hash.hex()}",
+                certificate_id,
                 expire=86400 * 365 * 2  # 2 years
             )
             
             # Index by recipient for quick lookups
-            recipient_key = f"blockchain:recipient:{recipient}"
-            existing_tokens = await self.redis.get(recipient_key)
-            if existing_tokens:
-                token_ids = json.loads(existing_tokens)
-                if certificate_id not in token_ids:
-                    token_ids.append(certificate_id)
-            else:
-                token_ids = [certificate_id]
-                
-            await self.redis.set(
-                recipient_key,
-                json.dumps(token_ids),
-                expire=86400 * 365 * 2  # 2 years
+            await self._add_to_recipient_index(recipient, certificate_id)
+            
+            # Confirmation is resolved in the background and pushed over WebSocket
+            await self.confirmation_watcher.track(
+                tx_hash,
+                kind="token",
+                subject=certificate_id,
+                notify=user_id
             )
             
             # Return token data
@@ -743,136 +989,162 @@ class BlockchainService:
     
     @circuit_breaker(failure_threshold=5, reset_timeout=300)
     async def get_token(self, token_id: str) -> Optional[Dict[str, Any]]:
-        """Get token details with blockchain fallback"""
+        """
+        Get token details with blockchain fallback
+        
+        The shared tier is the token record in Redis; the local tier keeps
+        hot tokens in process, and unknown IDs are negatively cached.
+        """
         try:
-            # Try to get from Redis cache first
-            token_key = f"blockchain:token:{token_id}"
-            token_data = await self.redis.get(token_key)
-            
-            if token_data:
-                return json.loads(token_data)
-            
-            # If not in cache, try to retrieve from the blockchain
-            if WEB3_AVAILABLE and settings.BLOCKCHAIN_ENABLED:
-                # Initialize Web3 connection
-                w3 = Web3(Web3.HTTPProvider(settings.POLYGON_RPC_URL))
-                
-                # Apply middleware for Polygon (PoS chain)
-                w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-                
-                # Check if connected
-                if not w3.is_connected():
-                    logger.error(f"Failed to connect to blockchain node at {settings.POLYGON_RPC_URL}")
-                    return None
-                
-                # Initialize the certificate contract
-                contract = w3.eth.contract(
-                    address=settings.CERTIFICATE_CONTRACT_ADDRESS, 
-                    abi=settings.CERTIFICATE_CONTRACT_ABI
-                )
-                
-                try:
-                    # Get certificate from blockchain
-                    cert_data = contract.functions.getCertificate(token_id).call()
-                    
-                    # Extract the recipient from the certificate
-                    recipient = cert_data[2]  # subject field
-                    
-                    # Format the certificate data
-                    token = {
-                        "id": token_id,
-                        "recipient": recipient,
-                        "issuer": cert_data[1],  # issuer address
-                        "metadata": {"certificate_type": cert_data[0]},  # certificateType
-                        "created_at": datetime.fromtimestamp(cert_data[3]).isoformat(),  # issuedAt
-                        "expires_at": datetime.fromtimestamp(cert_data[4]).isoformat(),  # expiresAt
-                        "status": self._get_status_string(cert_data[5]),  # status
-                        "metadataHash": cert_data[6],  # metadataURI
-                        "signature": cert_data[7],  # signature
-                        "network": self.network,
-                        "contract_address": settings.CERTIFICATE_CONTRACT_ADDRESS,
-                    }
-                    
-                    # Try to get full metadata from our storage
-                    try:
-                        metadata_key = f"blockchain:metadata:{cert_data[6]}"
-                        metadata_str = await self.redis.get(metadata_key)
-                        if metadata_str:
-                            token["metadata"] = json.loads(metadata_str)
-                    except Exception as e:
-                        logger.warning(f"Failed to get metadata for certificate {token_id}: {e}")
-                    
-                    # Cache the token data for future requests
-                    await self.redis.set(
-                        token_key,
-                        json.dumps(token),
-                        expire=86400 * 7  # 1 week
-                    )
-                    
-                    # Update recipient index
-                    recipient_key = f"blockchain:recipient:{recipient}"
-                    existing_tokens = await self.redis.get(recipient_key)
-                    if existing_tokens:
-                        token_ids = json.loads(existing_tokens)
-                        if token_id not in token_ids:
-                            token_ids.append(token_id)
-                            await self.redis.set(
-                                recipient_key,
-                                json.dumps(token_ids),
-                                expire=86400 * 7  # 1 week
-                            )
-                    else:
-                        await self.redis.set(
-                            recipient_key,
-                            json.dumps([token_id]),
-                            expire=86400 * 7  # 1 week
-                        )
-                    
-                    return token
-                except Exception as e:
-                    logger.error(f"Error getting certificate {token_id} from blockchain: {e}")
+            return await self.token_store.get_or_load(token_id, lambda: self._load_token(token_id))
             
+        except Exception as e:
+            logger.error(f"Failed to get token: {e}")
+            return None
+    
+    def _format_certificate(self, token_id: str, cert_data: Any) -> Dict[str, Any]:
+        """Convert a getCertificate result to token data"""
+        return {
+            "id": token_id,
+            "recipient": cert_data[2],  # subject field
+            "issuer": cert_data[1],  # issuer address
+            "metadata": {"certificate_type": cert_data[0]},  # certificateType
+            "created_at": datetime.fromtimestamp(cert_data[3]).isoformat(),  # issuedAt
+            "expires_at": datetime.fromtimestamp(cert_data[4]).isoformat(),  # expiresAt
+            "status": self._get_status_string(cert_data[5]),  # status
+            "metadataHash": cert_data[6],  # metadataURI
+            "signature": cert_data[7],  # signature
+            "network": self.network,
+            "contract_address": settings.CERTIFICATE_CONTRACT_ADDRESS,
+        }
+    
+    async def _load_token(self, token_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a certificate from the blockchain"""
+        if not (WEB3_AVAILABLE and settings.BLOCKCHAIN_ENABLED):
             logger.debug(f"Token not found: {token_id}")
             return None
-            
+        
+        # Reuse the shared Web3 connection
+        w3 = await self._get_web3()
+        
+        # Initialize the certificate contract
+        contract = w3.eth.contract(
+            address=settings.CERTIFICATE_CONTRACT_ADDRESS, 
+            abi=settings.CERTIFICATE_CONTRACT_ABI
+        )
+        
+        try:
+            # Get certificate from blockchain
+            cert_data = await asyncio.get_running_loop().run_in_executor(
+                None, contract.functions.getCertificate(token_id).call
+            )
         except Exception as e:
-            logger.error(f"Failed to get token: {e}")
+            logger.error(f"Error getting certificate {token_id} from blockchain: {e}")
             return None
+        
+        token = self._format_certificate(token_id, cert_data)
+        
+        # Try to get full metadata from our storage
+        try:
+            metadata_key = f"blockchain:metadata:{cert_data[6]}"
+            metadata_str = await self.redis.get(metadata_key)
+            if metadata_str:
+                token["metadata"] = json.loads(metadata_str)
+        except Exception as e:
+            logger.warning(f"Failed to get metadata for certificate {token_id}: {e}")
+        
+        await self._add_to_recipient_index(token["recipient"], token_id)
+        return token
+    
+    async def _add_to_recipient_index(self, recipient: str, token_id: str, ttl: int = 86400 * 365 * 2) -> None:
+        """Add a token to the recipient index set"""
+        recipient_key = f"{RECIPIENT_INDEX_PREFIX}{recipient}"
+        await self.redis.sadd(recipient_key, token_id)
+        await self.redis.expire(recipient_key, ttl)
+    
+    async def _sync_recipient_index(self) -> None:
+        """
+        Apply CertificateIssued events emitted since the last sync
+        
+        Certificates issued by this service are added to the recipient index
+        directly. Certificates issued elsewhere only carry a hashed ID in the
+        event, so their recipient's index entry is dropped and rebuilt from
+        the contract on the next lookup.
+        """
+        if not (WEB3_AVAILABLE and settings.BLOCKCHAIN_ENABLED):
+            return
+        
+        now = time.monotonic()
+        if now - self._last_index_sync < self.index_sync_interval:
+            return
+        
+        async with self._index_sync_lock:
+            if now - self._last_index_sync < self.index_sync_interval:
+                return
+            self._last_index_sync = now
+            
+            w3 = await self._get_web3()
+            loop = asyncio.get_running_loop()
+            head = await self._latest_block_number() - self.finality_depth + 1
+            
+            last_synced = await self.redis.get(RECIPIENT_INDEX_CURSOR_KEY)
+            if last_synced is None:
+                # Start following events from the current head; older
+                # recipients are indexed lazily from the contract
+                await self.redis.set(RECIPIENT_INDEX_CURSOR_KEY, str(head))
+                return
+            
+            contract = w3.eth.contract(
+                address=settings.CERTIFICATE_CONTRACT_ADDRESS, 
+                abi=settings.CERTIFICATE_CONTRACT_ABI
+            )
+            
+            from_block = int(last_synced) + 1
+            while from_block <= head:
+                to_block = min(from_block + self.index_sync_chunk - 1, head)
+                events = await loop.run_in_executor(
+                    None,
+                    functools.partial(
+                        contract.events.CertificateIssued.get_logs,
+                        fromBlock=from_block,
+                        toBlock=to_block
+                    )
+                )
+                for event in events:
+                    subject = event['args']['subject']
+                    tx_hash = event['transactionHash'].hex()
+                    token_id = await self.redis.get(f"blockchain:token_tx:{tx_hash}")
+                    if token_id:
+                        await self._add_to_recipient_index(subject, token_id)
+                    else:
+                        await self.redis.delete(f"{RECIPIENT_INDEX_PREFIX}{subject}")
+                
+                await self.redis.set(RECIPIENT_INDEX_CURSOR_KEY, str(to_block))
+                from_block = to_block + 1
     
     @circuit_breaker(failure_threshold=5, reset_timeout=300)
     async def get_tokens_for_recipient(self, recipient: str) -> List[Dict[str, Any]]:
         """Get all tokens for a recipient"""
         try:
+            try:
+                await self._sync_recipient_index()
+            except Exception as e:
+                logger.warning(f"Failed to sync recipient index from events: {e}")
+            
             # Check the recipient index first (much more efficient than scanning all tokens)
-            recipient_key = f"blockchain:recipient:{recipient}"
-            cached_token_ids = await self.redis.get(recipient_key)
+            recipient_key = f"{RECIPIENT_INDEX_PREFIX}{recipient}"
+            cached_token_ids = await self.redis.smembers(recipient_key)
             
             if cached_token_ids:
-                # We have a cached list of token IDs for this recipient
-                token_ids = json.loads(cached_token_ids)
-                tokens = []
-                
-                # Get each token by ID
-                for token_id in token_ids:
-                    token_key = f"blockchain:token:{token_id}"
-                    token_data = await self.redis.get(token_key)
-                    if token_data:
-                        tokens.append(json.loads(token_data))
-                
-                return tokens
+                # We have a cached set of token IDs for this recipient
+                token_ids = [token_id for token_id in cached_token_ids if token_id != RECIPIENT_INDEX_SENTINEL]
+                tokens = await asyncio.gather(*[self.get_token(token_id) for token_id in token_ids])
+                return [token for token in tokens if token]
             
             # If we don't have a cached list, query the blockchain directly
             if WEB3_AVAILABLE and settings.BLOCKCHAIN_ENABLED:
-                # Initialize Web3 connection
-                w3 = Web3(Web3.HTTPProvider(settings.POLYGON_RPC_URL))
-                
-                # Apply middleware for Polygon (PoS chain)
-                w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-                
-                # Check if connected
-                if not w3.is_connected():
-                    logger.error(f"Failed to connect to blockchain node at {settings.POLYGON_RPC_URL}")
-                    return []
+                # Reuse the shared Web3 connection
+                w3 = await self._get_web3()
                 
                 # Initialize the certificate contract
                 contract = w3.eth.contract(
@@ -882,95 +1154,32 @@ class BlockchainService:
                 
                 try:
                     # Get certificates by subject (recipient) from the contract
-                    certificate_ids = contract.functions.getCertificatesBySubject(recipient).call()
-                    
-                    if not certificate_ids:
-                        return []
+                    certificate_ids = await asyncio.get_running_loop().run_in_executor(
+                        None, contract.functions.getCertificatesBySubject(recipient).call
+                    )
                     
-                    # Store the certificate IDs in Redis for future lookups
-                    await self.redis.set(
+                    # Store the certificate IDs in Redis for future lookups; the
+                    # sentinel keeps an empty result cached until the event sync
+                    # invalidates it
+                    await self.redis.sadd(
                         recipient_key,
-                        json.dumps(certificate_ids),
-                        expire=86400 * 7  # 1 week
+                        RECIPIENT_INDEX_SENTINEL,
+                        *(certificate_ids or [])
                     )
+                    await self.redis.expire(recipient_key, 86400 * 7)  # 1 week
                     
-                    # Get each certificate's details
-                    tokens = []
-                    for cert_id in certificate_ids:
-                        try:
-                            # Try to get from cache first
-                            token_key = f"blockchain:token:{cert_id}"
-                            cached_token = await self.redis.get(token_key)
-                            
-                            if cached_token:
-                                tokens.append(json.loads(cached_token))
-                                continue
-                            
-                            # Get from blockchain if not cached
-                            cert_data = contract.functions.getCertificate(cert_id).call()
-                            
-                            # Format certificate data
-                            token = {
-                                "id": cert_id,
-                                "recipient": recipient,
-                                "issuer": cert_data[1],  # issuer address
-                                "metadata": {"certificate_type": cert_data[0]},  # certificateType
-                                "created_at": datetime.fromtimestamp(cert_data[3]).isoformat(),  # issuedAt
-                                "expires_at": datetime.fromtimestamp(cert_data[4]).isoformat(),  # expiresAt
-                                "status": self._get_status_string(cert_data[5]),  # status
-                                "metadataHash": cert_data[6],  # metadataURI
-                                "signature": cert_data[7],  # signature
-                                "network": self.network,
-                                "contract_address": settings.CERTIFICATE_CONTRACT_ADDRESS,
-                            }
-                            
-                            # Try to get the full metadata from our storage
-                            try:
-                                metadata_key = f"blockchain:metadata:{cert_data[6]}"
-                                metadata_str = await self.redis.get(metadata_key)
-                                if metadata_str:
-                                    token["metadata"] = json.loads(metadata_str)
-                            except Exception as e:
-                                logger.warning(f"Failed to get metadata for certificate {cert_id}: {e}")
-                            
-                            tokens.append(token)
-                            
-                            # Cache the token data
-                            await self.redis.set(
-                                token_key,
-                                json.dumps(token),
-                                expire=86400 * 7  # 1 week
-                            )
-                        except Exception as e:
-                            logger.error(f"Error getting certificate {cert_id}: {e}")
+                    if not certificate_ids:
+                        return []
                     
-                    return tokens
+                    # Get each certificate's details through the token cache
+                    tokens = await asyncio.gather(*[self.get_token(cert_id) for cert_id in certificate_ids])
+                    return [token for token in tokens if token]
                     
                 except Exception as e:
                     logger.error(f"Error querying certificates for recipient {recipient}: {e}")
             
-            # Fallback to scanning Redis (less efficient, but works as backup)
-            logger.warning(f"Falling back to Redis scan for recipient {recipient}")
-            token_keys = await self.redis.keys("blockchain:token:*")
-            tokens = []
-            
-            for key in token_keys:
-                token_data = await self.redis.get(key)
-                if token_data:
-                    token = json.loads(token_data)
-                    if token.get("recipient") == recipient:
-                        tokens.append(token)
-            
-            # If we found tokens this way, cache the IDs for future lookups
-            if tokens:
-                token_ids = [token["id"] for token in tokens]
-                await self.redis.set(
-                    recipient_key,
-                    json.dumps(token_ids),
-                    expire=86400 * 7  # 1 week
-                )
-            
-            return tokens
+            # Without the contract, tokens issued here are already in the index
+            return []
             
         except Exception as e:
             logger.error(f"Failed to get tokens for recipient: {e}")
@@ -1037,20 +1246,8 @@ class BlockchainService:
             
             # If no verification data, try to verify directly on blockchain
             if not verification_data and WEB3_AVAILABLE and settings.BLOCKCHAIN_ENABLED:
-                # Initialize Web3 connection
-                w3 = Web3(Web3.HTTPProvider(settings.POLYGON_RPC_URL))
-                
-                # Apply middleware for Polygon (PoS chain)
-                w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-                
-                # Check if connected
-                if not w3.is_connected():
-                    logger.error(f"Failed to connect to blockchain node at {settings.POLYGON_RPC_URL}")
-                    return {
-                        "verified": False,
-                        "message": "Failed to connect to blockchain node",
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
+                # Reuse the shared Web3 connection
+                w3 = await self._get_web3()
                 
                 # Initialize the certificate contract
                 contract = w3.eth.contract(
@@ -1105,18 +1302,64 @@ class BlockchainService:
                 except Exception as e:
                     logger.error(f"Error verifying certificate on blockchain: {e}")
             
+            # Batched anchors carry a Merkle proof that must link the hash to the anchored root
+            if verification_data and "merkle_proof" in verification_data:
+                if not self.verify_inclusion(content_hash, verification_data):
+                    result = {
+                        "verified": False,
+                        "message": "Content hash is not included in the anchored batch",
+                        "certificate": certificate_data,
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                    
+                    # Cache negative results for a shorter period
+                    await self.certificate_cache.set(cache_key, result, ttl=1800)  # 30 minutes
+                    return result
+            
             # If we have verification data, check if certificate ID matches
             if verification_data and verification_data.get("metadata", {}).get("certificate_id") == certificate_id:
+                anchor_status = verification_data.get("status")
+                
+                # Only an anchor confirmed on chain verifies the certificate
+                if anchor_status == "verified":
+                    result = {
+                        "verified": True,
+                        "status": anchor_status,
+                        "message": "Certificate verified successfully",
+                        "certificate": certificate_data,
+                        "verification_data": verification_data,
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                    
+                    # Cache positive results for longer
+                    await self.certificate_cache.set(cache_key, result, ttl=7200)  # 2 hours
+                    return result
+                
+                if anchor_status == "pending":
+                    result = {
+                        "verified": False,
+                        "status": anchor_status,
+                        "message": "Content hash is not yet confirmed on the blockchain",
+                        "certificate": certificate_data,
+                        "verification_data": verification_data,
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                    
+                    # Anchoring completes within minutes, so re-check soon
+                    await self.certificate_cache.set(cache_key, result, ttl=60)  # 1 minute
+                    return result
+                
                 result = {
-                    "verified": True,
-                    "message": "Certificate verified successfully",
+                    "verified": False,
+                    "status": anchor_status,
+                    "message": "Content hash anchoring failed",
                     "certificate": certificate_data,
                     "verification_data": verification_data,
                     "timestamp": datetime.utcnow().isoformat()
                 }
                 
-                # Cache positive results for longer
-                await self.certificate_cache.set(cache_key, result, ttl=7200)  # 2 hours
+                # Cache negative results for a shorter period
+                await self.certificate_cache.set(cache_key, result, ttl=1800)  # 30 minutes
                 return result
             
             # If nothing matches, return failure
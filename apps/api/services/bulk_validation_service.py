@@ -0,0 +1,365 @@
+"""
+Bulk Contact Validation Service
+
+Validates large contact lists by grouping addresses by domain so that
+domain-level checks (DNS/MX lookup, reputation, disposable detection) run
+once per domain instead of once per address. Results are cached with a TTL
+and SMTP probes run under a per-domain concurrency limit so a single large
+domain cannot monopolise the probe pool. Results are yielded as they arrive
+so callers can stream progress back to the client.
+"""
+
+import asyncio
+import logging
+import socket
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+
+# dnspython is optional; fall back to A-record resolution via getaddrinfo
+try:
+    import dns.asyncresolver
+    import dns.exception
+    DNS_AVAILABLE = True
+except ImportError:
+    DNS_AVAILABLE = False
+
+logger = logging.getLogger("api.services.bulk_validation")
+
+
+class DomainCache:
+    """
+    Bounded TTL cache for domain-level lookups.
+
+    Concurrent lookups for the same domain are coalesced so that only one
+    resolver call is in flight per key.
+    """
+
+    def __init__(self, max_size: int = 50000, ttl: int = 3600):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of domains to keep
+            ttl: Time-to-live in seconds for cached entries
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        self._entries[key] = (value, time.monotonic() + (ttl or self.ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, loading it once if missing
+
+        Args:
+            key: Cache key
+            loader: Coroutine factory used to compute the value on a miss
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await loader()
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BulkValidationService:
+    """Domain-grouped, concurrency-limited validation for contact lists."""
+
+    def __init__(
+        self,
+        contact_service: Any,
+        dns_ttl: int = 3600,
+        reputation_ttl: int = 3600,
+        per_domain_concurrency: int = 2,
+        max_concurrency: int = 100,
+        smtp_timeout: float = 10.0,
+        max_tracked_domains: int = 10000,
+    ):
+        """
+        Initialize the bulk validation service
+
+        Args:
+            contact_service: ContactService providing the per-signal checks
+            dns_ttl: Seconds to cache DNS/MX results per domain
+            reputation_ttl: Seconds to cache reputation results per domain
+            per_domain_concurrency: Maximum concurrent SMTP probes per domain
+            max_concurrency: Maximum concurrent validations and SMTP probes overall
+            smtp_timeout: Timeout in seconds for a single SMTP probe
+            max_tracked_domains: Maximum number of idle per-domain limiters to keep
+        """
+        self.contact_service = contact_service
+        self.dns_cache = DomainCache(ttl=dns_ttl)
+        self.reputation_cache = DomainCache(ttl=reputation_ttl)
+        self.per_domain_concurrency = per_domain_concurrency
+        self.max_concurrency = max_concurrency
+        self.smtp_timeout = smtp_timeout
+        self.max_tracked_domains = max_tracked_domains
+        self._global_semaphore = asyncio.Semaphore(max_concurrency)
+        # domain -> [semaphore, users]; least recently used first
+        self._domain_semaphores: "OrderedDict[str, list]" = OrderedDict()
+
+    @staticmethod
+    def _domain_of(email: str) -> str:
+        return email.rsplit("@", 1)[-1].lower() if email and "@" in email else ""
+
+    @asynccontextmanager
+    async def _domain_slot(self, domain: str):
+        """Hold one of the domain's probe slots for the duration of the block."""
+        entry = self._domain_semaphores.get(domain)
+        if entry is None:
+            entry = [asyncio.Semaphore(self.per_domain_concurrency), 0]
+            self._domain_semaphores[domain] = entry
+        self._domain_semaphores.move_to_end(domain)
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            self._evict_idle_domains()
+
+    def _evict_idle_domains(self) -> None:
+        # Only limiters nobody holds or waits on can be dropped safely
+        for domain in list(self._domain_semaphores):
+            if len(self._domain_semaphores) <= self.max_tracked_domains:
+                return
+            if self._domain_semaphores[domain][1] == 0:
+                del self._domain_semaphores[domain]
+
+    async def check_domain_dns(self, domain: str) -> Dict[str, Any]:
+        """
+        Check that a domain can receive mail, caching the result
+
+        Args:
+            domain: Domain to resolve
+
+        Returns:
+            Dictionary with has_mx, mx_hosts and reason
+        """
+        return await self.dns_cache.get_or_load(domain, lambda: self._resolve_domain(domain))
+
+    async def _resolve_domain(self, domain: str) -> Dict[str, Any]:
+        if not domain:
+            return {"has_mx": False, "mx_hosts": [], "reason": "Invalid email format"}
+
+        if DNS_AVAILABLE:
+            try:
+                answer = await dns.asyncresolver.resolve(domain, "MX")
+                hosts = sorted(
+                    (record.preference, str(record.exchange).rstrip(".")) for record in answer
+                )
+                return {
+                    "has_mx": True,
+                    "mx_hosts": [host for _, host in hosts],
+                    "reason": "MX records found",
+                }
+            except dns.exception.DNSException:
+                pass
+
+        # RFC 5321 implicit MX: fall back to the domain's address record
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.getaddrinfo(domain, 25, type=socket.SOCK_STREAM)
+            return {"has_mx": True, "mx_hosts": [domain], "reason": "Implicit MX via A record"}
+        except (socket.gaierror, OSError):
+            return {"has_mx": False, "mx_hosts": [], "reason": "Domain does not resolve"}
+
+    async def check_domain_reputation(self, domain: str) -> Dict[str, Any]:
+        """Return the cached reputation for a domain."""
+        return await self.reputation_cache.get_or_load(
+            domain, lambda: self.contact_service._check_domain_reputation(f"@{domain}")
+        )
+
+    async def _probe_smtp(self, email: str, domain: str) -> Dict[str, Any]:
+        async with self._global_semaphore, self._domain_slot(domain):
+            try:
+                return await asyncio.wait_for(
+                    self.contact_service._validate_email_smtp(email),
+                    timeout=self.smtp_timeout,
+                )
+            except asyncio.TimeoutError:
+                return {"valid": False, "score": 0.2, "reason": "SMTP probe timed out"}
+
+    async def _validate_one(self, email: str, domain: str) -> Dict[str, Any]:
+        syntax = await self.contact_service._validate_email_syntax(email)
+        if syntax["score"] == 0.0 or not domain:
+            return {
+                "email": email,
+                "valid": False,
+                "score": 0.0,
+                "syntax": syntax,
+                "reason": syntax["reason"],
+            }
+
+        dns_result, reputation = await asyncio.gather(
+            self.check_domain_dns(domain), self.check_domain_reputation(domain)
+        )
+        if not dns_result["has_mx"]:
+            smtp = {"valid": False, "score": 0.0, "reason": dns_result["reason"]}
+        else:
+            smtp = await self._probe_smtp(email, domain)
+
+        score = syntax["score"] * 0.3 + reputation["score"] * 0.3 + smtp["score"] * 0.4
+        return {
+            "email": email,
+            "valid": syntax["valid"] and smtp["valid"] and score > 0.6,
+            "score": round(score, 4),
+            "syntax": syntax,
+            "dns": dns_result,
+            "domain_reputation": reputation,
+            "smtp_validation": smtp,
+            "reason": smtp["reason"] if not smtp["valid"] else syntax["reason"],
+        }
+
+    async def stream(self, emails: Iterable[str]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Validate emails and yield results in completion order
+
+        Emails are grouped by domain and interleaved across domains so that
+        probes for different domains proceed in parallel while each domain
+        stays within its concurrency limit. A fixed pool of max_concurrency
+        workers processes the list, so memory stays bounded for large lists.
+
+        Args:
+            emails: Email addresses to validate
+
+        Yields:
+            Per-email validation result dictionaries; an email whose checks
+            raised gets a result with status "unknown" and the error as reason
+        """
+        by_domain: Dict[str, List[str]] = defaultdict(list)
+        seen = set()
+        for email in emails:
+            normalized = (email or "").strip()
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+            by_domain[self._domain_of(normalized)].append(normalized)
+
+        # Round-robin across domains so early results cover many domains
+        ordered: List[tuple] = []
+        queues = [iter(addresses) for addresses in by_domain.values()]
+        domains = list(by_domain.keys())
+        while queues:
+            remaining_queues, remaining_domains = [], []
+            for domain, queue in zip(domains, queues):
+                email = next(queue, None)
+                if email is None:
+                    continue
+                ordered.append((email, domain))
+                remaining_queues.append(queue)
+                remaining_domains.append(domain)
+            queues, domains = remaining_queues, remaining_domains
+
+        pending = iter(ordered)
+        worker_count = max(1, min(self.max_concurrency, len(ordered)))
+        results: asyncio.Queue = asyncio.Queue(maxsize=worker_count)
+        done = object()
+
+        async def worker() -> None:
+            for email, domain in pending:
+                try:
+                    result = await self._validate_one(email, domain)
+                except Exception as e:
+                    # Every input yields one result; the failure is reported rather than dropped
+                    logger.error(f"Bulk validation task failed: {str(e)}")
+                    result = {
+                        "email": email,
+                        "valid": False,
+                        "status": "unknown",
+                        "score": 0.0,
+                        "reason": f"Validation failed: {str(e)}",
+                    }
+                await results.put(result)
+            await results.put(done)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(worker_count)]
+        try:
+            running = len(workers)
+            while running:
+                result = await results.get()
+                if result is done:
+                    running -= 1
+                else:
+                    yield result
+        finally:
+            for task in workers:
+                if not task.done():
+                    task.cancel()
+
+    async def validate(self, emails: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Validate emails and return results keyed by address
+
+        Args:
+            emails: Email addresses to validate
+
+        Returns:
+            Dictionary mapping each email to its validation result
+        """
+        return {result["email"]: result async for result in self.stream(emails)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cache statistics."""
+        return {
+            "dns_cache": {
+                "size": len(self.dns_cache),
+                "hits": self.dns_cache.hits,
+                "misses": self.dns_cache.misses,
+            },
+            "reputation_cache": {
+                "size": len(self.reputation_cache),
+                "hits": self.reputation_cache.hits,
+                "misses": self.reputation_cache.misses,
+            },
+            "tracked_domains": len(self._domain_semaphores),
+        }
@@ -0,0 +1,217 @@
+"""
+Streaming fan-out of campaigns into chunked email jobs.
+
+Recipients are read from ``campaign_contacts`` in contact ID order with a
+keyset cursor, one chunk at a time, and each chunk is published as one email
+job. After every chunk the cursor is saved in the campaign's
+``delivery_data["fanout"]`` checkpoint, so a restarted fan-out continues
+after the last published chunk instead of starting over. The checkpoint also
+carries the progress (chunks and recipients published out of the total),
+which can be read while the fan-out runs.
+
+Publishing happens before the checkpoint is saved: a crash between the two
+republishes at most one chunk. Jobs carry a deterministic ``chunk_id`` so
+the email worker can skip the repeat.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import JSON, func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import column, table
+
+logger = logging.getLogger(__name__)
+
+FANOUT_CHUNK_SIZE = int(os.getenv("CAMPAIGN_FANOUT_CHUNK_SIZE", "1000"))
+
+# Only contacts in this status receive campaigns
+SENDABLE_CONTACT_STATUS = "active"
+
+campaigns_table = table("campaigns", column("id"), column("delivery_data", JSON))
+contacts_table = table("contacts", column("id"), column("email"), column("status"))
+campaign_contacts_table = table("campaign_contacts", column("campaign_id"), column("contact_id"))
+
+
+class CampaignFanout:
+    """
+    Publishes a campaign's recipients as chunked email jobs, resumably.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        publish: Callable[[Dict[str, Any]], Awaitable[None]],
+        chunk_size: int = FANOUT_CHUNK_SIZE,
+        run_db: Optional[Callable[..., Awaitable[Any]]] = None,
+        on_progress: Optional[Callable[[Any, Dict[str, Any]], None]] = None,
+    ):
+        """
+        Initialize the fan-out.
+
+        Args:
+            session_factory: Creates a database session, used as a context manager
+            publish: Coroutine publishing one email job; must return only once
+                the broker has confirmed it
+            chunk_size: Recipients per email job
+            run_db: Coroutine function running blocking database calls, e.g.
+                on a worker thread; by default they run inline
+            on_progress: Called with the campaign ID and checkpoint after each chunk
+        """
+        self.session_factory = session_factory
+        self.publish = publish
+        self.chunk_size = chunk_size
+        self._run_db = run_db or _run_inline
+        self.on_progress = on_progress
+
+    async def run(self, campaign_id: Any) -> Dict[str, Any]:
+        """
+        Fan out a campaign, resuming from its checkpoint.
+
+        Args:
+            campaign_id: ID of the campaign
+
+        Returns:
+            The final checkpoint
+        """
+        checkpoint = await self._run_db(self.load_checkpoint, campaign_id)
+        if checkpoint and checkpoint.get("status") == "done":
+            logger.info(f"Fan-out of campaign {campaign_id} already completed")
+            return checkpoint
+
+        if not checkpoint:
+            total = await self._run_db(self.count_recipients, campaign_id)
+            checkpoint = {
+                "status": "running",
+                "cursor": None,
+                "chunks": 0,
+                "published": 0,
+                "total": total,
+                "started_at": datetime.utcnow().isoformat(),
+            }
+            await self._run_db(self.save_checkpoint, campaign_id, checkpoint)
+        else:
+            logger.info(
+                f"Resuming fan-out of campaign {campaign_id} after contact {checkpoint['cursor']} "
+                f"({checkpoint['published']} of {checkpoint['total']} recipients published)"
+            )
+
+        started = time.monotonic()
+        published_before = checkpoint["published"]
+        while True:
+            rows = await self._run_db(self.fetch_chunk, campaign_id, checkpoint["cursor"])
+            if not rows:
+                break
+
+            first_id, last_id = rows[0][0], rows[-1][0]
+            await self.publish({
+                "campaign_id": campaign_id,
+                "chunk_id": f"{campaign_id}:{first_id}-{last_id}",
+                "recipients": [email for _, email in rows],
+                "attempt": 1,
+            })
+
+            elapsed = max(time.monotonic() - started, 1e-9)
+            checkpoint.update(
+                cursor=last_id,
+                chunks=checkpoint["chunks"] + 1,
+                last_chunk=len(rows),
+                published=checkpoint["published"] + len(rows),
+                rate=round((checkpoint["published"] + len(rows) - published_before) / elapsed, 1),
+                updated_at=datetime.utcnow().isoformat(),
+            )
+            await self._run_db(self.save_checkpoint, campaign_id, checkpoint)
+            self._report(campaign_id, checkpoint)
+
+            if len(rows) < self.chunk_size:
+                break
+
+        checkpoint.update(status="done", last_chunk=0, completed_at=datetime.utcnow().isoformat())
+        await self._run_db(self.save_checkpoint, campaign_id, checkpoint)
+        self._report(campaign_id, checkpoint)
+        logger.info(
+            f"Fan-out of campaign {campaign_id} completed: {checkpoint['published']} recipients "
+            f"in {checkpoint['chunks']} chunks"
+        )
+        return checkpoint
+
+    def fetch_chunk(self, campaign_id: Any, after: Optional[int]) -> List[Tuple[int, str]]:
+        """
+        Read the next chunk of recipients after a contact ID.
+
+        Args:
+            campaign_id: ID of the campaign
+            after: Last contact ID already published, or None to start
+
+        Returns:
+            (contact_id, email) rows in contact ID order
+        """
+        cc, contacts = campaign_contacts_table.c, contacts_table.c
+        query = (
+            select(cc.contact_id, contacts.email)
+            .select_from(
+                campaign_contacts_table.join(contacts_table, contacts.id == cc.contact_id)
+            )
+            .where(cc.campaign_id == campaign_id, contacts.status == SENDABLE_CONTACT_STATUS)
+            .order_by(cc.contact_id)
+            .limit(self.chunk_size)
+        )
+        if after is not None:
+            query = query.where(cc.contact_id > after)
+
+        with self.session_factory() as session:
+            return [tuple(row) for row in session.execute(query)]
+
+    def count_recipients(self, campaign_id: Any) -> int:
+        """Count the recipients a campaign will be sent to."""
+        cc, contacts = campaign_contacts_table.c, contacts_table.c
+        query = (
+            select(func.count())
+            .select_from(
+                campaign_contacts_table.join(contacts_table, contacts.id == cc.contact_id)
+            )
+            .where(cc.campaign_id == campaign_id, contacts.status == SENDABLE_CONTACT_STATUS)
+        )
+        with self.session_factory() as session:
+            return session.execute(query).scalar_one()
+
+    def load_checkpoint(self, campaign_id: Any) -> Optional[Dict[str, Any]]:
+        """Load a campaign's fan-out checkpoint, if any."""
+        with self.session_factory() as session:
+            delivery_data = session.execute(
+                select(campaigns_table.c.delivery_data).where(campaigns_table.c.id == campaign_id)
+            ).scalar_one_or_none()
+        return (delivery_data or {}).get("fanout")
+
+    def save_checkpoint(self, campaign_id: Any, checkpoint: Dict[str, Any]) -> None:
+        """Save a campaign's fan-out checkpoint, keeping other delivery data."""
+        with self.session_factory() as session:
+            delivery_data = session.execute(
+                select(campaigns_table.c.delivery_data).where(campaigns_table.c.id == campaign_id)
+            ).scalar_one_or_none() or {}
+            session.execute(
+                update(campaigns_table)
+                .where(campaigns_table.c.id == campaign_id)
+                .values(delivery_data={**delivery_data, "fanout": dict(checkpoint)})
+            )
+            session.commit()
+
+    def _report(self, campaign_id: Any, checkpoint: Dict[str, Any]) -> None:
+        total = checkpoint["total"] or 0
+        percent = 100.0 * checkpoint["published"] / total if total else 100.0
+        logger.info(
+            f"Campaign {campaign_id} fan-out: {checkpoint['published']}/{total} recipients "
+            f"({percent:.1f}%), {checkpoint['chunks']} chunks, {checkpoint.get('rate', 0)} recipients/s"
+        )
+        if self.on_progress is not None:
+            try:
+                self.on_progress(campaign_id, checkpoint)
+            except Exception as e:
+                logger.warning(f"Error reporting fan-out progress: {e}")
+
+
+async def _run_inline(func: Callable, *args: Any) -> Any:
+    return func(*args)
@@ -1,4 +1,4 @@
-from typing import Dict, Any, List, Optional, Tuple, Set
+from typing import Dict, Any, List, Optional, Tuple, Set, AsyncIterator
 import logging
 import time
 import uuid
@@ -11,6 +11,7 @@ from pydantic import EmailStr
 
 from .octotools_service import OctoToolsService
 from .blockchain import BlockchainService
+from .bulk_validation_service import BulkValidationService
 from api.models.contact import Contact, ContactHealthScore
 from api.utils.email_validator import validate_email_syntax, validate_email_smtp, check_domain_reputation
 
@@ -47,6 +48,9 @@ class ContactService:
         # Initialize contact network graph
         self.contact_relationship_graph = {}
 
+        # Domain-grouped validator for bulk list operations
+        self.bulk_validator = BulkValidationService(self)
+
         # Known disposable email domains
         self.disposable_domains = set([
             "mailinator.com", "tempmail.com", "10minutemail.com", "guerrillamail.com",
@@ -460,6 +464,34 @@ class ContactService:
 
         return validation_results
 
+    async def stream_bulk_validation(self, emails: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Validate many email addresses, yielding results as they complete.
+
+        Domain-level checks are shared across addresses on the same domain
+        and SMTP probes are throttled per domain.
+
+        Args:
+            emails: Email addresses to validate
+
+        Yields:
+            Per-email validation results
+        """
+        async for result in self.bulk_validator.stream(emails):
+            yield result
+
+    async def bulk_validate_emails(self, emails: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Validate many email addresses.
+
+        Args:
+            emails: Email addresses to validate
+
+        Returns:
+            Validation results keyed by email address
+        """
+        return await self.bulk_validator.validate(emails)
+
     async def calculate_contact_health_score(self, contact: Contact) -> ContactHealthScore:
         """
         Calculate comprehensive health score for a contact.
@@ -1,15 +1,24 @@
 """
 Email service for sending emails and tracking analytics.
+
+Single emails go through ``send_email``. Campaigns should use ``send_batch``,
+which sends up to a provider's per-request maximum of recipients in one call
+(SendGrid personalizations, Mailgun recipient-variables) over the shared
+per-host connection pools, and reports the outcome per recipient.
 """
 
+import json
 import logging
 import os
 import time
 import uuid
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import httpx
 
-import httpx
-from httpx import RequestException
+from packages.error_handling.python.transport import transport_registry
+
+from .email_tracking import TrackingTemplate, compile_tracking_template
 
 # Configure logging
 logging.basicConfig(
@@ -25,32 +34,112 @@ MAILGUN_DOMAIN = os.getenv("MAILGUN_DOMAIN", "mg.example.com")
 
 # Default email provider
 DEFAULT_PROVIDER = os.getenv("DEFAULT_EMAIL_PROVIDER", "sendgrid")
+DEFAULT_FROM_EMAIL = "noreply@justmaily.com"
+
+SENDGRID_URL = "https://api.sendgrid.com/v3/mail/send"
+MAILGUN_URL = f"https://api.mailgun.net/v3/{MAILGUN_DOMAIN}/messages"
+PROVIDER_URLS = {
+    "sendgrid": SENDGRID_URL,
+    "mailgun": MAILGUN_URL,
+}
+
+# HTTP client settings; pool sizes are set per host in the transport registry
+EMAIL_HTTP_TIMEOUT = float(os.getenv("EMAIL_HTTP_TIMEOUT", "10"))
+
+# Recipients per provider request; the providers reject more than this
+PROVIDER_BATCH_LIMITS = {
+    "sendgrid": 1000,
+    "mailgun": 1000,
+}
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "1000"))
+
+# Placeholders the providers replace with each recipient's message ID
+MESSAGE_ID_TOKENS = {
+    "sendgrid": "-message_id-",
+    "mailgun": "%recipient.message_id%",
+}
+
+# Failures that reject the whole request and are worth retrying later
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Failures caused by the request content, e.g. one malformed address
+INVALID_REQUEST_STATUS_CODES = {400, 422}
+
+# Mailgun error messages that blame a recipient rather than the shared content
+MAILGUN_RECIPIENT_ERRORS = ("'to'", "recipient")
+
+# Times a rejected request may be halved; 10 isolates one address in 1000
+EMAIL_MAX_SPLIT_DEPTH = int(os.getenv("EMAIL_MAX_SPLIT_DEPTH", "10"))
 
 
 class EmailService:
     """Service for sending emails and tracking analytics."""
 
-    def __init__(self, provider: Optional[str] = None):
-        """Initialize the email service."""
+    def __init__(
+        self,
+        provider: Optional[str] = None,
+        client: Optional[httpx.Client] = None,
+        async_client: Optional[httpx.AsyncClient] = None,
+        batch_size: Optional[int] = None,
+    ):
+        """Initialize the email service.
+
+        Args:
+            provider: Email provider, defaults to DEFAULT_EMAIL_PROVIDER
+            client: HTTP client for ``send_email``, created on first use
+            async_client: HTTP client for ``send_batch``, created on first use
+            batch_size: Maximum recipients per provider request
+        """
         self.provider = provider or DEFAULT_PROVIDER
         self.api_keys = {
             "sendgrid": SENDGRID_API_KEY,
             "mailgun": MAILGUN_API_KEY,
         }
+        self._client = client
+        self._async_client = async_client
+        self.batch_size = min(
+            batch_size or EMAIL_BATCH_SIZE,
+            PROVIDER_BATCH_LIMITS.get(self.provider, 1),
+        )
+
+    @property
+    def client(self) -> httpx.Client:
+        """HTTP client for single sends, on the shared connection pools."""
+        if self._client is None:
+            self._client = transport_registry.client(timeout=EMAIL_HTTP_TIMEOUT)
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """HTTP client for batch sends, on the shared connection pools."""
+        if self._async_client is None:
+            self._async_client = transport_registry.async_client(timeout=EMAIL_HTTP_TIMEOUT)
+        return self._async_client
+
+    async def aclose(self) -> None:
+        """Close the HTTP clients; the shared connection pools stay open."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
 
     def send_email(
-        self, to_email: str, subject: str, content: str, from_email: Optional[str] = None
+        self,
+        to_email: str,
+        subject: str,
+        content: Union[str, TrackingTemplate],
+        from_email: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Send an email using the configured provider."""
-        from_email = from_email or "noreply@justmaily.com"
-        message_id = str(uuid.uuid4())
+        """Send an email using the configured provider.
 
-        # Add tracking pixel for open tracking
-        tracking_pixel = f'<img src="https://justmaily.com/api/tracking/open/{message_id}" width="1" height="1" />'
-        html_content = content + tracking_pixel
-
-        # Track clicks by replacing links
-        html_content = self._add_click_tracking(html_content, message_id)
+        Pass a template from ``compile_tracking`` when sending the same
+        content repeatedly to skip compiling it for every email.
+        """
+        from_email = from_email or DEFAULT_FROM_EMAIL
+        message_id = str(uuid.uuid4())
+        html_content = self.compile_tracking(content).render(message_id)
 
         if self.provider == "sendgrid":
             return self._send_with_sendgrid(
@@ -81,7 +170,7 @@ class EmailService:
             }
 
         try:
-            url = "https://api.sendgrid.com/v3/mail/send"
+            url = SENDGRID_URL
             headers = {
                 "Authorization": f"Bearer {self.api_keys['sendgrid']}",
                 "Content-Type": "application/json",
@@ -94,7 +183,7 @@ class EmailService:
                 "custom_args": {"message_id": message_id},
             }
 
-            response = requests.post(url, headers=headers, json=data, timeout=10)
+            response = self.client.post(url, headers=headers, json=data)
             response.raise_for_status()
 
             return {
@@ -103,7 +192,7 @@ class EmailService:
                 "provider": "sendgrid",
                 "provider_response": response.status_code,
             }
-        except RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"SendGrid API error: {e}")
             return {
                 "status": "error",
@@ -125,7 +214,7 @@ class EmailService:
             }
 
         try:
-            url = f"https://api.mailgun.net/v3/{MAILGUN_DOMAIN}/messages"
+            url = MAILGUN_URL
             auth = ("api", self.api_keys["mailgun"])
             data = {
                 "from": from_email,
@@ -135,7 +224,7 @@ class EmailService:
                 "v:message_id": message_id,
             }
 
-            response = requests.post(url, auth=auth, data=data, timeout=10)
+            response = self.client.post(url, auth=auth, data=data)
             response.raise_for_status()
             response_data = response.json()
 
@@ -145,7 +234,7 @@ class EmailService:
                 "provider": "mailgun",
                 "provider_response": response_data,
             }
-        except RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Mailgun API error: {e}")
             return {
                 "status": "error",
@@ -154,18 +243,232 @@ class EmailService:
                 "provider": "mailgun",
             }
 
-    def _add_click_tracking(self, html_content: str, message_id: str) -> str:
-        """Add click tracking to links in the HTML content."""
-        import re
+    async def send_batch(
+        self,
+        recipients: List[str],
+        subject: str,
+        content: Union[str, TrackingTemplate],
+        from_email: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Send the same email to many recipients with few provider calls.
+
+        Recipients are grouped into requests of up to ``batch_size``. Each
+        recipient gets its own message ID, substituted by the provider into
+        the tracking links. When a request is rejected because of a
+        recipient (e.g. one malformed address), it is split in half and
+        resent until the offending recipients are isolated, so one bad
+        address does not fail the rest. Requests rejected for their shared
+        content are not split. Rate limiting, server errors and
+        network errors fail the whole request and are marked retryable.
+
+        Args:
+            recipients: Recipient email addresses
+            subject: Email subject
+            content: HTML content shared by all recipients, or its compiled template
+            from_email: Sender address
+            metadata: Extra tracking values sent with every message, e.g. campaign_id
+
+        Returns:
+            Summary with overall status, counts, number of provider requests,
+            whether any request was rate limited, and a per-recipient
+            ``results`` list
+        """
+        from_email = from_email or DEFAULT_FROM_EMAIL
+        batch = [{"email": email, "message_id": str(uuid.uuid4())} for email in recipients]
+
+        if self.provider not in PROVIDER_BATCH_LIMITS:
+            logger.error(f"Unsupported email provider: {self.provider}")
+            return self._batch_summary(
+                self._failed(batch, f"Unsupported email provider: {self.provider}"), 0
+            )
+        if not self.api_keys.get(self.provider):
+            logger.error(f"{self.provider} API key not configured")
+            return self._batch_summary(
+                self._failed(batch, f"{self.provider} API key not configured"), 0
+            )
+
+        # Tracking is rendered once; the provider fills in each message ID
+        html_content = self.compile_tracking(content).render(MESSAGE_ID_TOKENS[self.provider])
+        metadata = {key: str(value) for key, value in (metadata or {}).items()}
+
+        results: List[Dict[str, Any]] = []
+        requests_made = 0
+        for start in range(0, len(batch), self.batch_size):
+            chunk_results, chunk_requests = await self._send_chunk(
+                batch[start:start + self.batch_size], from_email, subject, html_content, metadata
+            )
+            results.extend(chunk_results)
+            requests_made += chunk_requests
+
+        return self._batch_summary(results, requests_made)
+
+    async def _send_chunk(
+        self,
+        batch: List[Dict[str, str]],
+        from_email: str,
+        subject: str,
+        html_content: str,
+        metadata: Dict[str, str],
+        depth: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Send one provider request, splitting it if a recipient is rejected."""
+        try:
+            if self.provider == "sendgrid":
+                response = await self._post_sendgrid_batch(batch, from_email, subject, html_content, metadata)
+            else:
+                response = await self._post_mailgun_batch(batch, from_email, subject, html_content, metadata)
+        except httpx.HTTPError as e:
+            logger.error(f"{self.provider} batch request error: {e}")
+            return self._failed(batch, str(e), retryable=True), 1
+
+        if response.is_success:
+            return [
+                {"recipient": r["email"], "message_id": r["message_id"], "status": "sent"}
+                for r in batch
+            ], 1
+
+        error = f"{self.provider} API error: {response.status_code} {response.text[:200]}"
+        if (
+            response.status_code in INVALID_REQUEST_STATUS_CODES
+            and len(batch) > 1
+            and depth < EMAIL_MAX_SPLIT_DEPTH
+            and self._rejects_recipients(response)
+        ):
+            middle = len(batch) // 2
+            left, left_requests = await self._send_chunk(
+                batch[:middle], from_email, subject, html_content, metadata, depth + 1
+            )
+            right, right_requests = await self._send_chunk(
+                batch[middle:], from_email, subject, html_content, metadata, depth + 1
+            )
+            return left + right, 1 + left_requests + right_requests
+
+        logger.error(error)
+        retryable = response.status_code in RETRYABLE_STATUS_CODES
+        return self._failed(batch, error, retryable=retryable, status_code=response.status_code), 1
+
+    def _rejects_recipients(self, response: httpx.Response) -> bool:
+        """Whether a rejected request blames its recipients rather than the shared content."""
+        try:
+            body = response.json()
+        except ValueError:
+            return False
+        if not isinstance(body, dict):
+            return False
+
+        if self.provider == "sendgrid":
+            # SendGrid names the offending field, e.g. personalizations.3.to.0.email
+            return any(
+                str(error.get("field") or "").startswith("personalizations")
+                for error in body.get("errors", [])
+                if isinstance(error, dict)
+            )
+        message = str(body.get("message", "")).lower()
+        return any(marker in message for marker in MAILGUN_RECIPIENT_ERRORS)
+
+    async def _post_sendgrid_batch(
+        self,
+        batch: List[Dict[str, str]],
+        from_email: str,
+        subject: str,
+        html_content: str,
+        metadata: Dict[str, str],
+    ) -> httpx.Response:
+        """Send a batch as one SendGrid request with a personalization per recipient."""
+        token = MESSAGE_ID_TOKENS["sendgrid"]
+        data = {
+            "personalizations": [
+                {
+                    "to": [{"email": r["email"]}],
+                    "substitutions": {token: r["message_id"]},
+                    "custom_args": {**metadata, "message_id": r["message_id"]},
+                }
+                for r in batch
+            ],
+            "from": {"email": from_email},
+            "subject": subject,
+            "content": [{"type": "text/html", "value": html_content}],
+        }
+        headers = {"Authorization": f"Bearer {self.api_keys['sendgrid']}"}
+        return await self.async_client.post(SENDGRID_URL, headers=headers, json=data)
+
+    async def _post_mailgun_batch(
+        self,
+        batch: List[Dict[str, str]],
+        from_email: str,
+        subject: str,
+        html_content: str,
+        metadata: Dict[str, str],
+    ) -> httpx.Response:
+        """Send a batch as one Mailgun request using recipient variables."""
+        recipient_variables = {r["email"]: {"message_id": r["message_id"]} for r in batch}
+        data = {
+            "from": from_email,
+            "to": [r["email"] for r in batch],
+            "subject": subject,
+            "html": html_content,
+            "recipient-variables": json.dumps(recipient_variables),
+            "v:message_id": MESSAGE_ID_TOKENS["mailgun"],
+        }
+        for key, value in metadata.items():
+            data[f"v:{key}"] = value
+        return await self.async_client.post(
+            MAILGUN_URL, auth=("api", self.api_keys["mailgun"]), data=data
+        )
+
+    def _failed(
+        self,
+        batch: List[Dict[str, str]],
+        error: str,
+        retryable: bool = False,
+        status_code: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Build failed results for every recipient in a batch."""
+        return [
+            {
+                "recipient": r["email"],
+                "message_id": r["message_id"],
+                "status": "error",
+                "error": error,
+                "retryable": retryable,
+                "status_code": status_code,
+            }
+            for r in batch
+        ]
+
+    def _batch_summary(self, results: List[Dict[str, Any]], requests_made: int) -> Dict[str, Any]:
+        """Summarize per-recipient results of a batch send."""
+        sent = sum(1 for r in results if r["status"] == "sent")
+        failed = len(results) - sent
+        if not failed:
+            status = "sent"
+        elif sent:
+            status = "partial"
+        else:
+            status = "error"
+        return {
+            "status": status,
+            "provider": self.provider,
+            "sent": sent,
+            "failed": failed,
+            "requests": requests_made,
+            "throttled": any(r.get("status_code") == 429 for r in results),
+            "results": results,
+        }
+
+    def compile_tracking(self, content: Union[str, TrackingTemplate]) -> TrackingTemplate:
+        """Compile content into a tracking template, once per campaign.
 
-        def replace_link(match):
-            original_url = match.group(2)
-            tracking_url = f"https://justmaily.com/api/tracking/click/{message_id}?url={original_url}"
-            return f'{match.group(1)}{tracking_url}{match.group(3)}'
+        Args:
+            content: HTML content, or an already compiled template
 
-        # Find and replace href attributes
-        pattern = r'(href=["\'])([^"\']*)(["\'])'
-        return re.sub(pattern, replace_link, html_content)
+        Returns:
+            The compiled template
+        """
+        if isinstance(content, TrackingTemplate):
+            return content
+        return compile_tracking_template(content)
 
     def get_analytics(self, message_id: str) -> Dict[str, Any]:
         """Get analytics for a specific email."""
@@ -1,25 +1,295 @@
-do i have any inconcistencies?
 """Open Policy Agent (OPA) service for authorization."""
 import json
 import logging
-from typing import Any, Dict, List, Optional, Union
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
-import httpx
+import httpx
 from fastapi import HTTPException, status
 
 from config.opa import opa_settings
+from packages.error_handling.python.transport import transport_registry
 
 logger = logging.getLogger(__name__)
 
+# Claims that carry roles, mirroring has_role in the maily.authz policy
+ROLE_CLAIMS = ("roles", "permissions", "https://maily.com/roles")
+
+
+def user_roles(user: Dict[str, Any]) -> Tuple[str, ...]:
+    """Collect a user's roles from every claim the policy checks.
+
+    Args:
+        user: The user information.
+
+    Returns:
+        Sorted, de-duplicated role names.
+    """
+    roles = set()
+    for claim in ROLE_CLAIMS:
+        value = user.get(claim) or ()
+        if isinstance(value, str):
+            value = (value,)
+        roles.update(str(role) for role in value)
+    return tuple(sorted(roles))
+
+
+def permission_key(action: str, resource: str, resource_id: Optional[str] = None) -> str:
+    """Build the key OPA uses for bulk decisions.
+
+    Args:
+        action: The action to perform.
+        resource: The resource type.
+        resource_id: The resource ID.
+
+    Returns:
+        ``action:resource:resource_id``
+    """
+    return f"{action}:{resource}:{resource_id or ''}"
+
+
+def decision_key(
+    user: Dict[str, Any],
+    action: str,
+    resource: str,
+    resource_id: Optional[str] = None,
+    context: Optional[Dict[str, Any]] = None,
+) -> Tuple:
+    """Build the cache key for a decision.
+
+    Plain role checks only depend on the user's roles, so they are shared by
+    every user with the same roles. Checks on a specific resource or with
+    context can match the user's own ID (ownership, self-service rules), so
+    those keys also include the subject.
+
+    Args:
+        user: The user information.
+        action: The action to perform.
+        resource: The resource type.
+        resource_id: The resource ID.
+        context: Additional context for the authorization decision.
+
+    Returns:
+        A hashable key.
+    """
+    subject = None
+    context_key = ""
+    if resource_id is not None or context:
+        subject = user.get("sub") or user.get("id")
+        context_key = json.dumps(context or {}, sort_keys=True, default=str)
+    return (user_roles(user), action, resource, resource_id, subject, context_key)
+
+
+class DecisionCache:
+    """Bounded TTL cache of policy decisions for the current bundle revision.
+
+    Decisions are dropped whenever OPA reports a new bundle revision or a
+    policy is changed through this service.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 10000):
+        """Initialize the cache.
+
+        Args:
+            ttl: Seconds to keep a decision.
+            max_size: Maximum number of decisions to keep.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.revision: Optional[str] = None
+        self._entries: "OrderedDict[Tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Get a cached decision.
+
+        Args:
+            key: Decision key.
+
+        Returns:
+            The decision, or None if unknown or expired.
+        """
+        full_key = (self.revision,) + key
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[full_key]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(full_key)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key: Tuple, decision: Any) -> None:
+        """Cache a decision.
+
+        Args:
+            key: Decision key.
+            decision: Decision returned by OPA.
+        """
+        if self.ttl <= 0:
+            return
+        full_key = (self.revision,) + key
+        with self._lock:
+            self._entries[full_key] = (decision, time.monotonic() + self.ttl)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set_revision(self, revision: Optional[str]) -> None:
+        """Record the bundle revision OPA answered with.
+
+        Args:
+            revision: Bundle revision, or None if OPA did not report one.
+        """
+        if revision is None or revision == self.revision:
+            return
+        with self._lock:
+            self._entries.clear()
+            self.revision = revision
+
+    def clear(self) -> None:
+        """Forget every cached decision."""
+        with self._lock:
+            self._entries.clear()
+
+
+class LocalPolicyEvaluator:
+    """In-process evaluation of the hot allow rules of the maily.authz policy.
+
+    The policy denies by default and every rule can only allow, so a local
+    allow is final. Anything the local rules do not allow is still sent to
+    OPA, which may have further rules.
+    """
+
+    ROLE_GRANTS = {
+        "editor": {(action, resource) for action in ("create", "update") for resource in ("content", "campaign", "template")},
+        "viewer": {("read", resource) for resource in ("content", "campaign", "template", "analytics")},
+        "analyst": {("read", "analytics")},
+    }
+
+    def evaluate(
+        self,
+        user: Dict[str, Any],
+        action: str,
+        resource: str,
+        resource_id: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Optional[bool]:
+        """Evaluate the hot rules.
+
+        Args:
+            user: The user information.
+            action: The action to perform.
+            resource: The resource type.
+            resource_id: The resource ID.
+            context: Additional context for the authorization decision.
+
+        Returns:
+            True if a local rule allows the request, None if OPA must decide.
+        """
+        roles = user_roles(user)
+        if "admin" in roles:
+            return True
+
+        subject = user.get("sub")
+        owner = (context or {}).get("resource_owner")
+        if owner and owner == subject:
+            return True
+
+        if action == "read" and resource == "public_content":
+            return True
+        if resource == "user_data" and action in ("read", "update") and resource_id is not None and resource_id == subject:
+            return True
+
+        for role in roles:
+            if (action, resource) in self.ROLE_GRANTS.get(role, ()):
+                return True
+        return None
+
 
 class OPAService:
     """Service for interacting with Open Policy Agent."""
 
-    def __init__(self):
-        """Initialize the OPA service."""
-        self.url = opa_settings.URL
-        self.policy_path = opa_settings.POLICY_PATH
-        self.timeout = opa_settings.TIMEOUT
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        policy_path: Optional[str] = None,
+        timeout: Optional[float] = None,
+        local_policy: Optional[bool] = None,
+        cache_ttl: Optional[float] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        """Initialize the OPA service.
+
+        Args:
+            url: OPA base URL; defaults to the configured URL.
+            policy_path: Path of the authorization policy.
+            timeout: Request timeout in seconds.
+            local_policy: Evaluate hot rules in process before asking OPA.
+            cache_ttl: Seconds to cache decisions; 0 disables the cache.
+            client: HTTP client to use instead of one on the shared pools.
+        """
+        self.url = (url or opa_settings.URL).rstrip("/")
+        self.policy_path = (policy_path or opa_settings.POLICY_PATH).strip("/")
+        self.timeout = timeout if timeout is not None else opa_settings.TIMEOUT
+        if local_policy is None:
+            local_policy = opa_settings.LOCAL_POLICY
+        self.local_evaluator = LocalPolicyEvaluator() if local_policy else None
+        self.decision_cache = DecisionCache(
+            ttl=cache_ttl if cache_ttl is not None else opa_settings.DECISION_CACHE_TTL,
+            max_size=opa_settings.DECISION_CACHE_SIZE,
+        )
+        self._client = client
+        if client is None:
+            # Pool settings only apply to pools created afterwards, so set them before any request
+            max_connections = opa_settings.MAX_CONNECTIONS
+            transport_registry.configure(
+                httpx.URL(self.url).host,
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the HTTP client, creating it on the shared pools on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = transport_registry.async_client(base_url=self.url, timeout=self.timeout)
+        return self._client
+
+    async def close(self) -> None:
+        """Close the HTTP client; the shared connection pools stay open."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _query(self, path: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate a policy document and track the bundle revision.
+
+        Args:
+            path: Policy path under the OPA base URL.
+            input_data: Request body with the ``input`` document.
+
+        Returns:
+            The ``result`` document.
+        """
+        response = await self._get_client().post(
+            f"{self.url}/{path}",
+            params={"provenance": "true"},
+            json=input_data,
+        )
+        response.raise_for_status()
+        payload = response.json()
+
+        bundles = payload.get("provenance", {}).get("bundles") or {}
+        if bundles:
+            self.decision_cache.set_revision(
+                ",".join(f"{name}={info.get('revision', '')}" for name, info in sorted(bundles.items()))
+            )
+        return payload.get("result", {})
 
     async def check_permission(
         self,
@@ -28,6 +298,7 @@ class OPAService:
         resource: str,
         resource_id: Optional[str] = None,
         context: Optional[Dict[str, Any]] = None,
+        memo: Optional[Dict] = None,
     ) -> bool:
         """Check if a user has permission to perform an action on a resource.
 
@@ -37,38 +308,176 @@ class OPAService:
             resource: The resource type.
             resource_id: The resource ID.
             context: Additional context for the authorization decision.
+            memo: Request-scoped decisions, reused by later checks in the same request.
 
         Returns:
             True if the user has permission, False otherwise.
+        """
+        decisions = await self.check_permissions(
+            user,
+            [{"action": action, "resource": resource, "resource_id": resource_id}],
+            context=context,
+            memo=memo,
+        )
+        return decisions[permission_key(action, resource, resource_id)]
+
+    async def check_permissions(
+        self,
+        user: Dict[str, Any],
+        permissions: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]] = None,
+        memo: Optional[Dict] = None,
+    ) -> Dict[str, bool]:
+        """Check several permissions, sending every undecided check to OPA in one call.
 
-        Raises:
-            HTTPException: If the OPA service cannot be reached.
+        Each check is answered from the request memo, the local policy, the
+        decision cache, or OPA, in that order.
+
+        Args:
+            user: The user information.
+            permissions: A list of permission requests, each with action, resource, and resource_id.
+            context: Additional context for the authorization decision.
+            memo: Request-scoped decisions, reused by later checks in the same request.
+
+        Returns:
+            A dictionary mapping permission keys to boolean results.
         """
-        input_data = {
-            "input": {
-                "user": user,
-                "action": action,
-                "resource": resource,
-                "resource_id": resource_id,
-                "context": context or {},
-            }
-        }
+        results: Dict[str, bool] = {}
+        pending: Dict[str, Tuple[Dict[str, Any], Tuple]] = {}
+
+        for permission in permissions:
+            action = permission["action"]
+            resource = permission["resource"]
+            resource_id = permission.get("resource_id")
+            result_key = permission_key(action, resource, resource_id)
+            if result_key in results or result_key in pending:
+                continue
+
+            key = decision_key(user, action, resource, resource_id, context)
+            if memo is not None and key in memo:
+                results[result_key] = memo[key]
+                continue
+
+            decision = None
+            if self.local_evaluator is not None:
+                decision = self.local_evaluator.evaluate(user, action, resource, resource_id, context)
+            if decision is None:
+                decision = self.decision_cache.get(key)
+            if decision is None:
+                pending[result_key] = (permission, key)
+                continue
+
+            results[result_key] = decision
+            if memo is not None:
+                memo[key] = decision
+
+        if pending:
+            decisions = await self._evaluate(user, [p for p, _ in pending.values()], context)
+            for result_key, (_, key) in pending.items():
+                allowed = decisions.get(result_key)
+                if allowed is None:
+                    # OPA unreachable or undecided; deny without caching
+                    results[result_key] = False
+                    continue
+                allowed = bool(allowed)
+                results[result_key] = allowed
+                self.decision_cache.put(key, allowed)
+                if memo is not None:
+                    memo[key] = allowed
+
+        return results
+
+    async def _evaluate(
+        self,
+        user: Dict[str, Any],
+        permissions: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]],
+    ) -> Dict[str, Optional[bool]]:
+        """Ask OPA for decisions; a single check uses the allow rule, several the decisions rule.
 
+        Returns:
+            Decisions keyed by permission key, None for checks OPA left
+            undecided, and empty if OPA could not be reached.
+        """
         try:
-            response = requests.post(
-                f"{self.url}/{self.policy_path}",
-                json=input_data,
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            # OPA returns a result with a "result" field that contains the policy decision
-            return result.get("result", {}).get("allow", False)
-        except requests.RequestException as e:
-            logger.error(f"Failed to check permission with OPA: {str(e)}")
+            if len(permissions) == 1:
+                permission = permissions[0]
+                result = await self._query(self.policy_path, {
+                    "input": {
+                        "user": user,
+                        "action": permission["action"],
+                        "resource": permission["resource"],
+                        "resource_id": permission.get("resource_id"),
+                        "context": context or {},
+                    }
+                })
+                # OPA returns a result with a "result" field that contains the policy decision
+                return {
+                    permission_key(permission["action"], permission["resource"], permission.get("resource_id")):
+                        result.get("allow", False)
+                }
+
+            # The decisions rule is a map from permission key to decision
+            decisions = await self._query(f"{self.policy_path}/decisions", {
+                "input": {
+                    "user": user,
+                    "permissions": [
+                        {
+                            "action": p["action"],
+                            "resource": p["resource"],
+                            "resource_id": p.get("resource_id") or "",
+                        }
+                        for p in permissions
+                    ],
+                    "context": context or {},
+                }
+            })
+            if not isinstance(decisions, dict):
+                decisions = {}
+            # Checks without a decision stay undecided so they are not cached
+            return {
+                permission_key(p["action"], p["resource"], p.get("resource_id")):
+                    decisions.get(permission_key(p["action"], p["resource"], p.get("resource_id")))
+                for p in permissions
+            }
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Failed to check permissions with OPA: {str(e)}")
             # In case of OPA service failure, deny access by default
-            return False
+            return {}
+
+    async def filter_allowed(
+        self,
+        user: Dict[str, Any],
+        action: str,
+        resource: str,
+        resource_ids: Iterable[Union[str, int]],
+        context: Optional[Dict[str, Any]] = None,
+        memo: Optional[Dict] = None,
+    ) -> List[Union[str, int]]:
+        """Filter a page of resources down to the ones the user may access.
+
+        List endpoints should use this instead of one check per item: all
+        undecided items are evaluated in a single OPA call.
+
+        Args:
+            user: The user information.
+            action: The action to perform.
+            resource: The resource type.
+            resource_ids: IDs of the resources on the page.
+            context: Additional context for the authorization decision.
+            memo: Request-scoped decisions.
+
+        Returns:
+            The allowed IDs, in their original order.
+        """
+        resource_ids = list(resource_ids)
+        decisions = await self.check_permissions(
+            user,
+            [{"action": action, "resource": resource, "resource_id": str(rid)} for rid in resource_ids],
+            context=context,
+            memo=memo,
+        )
+        return [rid for rid in resource_ids if decisions[permission_key(action, resource, str(rid))]]
 
     async def get_allowed_resources(
         self,
@@ -87,10 +496,15 @@ class OPAService:
 
         Returns:
             A list of resource IDs that the user has permission to access.
-
-        Raises:
-            HTTPException: If the OPA service cannot be reached.
         """
+        # The answer depends on the user's identity, not just their roles
+        key = ("allowed_resources", user.get("sub") or user.get("id")) + decision_key(
+            user, action, resource, context=context
+        )
+        cached = self.decision_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
         input_data = {
             "input": {
                 "user": user,
@@ -101,26 +515,23 @@ class OPAService:
         }
 
         try:
-            response = requests.post(
-                f"{self.url}/{self.policy_path}/allowed_resources",
-                json=input_data,
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            # OPA returns a result with a "result" field that contains the allowed resources
-            return result.get("result", {}).get("allowed_resources", [])
-        except requests.RequestException as e:
+            result = await self._query(f"{self.policy_path}/allowed_resources", input_data)
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Failed to get allowed resources from OPA: {str(e)}")
             # In case of OPA service failure, return an empty list
             return []
 
+        # OPA returns a result with a "result" field that contains the allowed resources
+        allowed = result.get("allowed_resources", [])
+        self.decision_cache.put(key, tuple(allowed))
+        return allowed
+
     async def check_bulk_permissions(
         self,
         user: Dict[str, Any],
         permissions: List[Dict[str, Any]],
         context: Optional[Dict[str, Any]] = None,
+        memo: Optional[Dict] = None,
     ) -> Dict[str, bool]:
         """Check multiple permissions at once.
 
@@ -128,36 +539,12 @@ class OPAService:
             user: The user information.
             permissions: A list of permission requests, each with action, resource, and resource_id.
             context: Additional context for the authorization decision.
+            memo: Request-scoped decisions.
 
         Returns:
             A dictionary mapping permission keys to boolean results.
-
-        Raises:
-            HTTPException: If the OPA service cannot be reached.
         """
-        input_data = {
-            "input": {
-                "user": user,
-                "permissions": permissions,
-                "context": context or {},
-            }
-        }
-
-        try:
-            response = requests.post(
-                f"{self.url}/{self.policy_path}/bulk",
-                json=input_data,
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            # OPA returns a result with a "result" field that contains the permission decisions
-            return result.get("result", {}).get("decisions", {})
-        except requests.RequestException as e:
-            logger.error(f"Failed to check bulk permissions with OPA: {str(e)}")
-            # In case of OPA service failure, deny all permissions by default
-            return {f"{p['action']}:{p['resource']}:{p.get('resource_id', '')}" : False for p in permissions}
+        return await self.check_permissions(user, permissions, context=context, memo=memo)
 
     async def upload_policy(self, policy_name: str, policy_content: str) -> bool:
         """Upload a policy to OPA.
@@ -173,15 +560,15 @@ class OPAService:
             HTTPException: If the policy cannot be uploaded.
         """
         try:
-            response = requests.put(
+            response = await self._get_client().put(
                 f"{self.url}/v1/policies/{policy_name}",
-                data=policy_content,
+                content=policy_content,
                 headers={"Content-Type": "text/plain"},
-                timeout=self.timeout,
             )
             response.raise_for_status()
+            self.decision_cache.clear()
             return True
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to upload policy to OPA: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -201,13 +588,10 @@ class OPAService:
             HTTPException: If the policy cannot be retrieved.
         """
         try:
-            response = requests.get(
-                f"{self.url}/v1/policies/{policy_name}",
-                timeout=self.timeout,
-            )
+            response = await self._get_client().get(f"{self.url}/v1/policies/{policy_name}")
             response.raise_for_status()
             return response.text
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to get policy from OPA: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -227,13 +611,11 @@ class OPAService:
             HTTPException: If the policy cannot be deleted.
         """
         try:
-            response = requests.delete(
-                f"{self.url}/v1/policies/{policy_name}",
-                timeout=self.timeout,
-            )
+            response = await self._get_client().delete(f"{self.url}/v1/policies/{policy_name}")
             response.raise_for_status()
+            self.decision_cache.clear()
             return True
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to delete policy from OPA: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -18,6 +18,7 @@ from ..monitoring.performance_metrics import (
     DatabaseQueryTimer
 )
 from ..database.transaction import transactional
+from ..middleware.auth_cache import user_profile_cache
 
 logger = structlog.get_logger("justmaily.services.user")
 
@@ -245,6 +246,9 @@ class UserService:
         Args:
             user: The user object
         """
+        # Authentication caches the profile derived from the user
+        user_profile_cache.invalidate(auth0_id=getattr(user, "auth0_id", None), user_id=user.id)
+
         try:
             if user.id:
                 await self.cache.delete(f"user:{user.id}")
@@ -0,0 +1,190 @@
+"""
+Tests for the rate limiting state backends.
+
+These tests verify that local limiter state stays bounded, that quota usage
+survives LRU eviction, and that the Redis backend answers repeat offenders
+from its local denial cache.
+"""
+
+import pytest
+
+from apps.api.middleware.rate_limiting import (
+    MAX_VIOLATIONS_BEFORE_PENALTY,
+    CountMinSketch,
+    IPReputationTracker,
+    LocalRateLimitState,
+    QuotaTracker,
+    RedisRateLimitState,
+)
+
+
+class FakeScriptRedis:
+    """Async Redis stand-in returning canned script results."""
+
+    def __init__(self, check_result=None, violation_result=0, fail=False, penalty_ms=-2):
+        self.check_result = check_result or [0, "4", 1, "0"]
+        self.violation_result = violation_result
+        self.fail = fail
+        self.penalty_ms = penalty_ms
+        self.calls = 0
+        self.script_keys = []
+
+    def register_script(self, source):
+        async def script(keys, args):
+            self.calls += 1
+            if self.fail:
+                raise ConnectionError("redis unavailable")
+            self.script_keys.append(keys)
+            return self.violation_result if "violations" in keys[0] else self.check_result
+        return script
+
+    async def pttl(self, key):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("redis unavailable")
+        return self.penalty_ms
+
+
+def hash_tag(key):
+    return key[key.index("{") + 1:key.index("}")]
+
+
+class TestCountMinSketch:
+    """Tests for CountMinSketch."""
+
+    def test_never_undercounts(self):
+        sketch = CountMinSketch(width=64, depth=4)
+        for i in range(500):
+            sketch.add(f"client-{i}", i % 7 + 1)
+
+        for i in range(500):
+            assert sketch.estimate(f"client-{i}") >= i % 7 + 1
+
+
+class TestQuotaTracker:
+    """Tests for the bounded QuotaTracker."""
+
+    def test_bounded_and_survives_eviction(self):
+        tracker = QuotaTracker(max_keys=10, sketch_width=1024)
+        for _ in range(3):
+            tracker.increment("client-a", daily_quota=100)
+        for i in range(50):
+            tracker.increment(f"scanner-{i}", daily_quota=100)
+
+        assert len(tracker.daily_quotas) == 10
+        assert "client-a" not in tracker.daily_quotas
+        assert tracker.get_usage("client-a", 100)[0] >= 3
+        assert tracker.increment("client-a", daily_quota=100)[0] >= 4
+
+
+class TestIPReputationTracker:
+    """Tests for the bounded IPReputationTracker."""
+
+    def test_penalty_after_repeated_violations(self):
+        tracker = IPReputationTracker(max_keys=100)
+        results = [tracker.record_violation("10.0.0.1") for _ in range(MAX_VIOLATIONS_BEFORE_PENALTY)]
+
+        assert results[-1] is True
+        assert not any(results[:-1])
+        assert tracker.is_penalized("10.0.0.1")
+        assert tracker.penalty_remaining("10.0.0.1") > 0
+
+    def test_tables_are_bounded(self):
+        tracker = IPReputationTracker(max_keys=10)
+        for i in range(1000):
+            tracker.record_violation(f"10.0.{i // 256}.{i % 256}")
+
+        assert len(tracker.violations) <= 10
+
+
+class TestLocalRateLimitState:
+    """Tests for LocalRateLimitState."""
+
+    @pytest.mark.asyncio
+    async def test_rate_then_quota_limits(self):
+        state = LocalRateLimitState(max_clients=100)
+        decisions = [
+            await state.check("c:default", "c", "1.1.1.1", rate=1.0, capacity=2, daily_quota=100)
+            for _ in range(3)
+        ]
+        assert [d.allowed for d in decisions] == [True, True, False]
+        assert decisions[-1].reason == "rate"
+        assert decisions[-1].retry_after > 0
+
+        state = LocalRateLimitState(max_clients=100)
+        for _ in range(2):
+            assert (await state.check("q:default", "q", "1.1.1.1", rate=100, capacity=100, daily_quota=2)).allowed
+        decision = await state.check("q:default", "q", "1.1.1.1", rate=100, capacity=100, daily_quota=2)
+        assert decision.reason == "quota"
+        assert decision.quota_usage == 2
+
+    @pytest.mark.asyncio
+    async def test_memory_bounded_under_scan(self):
+        state = LocalRateLimitState(max_clients=50)
+        for i in range(5000):
+            await state.check(f"scan-{i}:default", f"scan-{i}", f"10.{i // 65536}.{i // 256 % 256}.{i % 256}",
+                              rate=5, capacity=5, daily_quota=1000)
+
+        stats = state.get_stats()
+        assert stats["buckets"] == 50
+        assert stats["quota_keys"] == 50
+
+
+class TestRedisRateLimitState:
+    """Tests for RedisRateLimitState."""
+
+    @pytest.mark.asyncio
+    async def test_allowed_decision(self):
+        state = RedisRateLimitState(FakeScriptRedis())
+        decision = await state.check("c:default", "c", "1.1.1.1", rate=5, capacity=5, daily_quota=100)
+
+        assert decision.allowed
+        assert decision.remaining == 4.0
+        assert decision.quota_usage == 1
+
+    @pytest.mark.asyncio
+    async def test_penalized_ip_is_cached_locally(self):
+        redis = FakeScriptRedis(check_result=[1, "0", 0, "3600"])
+        state = RedisRateLimitState(redis)
+
+        first = await state.check("6.6.6.6:default", "6.6.6.6", "6.6.6.6", rate=5, capacity=5, daily_quota=100)
+        second = await state.check("d:default", "d", "6.6.6.6", rate=5, capacity=5, daily_quota=100)
+
+        assert first.reason == second.reason == "penalized"
+        assert redis.calls == 1
+        assert state.stats["local_denials"] == 1
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_local_state(self):
+        state = RedisRateLimitState(FakeScriptRedis(fail=True))
+        decision = await state.check("c:default", "c", "1.1.1.1", rate=5, capacity=5, daily_quota=100)
+
+        assert decision.allowed
+        assert state.stats["fallbacks"] == 1
+
+    @pytest.mark.asyncio
+    async def test_script_keys_share_one_hash_tag(self):
+        """Every script call stays in one Redis Cluster slot."""
+        redis = FakeScriptRedis()
+        state = RedisRateLimitState(redis)
+
+        await state.check("1.1.1.1:default", "1.1.1.1", "1.1.1.1", rate=5, capacity=5, daily_quota=100)
+        await state.check("key:default", "key", "1.1.1.1", rate=5, capacity=5, daily_quota=100)
+        await state.record_violation("1.1.1.1")
+
+        assert [len(keys) for keys in redis.script_keys] == [3, 2, 2]
+        for keys in redis.script_keys:
+            assert len({hash_tag(key) for key in keys}) == 1
+        assert hash_tag(redis.script_keys[1][0]) == "key"
+
+    @pytest.mark.asyncio
+    async def test_penalty_of_keyed_client_is_read_separately(self):
+        """A penalized IP is denied before the script runs for an API key client."""
+        redis = FakeScriptRedis(penalty_ms=60000)
+        state = RedisRateLimitState(redis)
+
+        decision = await state.check("key:default", "key", "6.6.6.6", rate=5, capacity=5, daily_quota=100)
+
+        assert decision.reason == "penalized"
+        assert decision.retry_after == 60.0
+        assert redis.script_keys == []
@@ -7,6 +7,8 @@ import asyncio
 from unittest.mock import MagicMock, patch, AsyncMock
 from typing import Dict, Any
 
+import httpx
+
 from apps.api.ai.adapters.adapter_utils import (
     AdapterInitializer,
     ResponseIteratorFactory,
@@ -65,6 +67,37 @@ class TestAdapterInitializer:
         mock_client_class.assert_called_once_with(api_key=None)
         assert client == mock_client_class.return_value
 
+    def test_http_client_matches_sync_and_async_sdk_classes(self):
+        """Sync SDK classes get a sync client on the shared pools, async ones an async client."""
+        class OpenAI:
+            def __init__(self, api_key, http_client: "httpx.Client | None" = None):
+                self.http_client = http_client
+
+        class AsyncOpenAI:
+            def __init__(self, api_key, http_client: "httpx.AsyncClient | None" = None):
+                self.http_client = http_client
+
+        class AsyncUnannotated:
+            def __init__(self, api_key, http_client=None):
+                self.http_client = http_client
+
+        class Unannotated:
+            def __init__(self, api_key, http_client=None):
+                self.http_client = http_client
+
+        def build(client_class):
+            return AdapterInitializer.initialize_client(
+                provider_name="Test",
+                api_key_var="TEST_API_KEY",
+                client_class=client_class,
+                api_key="key"
+            ).http_client
+
+        assert isinstance(build(OpenAI), httpx.Client)
+        assert isinstance(build(AsyncOpenAI), httpx.AsyncClient)
+        assert isinstance(build(AsyncUnannotated), httpx.AsyncClient)
+        assert build(Unannotated) is None
+
 
 class TestResponseIteratorFactory:
     """Tests for ResponseIteratorFactory class."""
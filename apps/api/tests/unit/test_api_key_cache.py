@@ -0,0 +1,151 @@
+"""
+Unit tests for API key caching and deferred last-used writes.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from apps.api.services.api_key_cache import INVALID_KEY, ApiKeyCache, LastUsedBuffer
+
+
+class FakeRedis:
+    """Records the calls ApiKeyCache makes on the shared Redis client."""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+        self.published = []
+        self.reads = 0
+
+    async def get_json(self, key):
+        self.reads += 1
+        return self.values.get(key)
+
+    async def set_json(self, key, value, ttl=None):
+        self.values[key] = value
+        self.ttls[key] = ttl
+        return True
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+        return 1
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
+
+
+def key_data(expires_in=None):
+    expires_at = (datetime.utcnow() + expires_in).isoformat() if expires_in else None
+    return {"id": "k1", "scopes": ["read"], "expires_at": expires_at, "is_valid": True}
+
+
+class TestApiKeyCache:
+    """Tests for ApiKeyCache."""
+
+    @pytest.mark.asyncio
+    async def test_local_entries_are_served_without_redis(self):
+        """Repeated lookups in one process do not touch Redis."""
+        redis = FakeRedis()
+        cache = ApiKeyCache(redis=redis)
+
+        await cache.set("h1", key_data())
+        assert await cache.get("h1") == key_data()
+        assert await cache.get("h1") == key_data()
+
+        assert redis.reads == 0
+        assert cache.stats["local_hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_other_processes_fill_from_redis(self):
+        """A process without a local copy reads the shared entry once."""
+        redis = FakeRedis()
+        await ApiKeyCache(redis=redis).set("h1", key_data())
+        cache = ApiKeyCache(redis=redis)
+
+        assert await cache.get("h1") == key_data()
+        assert await cache.get("h1") == key_data()
+
+        assert redis.reads == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_ttl_never_outlives_the_key(self):
+        """Keys close to expiry are cached only until they expire."""
+        redis = FakeRedis()
+        cache = ApiKeyCache(redis=redis, ttl=300)
+
+        await cache.set("h1", key_data(expires_in=timedelta(seconds=60)))
+
+        assert 0 < redis.ttls["api_key:h1"] <= 60
+
+    @pytest.mark.asyncio
+    async def test_invalidate_deletes_and_broadcasts(self):
+        """Revoked keys are dropped locally, in Redis and on other processes."""
+        redis = FakeRedis()
+        cache = ApiKeyCache(redis=redis)
+        await cache.set("h1", key_data())
+
+        await cache.invalidate("h1")
+
+        assert await cache.get("h1") is None
+        assert "api_key:h1" not in redis.values
+        assert redis.published == [("api_key:invalidate", "h1")]
+
+    @pytest.mark.asyncio
+    async def test_unknown_keys_are_remembered_locally(self):
+        """Bad keys are answered locally and never written to Redis."""
+        redis = FakeRedis()
+        cache = ApiKeyCache(redis=redis)
+
+        cache.set_invalid("bad")
+
+        assert await cache.get("bad") is INVALID_KEY
+        assert redis.values == {}
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_entry_is_evicted(self):
+        """The local cache stays within max_size."""
+        cache = ApiKeyCache(max_size=2)
+        await cache.set("h1", key_data())
+        await cache.set("h2", key_data())
+        await cache.get("h1")
+        await cache.set("h3", key_data())
+
+        assert await cache.get("h2") is None
+        assert await cache.get("h1") is not None
+
+
+class TestLastUsedBuffer:
+    """Tests for LastUsedBuffer."""
+
+    @pytest.mark.asyncio
+    async def test_uses_are_coalesced_into_one_write(self):
+        """Only the latest timestamp per key is written, in one call."""
+        writes = []
+
+        async def writer(updates):
+            writes.append(dict(updates))
+
+        buffer = LastUsedBuffer(writer)
+        first, last = datetime(2024, 1, 1), datetime(2024, 1, 2)
+        buffer.record("k1", first)
+        buffer.record("k1", last)
+        buffer.record("k2", first)
+
+        assert await buffer.flush() == 2
+        assert writes == [{"k1": last, "k2": first}]
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_writes_are_retried(self):
+        """Timestamps survive a failed flush without overwriting newer uses."""
+        async def failing_writer(updates):
+            buffer.record("k1", datetime(2024, 1, 3))
+            raise RuntimeError("database unavailable")
+
+        buffer = LastUsedBuffer(failing_writer)
+        buffer.record("k1", datetime(2024, 1, 1))
+        buffer.record("k2", datetime(2024, 1, 1))
+
+        assert await buffer.flush() == 0
+        assert buffer._pending == {"k1": datetime(2024, 1, 3), "k2": datetime(2024, 1, 1)}
@@ -0,0 +1,137 @@
+"""
+Unit tests for the JWT authentication caches.
+"""
+import json
+import time
+
+import httpx
+import pytest
+
+from apps.api.middleware.auth_cache import (
+    JWKSCache,
+    JWKSUnavailableError,
+    UserProfileCache,
+    VerifiedTokenCache,
+)
+
+JWKS_URL = "http://jwks.local/.well-known/jwks.json"
+
+
+class JWKSFileServer:
+    """Serves a JWKS file the way the issuer would, counting requests."""
+
+    def __init__(self, path):
+        self.path = path
+        self.requests = 0
+        self.fail = False
+
+    def publish(self, *kids):
+        self.path.write_text(json.dumps({"keys": [{"kid": kid, "kty": "RSA", "n": kid, "e": "AQAB"} for kid in kids]}))
+
+    def handler(self, request):
+        self.requests += 1
+        if self.fail:
+            return httpx.Response(503)
+        return httpx.Response(200, content=self.path.read_bytes(), headers={"Content-Type": "application/json"})
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = JWKSFileServer(tmp_path / "jwks.json")
+    server.publish("key-1")
+    return server
+
+
+class TestJWKSCache:
+    """Tests for JWKSCache."""
+
+    @pytest.mark.asyncio
+    async def test_keys_are_fetched_once(self, server):
+        """Repeated lookups are served from the cache."""
+        cache = JWKSCache(JWKS_URL, client=server.client())
+
+        for _ in range(5):
+            assert (await cache.get_key("key-1"))["kid"] == "key-1"
+
+        assert server.requests == 1
+        assert cache.stats["hits"] == 5
+
+    @pytest.mark.asyncio
+    async def test_unknown_kid_refetches_at_most_once_per_interval(self, server):
+        """A rotated key is picked up, but unknown kids cannot hammer the issuer."""
+        cache = JWKSCache(JWKS_URL, client=server.client(), min_refetch_interval=0)
+        await cache.get_key("key-1")
+
+        server.publish("key-1", "key-2")
+        assert (await cache.get_key("key-2"))["kid"] == "key-2"
+        assert server.requests == 2
+
+        cache.min_refetch_interval = 60
+        assert await cache.get_key("forged") is None
+        assert await cache.get_key("forged") is None
+        assert server.requests == 2
+
+    @pytest.mark.asyncio
+    async def test_cached_keys_survive_a_failed_refresh(self, server):
+        """Keys are kept when the issuer is unavailable."""
+        cache = JWKSCache(JWKS_URL, client=server.client())
+        await cache.get_key("key-1")
+
+        server.fail = True
+        assert not await cache.refresh()
+
+        assert (await cache.get_key("key-1"))["kid"] == "key-1"
+        assert cache.stats["fetch_errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_no_keys_raises(self, server):
+        """Authentication cannot proceed without any keys."""
+        server.fail = True
+        cache = JWKSCache(JWKS_URL, client=server.client())
+
+        with pytest.raises(JWKSUnavailableError):
+            await cache.get_key("key-1")
+
+
+class TestVerifiedTokenCache:
+    """Tests for VerifiedTokenCache."""
+
+    def test_entries_never_outlive_token_expiry(self):
+        """Claims are dropped at exp even when the TTL is longer."""
+        cache = VerifiedTokenCache(ttl=300)
+        cache.put("live", {"sub": "a", "exp": time.time() + 60})
+        cache.put("expired", {"sub": "b", "exp": time.time() - 1})
+
+        assert cache.get("live")["sub"] == "a"
+        assert cache.get("expired") is None
+        assert "live" not in cache._entries
+
+    def test_size_is_bounded(self):
+        """The least recently used token is evicted first."""
+        cache = VerifiedTokenCache(ttl=60, max_size=2)
+        cache.put("one", {"sub": "1"})
+        cache.put("two", {"sub": "2"})
+        cache.get("one")
+        cache.put("three", {"sub": "3"})
+
+        assert cache.get("two") is None
+        assert cache.get("one") is not None
+
+
+class TestUserProfileCache:
+    """Tests for UserProfileCache."""
+
+    def test_invalidate_by_user_id(self):
+        """Profiles can be invalidated by database ID after an update."""
+        cache = UserProfileCache(ttl=60)
+        cache.put("auth0|1", {"id": 1, "email": "a@example.com", "is_admin": False})
+
+        cached = cache.get("auth0|1")
+        cached["is_admin"] = True
+        assert cache.get("auth0|1")["is_admin"] is False
+
+        cache.invalidate(user_id=1)
+        assert cache.get("auth0|1") is None
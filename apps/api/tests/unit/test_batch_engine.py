@@ -0,0 +1,239 @@
+"""
+Unit tests for the model routing batch engine.
+"""
+import asyncio
+
+import pytest
+
+from apps.api.ai.routing.batch_engine import BatchEngine
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+        self.raw_response = None
+
+
+class FakeAdapter:
+    """Adapter recording concurrency, with optional delays and failures."""
+
+    def __init__(self, provider, delay=0.01, fail=False):
+        self.provider = provider
+        self.delay = delay
+        self.fail = fail
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def generate(self, prompt, **params):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay(prompt) if callable(self.delay) else self.delay)
+            if self.fail:
+                raise RuntimeError("provider error")
+            return FakeResponse(f"{self.provider}:{prompt}")
+        finally:
+            self.in_flight -= 1
+
+
+class FakeBatchAdapter(FakeAdapter):
+    """Adapter with a native batch method."""
+
+    def __init__(self, provider):
+        super().__init__(provider)
+        self.batch_sizes = []
+
+    async def generate_batch(self, prompts, **params):
+        self.batch_sizes.append(len(prompts))
+        return [FakeResponse(f"batch:{p}") for p in prompts]
+
+
+class FakeRoutingService:
+    """The parts of ModelRoutingService the engine uses."""
+
+    def __init__(self, adapters, chain):
+        self.adapters = adapters
+        self.chain = chain
+        self.resolutions = 0
+
+    def resolve_model_chain(self, task_type, complexity=None, requirements=None, override_model=None):
+        self.resolutions += 1
+        return [override_model] if override_model else list(self.chain)
+
+    def _is_circuit_open(self, model_id):
+        return False
+
+    def _update_metrics(self, model_id, success, duration):
+        pass
+
+    def _prepare_result(self, model_id, response, duration, prompt_tokens, completion_tokens):
+        return {"success": True, "model": model_id, "content": response.content}
+
+
+class FakeThrottler:
+    def __init__(self, throttled_calls):
+        self.throttled_calls = throttled_calls
+
+    async def check_throttle(self, model, user_id=None, priority="normal", tokens=None):
+        if self.throttled_calls:
+            self.throttled_calls -= 1
+            return True, 0.01, "rate limited"
+        return False, None, None
+
+
+async def collect(engine, prompts, **kwargs):
+    return [result async for result in engine.run(prompts, "email_personalization", **kwargs)]
+
+
+class TestBatchEngine:
+    """Tests for BatchEngine."""
+
+    @pytest.mark.asyncio
+    async def test_provider_window_caps_concurrency(self):
+        """No more calls than the provider's window are in flight at once."""
+        adapter = FakeAdapter("openai")
+        service = FakeRoutingService({"gpt-4": adapter}, ["gpt-4"])
+        engine = BatchEngine(service, config={"provider_concurrency": {"openai": 3}})
+
+        results = await collect(engine, [f"p{i}" for i in range(30)])
+
+        assert len(results) == 30
+        assert all(r["success"] for r in results)
+        assert adapter.max_in_flight == 3
+        assert service.resolutions == 1
+
+    @pytest.mark.asyncio
+    async def test_results_stream_in_completion_order(self):
+        """Fast prompts are yielded before slow ones submitted earlier."""
+        adapter = FakeAdapter("openai", delay=lambda prompt: 0.05 if prompt == "slow" else 0.0)
+        engine = BatchEngine(FakeRoutingService({"gpt-4": adapter}, ["gpt-4"]))
+
+        results = await collect(engine, ["slow", "fast-1", "fast-2"])
+
+        assert [r["prompt_index"] for r in results][-1] == 0
+
+    @pytest.mark.asyncio
+    async def test_native_batches_group_prompts(self):
+        """Adapters with generate_batch receive chunks of prompts in one call."""
+        adapter = FakeBatchAdapter("anthropic")
+        engine = BatchEngine(FakeRoutingService({"claude-3": adapter}, ["claude-3"]), config={"native_batch_size": 10})
+
+        prompts = [f"p{i}" for i in range(25)] + [{"prompt": "long", "max_tokens": 4000}]
+        results = await collect(engine, prompts)
+
+        assert sorted(adapter.batch_sizes) == [5, 10, 10]
+        assert adapter.calls == 1
+        assert {r["prompt_index"] for r in results} == set(range(26))
+
+    @pytest.mark.asyncio
+    async def test_failed_items_fall_back_along_chain(self):
+        """Items that fail on the primary model are retried on the next model."""
+        service = FakeRoutingService(
+            {"gpt-4": FakeAdapter("openai", fail=True), "claude-3": FakeAdapter("anthropic")},
+            ["gpt-4", "claude-3"],
+        )
+        engine = BatchEngine(service, config={"provider_concurrency": 1})
+
+        results = await collect(engine, ["a", "b", "c"])
+
+        assert [r["model"] for r in results] == ["claude-3"] * 3
+        assert engine.stats["fallbacks"] == 3
+
+    @pytest.mark.asyncio
+    async def test_override_model_errors_without_fallback(self):
+        service = FakeRoutingService({"gpt-4": FakeAdapter("openai", fail=True)}, ["gpt-4"])
+        results = await collect(BatchEngine(service), ["a"], override_model="gpt-4")
+
+        assert results[0]["success"] is False
+        assert results[0]["error_type"] == "RuntimeError"
+
+    @pytest.mark.asyncio
+    async def test_waits_for_throttling_service(self):
+        """Throttled calls wait and retry instead of failing."""
+        engine = BatchEngine(
+            FakeRoutingService({"gpt-4": FakeAdapter("openai")}, ["gpt-4"]),
+            throttling_service=FakeThrottler(throttled_calls=2),
+        )
+
+        results = await collect(engine, ["a"])
+
+        assert results[0]["success"]
+        assert engine.stats["throttle_waits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_throttle_waits_do_not_hold_window_slots(self):
+        """Chunks are paced before they take a provider slot."""
+        throttler = FakeThrottler(throttled_calls=3)
+        engine = BatchEngine(
+            FakeRoutingService({"gpt-4": FakeAdapter("openai")}, ["gpt-4"]),
+            config={"provider_concurrency": {"openai": 2}},
+            throttling_service=throttler,
+        )
+        free_slots = []
+        check_throttle = throttler.check_throttle
+
+        async def recording_check(model, **kwargs):
+            free_slots.append(engine.window("openai")._value)
+            return await check_throttle(model, **kwargs)
+
+        throttler.check_throttle = recording_check
+        results = await collect(engine, ["a"])
+
+        assert results[0]["success"]
+        assert free_slots == [2] * 4
+
+    @pytest.mark.asyncio
+    async def test_malformed_response_does_not_hang_the_batch(self):
+        """A response that cannot be turned into a result fails over instead of stalling run()."""
+        broken = FakeAdapter("openai")
+        broken.generate = lambda prompt, **params: asyncio.sleep(0, result=FakeResponse(None))
+        service = FakeRoutingService({"gpt-4": broken, "claude-3": FakeAdapter("anthropic")}, ["gpt-4", "claude-3"])
+
+        results = await asyncio.wait_for(collect(BatchEngine(service), ["a", "b"]), timeout=2)
+
+        assert [r["model"] for r in results] == ["claude-3", "claude-3"]
+
+    @pytest.mark.asyncio
+    async def test_failed_group_reports_its_remaining_items(self):
+        """If a model group dies, its unfinished items are returned as errors."""
+        service = FakeRoutingService({"gpt-4": FakeAdapter("openai", fail=True)}, ["gpt-4", "claude-3"])
+
+        def broken_circuit(model_id):
+            raise KeyError(model_id)
+
+        service._is_circuit_open = broken_circuit
+
+        results = await asyncio.wait_for(collect(BatchEngine(service), ["a", "b", "c"]), timeout=2)
+
+        assert sorted(r["prompt_index"] for r in results) == [0, 1, 2]
+        assert all(r["error_type"] == "KeyError" for r in results)
+
+    @pytest.mark.asyncio
+    async def test_offline_jobs_release_the_window_while_polling(self):
+        """Online calls are not starved by an offline job waiting for results."""
+        class OfflineAdapter(FakeAdapter):
+            def __init__(self):
+                super().__init__("openai")
+                self.polls = 0
+
+            async def submit_batch(self, prompts, **params):
+                self.prompts = prompts
+                return "job-1"
+
+            async def poll_batch(self, job_id):
+                self.polls += 1
+                return [FakeResponse(p) for p in self.prompts] if self.polls > 3 else None
+
+        engine = BatchEngine(
+            FakeRoutingService({"gpt-4": OfflineAdapter()}, ["gpt-4"]),
+            config={"provider_concurrency": 1, "batch_poll_interval": 0.01},
+        )
+        offline = asyncio.create_task(collect(engine, ["a", "b"], urgent=False))
+        await asyncio.sleep(0.015)
+
+        assert engine.get_stats()["windows"]["openai"]["available"] == 1
+        online = await asyncio.wait_for(collect(engine, ["c"]), timeout=0.5)
+        assert online[0]["success"]
+        assert len(await offline) == 2
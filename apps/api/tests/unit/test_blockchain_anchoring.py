@@ -0,0 +1,156 @@
+"""
+Unit tests for batched Merkle-root anchoring.
+"""
+import asyncio
+import hashlib
+import threading
+import pytest
+
+from apps.api.services.blockchain_anchoring import (
+    AnchoringQueue,
+    NonceManager,
+    build_merkle_tree,
+    merkle_proof,
+    merkle_root,
+    verify_merkle_proof,
+)
+
+
+def content_hash(i):
+    return hashlib.sha256(f"document-{i}".encode()).hexdigest()
+
+
+class TestMerkleTree:
+    """Tests for Merkle tree construction and proofs."""
+
+    def test_every_leaf_has_valid_proof(self):
+        """Each leaf's proof verifies against the root for odd and even sizes."""
+        for size in [1, 2, 3, 7, 8, 33]:
+            hashes = [content_hash(i) for i in range(size)]
+            levels = build_merkle_tree(hashes)
+            root = merkle_root(levels)
+
+            for index, leaf in enumerate(hashes):
+                assert verify_merkle_proof(leaf, merkle_proof(levels, index), root)
+
+    def test_proof_rejects_other_content(self):
+        """A proof does not verify a hash that was not in the batch."""
+        hashes = [content_hash(i) for i in range(4)]
+        levels = build_merkle_tree(hashes)
+
+        assert not verify_merkle_proof(content_hash(99), merkle_proof(levels, 0), merkle_root(levels))
+
+    def test_proof_rejects_wrong_root(self):
+        """A proof does not verify against a different batch's root."""
+        levels = build_merkle_tree([content_hash(i) for i in range(4)])
+        other = build_merkle_tree([content_hash(i) for i in range(4, 8)])
+
+        assert not verify_merkle_proof(content_hash(0), merkle_proof(levels, 0), merkle_root(other))
+
+    def test_empty_batch_rejected(self):
+        """Building a tree without leaves is an error."""
+        with pytest.raises(ValueError):
+            build_merkle_tree([])
+
+
+class TestNonceManager:
+    """Tests for NonceManager."""
+
+    @pytest.mark.asyncio
+    async def test_fetches_once_and_increments(self):
+        """The chain nonce is read once and then incremented locally."""
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return 10
+
+        manager = NonceManager(fetch)
+        assert [await manager.next() for _ in range(3)] == [10, 11, 12]
+        assert len(calls) == 1
+
+        await manager.reset()
+        assert await manager.next() == 10
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_fetch_runs_off_the_event_loop(self):
+        """The blocking chain read does not run on the event loop thread."""
+        loop_thread = threading.get_ident()
+        threads = []
+
+        def fetch():
+            threads.append(threading.get_ident())
+            return 3
+
+        assert await NonceManager(fetch).next() == 3
+        assert threads and threads[0] != loop_thread
+
+
+class TestAnchoringQueue:
+    """Tests for AnchoringQueue."""
+
+    @pytest.mark.asyncio
+    async def test_batches_into_single_transaction(self):
+        """A full batch is anchored with one submission."""
+        submissions = []
+
+        async def submitter(root, size):
+            submissions.append((root, size))
+            return {"transaction_id": "0xabc", "block_number": 1, "timestamp": "now"}
+
+        queue = AnchoringQueue(submitter, max_batch_size=5, max_wait_seconds=10)
+        hashes = [content_hash(i) for i in range(5)]
+        records = await asyncio.gather(*[queue.submit(h, {}, "user") for h in hashes])
+
+        assert len(submissions) == 1
+        assert submissions[0][1] == 5
+        for h, record in zip(hashes, records):
+            assert record["merkle_root"] == submissions[0][0]
+            assert verify_merkle_proof(h, record["merkle_proof"], record["merkle_root"])
+
+    @pytest.mark.asyncio
+    async def test_partial_batch_flushes_after_wait(self):
+        """A partial batch is anchored once the wait window elapses."""
+        async def submitter(root, size):
+            return {"transaction_id": "0xabc", "block_number": 1, "timestamp": "now"}
+
+        queue = AnchoringQueue(submitter, max_batch_size=100, max_wait_seconds=0.01)
+        record = await asyncio.wait_for(queue.submit(content_hash(1), {}, "user"), timeout=1)
+
+        assert record["batch_size"] == 1
+        assert queue.get_stats()["batches_submitted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_submission_failure_propagates(self):
+        """All waiters in a failed batch receive the error."""
+        async def submitter(root, size):
+            raise ConnectionError("node unavailable")
+
+        queue = AnchoringQueue(submitter, max_batch_size=2, max_wait_seconds=10)
+        results = await asyncio.gather(
+            queue.submit(content_hash(1), {}, "user"),
+            queue.submit(content_hash(2), {}, "user"),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_background_batches_are_referenced_until_done(self):
+        """Batch tasks stay referenced while anchoring and are released afterwards."""
+        release = asyncio.Event()
+
+        async def submitter(root, size):
+            await release.wait()
+            return {"transaction_id": "0xabc", "block_number": 1, "timestamp": "now"}
+
+        queue = AnchoringQueue(submitter, max_batch_size=1, max_wait_seconds=10)
+        future = await queue.enqueue(content_hash(1), {}, "user")
+        await asyncio.sleep(0)
+
+        assert len(queue._tasks) == 1
+        release.set()
+        await asyncio.wait_for(future, timeout=1)
+        await asyncio.sleep(0)
+        assert not queue._tasks
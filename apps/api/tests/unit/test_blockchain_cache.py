@@ -0,0 +1,155 @@
+"""
+Unit tests for the two-level blockchain cache.
+"""
+import asyncio
+import json
+import pytest
+
+from apps.api.services.blockchain_cache import TieredCache, MISSING_MARKER
+
+
+class FakeLocalCache:
+    """Async dict-backed stand-in for TimedCache."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.data[key] = value
+        self.ttls[key] = ttl
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeRedis:
+    """Async dict-backed stand-in for the shared Redis client."""
+
+    def __init__(self):
+        self.data = {}
+        self.expiries = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, expire=None):
+        self.data[key] = value
+        self.expiries[key] = expire
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+def make_cache(redis=None):
+    return TieredCache(FakeLocalCache(), redis or FakeRedis(), "test", ttl=60, negative_ttl=5)
+
+
+class TestTieredCache:
+    """Tests for TieredCache."""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_concurrent_misses(self):
+        """Concurrent requests for the same key trigger one load."""
+        cache = make_cache()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"number": 1}
+
+        results = await asyncio.gather(*[cache.get_or_load("1", loader) for _ in range(10)])
+
+        assert calls == 1
+        assert all(result == {"number": 1} for result in results)
+        assert cache.get_stats()["coalesced"] == 9
+
+    @pytest.mark.asyncio
+    async def test_shared_tier_serves_other_processes(self):
+        """A value loaded by one process is read from Redis by another."""
+        redis = FakeRedis()
+        first, second = make_cache(redis), make_cache(redis)
+
+        async def loader():
+            return {"number": 1}
+
+        async def failing_loader():
+            raise AssertionError("should not hit the source")
+
+        await first.get_or_load("1", loader)
+        assert await second.get_or_load("1", failing_loader) == {"number": 1}
+        assert second.get_stats()["redis_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_negative_caching(self):
+        """Missing items are cached with the negative TTL."""
+        redis = FakeRedis()
+        cache = make_cache(redis)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return None
+
+        assert await cache.get_or_load("missing", loader) is None
+        assert await cache.get_or_load("missing", loader) is None
+        assert calls == 1
+        assert json.loads(redis.data["cache:missing:test:missing"]) == MISSING_MARKER
+        assert redis.expiries["cache:missing:test:missing"] == 5
+
+    @pytest.mark.asyncio
+    async def test_misses_stay_out_of_the_namespace(self):
+        """A cached miss is not visible to scans of the namespace and is shared."""
+        redis = FakeRedis()
+        first, second = make_cache(redis), make_cache(redis)
+
+        async def loader():
+            return None
+
+        async def failing_loader():
+            raise AssertionError("should not hit the source")
+
+        assert await first.get_or_load("missing", loader) is None
+        assert not [key for key in redis.data if key.startswith("test:")]
+        assert await second.get_or_load("missing", failing_loader) is None
+        assert second.get_stats()["negative_hits"] == 1
+
+        await second.invalidate("missing")
+        assert redis.data == {}
+
+    @pytest.mark.asyncio
+    async def test_immutable_values_have_no_expiry(self):
+        """Values marked immutable are stored in Redis without a TTL."""
+        redis = FakeRedis()
+        cache = make_cache(redis)
+
+        async def final_loader():
+            return {"number": 1}, True
+
+        async def recent_loader():
+            return {"number": 2}, False
+
+        await cache.get_or_load("1", final_loader)
+        await cache.get_or_load("2", recent_loader)
+
+        assert redis.expiries["test:1"] is None
+        assert redis.expiries["test:2"] == 60
+
+    @pytest.mark.asyncio
+    async def test_invalidate_clears_both_tiers(self):
+        """Invalidation forces the next read to reload."""
+        cache = make_cache()
+        values = iter([{"v": 1}, {"v": 2}])
+
+        async def loader():
+            return next(values)
+
+        assert await cache.get_or_load("k", loader) == {"v": 1}
+        await cache.invalidate("k")
+        assert await cache.get_or_load("k", loader) == {"v": 2}
@@ -0,0 +1,240 @@
+"""
+Unit tests for the blockchain confirmation watcher.
+"""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from apps.api.services.blockchain_confirmation import (
+    ConfirmationWatcher,
+    PENDING_TX_INDEX_KEY,
+    PENDING_TX_PREFIX,
+)
+
+
+class FakeRedis:
+    """In-memory async Redis stand-in."""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, expire=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def sadd(self, key, *values):
+        self.sets.setdefault(key, set()).update(values)
+
+    async def smembers(self, key):
+        return list(self.sets.get(key, set()))
+
+    async def srem(self, key, *values):
+        self.sets.get(key, set()).difference_update(values)
+
+
+class FakeChain:
+    """Minimal web3-like chain with blocks and receipts."""
+
+    def __init__(self):
+        self.block_number = 100
+        self.blocks = {}
+        self.receipts = {}
+        self.get_block_calls = 0
+        self.receipt_calls = 0
+        self.receipt_errors = 0
+
+    def mine(self, tx_hashes, status=1):
+        self.block_number += 1
+        self.blocks[self.block_number] = SimpleNamespace(transactions=list(tx_hashes))
+        for tx_hash in tx_hashes:
+            self.receipts[tx_hash] = SimpleNamespace(status=status, blockNumber=self.block_number, logs=[])
+
+    def get_block(self, number):
+        self.get_block_calls += 1
+        return self.blocks.get(number, SimpleNamespace(transactions=[]))
+
+    def get_transaction_receipt(self, tx_hash):
+        self.receipt_calls += 1
+        if self.receipt_errors:
+            self.receipt_errors -= 1
+            raise ConnectionError("RPC unavailable")
+        return self.receipts.get(tx_hash)
+
+    @property
+    def eth(self):
+        return self
+
+
+def make_watcher(chain, redis, handler, confirmations=2):
+    return ConfirmationWatcher(
+        get_web3=AsyncMock(return_value=chain),
+        redis=redis,
+        handlers={"verification": handler},
+        confirmations=confirmations,
+    )
+
+
+class TestConfirmationWatcher:
+    """Tests for ConfirmationWatcher."""
+
+    @pytest.mark.asyncio
+    async def test_resolves_batch_after_confirmations(self):
+        """Transactions are resolved once they have enough confirmations."""
+        chain, redis, handler = FakeChain(), FakeRedis(), AsyncMock()
+        watcher = make_watcher(chain, redis, handler)
+        watcher.start = lambda: None
+
+        await watcher.track("0xaa", "verification", subject="hash-1", notify="user-1")
+        await watcher.track("0xaa", "verification", subject="hash-2", notify="user-1")
+        await watcher.track("0xbb", "verification", subject="hash-3")
+        await watcher.poll_once()
+
+        chain.mine(["0xaa", "0xbb"])
+        assert await watcher.poll_once() == 0
+        chain.mine([])
+        assert await watcher.poll_once() == 2
+
+        assert handler.await_count == 2
+        first = handler.await_args_list[0].args[0]
+        assert first.subjects == ["hash-1", "hash-2"]
+        assert watcher.pending == {}
+        assert not any(key.startswith(PENDING_TX_PREFIX) for key in redis.data)
+        assert not redis.sets[PENDING_TX_INDEX_KEY]
+
+    @pytest.mark.asyncio
+    async def test_scans_each_block_once_for_all_pending(self):
+        """Block scanning cost does not grow with the number of pending transactions."""
+        chain, redis = FakeChain(), FakeRedis()
+        watcher = make_watcher(chain, redis, AsyncMock(), confirmations=1)
+        watcher.start = lambda: None
+
+        hashes = [f"0x{i:02x}" for i in range(20)]
+        for tx_hash in hashes:
+            await watcher.track(tx_hash, "verification", subject=tx_hash)
+        await watcher.poll_once()
+        chain.get_block_calls = 0
+
+        chain.mine(hashes)
+        await watcher.poll_once()
+
+        assert chain.get_block_calls == 1
+        assert watcher.confirmed_count == 20
+
+    @pytest.mark.asyncio
+    async def test_failed_transaction_notifies(self):
+        """Reverted transactions are reported as failed."""
+        chain, redis = FakeChain(), FakeRedis()
+        notifier = AsyncMock()
+        watcher = ConfirmationWatcher(
+            get_web3=AsyncMock(return_value=chain),
+            redis=redis,
+            handlers={},
+            notifier=notifier,
+            confirmations=1,
+        )
+        watcher.start = lambda: None
+
+        await watcher.track("0xcc", "token", subject="cert-1", notify="user-1")
+        waiter = watcher.wait_for("0xcc")
+        await watcher.poll_once()
+        chain.mine(["0xcc"], status=0)
+        await watcher.poll_once()
+
+        assert await waiter == "failed"
+        notifier.assert_awaited_once()
+        assert notifier.await_args.args[1] == "failed"
+
+    @pytest.mark.asyncio
+    async def test_recovers_pending_from_redis(self):
+        """Pending transactions persisted by another process are reloaded."""
+        chain, redis = FakeChain(), FakeRedis()
+        first = make_watcher(chain, redis, AsyncMock())
+        first.start = lambda: None
+        await first.track("0xdd", "verification", subject="hash-1", notify="user-1")
+
+        second = make_watcher(chain, redis, AsyncMock())
+        assert await second.recover() == 1
+        assert second.pending["0xdd"].subjects == ["hash-1"]
+        assert second.pending["0xdd"].notify == {"user-1"}
+
+    @pytest.mark.asyncio
+    async def test_recover_prunes_expired_index_entries(self):
+        """Index entries whose record expired are dropped instead of recovered."""
+        chain, redis = FakeChain(), FakeRedis()
+        first = make_watcher(chain, redis, AsyncMock())
+        first.start = lambda: None
+        await first.track("0xdd", "verification", subject="hash-1")
+        await first.track("0xee", "verification", subject="hash-2")
+        await redis.delete(f"{PENDING_TX_PREFIX}0xee")
+
+        second = make_watcher(chain, redis, AsyncMock())
+
+        assert await second.recover() == 1
+        assert redis.sets[PENDING_TX_INDEX_KEY] == {"0xdd"}
+
+    @pytest.mark.asyncio
+    async def test_finds_transactions_tracked_after_their_block(self):
+        """A hash tracked after its block was scanned is located by receipt."""
+        chain, redis, handler = FakeChain(), FakeRedis(), AsyncMock()
+        watcher = make_watcher(chain, redis, handler)
+        watcher.start = lambda: None
+
+        await watcher.track("0xaa", "verification", subject="hash-1")
+        await watcher.poll_once()
+        chain.mine(["0xbb"])
+        await watcher.poll_once()
+
+        await watcher.track("0xbb", "verification", subject="hash-2")
+        chain.mine([])
+
+        assert await watcher.poll_once() == 1
+        assert handler.await_args.args[0].tx_hash == "0xbb"
+        assert "0xaa" in watcher.pending
+
+    @pytest.mark.asyncio
+    async def test_transient_receipt_error_is_retried(self):
+        """A failed receipt fetch keeps the inclusion block and retries."""
+        chain, redis, handler = FakeChain(), FakeRedis(), AsyncMock()
+        watcher = make_watcher(chain, redis, handler, confirmations=1)
+        watcher.start = lambda: None
+
+        await watcher.track("0xaa", "verification", subject="hash-1")
+        await watcher.poll_once()
+        chain.mine(["0xaa"])
+        chain.receipt_errors = 1
+
+        assert await watcher.poll_once() == 0
+        assert watcher.pending["0xaa"].included_in_block == chain.block_number
+        assert await watcher.poll_once() == 1
+        assert watcher.confirmed_count == 1
+
+    @pytest.mark.asyncio
+    async def test_timeout_checks_the_receipt_before_failing(self):
+        """Mined transactions the scan missed are confirmed, unmined ones fail."""
+        chain, redis, handler = FakeChain(), FakeRedis(), AsyncMock()
+        watcher = make_watcher(chain, redis, handler, confirmations=1)
+        watcher.start = lambda: None
+
+        await watcher.track("0xaa", "verification", subject="hash-1")
+        await watcher.track("0xbb", "verification", subject="hash-2")
+        chain.receipt_errors = 2
+        await watcher.poll_once()
+        # Mined in a block the watcher has already passed
+        chain.receipts["0xaa"] = SimpleNamespace(status=1, blockNumber=chain.block_number, logs=[])
+        watcher._unlocated.clear()
+        for pending in watcher.pending.values():
+            pending.submitted_at -= watcher.timeout_seconds + 1
+
+        chain.receipt_errors = 2
+        assert await watcher.poll_once() == 0
+        assert watcher.failed_count == 0
+
+        assert await watcher.poll_once() == 2
+        assert watcher.confirmed_count == 1
+        assert watcher.failed_count == 1
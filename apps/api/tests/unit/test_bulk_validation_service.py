@@ -0,0 +1,192 @@
+"""
+Unit tests for the bulk contact validation service.
+"""
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from apps.api.services.bulk_validation_service import BulkValidationService, DomainCache
+
+
+class FakeContactService:
+    """Minimal stand-in for ContactService that counts calls."""
+
+    def __init__(self, smtp_delay: float = 0.0):
+        self.smtp_delay = smtp_delay
+        self.reputation_calls = 0
+        self.smtp_in_flight = {}
+        self.max_smtp_in_flight = {}
+
+    async def _validate_email_syntax(self, email):
+        if "@" not in email:
+            return {"valid": False, "score": 0.0, "reason": "Invalid email format"}
+        return {"valid": True, "score": 1.0, "reason": "Valid email format"}
+
+    async def _check_domain_reputation(self, email):
+        self.reputation_calls += 1
+        return {"score": 0.9, "status": "good", "reason": "No negative signals detected"}
+
+    async def _validate_email_smtp(self, email):
+        domain = email.split("@")[-1]
+        self.smtp_in_flight[domain] = self.smtp_in_flight.get(domain, 0) + 1
+        self.max_smtp_in_flight[domain] = max(
+            self.max_smtp_in_flight.get(domain, 0), self.smtp_in_flight[domain]
+        )
+        await asyncio.sleep(self.smtp_delay)
+        self.smtp_in_flight[domain] -= 1
+        return {"valid": True, "score": 1.0, "reason": "SMTP verification passed"}
+
+
+async def resolved(domain):
+    return {"has_mx": True, "mx_hosts": [domain], "reason": "MX records found"}
+
+
+class TestDomainCache:
+    """Tests for DomainCache."""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_concurrent_loads(self):
+        """Concurrent misses for the same key call the loader once."""
+        cache = DomainCache(ttl=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"value": 1}
+
+        results = await asyncio.gather(*[cache.get_or_load("example.com", loader) for _ in range(10)])
+
+        assert calls == 1
+        assert all(result == {"value": 1} for result in results)
+
+    def test_evicts_least_recently_used(self):
+        """The cache stays within max_size."""
+        cache = DomainCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+
+class TestBulkValidationService:
+    """Tests for BulkValidationService."""
+
+    @pytest.mark.asyncio
+    async def test_domain_checks_run_once_per_domain(self):
+        """Reputation and DNS are looked up once per domain."""
+        contact_service = FakeContactService()
+        service = BulkValidationService(contact_service)
+        emails = [f"user{i}@example.com" for i in range(20)] + ["a@other.org", "b@other.org"]
+
+        with patch.object(service, "_resolve_domain", side_effect=resolved) as resolve:
+            results = await service.validate(emails)
+
+        assert len(results) == 22
+        assert all(result["valid"] for result in results.values())
+        assert contact_service.reputation_calls == 2
+        assert resolve.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_per_domain_concurrency_limit(self):
+        """SMTP probes never exceed the per-domain limit."""
+        contact_service = FakeContactService(smtp_delay=0.01)
+        service = BulkValidationService(contact_service, per_domain_concurrency=3)
+        emails = [f"user{i}@example.com" for i in range(15)]
+
+        with patch.object(service, "_resolve_domain", side_effect=resolved):
+            await service.validate(emails)
+
+        assert contact_service.max_smtp_in_flight["example.com"] <= 3
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_each_address_once(self):
+        """Duplicates are collapsed and invalid syntax is reported."""
+        service = BulkValidationService(FakeContactService())
+
+        with patch.object(service, "_resolve_domain", side_effect=resolved):
+            results = [result async for result in service.stream(["a@example.com", "a@example.com", "bad"])]
+
+        assert sorted(result["email"] for result in results) == ["a@example.com", "bad"]
+        assert next(r for r in results if r["email"] == "bad")["valid"] is False
+
+    @pytest.mark.asyncio
+    async def test_unresolvable_domain_skips_smtp(self):
+        """Domains without MX are marked invalid without an SMTP probe."""
+        contact_service = FakeContactService()
+        service = BulkValidationService(contact_service)
+
+        async def unresolved(domain):
+            return {"has_mx": False, "mx_hosts": [], "reason": "Domain does not resolve"}
+
+        with patch.object(service, "_resolve_domain", side_effect=unresolved):
+            results = await service.validate(["user@nowhere.invalid"])
+
+        assert results["user@nowhere.invalid"]["valid"] is False
+        assert contact_service.max_smtp_in_flight == {}
+
+    @pytest.mark.asyncio
+    async def test_idle_domain_limiters_are_evicted(self):
+        """Per-domain limiters stay within max_tracked_domains."""
+        service = BulkValidationService(FakeContactService(), max_tracked_domains=3)
+        emails = [f"user@domain{i}.com" for i in range(10)]
+
+        with patch.object(service, "_resolve_domain", side_effect=resolved):
+            results = await service.validate(emails)
+
+        assert len(results) == 10
+        assert service.get_stats()["tracked_domains"] <= 3
+
+    @pytest.mark.asyncio
+    async def test_stream_uses_a_bounded_worker_pool(self):
+        """No more than max_concurrency validations run at once."""
+        service = BulkValidationService(FakeContactService(), max_concurrency=4)
+        in_flight = 0
+        peak = 0
+        validate_one = service._validate_one
+
+        async def tracked(email, domain):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            try:
+                return await validate_one(email, domain)
+            finally:
+                in_flight -= 1
+
+        service._validate_one = tracked
+        emails = [f"user{i}@domain{i % 7}.com" for i in range(50)]
+
+        with patch.object(service, "_resolve_domain", side_effect=resolved):
+            results = await service.validate(emails)
+
+        assert len(results) == 50
+        assert peak == 4
+
+    @pytest.mark.asyncio
+    async def test_failed_validation_still_yields_a_result(self):
+        """An email whose checks raise is reported with status unknown."""
+        service = BulkValidationService(FakeContactService())
+        validate_one = service._validate_one
+
+        async def flaky(email, domain):
+            if email.startswith("broken"):
+                raise RuntimeError("resolver crashed")
+            return await validate_one(email, domain)
+
+        service._validate_one = flaky
+
+        with patch.object(service, "_resolve_domain", side_effect=resolved):
+            results = await service.validate(["ok@example.com", "broken@example.com"])
+
+        assert len(results) == 2
+        assert results["ok@example.com"]["valid"] is True
+        assert results["broken@example.com"]["status"] == "unknown"
+        assert results["broken@example.com"]["valid"] is False
+        assert "resolver crashed" in results["broken@example.com"]["reason"]
@@ -0,0 +1,124 @@
+"""
+Unit tests for the streaming campaign fan-out.
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from apps.api.services.campaign_fanout import CampaignFanout
+
+
+@pytest.fixture
+def session_factory():
+    """In-memory database with one campaign and seven contacts, one inactive."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE campaigns (id INTEGER PRIMARY KEY, delivery_data JSON)"))
+        conn.execute(text("CREATE TABLE contacts (id INTEGER PRIMARY KEY, email TEXT, status TEXT)"))
+        conn.execute(text("CREATE TABLE campaign_contacts (campaign_id INTEGER, contact_id INTEGER)"))
+        conn.execute(text("INSERT INTO campaigns (id, delivery_data) VALUES (1, '{\"provider\": \"sendgrid\"}')"))
+        for contact_id in (7, 3, 1, 5, 2, 6, 4):
+            status = "unsubscribed" if contact_id == 4 else "active"
+            conn.execute(
+                text("INSERT INTO contacts (id, email, status) VALUES (:id, :email, :status)"),
+                {"id": contact_id, "email": f"user{contact_id}@example.com", "status": status},
+            )
+            conn.execute(
+                text("INSERT INTO campaign_contacts (campaign_id, contact_id) VALUES (1, :id)"),
+                {"id": contact_id},
+            )
+    return sessionmaker(bind=engine)
+
+
+class Publisher:
+    """Records published jobs and can fail on a given call."""
+
+    def __init__(self, fail_on=None):
+        self.jobs = []
+        self.fail_on = fail_on
+
+    async def __call__(self, job):
+        if self.fail_on is not None and len(self.jobs) + 1 == self.fail_on:
+            self.fail_on = None
+            raise ConnectionError("broker unreachable")
+        self.jobs.append(job)
+
+
+class TestCampaignFanout:
+    """Tests for CampaignFanout."""
+
+    @pytest.mark.asyncio
+    async def test_recipients_are_published_in_keyset_chunks(self, session_factory):
+        """Active recipients are published in contact ID order, one job per chunk."""
+        publish = Publisher()
+        fanout = CampaignFanout(session_factory, publish, chunk_size=2)
+
+        checkpoint = await fanout.run(1)
+
+        assert [job["recipients"] for job in publish.jobs] == [
+            ["user1@example.com", "user2@example.com"],
+            ["user3@example.com", "user5@example.com"],
+            ["user6@example.com", "user7@example.com"],
+        ]
+        assert [job["chunk_id"] for job in publish.jobs] == ["1:1-2", "1:3-5", "1:6-7"]
+        assert checkpoint["status"] == "done"
+        assert checkpoint["published"] == checkpoint["total"] == 6
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_is_kept_with_other_delivery_data(self, session_factory):
+        """The checkpoint is stored in the campaign without replacing other data."""
+        fanout = CampaignFanout(session_factory, Publisher(), chunk_size=4)
+
+        await fanout.run(1)
+
+        with session_factory() as session:
+            delivery_data = session.execute(text("SELECT delivery_data FROM campaigns")).scalar_one()
+        assert '"provider": "sendgrid"' in delivery_data
+        saved = fanout.load_checkpoint(1)
+        assert saved["status"] == "done"
+        assert saved["cursor"] == 7
+        assert saved["chunks"] == 2
+
+    @pytest.mark.asyncio
+    async def test_restart_resumes_after_the_last_checkpoint(self, session_factory):
+        """A failed fan-out continues after the last published chunk."""
+        publish = Publisher(fail_on=2)
+        fanout = CampaignFanout(session_factory, publish, chunk_size=2)
+
+        with pytest.raises(ConnectionError):
+            await fanout.run(1)
+        assert fanout.load_checkpoint(1)["cursor"] == 2
+
+        checkpoint = await fanout.run(1)
+
+        assert [job["chunk_id"] for job in publish.jobs] == ["1:1-2", "1:3-5", "1:6-7"]
+        assert checkpoint["published"] == 6
+
+    @pytest.mark.asyncio
+    async def test_completed_fanout_is_not_repeated(self, session_factory):
+        """Running a completed fan-out again publishes nothing."""
+        publish = Publisher()
+        fanout = CampaignFanout(session_factory, publish, chunk_size=10)
+        await fanout.run(1)
+
+        await fanout.run(1)
+
+        assert len(publish.jobs) == 1
+
+    @pytest.mark.asyncio
+    async def test_progress_is_reported_per_chunk(self, session_factory):
+        """The progress callback sees every chunk and the completion."""
+        reports = []
+        fanout = CampaignFanout(
+            session_factory,
+            Publisher(),
+            chunk_size=3,
+            on_progress=lambda campaign_id, checkpoint: reports.append(
+                (campaign_id, checkpoint["published"], checkpoint["status"])
+            ),
+        )
+
+        await fanout.run(1)
+
+        assert reports == [(1, 3, "running"), (1, 6, "running"), (1, 6, "done")]
@@ -0,0 +1,76 @@
+"""
+Unit tests for the shared compiled prompt template cache.
+"""
+from apps.api.ai.prompts.compiled_cache import (
+    CompiledJinjaTemplate,
+    CompiledPlaceholderTemplate,
+    CompiledTemplateCache,
+)
+
+
+def word_counter(text):
+    return len(text.split())
+
+
+class TestCompiledPlaceholderTemplate:
+    """Tests for {{name}} substitution templates."""
+
+    def test_matches_sequential_replace(self):
+        """Rendering matches the previous replace-per-variable behaviour."""
+        source = "Hello {{name}}, your {{item}} ships {{when}}. {{name}}!"
+        variables = {"name": "Ada", "item": "order", "extra": "unused"}
+
+        expected = source
+        for key, value in variables.items():
+            expected = expected.replace(f"{{{{{key}}}}}", str(value))
+
+        assert CompiledPlaceholderTemplate(source).render(variables) == expected
+
+
+class TestCompiledTemplateCache:
+    """Tests for CompiledTemplateCache."""
+
+    def test_compiles_once_per_version(self):
+        """Repeated lookups reuse the compiled template until the version changes."""
+        cache = CompiledTemplateCache()
+        first = cache.get("ns", "welcome", "1.0.0", "Hi {{name}}", CompiledPlaceholderTemplate)
+        second = cache.get("ns", "welcome", "1.0.0", "Hi {{name}}", CompiledPlaceholderTemplate)
+        third = cache.get("ns", "welcome", "1.0.1", "Hello {{name}}", CompiledPlaceholderTemplate)
+
+        assert first is second
+        assert third is not first
+        assert cache.get_stats()["compiles"] == 2
+
+    def test_invalidate_drops_template_entries(self):
+        """Invalidation removes compiled templates and token counts of one template only."""
+        cache = CompiledTemplateCache()
+        cache.get("ns", "a", "v1", "Hi {{name}}", CompiledPlaceholderTemplate)
+        cache.get("ns", "b", "v1", "Bye {{name}}", CompiledPlaceholderTemplate)
+        cache.count_tokens("ns", "a", "v1", "Hi Ada", word_counter)
+
+        cache.invalidate("ns", "a")
+
+        stats = cache.get_stats()
+        assert stats["templates"] == 1
+        assert stats["token_counts"] == 0
+
+    def test_token_count_is_cached_per_render(self):
+        """Rendering the same values again reuses the count of that output."""
+        cache = CompiledTemplateCache()
+        compiled = cache.get("ns", "t", "v1", "Write an email to {{name}} about {{topic}}", CompiledPlaceholderTemplate)
+
+        for name, topic in [("Ada", "the launch plan"), ("Grace", "compilers"), ("Ada", "the launch plan")]:
+            rendered = compiled.render({"name": name, "topic": topic})
+            assert cache.count_tokens("ns", "t", "v1", rendered, word_counter) == word_counter(rendered)
+
+        stats = cache.get_stats()
+        assert stats["token_misses"] == 2
+        assert stats["token_hits"] == 1
+
+    def test_token_count_matches_rendered_output(self):
+        """Values that merge with the text around them are counted as rendered."""
+        cache = CompiledTemplateCache()
+        compiled = CompiledJinjaTemplate("{{ first }}{{ second }}")
+        rendered = compiled.render({"first": "data", "second": "base"})
+
+        assert cache.count_tokens("ns", "merge", "v1", rendered, word_counter) == 1
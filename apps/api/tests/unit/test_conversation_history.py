@@ -0,0 +1,264 @@
+"""
+Unit tests for conversation history storage and prompt windows.
+"""
+import threading
+
+import pytest
+
+from apps.api.ai.conversation.history_manager import (
+    ConversationHistoryManager,
+    SUMMARY_PREFIX,
+    extractive_summary,
+)
+from apps.api.ai.conversation.storage import (
+    InMemoryConversationStore,
+    RedisConversationStore,
+    create_conversation_store,
+)
+
+
+class FakeRedis:
+    """Synchronous Redis stand-in with the list, hash and sorted set commands the store uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = 0
+
+    def register_script(self, source):
+        def append(keys, args):
+            messages, tokens, ids, meta = keys
+            payload, token_count, message_id, updated_at, _ = args
+            self.data.setdefault(messages, []).append(payload)
+            self.data.setdefault(tokens, []).append(str(token_count))
+            n = len(self.data[messages])
+            self.data.setdefault(ids, {})[message_id] = str(n - 1)
+            self.data.setdefault(meta, {}).update(updated_at=updated_at, message_count=str(n))
+            return n - 1
+        return append
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()})
+
+    def hsetnx(self, key, field, value):
+        self.data.setdefault(key, {}).setdefault(field, str(value))
+
+    def hgetall(self, key):
+        self.commands += 1
+        return dict(self.data.get(key, {}))
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def zadd(self, key, mapping, nx=False):
+        zset = self.data.setdefault(key, {})
+        for member, score in mapping.items():
+            if not (nx and member in zset):
+                zset[member] = score
+
+    def zrange(self, key, start, end):
+        members = sorted(self.data.get(key, {}), key=self.data.get(key, {}).get)
+        return members[start:None if end == -1 else end + 1]
+
+    def zrem(self, key, member):
+        self.data.get(key, {}).pop(member, None)
+
+    def lrange(self, key, start, end):
+        self.commands += 1
+        return self.data.get(key, [])[start:end + 1]
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def expire(self, key, ttl):
+        pass
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return queue
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+def make_manager(store=None, **kwargs):
+    return ConversationHistoryManager(store=store or InMemoryConversationStore(), **kwargs)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def manager(request):
+    store = InMemoryConversationStore() if request.param == "memory" else RedisConversationStore(FakeRedis())
+    return make_manager(store)
+
+
+class TestConversationHistoryManager:
+    """Tests for ConversationHistoryManager on each store."""
+
+    def test_round_trip(self, manager):
+        """Conversations and messages survive the store's serialization."""
+        conversation = manager.create_conversation("Support", "user-1", metadata={"channel": "chat"})
+        manager.add_message(conversation.id, "user", "Hello")
+        manager.add_message(conversation.id, "assistant", "Hi, how can I help?")
+
+        loaded = manager.get_conversation(conversation.id)
+        assert [m.content for m in loaded.messages] == ["Hello", "Hi, how can I help?"]
+        assert loaded.message_count == 2
+        assert loaded.metadata == {"channel": "chat"}
+        assert manager.get_conversation(conversation.id, include_messages=False).messages == []
+        assert [c.id for c in manager.list_conversations("user-1")] == [conversation.id]
+
+    def test_index_pagination(self, manager):
+        """Pages are addressed by message index and by message ID."""
+        conversation = manager.create_conversation("Thread", "user-1")
+        added = [manager.add_message(conversation.id, "user", f"m{i}") for i in range(10)]
+
+        page = manager.get_messages(conversation.id, limit=3)
+        assert [m.index for m in page] == [7, 8, 9]
+
+        previous = manager.get_messages(conversation.id, limit=3, before_index=page[0].index)
+        assert [m.content for m in previous] == ["m4", "m5", "m6"]
+        assert [m.content for m in manager.get_messages(conversation.id, limit=2, before_id=added[2].id)] == ["m0", "m1"]
+
+    def test_update_does_not_read_messages(self, manager, monkeypatch):
+        """Renaming a conversation rewrites only its record."""
+        conversation = manager.create_conversation("Thread", "user-1")
+        manager.add_message(conversation.id, "user", "hello")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("messages should not be read")
+
+        with monkeypatch.context() as patched:
+            patched.setattr(manager.store, "get_messages", fail)
+            updated = manager.update_conversation(conversation.id, title="Renamed")
+
+        assert updated.title == "Renamed"
+        assert manager.get_conversation(conversation.id).title == "Renamed"
+        assert [m.content for m in manager.get_messages(conversation.id)] == ["hello"]
+
+    def test_clear_and_delete(self, manager):
+        conversation = manager.create_conversation("Thread", "user-1")
+        manager.add_message(conversation.id, "user", "hello")
+
+        assert manager.clear_conversation(conversation.id)
+        assert manager.get_messages(conversation.id) == []
+        assert manager.delete_conversation(conversation.id)
+        assert manager.get_conversation(conversation.id) is None
+        assert manager.list_conversations("user-1") == []
+
+
+class TestPromptWindow:
+    """Tests for budget-limited prompt assembly."""
+
+    def test_budget_keeps_most_recent_messages(self):
+        """Only the newest messages that fit the token budget are formatted."""
+        manager = make_manager()
+        conversation = manager.create_conversation("Long", "user-1")
+        for i in range(200):
+            manager.add_message(conversation.id, "user", f"message number {i}")
+
+        chat = manager.get_chat_messages(conversation.id)
+        per_message = manager.store.get_token_counts(conversation.id, 199, 200)[0]
+        window = manager.get_chat_messages(conversation.id, max_tokens=per_message * 5)
+
+        assert len(chat) == 200
+        assert [m["content"] for m in window] == [f"message number {i}" for i in range(195, 200)]
+
+    def test_rolling_summary_replaces_old_messages(self):
+        """Older messages are folded into the summary, which leads the prompt."""
+        calls = []
+
+        def summarizer(previous, messages):
+            calls.append(len(messages))
+            return f"{(previous or '')}[{messages[0].content}..{messages[-1].content}]"
+
+        manager = make_manager(summarizer=summarizer, summary_interval=5)
+        conversation = manager.create_conversation("Support", "user-1")
+        for i in range(20):
+            manager.add_message(conversation.id, "user", f"m{i}")
+
+        prompt = manager.format_for_prompt(conversation.id, max_tokens=10000)
+
+        assert calls == [5, 5, 5]
+        assert prompt.startswith(SUMMARY_PREFIX + "[m0..m4][m5..m9][m10..m14]\n\nUser: m15")
+        assert prompt.endswith("User: m19")
+        assert "User: m14" not in prompt
+
+    def test_window_reads_only_needed_pages(self):
+        """A small window does not read the whole thread from Redis."""
+        redis = FakeRedis()
+        manager = make_manager(RedisConversationStore(redis))
+        conversation = manager.create_conversation("Long", "user-1")
+        for i in range(500):
+            manager.add_message(conversation.id, "user", f"m{i}")
+
+        redis.commands = 0
+        assert manager.format_for_prompt(conversation.id, limit=3) == "User: m497\n\nUser: m498\n\nUser: m499"
+        assert redis.commands <= 3
+
+
+class TestExtractiveSummary:
+    """Tests for the default model-free summarizer."""
+
+    def test_summary_is_bounded_and_keeps_recent_lines(self, monkeypatch):
+        """Each message becomes one truncated line and old lines are dropped."""
+        monkeypatch.setattr("apps.api.ai.conversation.history_manager.SUMMARY_MAX_CHARS", 300)
+        manager = make_manager(summarizer=extractive_summary, summary_interval=5)
+        conversation = manager.create_conversation("Support", "user-1")
+        for i in range(40):
+            manager.add_message(conversation.id, "user", f"message {i} " + "word " * 100)
+
+        prompt = manager.format_for_prompt(conversation.id, max_tokens=10000)
+        summary = prompt.split("\n\n")[0][len(SUMMARY_PREFIX):]
+
+        assert len(summary) <= 300
+        assert summary.splitlines()[-1].startswith("User: message 34 ")
+        assert summary.splitlines()[-1].endswith("...")
+        assert "message 0 " not in summary
+
+
+class TestAsyncAccess:
+    """Tests for calling the manager from async code."""
+
+    @pytest.mark.asyncio
+    async def test_blocking_store_runs_in_executor(self):
+        """Redis-backed calls leave the event loop thread; memory calls do not."""
+        for store, off_loop in ((InMemoryConversationStore(), False), (RedisConversationStore(FakeRedis()), True)):
+            manager = make_manager(store)
+            threads = []
+
+            def record_thread():
+                threads.append(threading.get_ident())
+                return manager.create_conversation("Thread", "user-1")
+
+            conversation = await manager.run(record_thread)
+
+            assert (threads[0] != threading.get_ident()) is off_loop
+            assert (await manager.run(manager.get_conversation, conversation.id)).title == "Thread"
+
+
+def test_factory_uses_memory_without_redis():
+    class Placeholder:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: None
+
+    assert isinstance(create_conversation_store(Placeholder()), InMemoryConversationStore)
+    assert isinstance(create_conversation_store(FakeRedis()), RedisConversationStore)
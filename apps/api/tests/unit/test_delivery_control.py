@@ -0,0 +1,106 @@
+"""
+Unit tests for email delivery flow control.
+"""
+import asyncio
+
+import pytest
+
+from apps.api.utils.delivery_control import (
+    MIN_PACER_SWEEP_SIZE,
+    AdaptiveConcurrencyLimiter,
+    DomainPacer,
+    count_domains,
+)
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Tests for AdaptiveConcurrencyLimiter."""
+
+    def test_limit_grows_while_latency_is_steady(self):
+        """Fast, unthrottled requests raise the limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=10)
+
+        for _ in range(20):
+            limiter.record(0.1)
+
+        assert limiter.limit > 2
+
+    def test_rate_limiting_halves_the_limit(self):
+        """A 429 backs off multiplicatively, but never below the minimum."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=2)
+
+        limiter.record(0.1, throttled=True)
+        assert limiter.limit == 4
+
+        for _ in range(5):
+            limiter.record(0.1, throttled=True)
+        assert limiter.limit == 2
+
+    def test_latency_above_baseline_shrinks_the_limit(self):
+        """Requests much slower than the baseline are treated as congestion."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10, latency_tolerance=2.0)
+        limiter.record(0.1)
+        before = limiter.limit
+
+        limiter.record(0.5)
+
+        assert limiter.limit < before
+        assert limiter.stats["slow"] == 1
+
+    @pytest.mark.asyncio
+    async def test_in_flight_requests_stay_within_the_limit(self):
+        """Callers beyond the limit wait for a slot."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(request() for _ in range(6)))
+
+        assert peak == 2
+        assert limiter.in_flight == 0
+
+
+class TestDomainPacer:
+    """Tests for DomainPacer."""
+
+    def test_burst_is_sent_immediately(self):
+        """A quiet domain can take a burst without waiting."""
+        pacer = DomainPacer(default_rate=10, burst=100)
+
+        assert pacer.reserve({"example.com": 100}, now=0.0) == 0.0
+
+    def test_sends_beyond_the_burst_are_spaced(self):
+        """Once the burst is used, further batches wait for the domain rate."""
+        pacer = DomainPacer(default_rate=10, burst=100)
+        pacer.reserve({"example.com": 100}, now=0.0)
+
+        assert pacer.reserve({"example.com": 50}, now=0.0) == pytest.approx(5.0)
+        assert pacer.reserve({"other.com": 50}, now=0.0) == 0.0
+
+    def test_batch_waits_for_its_slowest_domain(self):
+        """Per-domain overrides apply and the longest wait wins."""
+        pacer = DomainPacer(default_rate=10, burst=0, rates={"Gmail.com": 100})
+
+        delay = pacer.reserve({"gmail.com": 100, "example.com": 20}, now=0.0)
+
+        assert delay == pytest.approx(2.0)
+
+    def test_idle_domains_are_forgotten(self):
+        """Domains whose schedule has passed do not accumulate."""
+        pacer = DomainPacer(default_rate=10, burst=0)
+        for i in range(5000):
+            pacer.reserve({f"domain{i}.com": 1}, now=float(i))
+
+        assert len(pacer._next_free) < 2 * MIN_PACER_SWEEP_SIZE
+        assert pacer.reserve({"domain4999.com": 1}, now=4999.0) == pytest.approx(0.2)
+
+    def test_count_domains_is_case_insensitive(self):
+        """Recipients are grouped by lower-cased domain."""
+        counts = count_domains(["a@Example.com", "b@example.com", "c@gmail.com"])
+
+        assert counts == {"example.com": 2, "gmail.com": 1}
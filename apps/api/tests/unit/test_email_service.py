@@ -0,0 +1,175 @@
+"""
+Unit tests for batch sending in the email service.
+"""
+import json
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from apps.api.services import email_service as email_module
+from apps.api.services.email_service import EmailService
+
+
+class FakeProvider:
+    """Stands in for the SendGrid and Mailgun send endpoints."""
+
+    def __init__(self, status_code=202, reject=(), error_field="personalizations.0.to.0.email"):
+        self.status_code = status_code
+        self.reject = set(reject)
+        self.error_field = error_field
+        self.requests = []
+
+    def recipients(self, request):
+        if request.url.host == "api.sendgrid.com":
+            body = json.loads(request.content)
+            return [p["to"][0]["email"] for p in body["personalizations"]]
+        return parse_qs(request.content.decode())["to"]
+
+    def handler(self, request):
+        recipients = self.recipients(request)
+        self.requests.append(recipients)
+        if self.reject.intersection(recipients):
+            if request.url.host == "api.sendgrid.com":
+                return httpx.Response(
+                    400, json={"errors": [{"message": "invalid email", "field": self.error_field}]}
+                )
+            return httpx.Response(400, json={"message": "'to' parameter is not a valid address"})
+        return httpx.Response(self.status_code, json={"id": "queued"})
+
+
+def make_service(provider, fake, **kwargs):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+    service = EmailService(provider=provider, async_client=client, **kwargs)
+    service.api_keys = {"sendgrid": "sg-key", "mailgun": "mg-key"}
+    return service
+
+
+RECIPIENTS = [f"user{i}@example.com" for i in range(5)]
+
+
+class TestSendBatch:
+    """Tests for EmailService.send_batch."""
+
+    @pytest.mark.asyncio
+    async def test_sendgrid_batches_use_personalizations(self):
+        """Recipients are grouped into as few requests as the batch size allows."""
+        fake = FakeProvider()
+        service = make_service("sendgrid", fake, batch_size=2)
+
+        result = await service.send_batch(RECIPIENTS, "Hello", '<a href="https://example.com">x</a>')
+
+        assert result["status"] == "sent"
+        assert result["sent"] == 5
+        assert result["requests"] == 3
+        assert fake.requests == [RECIPIENTS[0:2], RECIPIENTS[2:4], RECIPIENTS[4:5]]
+        assert len({r["message_id"] for r in result["results"]}) == 5
+
+    @pytest.mark.asyncio
+    async def test_sendgrid_substitutes_message_id_into_tracking(self):
+        """Tracking links carry a placeholder that each personalization fills in."""
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(202)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        service = EmailService(provider="sendgrid", async_client=client)
+        service.api_keys = {"sendgrid": "sg-key"}
+
+        result = await service.send_batch(RECIPIENTS[:2], "Hello", "<p>Hi</p>", metadata={"campaign_id": 7})
+
+        body = bodies[0]
+        assert "-message_id-" in body["content"][0]["value"]
+        for personalization, sent in zip(body["personalizations"], result["results"]):
+            assert personalization["substitutions"] == {"-message_id-": sent["message_id"]}
+            assert personalization["custom_args"]["campaign_id"] == "7"
+
+    @pytest.mark.asyncio
+    async def test_mailgun_batches_use_recipient_variables(self):
+        """Mailgun gets every recipient and their message ID in one request."""
+        bodies = []
+
+        def handler(request):
+            bodies.append(parse_qs(request.content.decode()))
+            return httpx.Response(200, json={"id": "queued"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        service = EmailService(provider="mailgun", async_client=client)
+        service.api_keys = {"mailgun": "mg-key"}
+
+        result = await service.send_batch(RECIPIENTS, "Hello", "<p>Hi</p>")
+
+        assert result["requests"] == 1
+        variables = json.loads(bodies[0]["recipient-variables"][0])
+        assert {email: v["message_id"] for email, v in variables.items()} == {
+            r["recipient"]: r["message_id"] for r in result["results"]
+        }
+        assert "%recipient.message_id%" in bodies[0]["html"][0]
+
+    @pytest.mark.asyncio
+    async def test_rejected_recipient_does_not_fail_the_batch(self):
+        """A rejected request is split until the bad address is isolated."""
+        fake = FakeProvider(reject={"user3@example.com"})
+        service = make_service("sendgrid", fake)
+
+        result = await service.send_batch(RECIPIENTS, "Hello", "<p>Hi</p>")
+
+        failed = [r["recipient"] for r in result["results"] if r["status"] != "sent"]
+        assert result["status"] == "partial"
+        assert failed == ["user3@example.com"]
+        assert not result["results"][3]["retryable"]
+        assert result["requests"] == len(fake.requests)
+
+    @pytest.mark.asyncio
+    async def test_rejected_recipient_is_isolated_with_mailgun(self):
+        """Mailgun recipient errors are recognised from the error message."""
+        fake = FakeProvider(reject={"user0@example.com"})
+        service = make_service("mailgun", fake)
+
+        result = await service.send_batch(RECIPIENTS, "Hello", "<p>Hi</p>")
+
+        assert [r["recipient"] for r in result["results"] if r["status"] != "sent"] == ["user0@example.com"]
+
+    @pytest.mark.asyncio
+    async def test_rejected_content_is_not_split(self):
+        """A request rejected for its shared content fails once instead of being bisected."""
+        fake = FakeProvider(reject=set(RECIPIENTS), error_field="content.0.value")
+        service = make_service("sendgrid", fake)
+
+        result = await service.send_batch(RECIPIENTS, "Hello", "<p>Hi</p>")
+
+        assert result["status"] == "error"
+        assert result["requests"] == 1
+        assert not any(r["retryable"] for r in result["results"])
+
+    @pytest.mark.asyncio
+    async def test_split_depth_is_capped(self, monkeypatch):
+        """Splitting stops at the configured depth and fails what is left."""
+        monkeypatch.setattr(email_module, "EMAIL_MAX_SPLIT_DEPTH", 1)
+        fake = FakeProvider(reject={"user0@example.com", "user4@example.com"})
+        service = make_service("sendgrid", fake)
+
+        result = await service.send_batch(RECIPIENTS, "Hello", "<p>Hi</p>")
+
+        assert result["requests"] == 3
+        assert result["failed"] == 5
+
+    @pytest.mark.asyncio
+    async def test_throttled_batch_is_retryable(self):
+        """Rate limiting fails the whole request once and is marked retryable."""
+        fake = FakeProvider(status_code=429)
+        service = make_service("mailgun", fake)
+
+        result = await service.send_batch(RECIPIENTS, "Hello", "<p>Hi</p>")
+
+        assert result["status"] == "error"
+        assert result["requests"] == 1
+        assert all(r["retryable"] for r in result["results"])
+
+    def test_batch_size_is_capped_at_provider_limit(self):
+        """The configured batch size never exceeds what the provider accepts."""
+        service = EmailService(provider="sendgrid", batch_size=5000)
+
+        assert service.batch_size == email_module.PROVIDER_BATCH_LIMITS["sendgrid"]
@@ -0,0 +1,67 @@
+"""
+Unit tests for compiled email tracking templates.
+"""
+import re
+from urllib.parse import parse_qs, urlsplit
+
+from apps.api.services.email_tracking import compile_tracking_template
+
+BASE = "https://t.example.com"
+
+
+def tracked_urls(html):
+    return re.findall(r'href="([^"]*)"', html)
+
+
+class TestTrackingTemplate:
+    """Tests for compile_tracking_template."""
+
+    def test_links_and_pixel_carry_the_message_id(self):
+        """Each render places the message ID in every link and the pixel."""
+        template = compile_tracking_template(
+            '<html><body><a href="https://a.com">a</a><a href=\'https://b.com\'>b</a></body></html>',
+            base_url=BASE,
+        )
+
+        html = template.render("m1")
+
+        assert template.link_count == 2
+        assert tracked_urls(html)[0].startswith(f"{BASE}/click/m1?url=")
+        assert f"href='{BASE}/click/m1?url=https%3A%2F%2Fb.com'" in html
+        assert html.endswith(f'<img src="{BASE}/open/m1" width="1" height="1" alt="" /></body></html>')
+
+    def test_original_urls_are_encoded(self):
+        """Query strings and entities in links survive the round trip."""
+        original = "https://shop.example.com/p?id=1&ref=news letter#top"
+        template = compile_tracking_template(
+            '<a href="https://shop.example.com/p?id=1&amp;ref=news letter#top">x</a>', base_url=BASE
+        )
+
+        url = tracked_urls(template.render("m1"))[0]
+
+        assert " " not in url and "#" not in url and "&" not in url
+        assert parse_qs(urlsplit(url).query)["url"] == [original]
+
+    def test_non_http_links_are_left_alone(self):
+        """Anchors, mailto links and tracked links are not rewritten."""
+        content = (
+            '<a href="#top">a</a><a href="mailto:hi@example.com">b</a>'
+            f'<a href="{BASE}/click/x?url=y">c</a>'
+        )
+        template = compile_tracking_template(content, base_url=BASE)
+
+        assert template.link_count == 0
+        assert template.render("m1").startswith(content)
+
+    def test_fragment_gets_the_pixel_appended(self):
+        """Content without a body tag gets the pixel at the end."""
+        template = compile_tracking_template("<p>Hi</p>", base_url=BASE)
+
+        assert template.render("m2") == f'<p>Hi</p><img src="{BASE}/open/m2" width="1" height="1" alt="" />'
+
+    def test_renders_differ_only_in_message_id(self):
+        """The compiled segments are shared; only the ID changes."""
+        template = compile_tracking_template('<a href="https://a.com">a</a>' * 3, base_url=BASE)
+
+        assert template.render("first").replace("first", "second") == template.render("second")
+        assert len(template.segments) == 5
@@ -0,0 +1,125 @@
+"""
+Unit tests for the shared HTTP transport registry.
+"""
+import httpx
+import pytest
+
+from packages.error_handling.python.transport import HostPoolConfig, TransportRegistry
+
+
+class FakePool(httpx.AsyncBaseTransport, httpx.BaseTransport):
+    """Stand-in connection pool that opens one TLS connection on first use."""
+
+    def __init__(self, config, is_async):
+        self.config = config
+        self.is_async = is_async
+        self.connected = False
+        self.requests = []
+        self.closed = False
+
+    def _events(self):
+        if self.connected:
+            return []
+        self.connected = True
+        return [
+            "connection.connect_tcp.started",
+            "connection.connect_tcp.complete",
+            "connection.start_tls.started",
+            "connection.start_tls.complete",
+        ]
+
+    async def handle_async_request(self, request):
+        for event in self._events():
+            await request.extensions["trace"](event, {})
+        self.requests.append(request)
+        return httpx.Response(200, request=request)
+
+    def handle_request(self, request):
+        for event in self._events():
+            request.extensions["trace"](event, {})
+        self.requests.append(request)
+        return httpx.Response(200, request=request)
+
+    async def aclose(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pools():
+    return []
+
+
+@pytest.fixture
+def registry(pools):
+    def factory(config, is_async):
+        pool = FakePool(config, is_async)
+        pools.append(pool)
+        return pool
+
+    return TransportRegistry(
+        default_config=HostPoolConfig(max_connections=10),
+        host_configs={"api.openai.com": {"max_connections": 50}},
+        pool_factory=factory,
+    )
+
+
+class TestTransportRegistry:
+    """Tests for TransportRegistry."""
+
+    @pytest.mark.asyncio
+    async def test_clients_share_one_pool_per_origin(self, registry, pools):
+        """Separate clients to the same origin reuse its connection."""
+        async with registry.async_client() as first, registry.async_client() as second:
+            await first.get("https://api.openai.com/v1/models")
+            await second.post("https://api.openai.com/v1/chat/completions", json={})
+            await second.get("https://api.anthropic.com/v1/models")
+
+        assert len(pools) == 2
+        assert len(pools[0].requests) == 2
+        stats = registry.stats()
+        assert stats["https://api.openai.com"]["requests"] == 2
+        assert stats["https://api.openai.com"]["tls_handshakes"] == 1
+        assert stats["https://api.anthropic.com"]["connections_opened"] == 1
+
+    @pytest.mark.asyncio
+    async def test_closing_a_client_keeps_the_pools_open(self, registry, pools):
+        """Pools outlive the clients that borrow them and close with the registry."""
+        async with registry.async_client() as client:
+            await client.get("https://api.openai.com/")
+        assert not pools[0].closed
+
+        await registry.aclose()
+
+        assert pools[0].closed
+
+    def test_pools_are_tuned_per_host(self, registry, pools):
+        """Host overrides apply on top of the defaults."""
+        with registry.client() as client:
+            client.get("https://api.openai.com/")
+            client.get("https://hooks.example.com/")
+
+        assert [pool.config.max_connections for pool in pools] == [50, 10]
+        assert not any(pool.is_async for pool in pools)
+        assert registry.stats()["https://hooks.example.com"]["requests"] == 1
+
+    def test_http2_needs_h2(self):
+        """HTTP/2 is only requested when the h2 package can serve it."""
+        registry = TransportRegistry(http2=True)
+        config = registry.config_for("api.openai.com")
+
+        assert config.http2 == registry.http2
+
+    @pytest.mark.asyncio
+    async def test_warm_up_connects_once_per_origin(self, registry, pools):
+        """Warm-up opens one connection per distinct origin."""
+        warmed = await registry.warm_up([
+            "https://api.openai.com/v1/chat/completions",
+            "https://api.openai.com/v1/embeddings",
+            "https://api.anthropic.com/v1/messages",
+        ])
+
+        assert warmed == {"https://api.openai.com": True, "https://api.anthropic.com": True}
+        assert [request.method for pool in pools for request in pool.requests] == ["HEAD", "HEAD"]
@@ -0,0 +1,130 @@
+"""
+Unit tests for lazy router loading and import profiling.
+"""
+import sys
+import types
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from apps.api.utils.lazy_loading import (
+    ImportProfiler,
+    LazyRouterRegistry,
+    parse_importtime,
+    summarize_importtime,
+)
+
+
+@pytest.fixture
+def fake_router_module(monkeypatch):
+    """Installs an importable module exposing a router under /reports."""
+    module = types.ModuleType("fake_lazy_reports")
+    router = APIRouter(prefix="/reports")
+
+    @router.get("/daily")
+    async def daily():
+        return {"report": "daily"}
+
+    module.router = router
+    monkeypatch.setitem(sys.modules, "fake_lazy_reports", module)
+    return module
+
+
+def build_app(registry):
+    app = FastAPI()
+    registry.add_middleware(app)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+class TestLazyRouterRegistry:
+    """Tests for LazyRouterRegistry."""
+
+    def test_lazy_router_mounts_on_first_matching_request(self, fake_router_module):
+        """A lazy router is not mounted until a request hits its prefix."""
+        registry = LazyRouterRegistry(profiler=ImportProfiler(), lazy_enabled=True)
+        app = build_app(registry)
+        registry.register("reports", "fake_lazy_reports", prefix="/reports", mode="lazy")
+        registry.mount(app)
+        client = TestClient(app)
+
+        assert client.get("/ping").status_code == 200
+        assert registry.specs["reports"].state == "pending"
+
+        response = client.get("/reports/daily")
+
+        assert response.status_code == 200
+        assert response.json() == {"report": "daily"}
+        assert registry.specs["reports"].state == "mounted"
+        assert registry.specs["reports"].mounted_by == "/reports/daily"
+        assert "fake_lazy_reports" in [e["name"] for e in registry.profiler.report()["entries"]]
+
+    def test_docs_request_mounts_all_pending_routers(self, fake_router_module):
+        """The OpenAPI schema includes lazy routers once it is requested."""
+        registry = LazyRouterRegistry(profiler=ImportProfiler(), lazy_enabled=True)
+        app = build_app(registry)
+        registry.register("reports", "fake_lazy_reports", prefix="/reports", mode="lazy")
+        registry.mount(app)
+
+        schema = TestClient(app).get("/openapi.json").json()
+
+        assert "/reports/daily" in schema["paths"]
+
+    def test_flags_override_default_mode(self, fake_router_module, monkeypatch):
+        """API_ROUTER_<NAME> disables or forces routers, and lazy mode can be turned off."""
+        monkeypatch.setenv("API_ROUTER_REPORTS", "off")
+        registry = LazyRouterRegistry(profiler=ImportProfiler(), lazy_enabled=True)
+        app = build_app(registry)
+        registry.register("reports", "fake_lazy_reports", prefix="/reports", mode="lazy")
+        registry.mount(app)
+
+        assert registry.specs["reports"].state == "disabled"
+        assert TestClient(app).get("/reports/daily").status_code == 404
+
+        monkeypatch.delenv("API_ROUTER_REPORTS")
+        eager = LazyRouterRegistry(profiler=ImportProfiler(), lazy_enabled=False)
+        spec = eager.register("reports", "fake_lazy_reports", prefix="/reports", mode="lazy")
+        assert eager.resolve_mode(spec) == "eager"
+
+    def test_missing_module_is_reported_not_raised(self):
+        """A router that cannot be imported is marked failed."""
+        registry = LazyRouterRegistry(profiler=ImportProfiler(), lazy_enabled=True)
+        app = build_app(registry)
+        registry.register("missing", "fake_lazy_missing_module")
+        registry.mount(app)
+
+        router = registry.report()["routers"][0]
+        assert router["state"] == "failed"
+        assert "fake_lazy_missing_module" in router["error"]
+
+
+class TestImportTimeParsing:
+    """Tests for -X importtime parsing."""
+
+    OUTPUT = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   encodings.aliases",
+        "import time:       300 |        420 | encodings",
+        "import time:      2000 |       2000 |     web3.utils",
+        "import time:      5000 |       7000 |   web3",
+        "import time:       800 |       7800 | apps.api.services.blockchain_service",
+        "Traceback (most recent call last):",
+    ])
+
+    def test_parse_and_group_by_package(self):
+        """Entries are parsed and self time is grouped by package."""
+        entries = parse_importtime(self.OUTPUT)
+
+        assert [e["module"] for e in entries][:2] == ["encodings.aliases", "encodings"]
+        assert entries[2]["depth"] == 2
+
+        summary = summarize_importtime(entries, top=2)
+
+        assert summary["modules"] == 5
+        assert summary["slowest_modules"][0]["module"] == "apps.api.services.blockchain_service"
+        assert summary["packages"][0] == {"package": "web3", "self_us": 7000, "modules": 2}
@@ -0,0 +1,135 @@
+"""
+Unit tests for the metrics manager.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+pytest.importorskip("psutil")
+
+# Keep the singleton from starting a metrics server in the test process
+os.environ.setdefault("ENABLE_METRICS", "false")
+
+from apps.api.utils import metrics_manager as mm
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+
+
+def run_worker(code, multiproc_dir):
+    """Run code in a fresh process with multiprocess metrics enabled."""
+    env = dict(
+        os.environ,
+        ENABLE_METRICS="true",
+        METRICS_PORT="0",
+        PROMETHEUS_MULTIPROC_DIR=str(multiproc_dir),
+    )
+    script = "from apps.api.utils.metrics_manager import metrics_manager\n" + code
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+class TestMetricsMiddleware:
+    """Tests for MetricsMiddleware endpoint labels."""
+
+    @staticmethod
+    def make_request(app, path, method="GET", route=None):
+        from starlette.requests import Request
+
+        scope = {"type": "http", "method": method, "path": path, "root_path": "",
+                 "query_string": b"", "headers": [], "app": app}
+        if route is not None:
+            scope["route"] = route
+        return Request(scope)
+
+    @pytest.fixture
+    def app(self):
+        from fastapi import FastAPI
+
+        app = FastAPI()
+
+        @app.get("/campaigns/{campaign_id}")
+        async def get_campaign(campaign_id: int):
+            return {}
+
+        @app.get("/campaigns/{campaign_id}/emails")
+        async def list_emails(campaign_id: int):
+            return []
+
+        @app.post("/contacts")
+        async def create_contact():
+            return {}
+
+        return app
+
+    def test_endpoints_are_labelled_by_route_template(self, app):
+        """Requests for different resources share their route's label."""
+        label = mm.MetricsMiddleware._endpoint_label
+
+        assert label(self.make_request(app, "/campaigns/1")) == "/campaigns/{campaign_id}"
+        assert label(self.make_request(app, "/campaigns/99")) == "/campaigns/{campaign_id}"
+        assert label(self.make_request(app, "/campaigns/7/emails")) == "/campaigns/{campaign_id}/emails"
+        assert label(self.make_request(app, "/contacts", method="GET")) == "/contacts"
+
+    def test_unmatched_paths_share_one_label(self, app):
+        """Paths no route handles never create new series."""
+        label = mm.MetricsMiddleware._endpoint_label
+
+        assert label(self.make_request(app, "/wp-admin/setup.php")) == mm.UNMATCHED_ENDPOINT
+        assert label(self.make_request(app, "/campaigns/1/unknown")) == mm.UNMATCHED_ENDPOINT
+
+    def test_route_set_by_the_router_is_used(self, app):
+        """A route already resolved for the request takes precedence."""
+        route = next(route for route in app.routes if getattr(route, "path", "") == "/contacts")
+
+        assert mm.MetricsMiddleware._endpoint_label(
+            self.make_request(app, "/campaigns/1", route=route)
+        ) == "/contacts"
+
+
+class TestGauges:
+    """Tests for labelled gauges."""
+
+    def test_removed_series_is_not_exported(self, tmp_path):
+        """A removed label value no longer appears on scrape."""
+        output = run_worker(
+            "metrics_manager.register_gauge('job_progress_ratio', 'Progress', ['job_id'])\n"
+            "metrics_manager.set_gauge('job_progress_ratio', 0.5, job_id='1')\n"
+            "metrics_manager.set_gauge('job_progress_ratio', 1.0, job_id='2')\n"
+            "metrics_manager.remove_gauge('job_progress_ratio', job_id='2')\n"
+            "metrics_manager.remove_gauge('job_progress_ratio', job_id='3')\n"
+            "from prometheus_client import REGISTRY, generate_latest\n"
+            "print(generate_latest(REGISTRY).decode())\n",
+            tmp_path,
+        )
+
+        assert 'job_progress_ratio{job_id="1"}' in output
+        assert 'job_id="2"' not in output
+
+
+class TestMultiprocessMetrics:
+    """Tests for multiprocess collection."""
+
+    def test_scrape_merges_all_workers(self, tmp_path):
+        """Counts recorded by separate worker processes are summed on scrape."""
+        record = (
+            "metrics_manager.increment_counter("
+            "'http_requests_total', 1, method='GET', endpoint='/health', status='200')\n"
+        )
+        run_worker(record, tmp_path)
+        run_worker(record * 2, tmp_path)
+
+        output = run_worker(
+            "from prometheus_client import generate_latest\n"
+            "print(generate_latest(metrics_manager.scrape_registry()).decode())\n",
+            tmp_path,
+        )
+
+        assert 'http_requests_total{endpoint="/health",method="GET",status="200"} 3.0' in output
+        assert "system_cpu_usage" in output
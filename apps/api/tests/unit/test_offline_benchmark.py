@@ -0,0 +1,139 @@
+"""
+Unit tests for the offline AI path benchmark suite.
+"""
+import pytest
+
+from apps.api.ai.adapters.base import ModelRequest
+from apps.api.ai.monitoring.offline_benchmark import (
+    DEFAULT_PROFILES,
+    OfflineBenchmarkSuite,
+    ProviderProfile,
+    StubModelAdapter,
+    compare_results,
+    load_results,
+    percentile,
+    save_results,
+)
+
+
+def request(prompt="Write a welcome email", model_name="gpt-4"):
+    return ModelRequest(prompt=prompt, model_name=model_name, temperature=0.0)
+
+
+class TestStubModelAdapter:
+    """Tests for StubModelAdapter."""
+
+    @pytest.mark.asyncio
+    async def test_same_seed_gives_same_latencies_and_content(self):
+        """Stub providers are deterministic for a seed."""
+        runs = []
+        for _ in range(2):
+            adapter = StubModelAdapter("gpt-4", DEFAULT_PROFILES["gpt-4"], seed=7)
+            contents = []
+            for _ in range(20):
+                try:
+                    contents.append((await adapter.generate(request())).content)
+                except Exception as e:
+                    contents.append(str(e))
+            runs.append((adapter.simulated_ms, contents))
+
+        assert runs[0] == runs[1]
+
+    @pytest.mark.asyncio
+    async def test_stream_emulates_chunks_without_sleeping(self):
+        """Streaming yields profile-sized chunks and only records emulated time."""
+        profile = ProviderProfile(500, ttft_ms=200, tokens_per_second=40, chunk_tokens=4, completion_tokens=40)
+        adapter = StubModelAdapter("stub", profile)
+
+        chunks = [chunk async for chunk in adapter.stream_generate(request(model_name="stub"))]
+
+        assert len(chunks) == 10
+        assert chunks[-1].finish_reason == "stop"
+        assert adapter.slept_seconds == 0
+        # Time to first token plus nine chunk gaps of 100ms
+        assert adapter.simulated_ms[0] > 900
+
+
+class TestOfflineBenchmarkSuite:
+    """Tests for OfflineBenchmarkSuite."""
+
+    @pytest.mark.asyncio
+    async def test_run_reports_layers_end_to_end_and_providers(self):
+        """Each layer gets timings or a skip reason; provider time is emulated."""
+        suite = OfflineBenchmarkSuite(iterations=20, warmup=2)
+
+        results = await suite.run(layers=["caching", "prompt_rendering", "serialization"])
+
+        assert set(results["layers"]) == {"caching", "prompt_rendering", "serialization"}
+        for stats in results["layers"].values():
+            assert stats["iterations"] == 20
+            assert stats["p50_us"] <= stats["p95_us"] <= stats["p99_us"]
+        assert results["end_to_end"]["layers"] == ["caching", "prompt_rendering", "serialization"]
+        assert results["streaming"]["chunks"] > 0
+        assert sum(p["calls"] for p in results["providers"].values()) >= 20
+
+    @pytest.mark.asyncio
+    async def test_failing_layer_setup_is_skipped(self):
+        """A layer that cannot be set up does not fail the run."""
+        async def broken(suite):
+            raise ImportError("module missing")
+
+        suite = OfflineBenchmarkSuite(iterations=5, warmup=0)
+        suite.register_layer("broken", broken)
+
+        results = await suite.run(layers=["serialization", "broken"])
+
+        assert "module missing" in results["layers"]["broken"]["skipped"]
+        assert results["end_to_end"]["layers"] == ["serialization"]
+
+
+class TestBaselines:
+    """Tests for baseline storage and comparison."""
+
+    def results(self, p50, p95):
+        return {"version": 1, "layers": {"caching": {"p50_us": p50, "p95_us": p95}},
+                "end_to_end": {}, "streaming": {}}
+
+    def test_regression_needs_relative_and_absolute_slowdown(self):
+        """Small absolute changes are ignored even when the relative change is large."""
+        baseline = self.results(10.0, 20.0)
+
+        noisy = compare_results(self.results(14.0, 24.0), baseline)
+        slower = compare_results(self.results(40.0, 20.0), baseline)
+
+        assert noisy["passed"]
+        assert not slower["passed"]
+        assert slower["regressions"][0]["layer"] == "caching"
+        assert slower["regressions"][0]["stat"] == "p50_us"
+
+    def test_layer_that_stops_running_is_a_regression(self):
+        """A measured baseline layer that is now skipped or failed fails the comparison."""
+        baseline = self.results(10.0, 20.0)
+        skipped = dict(baseline, layers={"caching": {"skipped": "ImportError: module missing"}})
+        failed = dict(baseline, layers={"caching": {"error": "RuntimeError: boom"}})
+
+        for current, status in ((skipped, "skipped"), (failed, "error")):
+            comparison = compare_results(current, baseline)
+
+            assert not comparison["passed"]
+            assert comparison["regressions"] == [{
+                "layer": "caching",
+                "stat": "status",
+                "baseline": "measured",
+                "current": status,
+                "reason": current["layers"]["caching"][status],
+            }]
+
+    def test_round_trip(self, tmp_path):
+        """Saved results load back unchanged."""
+        path = str(tmp_path / "baselines" / "offline.json")
+        save_results(self.results(1.0, 2.0), path)
+
+        assert load_results(path) == self.results(1.0, 2.0)
+        assert load_results(str(tmp_path / "missing.json")) is None
+
+    def test_percentile_matches_linear_interpolation(self):
+        """Percentiles interpolate between samples."""
+        assert percentile([1, 2, 3, 4], 50) == 2.5
+        assert percentile([5], 95) == 5
+        assert percentile([], 95) == 0.0
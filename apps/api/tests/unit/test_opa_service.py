@@ -0,0 +1,148 @@
+"""
+Unit tests for the OPA service decision cache and batched evaluation.
+"""
+import importlib
+import json
+import sys
+import types
+
+import httpx
+import pytest
+
+
+class FakeOPA:
+    """Answers allow and decisions queries like the maily.authz policy for editors."""
+
+    def __init__(self, revision="r1", undecided=()):
+        self.revision = revision
+        self.undecided = set(undecided)
+        self.queries = []
+
+    def allowed(self, user, action, resource):
+        return "editor" in user.get("roles", []) and action in ("create", "update") and resource == "campaign"
+
+    def handler(self, request):
+        body = json.loads(request.content)["input"]
+        self.queries.append(request.url.path)
+        provenance = {"bundles": {"authz": {"revision": self.revision}}}
+        if request.url.path.endswith("/decisions"):
+            result = {
+                f"{p['action']}:{p['resource']}:{p['resource_id']}": self.allowed(body["user"], p["action"], p["resource"])
+                for p in body["permissions"]
+                if p["resource_id"] not in self.undecided
+            }
+        else:
+            result = {"allow": self.allowed(body["user"], body["action"], body["resource"])}
+        return httpx.Response(200, json={"result": result, "provenance": provenance})
+
+
+@pytest.fixture
+def opa_module(monkeypatch):
+    """Imports the OPA service with settings that do not need an environment."""
+    settings = types.SimpleNamespace(
+        URL="http://opa.local",
+        POLICY_PATH="v1/data/maily/authz",
+        TIMEOUT=5,
+        MAX_CONNECTIONS=4,
+        DECISION_CACHE_TTL=30,
+        DECISION_CACHE_SIZE=100,
+        LOCAL_POLICY=False,
+    )
+    config_module = types.ModuleType("config.opa")
+    config_module.opa_settings = settings
+    monkeypatch.setitem(sys.modules, "config.opa", config_module)
+    monkeypatch.delitem(sys.modules, "apps.api.services.opa_service", raising=False)
+    return importlib.import_module("apps.api.services.opa_service")
+
+
+@pytest.fixture
+def opa():
+    return FakeOPA()
+
+
+def make_service(opa_module, opa, **kwargs):
+    client = httpx.AsyncClient(base_url="http://opa.local", transport=httpx.MockTransport(opa.handler))
+    return opa_module.OPAService(client=client, **kwargs)
+
+
+EDITOR = {"sub": "auth0|1", "roles": ["editor"]}
+OTHER_EDITOR = {"sub": "auth0|2", "roles": ["editor"]}
+
+
+class TestOPAService:
+    """Tests for OPAService."""
+
+    @pytest.mark.asyncio
+    async def test_role_decisions_are_shared_across_users(self, opa_module, opa):
+        """Plain role checks are cached by roles, not by user."""
+        service = make_service(opa_module, opa)
+
+        assert await service.check_permission(EDITOR, "update", "campaign")
+        assert await service.check_permission(OTHER_EDITOR, "update", "campaign")
+        assert not await service.check_permission(EDITOR, "delete", "campaign")
+
+        assert len(opa.queries) == 2
+
+    @pytest.mark.asyncio
+    async def test_new_bundle_revision_drops_cached_decisions(self, opa_module, opa):
+        """Decisions made under an older policy revision are not reused."""
+        service = make_service(opa_module, opa)
+        await service.check_permission(EDITOR, "update", "campaign")
+
+        opa.revision = "r2"
+        await service.check_permission(EDITOR, "delete", "campaign")
+        await service.check_permission(EDITOR, "update", "campaign")
+
+        assert len(opa.queries) == 3
+        assert service.decision_cache.revision == "authz=r2"
+
+    @pytest.mark.asyncio
+    async def test_list_filtering_uses_one_bulk_query(self, opa_module, opa):
+        """Undecided items on a page are evaluated together; the memo answers repeats."""
+        service = make_service(opa_module, opa, cache_ttl=0)
+        memo = {}
+
+        allowed = await service.filter_allowed(EDITOR, "update", "campaign", [1, 2, 3], memo=memo)
+        again = await service.check_permission(EDITOR, "update", "campaign", resource_id="2", memo=memo)
+
+        assert allowed == [1, 2, 3]
+        assert again
+        assert opa.queries == ["/v1/data/maily/authz/decisions"]
+
+    @pytest.mark.asyncio
+    async def test_undecided_items_are_denied_without_caching(self, opa_module):
+        """Items missing from the decisions map are denied and asked again next time."""
+        opa = FakeOPA(undecided={"2"})
+        service = make_service(opa_module, opa)
+
+        assert await service.filter_allowed(EDITOR, "update", "campaign", [1, 2, 3]) == [1, 3]
+        assert await service.filter_allowed(EDITOR, "update", "campaign", [1, 2, 3]) == [1, 2, 3]
+
+        assert opa.queries == ["/v1/data/maily/authz/decisions", "/v1/data/maily/authz"]
+
+    @pytest.mark.asyncio
+    async def test_local_policy_answers_hot_rules(self, opa_module, opa):
+        """Local allows skip OPA; anything else is still asked."""
+        service = make_service(opa_module, opa, local_policy=True)
+
+        assert await service.check_permission({"sub": "a", "roles": ["admin"]}, "delete", "campaign")
+        assert await service.check_permission({"sub": "a"}, "read", "user_data", resource_id="a")
+        assert not await service.check_permission({"sub": "a"}, "read", "user_data", resource_id="b")
+
+        assert len(opa.queries) == 1
+
+    @pytest.mark.asyncio
+    async def test_unreachable_opa_denies_without_caching(self, opa_module):
+        """Failures deny access and are retried on the next check."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(503)
+
+        client = httpx.AsyncClient(base_url="http://opa.local", transport=httpx.MockTransport(handler))
+        service = opa_module.OPAService(client=client)
+
+        assert not await service.check_permission(EDITOR, "update", "campaign")
+        assert not await service.check_permission(EDITOR, "update", "campaign")
+        assert len(calls) == 2
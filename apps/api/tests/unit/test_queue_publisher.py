@@ -0,0 +1,149 @@
+"""
+Unit tests for the async queue publisher.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip("aio_pika")
+pytest.importorskip("pika")
+
+from apps.api.utils import queue_manager as qm
+
+
+class FakeBroker:
+    """In-memory stand-in for a RabbitMQ connection with confirm channels."""
+
+    def __init__(self):
+        self.down = False
+        self.channels = 0
+        self.published = []
+
+    async def connect(self, url):
+        if self.down:
+            raise ConnectionError("broker unreachable")
+        return self
+
+    async def channel(self, publisher_confirms=True):
+        self.channels += 1
+        return FakeChannel(self)
+
+    async def close(self):
+        pass
+
+
+class FakeChannel:
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_closed = False
+
+    async def declare_exchange(self, name, type, durable=True):
+        return FakeExchange(self.broker, name)
+
+    async def declare_queue(self, name, durable=True, arguments=None):
+        return FakeQueue()
+
+    async def get_exchange(self, name, ensure=True):
+        return FakeExchange(self.broker, name)
+
+    async def close(self):
+        self.is_closed = True
+
+
+class FakeExchange:
+    def __init__(self, broker, name):
+        self.broker = broker
+        self.name = name
+
+    async def publish(self, message, routing_key, timeout=None):
+        if self.broker.down:
+            raise ConnectionError("connection lost")
+        self.broker.published.append((routing_key, json.loads(message.body)))
+
+
+class FakeQueue:
+    async def bind(self, exchange, routing_key=None):
+        pass
+
+
+def make_publisher(broker, **kwargs):
+    kwargs.setdefault("retry_interval", 0.01)
+    return qm.AsyncQueuePublisher(connect=broker.connect, **kwargs)
+
+
+class TestAsyncQueuePublisher:
+    """Tests for AsyncQueuePublisher."""
+
+    @pytest.mark.asyncio
+    async def test_batch_is_published_on_one_pooled_channel(self):
+        """A batch reuses the pooled channel instead of opening one per message."""
+        broker = FakeBroker()
+        publisher = make_publisher(broker)
+
+        accepted = await publisher.publish_batch(qm.Queues.CAMPAIGN_PROCESSING, [{"n": i} for i in range(3)])
+        assert await publisher.publish(qm.Queues.CAMPAIGN_PROCESSING, {"n": 3})
+
+        assert accepted == 3
+        assert [body["n"] for _, body in broker.published] == [0, 1, 2, 3]
+        assert broker.channels == 1
+        await publisher.close()
+
+    @pytest.mark.asyncio
+    async def test_outage_spills_and_replays_in_order(self):
+        """Unconfirmed messages are buffered and published once the broker is back."""
+        broker = FakeBroker()
+        publisher = make_publisher(broker)
+        await publisher.publish(qm.Queues.CAMPAIGN_PROCESSING, {"n": 0})
+
+        broker.down = True
+        assert await publisher.publish_batch(qm.Queues.CAMPAIGN_PROCESSING, [{"n": 1}, {"n": 2}]) == 2
+        assert publisher.spilled == 2
+
+        broker.down = False
+        for _ in range(100):
+            if not publisher.spilled:
+                break
+            await asyncio.sleep(0.01)
+
+        assert [body["n"] for _, body in broker.published] == [0, 1, 2]
+        assert publisher.stats["replayed"] == 2
+        await publisher.close()
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_rejects_the_overflow(self):
+        """Messages beyond the buffer size are reported as not accepted."""
+        broker = FakeBroker()
+        broker.down = True
+        publisher = make_publisher(broker, spill_size=1, retry_interval=60)
+
+        accepted = await publisher.publish_batch(qm.Queues.CAMPAIGN_PROCESSING, [{"n": i} for i in range(3)])
+
+        assert accepted == 1
+        assert publisher.stats["dropped"] == 2
+        await publisher.close()
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_queue_yields_to_the_event_loop(self):
+        """Pacing waits asynchronously, so other tasks keep running."""
+        broker = FakeBroker()
+        publisher = make_publisher(broker)
+        rate = qm.RATE_LIMITS[qm.Queues.EMAIL_BULK]
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        started = time.monotonic()
+        await publisher.publish_batch(qm.Queues.EMAIL_BULK, [{"n": i} for i in range(rate + rate // 4)])
+        elapsed = time.monotonic() - started
+        task.cancel()
+
+        assert elapsed >= 0.2
+        assert ticks > 5
+        await publisher.close()
@@ -0,0 +1,191 @@
+"""
+Unit tests for the shared AI throttling backends.
+"""
+import time
+
+from apps.api.ai.throttling.throttle_backend import (
+    LocalThrottleBackend,
+    RedisThrottleBackend,
+    create_throttle_backend,
+    gcra,
+    sliding_window,
+)
+
+
+class FakeScriptRedis:
+    """Redis stand-in running the throttling scripts with the Python reference algorithms."""
+
+    def __init__(self):
+        self.data = {}
+        self.script_calls = 0
+        self.fail = False
+
+    def register_script(self, source):
+        if "INCRBY" in source:
+            return self._sliding_window
+        return self._gcra
+
+    def _check(self):
+        self.script_calls += 1
+        if self.fail:
+            raise ConnectionError("redis unavailable")
+
+    def _gcra(self, keys, args):
+        self._check()
+        interval, burst, requested = args
+        granted, retry_after, tat = gcra(self.data.get(keys[0]), time.time(), interval, burst, requested)
+        self.data[keys[0]] = tat
+        return [granted, str(retry_after)]
+
+    def _sliding_window(self, keys, args):
+        self._check()
+        now = time.time()
+        windows = [(args[1 + 2 * i], args[2 + 2 * i]) for i in range(len(keys))]
+        counts = []
+        for key, (window, _) in zip(keys, windows):
+            bucket = int(now // window)
+            counts.append((self.data.get(f"{key}:{bucket - 1}", 0), self.data.get(f"{key}:{bucket}", 0)))
+        granted, retry_after = sliding_window(counts, now, windows, args[0])
+        if granted:
+            for key, (window, _) in zip(keys, windows):
+                current = f"{key}:{int(now // window)}"
+                self.data[current] = self.data.get(current, 0) + granted
+        return [granted, str(retry_after), -1 if granted else 0]
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def incrbyfloat(self, key, amount):
+        self.ops.append((key, amount))
+
+    def expire(self, key, ttl):
+        self.ops.append(None)
+
+    def execute(self):
+        self.redis._check()
+        results = []
+        for op in self.ops:
+            if op is None:
+                results.append(True)
+            else:
+                key, amount = op
+                self.redis.data[key] = float(self.redis.data.get(key, 0)) + amount
+                results.append(self.redis.data[key])
+        return results
+
+
+class TestAlgorithms:
+    """Tests for the reference rate limiting algorithms."""
+
+    def test_gcra_allows_burst_then_spaces_requests(self):
+        """A full bucket admits its burst, then one request per interval."""
+        tat, now = None, 1000.0
+        for _ in range(5):
+            granted, _, tat = gcra(tat, now, interval=1.0, burst=5, requested=1)
+            assert granted == 1
+
+        granted, retry_after, tat = gcra(tat, now, interval=1.0, burst=5, requested=1)
+        assert granted == 0
+        assert abs(retry_after - 1.0) < 1e-6
+
+        granted, _, _ = gcra(tat, now + 1.0, interval=1.0, burst=5, requested=1)
+        assert granted == 1
+
+    def test_sliding_window_caps_grant_at_tightest_window(self):
+        """The number of granted hits is limited by the fullest window."""
+        granted, _ = sliding_window([(0, 8), (0, 2)], 10.0, [(60, 10), (300, 100)], requested=5)
+        assert granted == 2
+
+
+class TestLocalThrottleBackend:
+    """Tests for LocalThrottleBackend."""
+
+    def test_hit_windows_reports_exceeded_window(self):
+        """Hits beyond the limit are rejected with the exceeded window index."""
+        backend = LocalThrottleBackend()
+        for _ in range(3):
+            assert backend.hit_windows("rate:gpt-4", [(60, 3), (300, 10)])[0]
+
+        allowed, retry_after, exceeded = backend.hit_windows("rate:gpt-4", [(60, 3), (300, 10)])
+        assert not allowed
+        assert exceeded == 0
+        assert retry_after > 0
+        assert backend.window_counts("rate:gpt-4", [60])[60] == 3
+
+    def test_counters_and_claims(self):
+        """Counters accumulate and a claim is granted once per TTL."""
+        backend = LocalThrottleBackend()
+        backend.incr("spend:today", 0.25)
+        backend.incr("spend:today", 0.5)
+        assert backend.get("spend:today") == 0.75
+        assert backend.claim_once("alert:50", 60)
+        assert not backend.claim_once("alert:50", 60)
+
+
+class TestRedisThrottleBackend:
+    """Tests for RedisThrottleBackend."""
+
+    def test_lease_avoids_round_trip_per_check(self):
+        """Permits leased in one script call are handed out locally."""
+        redis = FakeScriptRedis()
+        backend = RedisThrottleBackend(redis, lease_size=10, lease_fraction=0.1)
+
+        results = [backend.hit_windows("rate:gpt-4", [(60, 100)])[0] for _ in range(10)]
+
+        assert all(results)
+        assert redis.script_calls == 1
+        assert backend.stats["lease_hits"] == 9
+
+    def test_replicas_share_limits(self):
+        """Two backends on the same Redis never admit more than the limit together."""
+        redis = FakeScriptRedis()
+        replicas = [RedisThrottleBackend(redis), RedisThrottleBackend(redis)]
+
+        allowed = sum(
+            replicas[i % 2].acquire("bucket:gpt-4:user", rate=1.0, burst=10)[0]
+            for i in range(30)
+        )
+
+        assert allowed == 10
+
+    def test_counters_are_flushed_in_batches(self):
+        """Counter increments are buffered and written with one pipeline."""
+        redis = FakeScriptRedis()
+        backend = RedisThrottleBackend(redis, flush_interval=60)
+        for _ in range(5):
+            backend.incr("spend:today", 0.1)
+
+        assert redis.data == {}
+        assert abs(backend.get("spend:today") - 0.5) < 1e-9
+
+        backend.flush()
+        assert abs(redis.data[backend._key("counter:spend:today")] - 0.5) < 1e-9
+
+    def test_falls_back_to_local_state_on_error(self):
+        """Redis errors degrade to per-process limiting instead of failing requests."""
+        redis = FakeScriptRedis()
+        redis.fail = True
+        backend = RedisThrottleBackend(redis)
+
+        assert backend.acquire("bucket:gpt-4:user", rate=1.0, burst=1)[0]
+        assert not backend.acquire("bucket:gpt-4:user", rate=1.0, burst=1)[0]
+        assert backend.stats["fallbacks"] == 2
+
+    def test_factory_uses_local_backend_without_redis(self):
+        """The factory falls back to local state for placeholder clients."""
+        class Placeholder:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: None
+
+        assert isinstance(create_throttle_backend(Placeholder()), LocalThrottleBackend)
+        assert isinstance(create_throttle_backend(FakeScriptRedis()), RedisThrottleBackend)
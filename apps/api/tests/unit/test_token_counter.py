@@ -0,0 +1,110 @@
+"""
+Unit tests for cached, batched and incremental token counting.
+"""
+import pytest
+
+from apps.api.ai.utils.token_counter import (
+    ConversationTokenCounter,
+    clear_token_cache,
+    count_tokens,
+    count_tokens_batch,
+    count_tokens_batch_async,
+    count_tokens_in_messages,
+    get_token_cache_stats,
+    get_tokenizer,
+    truncate_text_to_token_limit,
+)
+
+MODEL = "gpt-4"
+
+
+def uncached_message_count(messages):
+    tokenizer = get_tokenizer(MODEL)
+    total = 2
+    for message in messages:
+        total += len(tokenizer.encode(message["content"])) + len(tokenizer.encode(message["role"])) + 4
+    return total
+
+
+class TestTokenCache:
+    """Tests for the token count cache and batch API."""
+
+    def setup_method(self):
+        clear_token_cache()
+
+    def test_repeat_counts_hit_cache(self):
+        """Counting the same text twice encodes it once."""
+        text = "The quick brown fox jumps over the lazy dog. " * 20
+        first = count_tokens(text, MODEL)
+        second = count_tokens(text, MODEL)
+
+        assert first == second == len(get_tokenizer(MODEL).encode(text))
+        stats = get_token_cache_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_batch_matches_single_counts(self):
+        """Batch counts equal per-string counts, including duplicates and blanks."""
+        texts = ["hello world", "", "hello world", "Ünïcödé text 🚀", "x" * 1000]
+        counts = count_tokens_batch(texts, MODEL)
+
+        tokenizer = get_tokenizer(MODEL)
+        assert counts == [len(tokenizer.encode(t)) for t in texts]
+        assert get_token_cache_stats()["size"] == 3
+
+    @pytest.mark.asyncio
+    async def test_async_batch(self):
+        """The async batch API returns the same counts off the event loop."""
+        texts = ["one", "two words", "three more words"]
+        assert await count_tokens_batch_async(texts, MODEL) == count_tokens_batch(texts, MODEL)
+
+
+class TestMessageCounting:
+    """Tests for conversation token counting."""
+
+    def test_messages_match_uncached_count(self):
+        """Message counts keep the previous content + role + overhead formula."""
+        messages = [
+            {"role": "system", "content": "You are helpful."},
+            {"role": "user", "content": "Write a subject line for our spring sale."},
+        ]
+        assert count_tokens_in_messages(messages, MODEL) == uncached_message_count(messages)
+
+    def test_incremental_counter_only_counts_new_messages(self):
+        """Appending one message only tokenizes that message."""
+        counter = ConversationTokenCounter(MODEL)
+        messages = [{"role": "user", "content": f"message {i}"} for i in range(5)]
+        counter.count(messages)
+
+        clear_token_cache()
+        messages.append({"role": "assistant", "content": "a brand new reply"})
+        total = counter.count(messages)
+
+        assert total == uncached_message_count(messages)
+        assert get_token_cache_stats()["misses"] == 2
+
+    def test_incremental_counter_recounts_edited_history(self):
+        """A history that no longer extends the counted prefix is recounted."""
+        counter = ConversationTokenCounter(MODEL)
+        counter.count([{"role": "user", "content": "first"}, {"role": "assistant", "content": "second"}])
+
+        edited = [{"role": "user", "content": "first"}, {"role": "assistant", "content": "changed"}]
+        assert counter.count(edited) == uncached_message_count(edited)
+
+
+class TestTruncation:
+    """Tests for truncate_text_to_token_limit."""
+
+    @pytest.mark.parametrize("text", [
+        "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 500,
+        "    indented\n\tcode = [1, 2, 3]\n" * 400,
+        "日本語のテキスト。" * 300,
+    ])
+    def test_matches_full_encoding(self, text):
+        """Prefix encoding truncates exactly like encoding the full text."""
+        tokenizer = get_tokenizer(MODEL)
+        expected = tokenizer.decode(tokenizer.encode(text)[:100])
+        assert truncate_text_to_token_limit(text, 100, MODEL) == expected
+
+    def test_short_text_is_unchanged(self):
+        assert truncate_text_to_token_limit("short", 100, MODEL) == "short"
@@ -0,0 +1,260 @@
+"""
+Flow control for email delivery.
+
+This module provides the primitives the email worker uses to send as fast as
+the providers and receiving domains allow:
+
+- ``AdaptiveConcurrencyLimiter`` bounds the number of provider requests in
+  flight and adjusts the bound from observed latency and rate limiting:
+  it grows while latency stays near the best seen and backs off when
+  latency climbs or the provider answers 429.
+- ``DomainPacer`` spaces sends per recipient domain so large mailbox
+  providers are not flooded, which protects sender reputation.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Domains the pacer tracks before it first sweeps out idle ones
+MIN_PACER_SWEEP_SIZE = 1024
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit that adapts to downstream latency and throttling.
+
+    Successful requests whose latency stays within ``latency_tolerance`` of
+    the baseline (the lowest recent latency) raise the limit by about one
+    per ``limit`` completions. Slower requests shrink it by ``decrease``,
+    and throttled requests by ``backoff``.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_tolerance: float = 2.0,
+        decrease: float = 0.9,
+        backoff: float = 0.5,
+        baseline_drift: float = 0.01,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial_limit: Starting concurrency limit
+            min_limit: Lowest the limit may go
+            max_limit: Highest the limit may go
+            latency_tolerance: Latency, as a multiple of the baseline, above
+                which the limit shrinks
+            decrease: Factor applied to the limit on slow requests
+            backoff: Factor applied to the limit on throttled requests
+            baseline_drift: Fraction by which the baseline may rise per
+                sample, so it follows lasting latency changes
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.decrease = decrease
+        self.backoff = backoff
+        self.baseline_drift = baseline_drift
+
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._condition = asyncio.Condition()
+        self.stats = {"throttled": 0, "slow": 0, "completed": 0}
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Requests currently holding a slot."""
+        return self._in_flight
+
+    @property
+    def baseline(self) -> Optional[float]:
+        """Lowest recent latency in seconds."""
+        return self._baseline
+
+    async def acquire(self) -> None:
+        """Wait for a free slot."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self) -> None:
+        """Free a slot."""
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def record(self, latency: float, throttled: bool = False) -> None:
+        """
+        Adjust the limit from a completed request.
+
+        Call before releasing the request's slot; the release wakes
+        waiters for any slots the new limit adds.
+
+        Args:
+            latency: Request latency in seconds
+            throttled: Whether the provider rate limited the request
+        """
+        self.stats["completed"] += 1
+        if throttled:
+            self.stats["throttled"] += 1
+            self._set_limit(self._limit * self.backoff)
+            return
+
+        if self._baseline is None:
+            self._baseline = latency
+        else:
+            self._baseline = min(latency, self._baseline * (1 + self.baseline_drift))
+
+        if latency > self._baseline * self.latency_tolerance:
+            self.stats["slow"] += 1
+            self._set_limit(self._limit * self.decrease)
+        else:
+            self._set_limit(self._limit + 1 / self._limit)
+
+    def _set_limit(self, limit: float) -> None:
+        previous = self.limit
+        self._limit = max(float(self.min_limit), min(limit, float(self.max_limit)))
+        if self.limit != previous:
+            logger.debug(f"Concurrency limit changed from {previous} to {self.limit}")
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.release()
+
+
+class DomainPacer:
+    """
+    Per-domain send pacing.
+
+    Each domain has a rate in emails per second and a burst allowance.
+    Callers reserve capacity for a batch and are told how long to wait
+    before sending, so many tasks can share the pacer without polling.
+    """
+
+    def __init__(
+        self,
+        default_rate: float = 50.0,
+        burst: float = 100.0,
+        rates: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Initialize the pacer.
+
+        Args:
+            default_rate: Emails per second for domains without an override
+            burst: Emails a quiet domain may receive at once
+            rates: Per-domain overrides, e.g. ``{"gmail.com": 200}``
+        """
+        self.default_rate = default_rate
+        self.burst = burst
+        self.rates = {domain.lower(): rate for domain, rate in (rates or {}).items()}
+        # Time at which each domain's schedule is free again; domains whose
+        # time has passed are swept once the table doubles in size
+        self._next_free: Dict[str, float] = {}
+        self._sweep_at = MIN_PACER_SWEEP_SIZE
+
+    def rate_for(self, domain: str) -> float:
+        """Get the rate for a domain."""
+        return self.rates.get(domain, self.default_rate)
+
+    def reserve(self, counts: Dict[str, int], now: Optional[float] = None) -> float:
+        """
+        Reserve sends for a batch.
+
+        Args:
+            counts: Number of recipients per domain
+            now: Current monotonic time, for testing
+
+        Returns:
+            Seconds to wait before sending the batch
+        """
+        now = time.monotonic() if now is None else now
+        delay = 0.0
+        for domain, count in counts.items():
+            rate = self.rate_for(domain)
+            next_free = max(self._next_free.get(domain, now), now) + count / rate
+            self._next_free[domain] = next_free
+            # Up to `burst` emails may be sent ahead of the schedule
+            delay = max(delay, next_free - now - self.burst / rate)
+        if len(self._next_free) >= self._sweep_at:
+            self._sweep(now)
+        return max(delay, 0.0)
+
+    def _sweep(self, now: float) -> None:
+        """Forget domains whose schedule is already free."""
+        self._next_free = {
+            domain: next_free for domain, next_free in self._next_free.items() if next_free > now
+        }
+        self._sweep_at = max(MIN_PACER_SWEEP_SIZE, 2 * len(self._next_free))
+
+    async def wait(self, recipients: Iterable[str]) -> float:
+        """
+        Wait until a batch may be sent.
+
+        Args:
+            recipients: Recipient email addresses
+
+        Returns:
+            Seconds waited
+        """
+        delay = self.reserve(count_domains(recipients))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+def count_domains(recipients: Iterable[str]) -> Dict[str, int]:
+    """
+    Count recipients per domain.
+
+    Args:
+        recipients: Recipient email addresses
+
+    Returns:
+        Mapping of lower-cased domain to recipient count
+    """
+    counts: Dict[str, int] = {}
+    for recipient in recipients:
+        domain = recipient.rpartition("@")[2].lower()
+        counts[domain] = counts.get(domain, 0) + 1
+    return counts
+
+
+def domain_pacer_from_env() -> DomainPacer:
+    """
+    Create a pacer configured from the environment.
+
+    ``EMAIL_DOMAIN_RATE`` and ``EMAIL_DOMAIN_BURST`` set the defaults and
+    ``EMAIL_DOMAIN_RATES`` holds JSON per-domain overrides.
+    """
+    rates: Dict[str, float] = {}
+    raw_rates = os.getenv("EMAIL_DOMAIN_RATES")
+    if raw_rates:
+        try:
+            rates = {domain: float(rate) for domain, rate in json.loads(raw_rates).items()}
+        except (ValueError, AttributeError) as e:
+            logger.error(f"Invalid EMAIL_DOMAIN_RATES, using defaults: {e}")
+    return DomainPacer(
+        default_rate=float(os.getenv("EMAIL_DOMAIN_RATE", "50")),
+        burst=float(os.getenv("EMAIL_DOMAIN_BURST", "100")),
+        rates=rates,
+    )
@@ -0,0 +1,584 @@
+"""
+Lazy router loading and import-time profiling for the API service.
+
+Importing every router at startup drags in the AI adapters, web3 and the rest
+of the optional integrations before the first request can be served. This
+module lets the application register routers with a loading mode instead:
+
+- ``eager``: imported and mounted while the app is built (core routes).
+- ``lazy``: imported and mounted on the first request under the router prefix.
+- ``off``: never imported.
+
+Each router's mode can be overridden with an ``API_ROUTER_<NAME>`` environment
+variable, and ``API_LAZY_ROUTERS=false`` mounts everything eagerly. Import
+costs are recorded by an ``ImportProfiler`` so the startup report shows where
+cold start time goes. Running this module profiles a cold import of the app
+with ``python -X importtime``:
+
+    python -m apps.api.utils.lazy_loading --target apps.api.main --top 30
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EAGER = "eager"
+LAZY = "lazy"
+OFF = "off"
+
+_TRUE_VALUES = {"1", "true", "yes", "on", "enabled"}
+_FALSE_VALUES = {"0", "false", "no", "off", "disabled"}
+
+# Requests for the API docs mount every lazy router so the schema is complete
+DOCS_PATHS = ("/openapi.json", "/docs", "/redoc")
+
+
+class ImportProfiler:
+    """
+    Records how long each module or startup phase took to import.
+
+    Entries are kept in the order they were recorded; ``report`` sorts them by
+    cost.
+    """
+
+    def __init__(self):
+        """Initialize an empty profiler."""
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        name: str,
+        duration_ms: float,
+        new_modules: int = 0,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Record the cost of importing a module or running a startup phase.
+
+        Args:
+            name: Module or phase name
+            duration_ms: Wall time in milliseconds
+            new_modules: Number of modules added to ``sys.modules``
+            error: Error message if the import failed
+        """
+        entry = {
+            "name": name,
+            "duration_ms": round(duration_ms, 3),
+            "new_modules": new_modules,
+        }
+        if error:
+            entry["error"] = error
+        with self._lock:
+            self._entries[name] = entry
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """
+        Time the enclosed block and record it under ``name``.
+
+        Args:
+            name: Module or phase name
+        """
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.record(
+                name,
+                (time.perf_counter() - start) * 1000,
+                new_modules=max(0, len(sys.modules) - modules_before),
+                error=error,
+            )
+
+    def import_module(self, name: str) -> Any:
+        """
+        Import a module and record its cost.
+
+        Args:
+            name: Dotted module name
+
+        Returns:
+            The imported module
+        """
+        with self.measure(name):
+            return importlib.import_module(name)
+
+    def report(self, top: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Summarize recorded import costs, most expensive first.
+
+        Args:
+            top: Only include this many entries
+
+        Returns:
+            Total time and the per-entry breakdown
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+        entries.sort(key=lambda entry: entry["duration_ms"], reverse=True)
+        return {
+            "total_ms": round(sum(entry["duration_ms"] for entry in entries), 3),
+            "entries": entries[:top] if top else entries,
+        }
+
+    def clear(self) -> None:
+        """Forget all recorded entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+class RouterSpec:
+    """
+    Description of a router and how it should be loaded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        prefix: Optional[str] = None,
+        mode: str = EAGER,
+        attr: str = "router",
+        include_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize a router spec.
+
+        Args:
+            name: Short name, also used for the ``API_ROUTER_<NAME>`` override
+            module: Dotted module that defines the router
+            prefix: Path prefix that triggers lazy mounting
+            mode: Default loading mode (eager, lazy or off)
+            attr: Attribute holding the ``APIRouter``
+            include_kwargs: Extra arguments for ``include_router``
+        """
+        if mode not in (EAGER, LAZY, OFF):
+            raise ValueError(f"Invalid router mode: {mode}")
+        self.name = name
+        self.module = module
+        self.prefix = prefix.rstrip("/") if prefix else None
+        self.mode = mode
+        self.attr = attr
+        self.include_kwargs = include_kwargs or {}
+        self.state = "registered"
+        self.error: Optional[str] = None
+        self.import_ms: Optional[float] = None
+        self.mounted_by: Optional[str] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def flag(self) -> str:
+        """Environment variable that overrides the loading mode."""
+        return "API_ROUTER_" + self.name.upper().replace("-", "_")
+
+    def matches(self, path: str) -> bool:
+        """
+        Check whether a request path falls under this router's prefix.
+
+        Args:
+            path: Request path
+
+        Returns:
+            True if the path is the prefix or below it
+        """
+        if not self.prefix:
+            return False
+        return path == self.prefix or path.startswith(self.prefix + "/")
+
+
+class LazyRouterRegistry:
+    """
+    Mounts routers eagerly, on first request, or not at all.
+
+    Call ``add_middleware`` before any other middleware so that it sits
+    innermost and only requests that pass the security middleware trigger an
+    import, then ``mount`` once every router has been registered.
+    """
+
+    def __init__(
+        self,
+        profiler: Optional[ImportProfiler] = None,
+        lazy_enabled: Optional[bool] = None,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            profiler: Profiler that records router import costs
+            lazy_enabled: Allow lazy mounting; defaults to ``API_LAZY_ROUTERS``
+        """
+        if lazy_enabled is None:
+            lazy_enabled = os.getenv("API_LAZY_ROUTERS", "true").lower() not in _FALSE_VALUES
+        self.profiler = profiler or import_profiler
+        self.lazy_enabled = lazy_enabled
+        self.specs: "OrderedDict[str, RouterSpec]" = OrderedDict()
+        self.app = None
+
+    def register(
+        self,
+        name: str,
+        module: str,
+        prefix: Optional[str] = None,
+        mode: str = EAGER,
+        attr: str = "router",
+        **include_kwargs: Any,
+    ) -> RouterSpec:
+        """
+        Register a router.
+
+        Args:
+            name: Short name, also used for the ``API_ROUTER_<NAME>`` override
+            module: Dotted module that defines the router
+            prefix: Path prefix that triggers lazy mounting
+            mode: Default loading mode (eager, lazy or off)
+            attr: Attribute holding the ``APIRouter``
+            **include_kwargs: Extra arguments for ``include_router``
+
+        Returns:
+            The registered spec
+        """
+        spec = RouterSpec(name, module, prefix=prefix, mode=mode, attr=attr, include_kwargs=include_kwargs)
+        self.specs[name] = spec
+        return spec
+
+    def resolve_mode(self, spec: RouterSpec) -> str:
+        """
+        Work out how a router should be loaded in this process.
+
+        ``API_ROUTER_<NAME>`` accepts a mode name or a boolean; ``true`` keeps
+        the default mode (or lazy if the router is off by default).
+
+        Args:
+            spec: Router spec
+
+        Returns:
+            eager, lazy or off
+        """
+        mode = spec.mode
+        override = os.getenv(spec.flag)
+        if override:
+            value = override.strip().lower()
+            if value in (EAGER, LAZY, OFF):
+                mode = value
+            elif value in _FALSE_VALUES:
+                mode = OFF
+            elif value in _TRUE_VALUES:
+                mode = LAZY if mode == OFF else mode
+            else:
+                logger.warning(f"Ignoring invalid value {override!r} for {spec.flag}")
+
+        if mode == LAZY and (not self.lazy_enabled or not spec.prefix):
+            mode = EAGER
+        return mode
+
+    def add_middleware(self, app) -> None:
+        """
+        Install the middleware that mounts lazy routers on first request.
+
+        Args:
+            app: FastAPI application
+        """
+        self.app = app
+        app.add_middleware(LazyRouterMiddleware, registry=self)
+
+    def mount(self, app) -> None:
+        """
+        Mount eager routers and mark lazy ones as pending.
+
+        Args:
+            app: FastAPI application
+        """
+        self.app = app
+        for spec in self.specs.values():
+            mode = self.resolve_mode(spec)
+            if mode == OFF:
+                spec.state = "disabled"
+            elif mode == LAZY:
+                spec.state = "pending"
+            else:
+                self._load_sync(spec, trigger="startup")
+
+    @property
+    def pending(self) -> List[RouterSpec]:
+        """Routers waiting for their first request."""
+        return [spec for spec in self.specs.values() if spec.state == "pending"]
+
+    async def ensure_mounted(self, path: str) -> None:
+        """
+        Mount every pending router that serves ``path``.
+
+        Args:
+            path: Request path
+        """
+        if path in DOCS_PATHS:
+            targets = self.pending
+        else:
+            targets = [spec for spec in self.pending if spec.matches(path)]
+        for spec in targets:
+            await self.load(spec, trigger=path)
+
+    async def preload(self) -> None:
+        """Mount every pending router, e.g. in the background after startup."""
+        for spec in self.pending:
+            await self.load(spec, trigger="preload")
+
+    async def load(self, spec: RouterSpec, trigger: str) -> None:
+        """
+        Import and mount a pending router once, however many requests race.
+
+        The import runs in a worker thread so other requests keep being
+        served while a heavy router loads.
+
+        Args:
+            spec: Router spec
+            trigger: What caused the load (request path or "preload")
+        """
+        if spec._lock is None:
+            spec._lock = asyncio.Lock()
+        async with spec._lock:
+            if spec.state != "pending":
+                return
+            loop = asyncio.get_running_loop()
+            router = await loop.run_in_executor(None, self._import_router, spec)
+            if router is not None:
+                self._include(spec, router, trigger)
+
+    def _load_sync(self, spec: RouterSpec, trigger: str) -> None:
+        router = self._import_router(spec)
+        if router is not None:
+            self._include(spec, router, trigger)
+
+    def _import_router(self, spec: RouterSpec) -> Any:
+        start = time.perf_counter()
+        try:
+            module = self.profiler.import_module(spec.module)
+            return getattr(module, spec.attr)
+        except Exception as e:
+            spec.state = "failed"
+            spec.error = f"{type(e).__name__}: {e}"
+            logger.warning(f"Router {spec.name} ({spec.module}) not available: {spec.error}")
+            return None
+        finally:
+            spec.import_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    def _include(self, spec: RouterSpec, router: Any, trigger: str) -> None:
+        self.app.include_router(router, **spec.include_kwargs)
+        # Routes added after startup must show up in the generated schema
+        self.app.openapi_schema = None
+        spec.state = "mounted"
+        spec.mounted_by = trigger
+        if trigger != "startup":
+            logger.info(f"Mounted router {spec.name} in {spec.import_ms:.1f}ms (trigger: {trigger})")
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Describe every registered router and the recorded import costs.
+
+        Returns:
+            Router states and the import profile
+        """
+        return {
+            "lazy_enabled": self.lazy_enabled,
+            "routers": [
+                {
+                    "name": spec.name,
+                    "module": spec.module,
+                    "prefix": spec.prefix,
+                    "mode": spec.mode,
+                    "state": spec.state,
+                    "import_ms": spec.import_ms,
+                    "mounted_by": spec.mounted_by,
+                    "error": spec.error,
+                }
+                for spec in self.specs.values()
+            ],
+            "imports": self.profiler.report(),
+        }
+
+
+class LazyRouterMiddleware:
+    """
+    ASGI middleware that mounts lazy routers before the request is routed.
+    """
+
+    def __init__(self, app, registry: LazyRouterRegistry):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Next ASGI application
+            registry: Registry holding the pending routers
+        """
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and self.registry.pending:
+            await self.registry.ensure_mounted(scope.get("path", ""))
+        await self.app(scope, receive, send)
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """
+    Parse the stderr of ``python -X importtime``.
+
+    Args:
+        output: Captured stderr
+
+    Returns:
+        One entry per imported module with self and cumulative microseconds
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            # Header line
+            continue
+        raw_name = parts[2].rstrip()
+        name = raw_name.lstrip()
+        entries.append({
+            "module": name,
+            "self_us": self_us,
+            "cumulative_us": cumulative_us,
+            "depth": (len(raw_name) - len(name) - 1) // 2,
+        })
+    return entries
+
+
+def _package_of(module: str) -> str:
+    parts = module.split(".")
+    # Project code is grouped by component, third-party code by distribution
+    if parts[0] in ("apps", "packages"):
+        return ".".join(parts[:4])
+    return parts[0]
+
+
+def summarize_importtime(entries: List[Dict[str, Any]], top: int = 25) -> Dict[str, Any]:
+    """
+    Summarize parsed ``-X importtime`` output.
+
+    Args:
+        entries: Output of ``parse_importtime``
+        top: Number of modules and packages to list
+
+    Returns:
+        Total import time, the slowest modules by cumulative time, and self
+        time grouped by package
+    """
+    packages: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        package = packages.setdefault(_package_of(entry["module"]), {"self_us": 0, "modules": 0})
+        package["self_us"] += entry["self_us"]
+        package["modules"] += 1
+
+    slowest = sorted(entries, key=lambda entry: entry["cumulative_us"], reverse=True)
+    by_package = sorted(
+        ({"package": name, **stats} for name, stats in packages.items()),
+        key=lambda entry: entry["self_us"],
+        reverse=True,
+    )
+    return {
+        "total_ms": round(sum(entry["self_us"] for entry in entries) / 1000, 3),
+        "modules": len(entries),
+        "slowest_modules": slowest[:top],
+        "packages": by_package[:top],
+    }
+
+
+def profile_cold_import(
+    target: str = "apps.api.main",
+    top: int = 25,
+    python: Optional[str] = None,
+    timeout: float = 300.0,
+) -> Dict[str, Any]:
+    """
+    Import a module in a fresh interpreter and report per-module cost.
+
+    Args:
+        target: Module to import
+        top: Number of modules and packages to list
+        python: Interpreter to use (defaults to the current one)
+        timeout: Seconds to wait for the import
+
+    Returns:
+        ``summarize_importtime`` output plus wall time and import status
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    summary = summarize_importtime(parse_importtime(completed.stderr), top=top)
+    summary["target"] = target
+    summary["wall_ms"] = round(wall_ms, 3)
+    summary["ok"] = completed.returncode == 0
+    if completed.returncode != 0:
+        # The last stderr line holds the exception that stopped the import
+        lines = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        summary["error"] = lines[-1] if lines else f"exit code {completed.returncode}"
+    return summary
+
+
+def _print_summary(summary: Dict[str, Any]) -> None:
+    status = "ok" if summary["ok"] else f"failed ({summary.get('error')})"
+    print(f"Cold import of {summary['target']}: {summary['wall_ms']:.0f}ms wall, "
+          f"{summary['total_ms']:.0f}ms in {summary['modules']} modules, {status}")
+    print("\nSlowest modules (cumulative):")
+    for entry in summary["slowest_modules"]:
+        print(f"  {entry['cumulative_us'] / 1000:10.1f}ms  {entry['module']}")
+    print("\nSelf time by package:")
+    for entry in summary["packages"]:
+        print(f"  {entry['self_us'] / 1000:10.1f}ms  {entry['package']} ({entry['modules']} modules)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Profile a cold import from the command line."""
+    parser = argparse.ArgumentParser(description="Report per-module import cost of the API")
+    parser.add_argument("--target", default="apps.api.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=25, help="Number of entries to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    summary = profile_cold_import(args.target, top=args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        _print_summary(summary)
+    return 0 if summary["ok"] else 1
+
+
+# Module-level profiler shared by the application startup code
+import_profiler = ImportProfiler()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,19 @@ monitoring application performance, resource usage, and business metrics. It off
 4. Configurable aggregation and exporters
 5. Real-time alerting thresholds
 6. Integration with Grafana dashboards
+
+Multi-worker deployments (gunicorn, ``uvicorn --workers``) should set
+``PROMETHEUS_MULTIPROC_DIR`` to an empty directory before the workers start.
+Each worker then writes its counters, gauges and histograms to its own
+mmap-backed files without cross-process locking, and a scrape merges the
+files of all workers, so every worker serves the same totals. Call
+``mark_worker_dead`` from the server's worker-exit hook so live gauges of
+dead workers are dropped.
+
+System metrics are read when metrics are scraped or pushed rather than on a
+timer, and requests are labelled with the path template of the route they
+match (``/campaigns/{campaign_id}``); paths no route handles share a single
+label.
 """
 
 import os
@@ -23,6 +36,7 @@ import logging
 import psutil
 
 from fastapi import Request, Response
+from starlette.routing import Match
 from prometheus_client import (
     Counter, Gauge, Histogram, Summary,
     REGISTRY, CollectorRegistry, push_to_gateway,
@@ -47,6 +61,56 @@ PUSH_INTERVAL = int(os.getenv("METRICS_PUSH_INTERVAL", "15"))  # seconds
 HOSTNAME = socket.gethostname()
 ENV = os.getenv("ENVIRONMENT", "development")
 
+# Per-worker metric files are written here when set; read by prometheus_client at import
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+# Endpoint label for requests that match no route, so scanned URLs add no series
+UNMATCHED_ENDPOINT = "unmatched"
+
+
+def mark_worker_dead(pid: int) -> None:
+    """
+    Drop the live gauges of an exited worker process
+
+    Call from the server's worker-exit hook, e.g. gunicorn's ``child_exit``.
+
+    Args:
+        pid: Process ID of the exited worker
+    """
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+class SystemMetricsCollector:
+    """Collector reading CPU, memory and disk usage when metrics are scraped"""
+
+    def __init__(self):
+        # Prime the CPU counter so the first scrape does not need to block
+        psutil.cpu_percent(interval=None)
+
+    def collect(self):
+        try:
+            cpu = GaugeMetricFamily("system_cpu_usage", "CPU usage percentage", labels=["hostname", "env"])
+            cpu.add_metric([HOSTNAME, ENV], psutil.cpu_percent(interval=None))
+
+            memory = psutil.virtual_memory()
+            memory_usage = GaugeMetricFamily(
+                "system_memory_usage_bytes", "Memory usage in bytes", labels=["hostname", "env", "type"]
+            )
+            for kind in ("total", "used", "available"):
+                memory_usage.add_metric([HOSTNAME, ENV, kind], getattr(memory, kind))
+
+            disk = psutil.disk_usage('/')
+            disk_usage = GaugeMetricFamily(
+                "system_disk_usage_bytes", "Disk usage in bytes", labels=["hostname", "env", "path", "type"]
+            )
+            for kind in ("total", "used", "free"):
+                disk_usage.add_metric([HOSTNAME, ENV, "/", kind], getattr(disk, kind))
+        except Exception as e:
+            logger.error(f"Error collecting system metrics: {e}")
+            return []
+        return [cpu, memory_usage, disk_usage]
+
 
 class MetricType(Enum):
     """Enum for different types of metrics"""
@@ -78,6 +142,7 @@ class MetricsManager:
         # Metrics collections
         self._counters: Dict[str, Counter] = {}
         self._gauges: Dict[str, Gauge] = {}
+        self._gauge_labels: Dict[str, List[str]] = {}
         self._histograms: Dict[str, Histogram] = {}
         self._summaries: Dict[str, Summary] = {}
 
@@ -88,13 +153,27 @@ class MetricsManager:
         self._push_thread = None
         self._stop_push_thread = threading.Event()
 
+        # Registry served on scrapes; merges all workers' files in multiprocess mode
+        self._system_collector = None
+        self._scrape_registry = REGISTRY
+
         # Initialize standard metrics
         if ENABLE_METRICS:
             self._init_standard_metrics()
+            self._system_collector = SystemMetricsCollector()
+            if MULTIPROC_DIR:
+                self._scrape_registry = CollectorRegistry()
+                multiprocess.MultiProcessCollector(self._scrape_registry, path=MULTIPROC_DIR)
+            self._scrape_registry.register(self._system_collector)
 
-            # Start metrics HTTP server
-            start_http_server(METRICS_PORT)
-            logger.info(f"Metrics server started on port {METRICS_PORT}")
+            # Start metrics HTTP server; with several workers the first one serves the merged view
+            try:
+                start_http_server(METRICS_PORT, registry=self._scrape_registry)
+                logger.info(f"Metrics server started on port {METRICS_PORT}")
+            except OSError as e:
+                if not MULTIPROC_DIR:
+                    raise
+                logger.debug(f"Metrics server already running in another worker: {e}")
 
             # Start push thread if gateway configured
             if PUSH_GATEWAY_URL:
@@ -104,24 +183,7 @@ class MetricsManager:
 
     def _init_standard_metrics(self):
         """Initialize standard application metrics"""
-        # System metrics
-        self.register_gauge(
-            "system_cpu_usage",
-            "CPU usage percentage",
-            ["hostname", "env"]
-        )
-
-        self.register_gauge(
-            "system_memory_usage_bytes",
-            "Memory usage in bytes",
-            ["hostname", "env", "type"]
-        )
-
-        self.register_gauge(
-            "system_disk_usage_bytes",
-            "Disk usage in bytes",
-            ["hostname", "env", "path", "type"]
-        )
+        # System metrics are produced by SystemMetricsCollector at scrape time
 
         # Application metrics
         self.register_counter(
@@ -140,7 +202,8 @@ class MetricsManager:
         self.register_gauge(
             "http_requests_in_progress",
             "HTTP requests currently in progress",
-            ["method", "endpoint"]
+            ["method", "endpoint"],
+            multiprocess_mode="livesum"
         )
 
         # Database metrics
@@ -187,7 +250,8 @@ class MetricsManager:
         self.register_gauge(
             "email_queue_size",
             "Number of emails in sending queue",
-            ["priority"]
+            ["priority"],
+            multiprocess_mode="max"
         )
 
         self.register_histogram(
@@ -219,7 +283,9 @@ class MetricsManager:
     def _start_push_thread(self):
         """Start a thread to periodically push metrics to Prometheus gateway"""
         def push_metrics():
-            registry = REGISTRY
+            # System metrics are read during the push itself, so the thread
+            # does no other work between pushes
+            registry = self._scrape_registry
             while not self._stop_push_thread.is_set():
                 try:
                     push_to_gateway(
@@ -231,9 +297,6 @@ class MetricsManager:
                 except Exception as e:
                     logger.error(f"Failed to push metrics to gateway: {e}")
 
-                # Collect system metrics
-                self._collect_system_metrics()
-
                 # Wait for next push interval or until stopped
                 self._stop_push_thread.wait(timeout=PUSH_INTERVAL)
 
@@ -241,59 +304,15 @@ class MetricsManager:
         self._push_thread.start()
         logger.info(f"Started metrics push thread, pushing to {PUSH_GATEWAY_URL} every {PUSH_INTERVAL}s")
 
-    def _collect_system_metrics(self):
-        """Collect system metrics like CPU, memory, and disk usage"""
-        if not ENABLE_METRICS:
-            return
+    def scrape_registry(self) -> CollectorRegistry:
+        """
+        Get the registry to expose on scrapes and pushes
 
-        try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=0.5)
-            self._gauges["system_cpu_usage"].labels(
-                hostname=HOSTNAME,
-                env=ENV
-            ).set(cpu_percent)
-
-            # Memory usage
-            memory = psutil.virtual_memory()
-            self._gauges["system_memory_usage_bytes"].labels(
-                hostname=HOSTNAME,
-                env=ENV,
-                type="total"
-            ).set(memory.total)
-            self._gauges["system_memory_usage_bytes"].labels(
-                hostname=HOSTNAME,
-                env=ENV,
-                type="used"
-            ).set(memory.used)
-            self._gauges["system_memory_usage_bytes"].labels(
-                hostname=HOSTNAME,
-                env=ENV,
-                type="available"
-            ).set(memory.available)
-
-            # Disk usage
-            disk = psutil.disk_usage('/')
-            self._gauges["system_disk_usage_bytes"].labels(
-                hostname=HOSTNAME,
-                env=ENV,
-                path="/",
-                type="total"
-            ).set(disk.total)
-            self._gauges["system_disk_usage_bytes"].labels(
-                hostname=HOSTNAME,
-                env=ENV,
-                path="/",
-                type="used"
-            ).set(disk.used)
-            self._gauges["system_disk_usage_bytes"].labels(
-                hostname=HOSTNAME,
-                env=ENV,
-                path="/",
-                type="free"
-            ).set(disk.free)
-        except Exception as e:
-            logger.error(f"Error collecting system metrics: {e}")
+        Returns:
+            The registry merging all worker processes in multiprocess mode,
+            otherwise the default registry
+        """
+        return self._scrape_registry
 
     def register_counter(self, name: str, description: str, labels: List[str] = None) -> Counter:
         """
@@ -317,7 +336,13 @@ class MetricsManager:
         self._counters[name] = counter
         return counter
 
-    def register_gauge(self, name: str, description: str, labels: List[str] = None) -> Gauge:
+    def register_gauge(
+        self,
+        name: str,
+        description: str,
+        labels: List[str] = None,
+        multiprocess_mode: str = "liveall"
+    ) -> Gauge:
         """
         Register a gauge metric
 
@@ -325,6 +350,8 @@ class MetricsManager:
             name: Metric name
             description: Metric description
             labels: Label names for the metric
+            multiprocess_mode: How values of several workers are merged, e.g.
+                "livesum" to add them up or "liveall" to keep one per worker
 
         Returns:
             The registered gauge
@@ -335,8 +362,9 @@ class MetricsManager:
         if name in self._gauges:
             return self._gauges[name]
 
-        gauge = Gauge(name, description, labels or [])
+        gauge = Gauge(name, description, labels or [], multiprocess_mode=multiprocess_mode)
         self._gauges[name] = gauge
+        self._gauge_labels[name] = list(labels or [])
         return gauge
 
     def register_histogram(
@@ -431,6 +459,42 @@ class MetricsManager:
         else:
             self._gauges[name].set(value)
 
+    def remove_gauge(self, name: str, **labels) -> None:
+        """
+        Drop one labelled series of a gauge, e.g. once what it tracks has finished
+
+        In multiprocess mode the last value stays in the worker's file until
+        the worker exits.
+
+        Args:
+            name: Metric name
+            **labels: Label values of the series
+        """
+        if not ENABLE_METRICS or name not in self._gauges:
+            return
+
+        try:
+            self._gauges[name].remove(*(labels[label] for label in self._gauge_labels[name]))
+        except KeyError:
+            pass
+
+    def increment_gauge(self, name: str, amount: float = 1, **labels) -> None:
+        """
+        Increment (or with a negative amount, decrement) a gauge metric
+
+        Args:
+            name: Metric name
+            amount: Amount to add
+            **labels: Label values
+        """
+        if not ENABLE_METRICS or name not in self._gauges:
+            return
+
+        if labels:
+            self._gauges[name].labels(**labels).inc(amount)
+        else:
+            self._gauges[name].inc(amount)
+
     def observe_histogram(self, name: str, value: float, **labels) -> None:
         """
         Observe a value in a histogram
@@ -557,12 +621,30 @@ class MetricsMiddleware:
         self.app = app
         self.metrics = MetricsManager()
 
+    @staticmethod
+    def _endpoint_label(request: Request) -> str:
+        """Label a request with the path template of the route it matches"""
+        route = request.scope.get("route")
+        if route is None:
+            # Routing has not run yet; pick the route the router will, full matches first
+            router = request.scope.get("router") or getattr(request.scope.get("app"), "router", None)
+            partial = None
+            for candidate in getattr(router, "routes", ()):
+                match, _ = candidate.matches(request.scope)
+                if match == Match.FULL:
+                    route = candidate
+                    break
+                if match == Match.PARTIAL and partial is None:
+                    partial = candidate
+            route = route or partial
+        return getattr(route, "path", None) or UNMATCHED_ENDPOINT
+
     async def __call__(self, request: Request, call_next) -> Response:
         method = request.method
-        endpoint = request.url.path
+        endpoint = self._endpoint_label(request)
 
         # Track in-progress requests
-        self.metrics.increment_counter(
+        self.metrics.increment_gauge(
             "http_requests_in_progress",
             1,
             method=method,
@@ -570,7 +652,7 @@ class MetricsMiddleware:
         )
 
         # Time the request
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             response = await call_next(request)
             status = response.status_code
@@ -580,7 +662,7 @@ class MetricsMiddleware:
             raise
         finally:
             # Record request duration
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
 
             # Update metrics
             self.metrics.increment_counter(
@@ -598,8 +680,8 @@ class MetricsMiddleware:
                 endpoint=endpoint
             )
 
-            # Decrement in-progress counter
-            self.metrics.increment_counter(
+            # Decrement in-progress gauge
+            self.metrics.increment_gauge(
                 "http_requests_in_progress",
                 -1,
                 method=method,
@@ -743,13 +825,10 @@ def setup_metrics(app):
     @router.get("/metrics")
     async def metrics():
         from fastapi.responses import Response
-        return Response(content=generate_latest(), media_type="text/plain")
+        return Response(content=generate_latest(metrics_manager.scrape_registry()), media_type="text/plain")
 
     app.include_router(router, tags=["Monitoring"])
 
-    # Initialize metrics
-    metrics_manager._collect_system_metrics()
-
     # Register shutdown event
     @app.on_event("shutdown")
     def shutdown_metrics():
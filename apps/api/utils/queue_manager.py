@@ -1,22 +1,51 @@
 """
 Queue Manager for setting up and managing RabbitMQ queues.
 Handles creating exchanges, queues, and managing connections.
+
+``QueueManager`` is the blocking client used by worker threads. Code running
+on an event loop, such as request handlers, should publish through
+``AsyncQueuePublisher`` instead: it publishes on a pool of confirm channels,
+waits for confirms of a whole batch at once, paces queues by yielding to the
+event loop rather than sleeping, and buffers messages locally while the
+broker is unreachable.
 """
+import asyncio
+import json
 import logging
+import os
 import time
 import threading
-from typing import Dict, List, Optional, Any, Callable
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any, Callable, Tuple
 
+import aio_pika
 import pika
+from aio_pika.pool import Pool
 from pika.adapters.blocking_connection import BlockingChannel
 from pika.exceptions import AMQPConnectionError, AMQPChannelError
 
-from backend.config.queue_config import (
+from config.queue_config import (
     RABBITMQ_URL, QUEUE_CONFIGS, DLX_CONFIG, DLX_QUEUE, RATE_LIMITS, Queues
 )
+from .resilience import RateLimiter
 
 logger = logging.getLogger(__name__)
 
+# Async publisher settings
+PUBLISHER_CHANNEL_POOL_SIZE = int(os.getenv("QUEUE_PUBLISHER_CHANNELS", "4"))
+PUBLISH_CONFIRM_TIMEOUT = float(os.getenv("QUEUE_PUBLISH_CONFIRM_TIMEOUT", "5"))
+SPILL_BUFFER_SIZE = int(os.getenv("QUEUE_SPILL_BUFFER_SIZE", "10000"))
+SPILL_RETRY_INTERVAL = float(os.getenv("QUEUE_SPILL_RETRY_SECONDS", "5"))
+SPILL_REPLAY_BATCH_SIZE = 500
+
+
+def _queue_rate_limiters() -> Dict[Queues, RateLimiter]:
+    """Create token buckets for the queues in RATE_LIMITS, allowing one second of burst."""
+    return {
+        queue: RateLimiter(f"queue:{queue.value}", rate, max(1, int(rate)))
+        for queue, rate in RATE_LIMITS.items()
+    }
+
 class QueueManager:
     """
     Manager for RabbitMQ queues, exchanges, and connections.
@@ -29,7 +58,9 @@ class QueueManager:
         self._is_connected = False
         self._reconnect_delay = 0
         self._connection_lock = threading.Lock()
-        self._last_message_time = {}
+        # pika channels are not thread-safe
+        self._publish_lock = threading.Lock()
+        self._rate_limiters = _queue_rate_limiters()
         self._setup_exchanges_and_queues()
 
     def _get_connection_parameters(self) -> pika.ConnectionParameters:
@@ -135,6 +166,9 @@ class QueueManager:
         """
         Publish a message to a queue with rate limiting.
 
+        This blocks the calling thread while rate limited; code on an event
+        loop should use ``AsyncQueuePublisher.publish``.
+
         Args:
             queue: Queue enum to publish to
             message: Message body as dictionary
@@ -152,22 +186,13 @@ class QueueManager:
             logger.error(f"Unknown queue: {queue}")
             return False
 
-        # Apply rate limiting if configured
-        if queue in RATE_LIMITS:
-            now = time.time()
-            last_time = self._last_message_time.get(queue, 0)
-            min_interval = 1.0 / RATE_LIMITS[queue]
-
-            if now - last_time < min_interval:
-                # We're sending too fast, sleep to maintain the rate limit
-                sleep_time = min_interval - (now - last_time)
-                time.sleep(sleep_time)
-                now = time.time()
-
-            self._last_message_time[queue] = now
+        # Apply rate limiting if configured; only the missing tokens are waited for
+        limiter = self._rate_limiters.get(queue)
+        if limiter is not None:
+            while not limiter.acquire():
+                time.sleep((1 - limiter.tokens) / limiter.tokens_per_second)
 
         try:
-            import json
             properties = pika.BasicProperties(
                 content_type='application/json',
                 delivery_mode=2,  # persistent
@@ -175,12 +200,13 @@ class QueueManager:
                 correlation_id=correlation_id
             )
 
-            self.channel.basic_publish(
-                exchange=queue_config["exchange"],
-                routing_key=queue_config["routing_key"],
-                body=json.dumps(message),
-                properties=properties
-            )
+            with self._publish_lock:
+                self.channel.basic_publish(
+                    exchange=queue_config["exchange"],
+                    routing_key=queue_config["routing_key"],
+                    body=json.dumps(message),
+                    properties=properties
+                )
             return True
         except (AMQPConnectionError, AMQPChannelError) as e:
             logger.error(f"Failed to publish message to {queue.value}: {e}")
@@ -211,7 +237,6 @@ class QueueManager:
 
         def on_message(ch, method, properties, body):
             try:
-                import json
                 message = json.loads(body)
                 message_info = {
                     'routing_key': method.routing_key,
@@ -262,8 +287,294 @@ class QueueManager:
         """Clean up resources when this object is garbage collected."""
         self.close()
 
-# Create a singleton instance
-queue_manager = QueueManager()
+# A message waiting to be published: (queue, body, priority, correlation_id)
+PendingMessage = Tuple[Queues, bytes, int, Optional[str]]
+
+
+class AsyncQueuePublisher:
+    """
+    Non-blocking RabbitMQ publisher for code running on an event loop.
+
+    Messages are published on a pool of channels in confirm mode. A batch is
+    published on one channel and all its confirms are awaited together, so
+    publishing many messages costs about one round trip. Queues listed in
+    RATE_LIMITS are paced with token buckets; callers wait by yielding to the
+    event loop. Messages the broker does not confirm, e.g. during an outage,
+    are kept in a bounded local buffer and replayed in the background.
+    """
+
+    def __init__(
+        self,
+        connection_url: str = RABBITMQ_URL,
+        pool_size: int = PUBLISHER_CHANNEL_POOL_SIZE,
+        spill_size: int = SPILL_BUFFER_SIZE,
+        retry_interval: float = SPILL_RETRY_INTERVAL,
+        connect: Optional[Callable[..., Any]] = None,
+    ):
+        """
+        Initialize the publisher. The connection is opened on first publish.
+
+        Args:
+            connection_url: RabbitMQ URL
+            pool_size: Maximum number of publishing channels
+            spill_size: Maximum number of messages buffered during outages
+            retry_interval: Seconds between attempts to replay buffered messages
+            connect: Coroutine function opening the connection, defaults to
+                ``aio_pika.connect_robust``
+        """
+        self.connection_url = connection_url
+        self.pool_size = pool_size
+        self.spill_size = spill_size
+        self.retry_interval = retry_interval
+        self._connect = connect or aio_pika.connect_robust
+        self._connection = None
+        self._channels: Optional[Pool] = None
+        self._connect_lock = asyncio.Lock()
+        self._next_connect_attempt = 0.0
+        self._rate_limiters = _queue_rate_limiters()
+        self._spill: Deque[PendingMessage] = deque()
+        self._replay_task: Optional[asyncio.Task] = None
+        self.stats = {"published": 0, "spilled": 0, "replayed": 0, "dropped": 0}
+
+    @property
+    def spilled(self) -> int:
+        """Number of messages waiting in the local buffer."""
+        return len(self._spill)
+
+    async def publish(
+        self,
+        queue: Queues,
+        message: Dict[str, Any],
+        priority: int = 0,
+        correlation_id: str = None,
+    ) -> bool:
+        """
+        Publish a message to a queue.
+
+        Args:
+            queue: Queue enum to publish to
+            message: Message body as dictionary
+            priority: Message priority (0-9, higher is more priority)
+            correlation_id: Optional correlation ID for the message
+
+        Returns:
+            bool: True if the broker confirmed the message or it was buffered
+            for replay, False otherwise
+        """
+        return await self.publish_batch(queue, [message], priority, correlation_id) == 1
+
+    async def publish_batch(
+        self,
+        queue: Queues,
+        messages: List[Dict[str, Any]],
+        priority: int = 0,
+        correlation_id: str = None,
+    ) -> int:
+        """
+        Publish messages to a queue and wait for all their confirms at once.
+
+        Args:
+            queue: Queue enum to publish to
+            messages: Message bodies as dictionaries
+            priority: Message priority (0-9, higher is more priority)
+            correlation_id: Optional correlation ID for the messages
+
+        Returns:
+            int: Number of messages confirmed or buffered for replay
+        """
+        if queue not in QUEUE_CONFIGS:
+            logger.error(f"Unknown queue: {queue}")
+            return 0
+
+        pending = [(queue, json.dumps(message).encode("utf-8"), priority, correlation_id) for message in messages]
+        await self._pace(queue, len(pending))
+
+        failed = await self._send(pending)
+        self.stats["published"] += len(pending) - len(failed)
+        if not failed:
+            return len(pending)
+        return len(pending) - self._spill_messages(failed)
+
+    async def close(self) -> None:
+        """Stop replaying and close the channels and connection."""
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+            try:
+                await self._replay_task
+            except asyncio.CancelledError:
+                pass
+            self._replay_task = None
+        if self._spill:
+            logger.warning(f"Closing publisher with {len(self._spill)} unpublished messages")
+        if self._channels is not None:
+            await self._channels.close()
+            self._channels = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def _pace(self, queue: Queues, count: int) -> None:
+        """Take tokens for ``count`` messages, yielding until they are available."""
+        limiter = self._rate_limiters.get(queue)
+        if limiter is None:
+            return
+        remaining = count
+        while remaining > 0:
+            take = min(remaining, limiter.bucket_size)
+            if limiter.acquire(take):
+                remaining -= take
+            else:
+                await asyncio.sleep((take - limiter.tokens) / limiter.tokens_per_second)
+
+    async def _ensure_connected(self) -> bool:
+        """Open the connection, channel pool and topology if needed."""
+        if self._channels is not None:
+            return True
+        async with self._connect_lock:
+            if self._channels is not None:
+                return True
+            # While the broker is down, buffer immediately instead of waiting on every publish
+            if time.monotonic() < self._next_connect_attempt:
+                return False
+            try:
+                self._connection = await self._connect(self.connection_url)
+                channels = Pool(self._open_channel, max_size=self.pool_size)
+                async with channels.acquire() as channel:
+                    await self._declare_topology(channel)
+                self._channels = channels
+                logger.info("Async publisher connected to RabbitMQ")
+                return True
+            except Exception as e:
+                logger.error(f"Async publisher failed to connect to RabbitMQ: {e}")
+                self._next_connect_attempt = time.monotonic() + self.retry_interval
+                if self._connection is not None:
+                    try:
+                        await self._connection.close()
+                    except Exception:
+                        pass
+                    self._connection = None
+                return False
+
+    async def _open_channel(self):
+        return await self._connection.channel(publisher_confirms=True)
+
+    async def _declare_topology(self, channel) -> None:
+        """Declare the exchanges and queues from the queue config."""
+        dlx = await channel.declare_exchange(
+            DLX_CONFIG["exchange"], DLX_CONFIG["type"], durable=DLX_CONFIG["durable"]
+        )
+        dlx_queue = await channel.declare_queue(
+            DLX_QUEUE["name"], durable=True, arguments=DLX_QUEUE["arguments"]
+        )
+        await dlx_queue.bind(dlx, routing_key=DLX_QUEUE["routing_key"])
+
+        exchanges = {}
+        for name in set(config["exchange"] for config in QUEUE_CONFIGS.values()):
+            exchanges[name] = await channel.declare_exchange(name, "direct", durable=True)
+
+        for queue_enum, config in QUEUE_CONFIGS.items():
+            queue = await channel.declare_queue(
+                queue_enum.value, durable=True, arguments=config["arguments"]
+            )
+            await queue.bind(exchanges[config["exchange"]], routing_key=config["routing_key"])
+
+    async def _send(self, pending: List[PendingMessage]) -> List[PendingMessage]:
+        """
+        Publish messages on one pooled channel.
+
+        Returns:
+            The messages that were not confirmed
+        """
+        if not await self._ensure_connected():
+            return pending
+        try:
+            async with self._channels.acquire() as channel:
+                results = await asyncio.gather(
+                    *(self._publish_one(channel, message) for message in pending),
+                    return_exceptions=True,
+                )
+        except Exception as e:
+            logger.error(f"Failed to publish {len(pending)} messages: {e}")
+            return pending
+
+        failed = [message for message, result in zip(pending, results) if isinstance(result, BaseException)]
+        if failed:
+            logger.error(f"Broker did not confirm {len(failed)} of {len(pending)} messages")
+        return failed
+
+    async def _publish_one(self, channel, message: PendingMessage) -> None:
+        queue, body, priority, correlation_id = message
+        config = QUEUE_CONFIGS[queue]
+        exchange = await channel.get_exchange(config["exchange"], ensure=False)
+        await exchange.publish(
+            aio_pika.Message(
+                body,
+                content_type="application/json",
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                priority=priority,
+                correlation_id=correlation_id,
+            ),
+            routing_key=config["routing_key"],
+            timeout=PUBLISH_CONFIRM_TIMEOUT,
+        )
+
+    def _spill_messages(self, messages: List[PendingMessage]) -> int:
+        """
+        Buffer messages for replay.
+
+        Returns:
+            Number of messages dropped because the buffer is full
+        """
+        room = max(self.spill_size - len(self._spill), 0)
+        self._spill.extend(messages[:room])
+        self.stats["spilled"] += min(room, len(messages))
+
+        dropped = len(messages) - room
+        if dropped > 0:
+            self.stats["dropped"] += dropped
+            logger.error(f"Publish buffer full, dropped {dropped} messages")
+
+        if self._replay_task is None or self._replay_task.done():
+            self._replay_task = asyncio.get_running_loop().create_task(self._replay_loop())
+        return max(dropped, 0)
+
+    async def _replay_loop(self) -> None:
+        """Replay buffered messages until the buffer is empty."""
+        while self._spill:
+            await asyncio.sleep(self.retry_interval)
+            while self._spill:
+                batch = [self._spill.popleft() for _ in range(min(SPILL_REPLAY_BATCH_SIZE, len(self._spill)))]
+                failed = await self._send(batch)
+                self.stats["replayed"] += len(batch) - len(failed)
+                if failed:
+                    # Keep the original order and wait before the next attempt
+                    self._spill.extendleft(reversed(failed))
+                    break
+        logger.info("Replayed all buffered messages")
+
+
+# Create singleton instances. The blocking manager connects when first used
+# rather than at import, so importing this module never waits on the broker.
+_queue_manager: Optional[QueueManager] = None
+_queue_manager_lock = threading.Lock()
+async_publisher = AsyncQueuePublisher()
+
+
+def get_queue_manager() -> QueueManager:
+    """Get the shared blocking queue manager, creating it on first use."""
+    global _queue_manager
+    if _queue_manager is None:
+        with _queue_manager_lock:
+            if _queue_manager is None:
+                _queue_manager = QueueManager()
+    return _queue_manager
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps `from utils.queue_manager import queue_manager` working
+    if name == "queue_manager":
+        return get_queue_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Helper functions for common operations
 def publish_to_queue(queue: Queues, message: Dict[str, Any], priority: int = 0, correlation_id: str = None) -> bool:
@@ -276,7 +587,19 @@ def publish_to_queue(queue: Queues, message: Dict[str, Any], priority: int = 0,
         priority: Message priority (0-9)
         correlation_id: Optional correlation ID
     """
-    return queue_manager.publish_message(queue, message, priority, correlation_id)
+    return get_queue_manager().publish_message(queue, message, priority, correlation_id)
+
+async def publish_to_queue_async(queue: Queues, message: Dict[str, Any], priority: int = 0, correlation_id: str = None) -> bool:
+    """
+    Publish a message to a queue without blocking the event loop.
+
+    Args:
+        queue: Queue enum to publish to
+        message: Message body
+        priority: Message priority (0-9)
+        correlation_id: Optional correlation ID
+    """
+    return await async_publisher.publish(queue, message, priority, correlation_id)
 
 def setup_consumer(queue: Queues, callback: Callable, prefetch_count: int = 10) -> threading.Thread:
     """
@@ -39,6 +39,7 @@ try:
         ServerError,
         ValidationError,
     )
+    from .transport import transport_registry
 except ImportError:
     # Fallback to absolute import (for direct module import)
     from errors import (
@@ -54,6 +55,7 @@ except ImportError:
         ServerError,
         ValidationError,
     )
+    from transport import transport_registry
 
 T = TypeVar('T')
 
@@ -210,14 +212,15 @@ class HttpClient:
         if "User-Agent" not in self.headers:
             self.headers["User-Agent"] = "Maily-HttpClient/1.0"
 
-        # Initialize the sync client with proper arguments
+        # Initialize the sync client with proper arguments; connections come
+        # from the shared per-host pools
         client_args = {"headers": self.headers, "follow_redirects": True}
         if base_url is not None:
             client_args["base_url"] = base_url
         if timeout is not None:
             client_args["timeout"] = timeout
             
-        self.sync_client = httpx.Client(**client_args)
+        self.sync_client = transport_registry.client(**client_args)
 
         # The async client will be created when needed
         self._async_client = None
@@ -238,11 +241,11 @@ class HttpClient:
             if self.timeout is not None:
                 client_args["timeout"] = self.timeout
                 
-            self._async_client = httpx.AsyncClient(**client_args)
+            self._async_client = transport_registry.async_client(**client_args)
         return self._async_client
 
     async def close(self) -> None:
-        """Close the HTTP client connections."""
+        """Close the HTTP client; the shared connection pools stay open."""
         if self._async_client:
             await self._async_client.aclose()
             self._async_client = None
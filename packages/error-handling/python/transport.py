@@ -0,0 +1,426 @@
+"""
+Shared HTTP connection pools for outbound integrations.
+
+Every outbound client (LLM providers, AI adapter SDKs, ``HttpClient``, email
+providers, OPA, alert webhooks) should send its requests through the
+transports of one ``TransportRegistry`` instead of owning a connection pool.
+The registry keeps one keep-alive pool per origin, tuned per host, so TCP and
+TLS handshakes are paid once per connection and reused by every client in the
+process. HTTP/2 is negotiated where ``h2`` is installed, letting many
+concurrent requests share a single connection.
+
+Clients built on the registry only borrow its pools: closing them leaves the
+pools open for the other clients. The registry also warms connections up at
+startup and keeps per-host metrics on requests, latency, connections opened
+and TLS handshake time.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Pool defaults for hosts without an override
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_POOL_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "60"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+# Origins to connect to at startup, comma separated
+HTTP_WARM_UP_URLS = [url.strip() for url in os.getenv("HTTP_WARM_UP_URLS", "").split(",") if url.strip()]
+
+# Tuning for the hosts the platform talks to most; HTTP_HOST_POOLS (JSON) overrides it
+DEFAULT_HOST_POOLS: Dict[str, Dict[str, Any]] = {
+    "api.openai.com": {"max_connections": 200, "max_keepalive_connections": 50},
+    "api.anthropic.com": {"max_connections": 200, "max_keepalive_connections": 50},
+    "generativelanguage.googleapis.com": {"max_connections": 200, "max_keepalive_connections": 50},
+    "api.sendgrid.com": {"max_connections": 100, "max_keepalive_connections": 100},
+    "api.mailgun.net": {"max_connections": 100, "max_keepalive_connections": 100},
+    "hooks.slack.com": {"max_connections": 5, "max_keepalive_connections": 2},
+}
+
+
+class HostPoolConfig:
+    """
+    Connection pool settings for one host.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry: float = HTTP_POOL_KEEPALIVE_EXPIRY,
+        http2: bool = True,
+    ):
+        """
+        Initialize the pool settings.
+
+        Args:
+            max_connections: Most connections open to the host at once
+            max_keepalive_connections: Most idle connections kept open
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Whether to negotiate HTTP/2 with the host
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = min(max_keepalive_connections, max_connections)
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+
+    def limits(self) -> httpx.Limits:
+        """Get the pool limits in httpx form."""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def merged(self, **overrides: Any) -> "HostPoolConfig":
+        """Get a copy with some settings replaced."""
+        settings = dict(vars(self), **overrides)
+        return HostPoolConfig(**settings)
+
+
+class TransportRegistry:
+    """
+    Per-origin connection pools shared by all outbound HTTP clients.
+    """
+
+    def __init__(
+        self,
+        default_config: Optional[HostPoolConfig] = None,
+        host_configs: Optional[Dict[str, Dict[str, Any]]] = None,
+        http2: bool = HTTP2_ENABLED,
+        pool_factory: Optional[Any] = None,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            default_config: Pool settings for hosts without an override
+            host_configs: Per-host overrides, e.g.
+                ``{"api.openai.com": {"max_connections": 200}}``
+            http2: Whether HTTP/2 may be used at all; it also needs ``h2``
+            pool_factory: Creates the pool for an origin from its settings and
+                whether it is async; by default an httpx HTTP transport
+        """
+        self.default_config = default_config or HostPoolConfig()
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.info("h2 is not installed; outbound connections use HTTP/1.1")
+        self._host_configs: Dict[str, HostPoolConfig] = {}
+        for host, overrides in (host_configs or {}).items():
+            self.configure(host, **overrides)
+        self._pool_factory = pool_factory or _http_transport
+        self._async_pools: Dict[str, Tuple[asyncio.AbstractEventLoop, httpx.AsyncBaseTransport]] = {}
+        self._sync_pools: Dict[str, httpx.BaseTransport] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.async_transport = SharedAsyncTransport(self)
+        self.sync_transport = SharedTransport(self)
+
+    def configure(self, host: str, **overrides: Any) -> None:
+        """
+        Override the pool settings for a host.
+
+        Takes effect for pools created afterwards, so configure hosts before
+        their first request.
+
+        Args:
+            host: Host name, e.g. ``api.openai.com``
+            **overrides: ``HostPoolConfig`` settings to replace
+        """
+        base = self._host_configs.get(host.lower(), self.default_config)
+        self._host_configs[host.lower()] = base.merged(**overrides)
+
+    def config_for(self, host: str) -> HostPoolConfig:
+        """Get the pool settings for a host."""
+        config = self._host_configs.get(host.lower(), self.default_config)
+        if config.http2 and not self.http2:
+            config = config.merged(http2=False)
+        return config
+
+    def async_client(self, **kwargs: Any) -> httpx.AsyncClient:
+        """
+        Create an async client that sends through the shared pools.
+
+        Args:
+            **kwargs: ``httpx.AsyncClient`` arguments other than the transport
+
+        Returns:
+            Client whose ``aclose()`` leaves the shared pools open
+        """
+        return httpx.AsyncClient(transport=self.async_transport, **kwargs)
+
+    def client(self, **kwargs: Any) -> httpx.Client:
+        """
+        Create a sync client that sends through the shared pools.
+
+        Args:
+            **kwargs: ``httpx.Client`` arguments other than the transport
+
+        Returns:
+            Client whose ``close()`` leaves the shared pools open
+        """
+        return httpx.Client(transport=self.sync_transport, **kwargs)
+
+    async def warm_up(self, urls: Optional[Iterable[str]] = None, timeout: float = 5.0) -> Dict[str, bool]:
+        """
+        Open a connection to each origin ahead of the first real request.
+
+        Each origin gets a ``HEAD`` request; any response counts, since only
+        the connection (and its TLS session) is wanted.
+
+        Args:
+            urls: URLs whose origins to connect to; defaults to ``HTTP_WARM_UP_URLS``
+            timeout: Seconds to wait per origin
+
+        Returns:
+            Mapping of origin to whether a connection was made
+        """
+        origins = list(dict.fromkeys(_origin(httpx.URL(url)) for url in (HTTP_WARM_UP_URLS if urls is None else urls)))
+        if not origins:
+            return {}
+
+        async with self.async_client(timeout=timeout) as client:
+            async def connect(origin: str) -> bool:
+                try:
+                    await client.head(origin + "/")
+                    return True
+                except httpx.HTTPError as e:
+                    logger.warning(f"Could not warm up connection to {origin}: {e}")
+                    return False
+
+            results = await asyncio.gather(*(connect(origin) for origin in origins))
+
+        warmed = dict(zip(origins, results))
+        logger.info(f"Warmed up connections to {sum(results)} of {len(origins)} origins")
+        return warmed
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-origin pool metrics.
+
+        Returns:
+            Mapping of origin to request counts, average latency to response
+            headers, connections and TLS handshakes opened, and the current
+            open and idle connections
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        for origin, stats in list(self._stats.items()):
+            completed = stats["requests"] - stats["in_flight"]
+            handshakes = stats["tls_handshakes"]
+            entry = {
+                "requests": int(stats["requests"]),
+                "errors": int(stats["errors"]),
+                "in_flight": int(stats["in_flight"]),
+                "avg_latency_ms": round(1000 * stats["latency"] / completed, 2) if completed else 0.0,
+                "connections_opened": int(stats["connections_opened"]),
+                "tls_handshakes": int(handshakes),
+                "avg_tls_handshake_ms": round(1000 * stats["tls_seconds"] / handshakes, 2) if handshakes else 0.0,
+                "http2": self.config_for(urlsplit(origin).hostname or "").http2,
+            }
+            entry.update(self._pool_connections(origin))
+            result[origin] = entry
+        return result
+
+    async def aclose(self) -> None:
+        """Close all pools."""
+        with self._lock:
+            async_pools = list(self._async_pools.values())
+            sync_pools = list(self._sync_pools.values())
+            self._async_pools.clear()
+            self._sync_pools.clear()
+
+        loop = asyncio.get_running_loop()
+        for pool_loop, pool in async_pools:
+            if pool_loop is loop:
+                await pool.aclose()
+        for pool in sync_pools:
+            pool.close()
+
+    def close(self) -> None:
+        """Close the sync pools."""
+        with self._lock:
+            sync_pools = list(self._sync_pools.values())
+            self._sync_pools.clear()
+        for pool in sync_pools:
+            pool.close()
+
+    def _async_pool(self, origin: str) -> httpx.AsyncBaseTransport:
+        # Async connections belong to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_pools.get(origin)
+            if entry is None or entry[0] is not loop:
+                config = self.config_for(urlsplit(origin).hostname or "")
+                entry = (loop, self._pool_factory(config, True))
+                self._async_pools[origin] = entry
+            return entry[1]
+
+    def _sync_pool(self, origin: str) -> httpx.BaseTransport:
+        with self._lock:
+            pool = self._sync_pools.get(origin)
+            if pool is None:
+                config = self.config_for(urlsplit(origin).hostname or "")
+                pool = self._sync_pools[origin] = self._pool_factory(config, False)
+            return pool
+
+    def _origin_stats(self, origin: str) -> Dict[str, float]:
+        stats = self._stats.get(origin)
+        if stats is None:
+            stats = self._stats.setdefault(origin, {
+                "requests": 0, "errors": 0, "in_flight": 0, "latency": 0.0,
+                "connections_opened": 0, "tls_handshakes": 0, "tls_seconds": 0.0,
+            })
+        return stats
+
+    def _record_trace(self, stats: Dict[str, float], started: Dict[str, float], event: str) -> None:
+        # Connection events come from httpcore's trace extension
+        if event == "connection.connect_tcp.complete":
+            stats["connections_opened"] += 1
+        elif event == "connection.start_tls.started":
+            started["tls"] = time.monotonic()
+        elif event == "connection.start_tls.complete" and "tls" in started:
+            stats["tls_handshakes"] += 1
+            stats["tls_seconds"] += time.monotonic() - started.pop("tls")
+
+    def _pool_connections(self, origin: str) -> Dict[str, int]:
+        pools: List[Any] = []
+        entry = self._async_pools.get(origin)
+        if entry is not None:
+            pools.append(entry[1])
+        if origin in self._sync_pools:
+            pools.append(self._sync_pools[origin])
+
+        open_connections = idle = 0
+        for pool in pools:
+            # httpx keeps the httpcore pool private; it is only read for metrics
+            for connection in getattr(getattr(pool, "_pool", None), "connections", []):
+                open_connections += 1
+                idle += connection.is_idle()
+        return {"open_connections": open_connections, "idle_connections": idle}
+
+
+class SharedAsyncTransport(httpx.AsyncBaseTransport):
+    """
+    Async transport routing requests to the registry's per-origin pools.
+    """
+
+    def __init__(self, registry: TransportRegistry):
+        self.registry = registry
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        origin = _origin(request.url)
+        pool = self.registry._async_pool(origin)
+        stats = self.registry._origin_stats(origin)
+        started: Dict[str, float] = {}
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            self.registry._record_trace(stats, started, event)
+            if outer_trace is not None:
+                await outer_trace(event, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        start = time.monotonic()
+        try:
+            return await pool.handle_async_request(request)
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["in_flight"] -= 1
+            stats["latency"] += time.monotonic() - start
+
+    async def aclose(self) -> None:
+        # The pools are shared; they are closed with the registry
+        pass
+
+
+class SharedTransport(httpx.BaseTransport):
+    """
+    Sync transport routing requests to the registry's per-origin pools.
+    """
+
+    def __init__(self, registry: TransportRegistry):
+        self.registry = registry
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        origin = _origin(request.url)
+        pool = self.registry._sync_pool(origin)
+        stats = self.registry._origin_stats(origin)
+        started: Dict[str, float] = {}
+        outer_trace = request.extensions.get("trace")
+
+        def trace(event: str, info: Dict[str, Any]) -> None:
+            self.registry._record_trace(stats, started, event)
+            if outer_trace is not None:
+                outer_trace(event, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        with self.registry._lock:
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+        start = time.monotonic()
+        try:
+            return pool.handle_request(request)
+        except Exception:
+            with self.registry._lock:
+                stats["errors"] += 1
+            raise
+        finally:
+            with self.registry._lock:
+                stats["in_flight"] -= 1
+                stats["latency"] += time.monotonic() - start
+
+    def close(self) -> None:
+        # The pools are shared; they are closed with the registry
+        pass
+
+
+def _origin(url: httpx.URL) -> str:
+    port = f":{url.port}" if url.port else ""
+    return f"{url.scheme}://{url.host}{port}"
+
+
+def _http_transport(config: HostPoolConfig, is_async: bool) -> Any:
+    transport_class = httpx.AsyncHTTPTransport if is_async else httpx.HTTPTransport
+    return transport_class(http2=config.http2, limits=config.limits(), retries=1)
+
+
+def _host_pools_from_env() -> Dict[str, Dict[str, Any]]:
+    host_pools = {host: dict(settings) for host, settings in DEFAULT_HOST_POOLS.items()}
+    raw = os.getenv("HTTP_HOST_POOLS")
+    if raw:
+        try:
+            for host, settings in json.loads(raw).items():
+                host_pools.setdefault(host, {}).update(settings)
+        except (ValueError, AttributeError) as e:
+            logger.error(f"Invalid HTTP_HOST_POOLS, using defaults: {e}")
+    return host_pools
+
+
+# Registry shared by the whole process
+transport_registry = TransportRegistry(host_configs=_host_pools_from_env())
+
+
+def get_transport_registry() -> TransportRegistry:
+    """Get the process-wide transport registry."""
+    return transport_registry
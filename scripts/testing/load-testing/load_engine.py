@@ -0,0 +1,779 @@
+#!/usr/bin/env python3
+"""
+Async Load Engine for Maily
+
+Open-loop load generation on asyncio and httpx. Requests are fired on an
+arrival schedule (Poisson, constant or stepped rates) whether or not earlier
+requests have finished, and each operation's latency is measured from its
+scheduled start. A slow server therefore shows up as tail latency instead of
+silently lowering the request rate (coordinated omission).
+
+Latencies are recorded in HDR histograms, so reports from several worker
+processes or machines can be merged without losing percentile accuracy.
+
+Usage:
+    from load_engine import ArrivalSchedule, LoadEngine
+    from scenarios import load_scenario
+
+    engine = LoadEngine(load_scenario("api"), ArrivalSchedule.poisson(200, 60), "http://localhost:5000")
+    report = asyncio.run(engine.run())
+    report.print_summary()
+"""
+
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+
+logger = logging.getLogger("maily_load_engine")
+
+# Latencies are recorded in microseconds with three significant figures
+HISTOGRAM_SIGNIFICANT_FIGURES = 3
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_IN_FLIGHT = 10000
+DEFAULT_MAX_CONNECTIONS = 1000
+
+# How long to wait for in-flight requests after the schedule ends; operations
+# still running then are cancelled and recorded as failed
+DRAIN_TIMEOUT = 60.0
+
+REPORT_VERSION = 1
+
+
+class HdrHistogram:
+    """
+    High dynamic range histogram of integer values.
+
+    Values are bucketed with a fixed relative precision (three significant
+    figures by default) over an unbounded range, using the HdrHistogram
+    bucket layout. Counts are kept sparse so histograms serialize compactly
+    and merge by adding counts.
+    """
+
+    def __init__(self, significant_figures: int = HISTOGRAM_SIGNIFICANT_FIGURES):
+        """
+        Initialize the histogram.
+
+        Args:
+            significant_figures: Decimal digits of precision (1-5)
+        """
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        self.significant_figures = significant_figures
+
+        largest_single_unit = 2 * 10 ** significant_figures
+        sub_bucket_magnitude = math.ceil(math.log2(largest_single_unit))
+        self._half_magnitude = sub_bucket_magnitude - 1
+        self._half_count = 1 << self._half_magnitude
+        self._mask = (1 << sub_bucket_magnitude) - 1
+
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self.sum = 0
+
+    def _index(self, value: int) -> int:
+        bucket = (value | self._mask).bit_length() - (self._half_magnitude + 1)
+        sub_bucket = value >> bucket
+        return ((bucket + 1) << self._half_magnitude) + sub_bucket - self._half_count
+
+    def _range(self, index: int) -> Tuple[int, int]:
+        """Lowest and highest value that map to an index."""
+        bucket = (index >> self._half_magnitude) - 1
+        sub_bucket = (index & (self._half_count - 1)) + self._half_count
+        if bucket < 0:
+            sub_bucket -= self._half_count
+            bucket = 0
+        lowest = sub_bucket << bucket
+        return lowest, lowest + (1 << bucket) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        """
+        Record a value.
+
+        Args:
+            value: Non-negative integer value
+            count: Number of occurrences
+        """
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        if not self.total or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.total += count
+        self.sum += value * count
+
+    def merge(self, other: "HdrHistogram") -> "HdrHistogram":
+        """Add another histogram's counts to this one."""
+        if other.significant_figures != self.significant_figures:
+            raise ValueError("Cannot merge histograms with different precision")
+        if not other.total:
+            return self
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.min = other.min if not self.total else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.total += other.total
+        self.sum += other.sum
+        return self
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Value at a percentile.
+
+        Returns the highest value equivalent to the bucket containing the
+        percentile, capped at the largest recorded value.
+        """
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(percentile / 100.0 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._range(index)[1], self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "significant_figures": self.significant_figures,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "sum": self.sum,
+            "counts": {str(index): count for index, count in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HdrHistogram":
+        histogram = cls(data.get("significant_figures", HISTOGRAM_SIGNIFICANT_FIGURES))
+        histogram.counts = {int(index): count for index, count in data.get("counts", {}).items()}
+        histogram.total = data.get("total", sum(histogram.counts.values()))
+        histogram.min = data.get("min", 0)
+        histogram.max = data.get("max", 0)
+        histogram.sum = data.get("sum", 0)
+        return histogram
+
+
+class ArrivalSchedule:
+    """
+    Open-loop arrival schedule.
+
+    A schedule is a list of phases, each a (rate per second, duration in
+    seconds) pair. Arrivals within a phase are either Poisson (exponential
+    gaps) or evenly spaced.
+    """
+
+    def __init__(self, phases: Sequence[Tuple[float, float]], kind: str = "poisson", seed: int = 1):
+        """
+        Initialize the schedule.
+
+        Args:
+            phases: (rate per second, duration in seconds) for each phase
+            kind: "poisson" or "constant"
+            seed: Seed for Poisson gaps
+        """
+        if kind not in ("poisson", "constant"):
+            raise ValueError(f"Unknown arrival kind: {kind}")
+        self.phases = [(float(rate), float(duration)) for rate, duration in phases]
+        self.kind = kind
+        self.seed = seed
+        # Fraction of one gap to shift constant arrivals by, so workers interleave
+        self.phase_shift = 0.0
+
+    @classmethod
+    def poisson(cls, rate: float, duration: float, seed: int = 1) -> "ArrivalSchedule":
+        return cls([(rate, duration)], "poisson", seed)
+
+    @classmethod
+    def constant(cls, rate: float, duration: float) -> "ArrivalSchedule":
+        return cls([(rate, duration)], "constant")
+
+    @classmethod
+    def step(cls, steps: Sequence[Tuple[float, float]], kind: str = "poisson", seed: int = 1) -> "ArrivalSchedule":
+        return cls(steps, kind, seed)
+
+    @property
+    def duration(self) -> float:
+        return sum(duration for _, duration in self.phases)
+
+    @property
+    def expected_arrivals(self) -> float:
+        return sum(rate * duration for rate, duration in self.phases)
+
+    def offsets(self) -> Iterator[float]:
+        """Yield arrival times in seconds from the start of the run."""
+        rng = random.Random(self.seed)
+        phase_start = 0.0
+        for rate, duration in self.phases:
+            phase_end = phase_start + duration
+            if rate > 0:
+                if self.kind == "poisson":
+                    t = phase_start + rng.expovariate(rate)
+                    while t < phase_end:
+                        yield t
+                        t += rng.expovariate(rate)
+                else:
+                    gap = 1.0 / rate
+                    t = phase_start + gap * self.phase_shift
+                    while t < phase_end:
+                        yield t
+                        t += gap
+            phase_start = phase_end
+
+    def for_worker(self, index: int, workers: int) -> "ArrivalSchedule":
+        """
+        Share of this schedule for one of several workers.
+
+        Each worker runs the same phases at 1/workers of the rate. Poisson
+        workers get distinct seeds; the merged arrivals are again Poisson at
+        the full rate. Constant workers are offset so their arrivals interleave.
+        """
+        schedule = ArrivalSchedule(
+            [(rate / workers, duration) for rate, duration in self.phases],
+            self.kind,
+            self.seed * 1000 + index
+        )
+        schedule.phase_shift = index / workers
+        return schedule
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "phases": self.phases, "seed": self.seed}
+
+
+class LoadReport:
+    """
+    Results of a load run.
+
+    Operation latencies are measured from the scheduled arrival time; request
+    latencies are measured from when each HTTP request was sent. Reports merge
+    by adding histograms and counters.
+    """
+
+    def __init__(self, name: str = "load"):
+        self.name = name
+        self.operations: Dict[str, HdrHistogram] = {}
+        self.requests: Dict[str, HdrHistogram] = {}
+        self.status_codes: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.scheduled = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        # Worst delay between an arrival's scheduled time and when it was fired
+        self.max_start_lag_us = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.workers = 1
+        self.system: Dict[str, List[float]] = {"cpu": [], "memory": []}
+        self.config: Dict[str, Any] = {}
+
+    def record_operation(self, name: str, latency_us: int, success: bool) -> None:
+        self.operations.setdefault(name, HdrHistogram()).record(latency_us)
+        if success:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+    def record_request(self, name: str, latency_us: int, status_code: int, error: Optional[str] = None) -> None:
+        self.requests.setdefault(name, HdrHistogram()).record(latency_us)
+        self.status_codes[str(status_code)] += 1
+        if error:
+            self.errors[error] += 1
+
+    def overall(self) -> HdrHistogram:
+        """Latency of all operations together."""
+        histogram = HdrHistogram()
+        for operation in self.operations.values():
+            histogram.merge(operation)
+        return histogram
+
+    def merge(self, other: "LoadReport") -> "LoadReport":
+        """Add another report's results to this one."""
+        for target, source in ((self.operations, other.operations), (self.requests, other.requests)):
+            for name, histogram in source.items():
+                target.setdefault(name, HdrHistogram(histogram.significant_figures)).merge(histogram)
+        self.status_codes.update(other.status_codes)
+        self.errors.update(other.errors)
+        self.scheduled += other.scheduled
+        self.completed += other.completed
+        self.failed += other.failed
+        self.dropped += other.dropped
+        self.max_start_lag_us = max(self.max_start_lag_us, other.max_start_lag_us)
+        starts = [t for t in (self.started_at, other.started_at) if t is not None]
+        ends = [t for t in (self.finished_at, other.finished_at) if t is not None]
+        self.started_at = min(starts) if starts else None
+        self.finished_at = max(ends) if ends else None
+        self.workers += other.workers
+        for key, samples in other.system.items():
+            self.system.setdefault(key, []).extend(samples)
+        return self
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    def summary(self) -> Dict[str, Any]:
+        """Percentiles in milliseconds and throughput for each operation and request."""
+        def latency(histogram: HdrHistogram) -> Dict[str, Any]:
+            return {
+                "count": histogram.total,
+                "mean_ms": round(histogram.mean / 1000.0, 3),
+                "min_ms": round(histogram.min / 1000.0, 3),
+                "p50_ms": round(histogram.percentile(50) / 1000.0, 3),
+                "p90_ms": round(histogram.percentile(90) / 1000.0, 3),
+                "p99_ms": round(histogram.percentile(99) / 1000.0, 3),
+                "p999_ms": round(histogram.percentile(99.9) / 1000.0, 3),
+                "max_ms": round(histogram.max / 1000.0, 3),
+            }
+
+        duration = self.duration
+        finished = self.completed + self.failed
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "duration": round(duration, 3),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "success_rate": round(self.completed / finished * 100, 2) if finished else 0.0,
+            "throughput_per_second": round(finished / duration, 2) if duration else 0.0,
+            "max_start_lag_ms": round(self.max_start_lag_us / 1000.0, 3),
+            "latency": latency(self.overall()),
+            "operations": {name: latency(h) for name, h in sorted(self.operations.items())},
+            "requests": {name: latency(h) for name, h in sorted(self.requests.items())},
+            "status_codes": dict(self.status_codes),
+            "errors": dict(self.errors.most_common(20)),
+            "system": {
+                key: {"avg": round(sum(v) / len(v), 2), "max": max(v)}
+                for key, v in self.system.items() if v
+            },
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Full report including histograms, for merging later."""
+        return {
+            "version": REPORT_VERSION,
+            "name": self.name,
+            "config": self.config,
+            "workers": self.workers,
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "max_start_lag_us": self.max_start_lag_us,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "operations": {name: h.to_dict() for name, h in self.operations.items()},
+            "requests": {name: h.to_dict() for name, h in self.requests.items()},
+            "status_codes": dict(self.status_codes),
+            "errors": dict(self.errors),
+            "system": self.system,
+            "summary": self.summary(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LoadReport":
+        if data.get("version") != REPORT_VERSION:
+            raise ValueError(f"Unsupported report version: {data.get('version')}")
+        report = cls(data.get("name", "load"))
+        report.config = data.get("config", {})
+        report.workers = data.get("workers", 1)
+        report.scheduled = data.get("scheduled", 0)
+        report.completed = data.get("completed", 0)
+        report.failed = data.get("failed", 0)
+        report.dropped = data.get("dropped", 0)
+        report.max_start_lag_us = data.get("max_start_lag_us", 0)
+        report.started_at = data.get("started_at")
+        report.finished_at = data.get("finished_at")
+        report.operations = {n: HdrHistogram.from_dict(h) for n, h in data.get("operations", {}).items()}
+        report.requests = {n: HdrHistogram.from_dict(h) for n, h in data.get("requests", {}).items()}
+        report.status_codes = Counter(data.get("status_codes", {}))
+        report.errors = Counter(data.get("errors", {}))
+        report.system = data.get("system", {"cpu": [], "memory": []})
+        return report
+
+    def save(self, filename: str) -> str:
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return filename
+
+    @classmethod
+    def load(cls, filename: str) -> "LoadReport":
+        with open(filename, "r") as f:
+            return cls.from_dict(json.load(f))
+
+    def print_summary(self) -> None:
+        """Print the report to the console."""
+        summary = self.summary()
+
+        print("\n" + "=" * 60)
+        print(f"LOAD REPORT: {summary['name']} ({summary['workers']} worker(s))")
+        print("=" * 60)
+        print(f"Duration: {summary['duration']:.2f}s")
+        print(f"Scheduled: {summary['scheduled']}  Completed: {summary['completed']}  "
+              f"Failed: {summary['failed']}  Dropped: {summary['dropped']}")
+        print(f"Success Rate: {summary['success_rate']:.2f}%")
+        print(f"Throughput: {summary['throughput_per_second']:.2f} ops/s")
+        print(f"Max Start Lag: {summary['max_start_lag_ms']:.2f}ms")
+
+        header = f"  {'operation':<28}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>10}"
+        for title, rows in (("Operations (ms, from scheduled start)", summary["operations"]),
+                            ("Requests (ms)", summary["requests"])):
+            if not rows:
+                continue
+            print(f"\n{title}:")
+            print(header)
+            for name, row in rows.items():
+                print(f"  {name[:27]:<28}{row['count']:>8}{row['p50_ms']:>10.2f}{row['p90_ms']:>10.2f}"
+                      f"{row['p99_ms']:>10.2f}{row['p999_ms']:>10.2f}{row['max_ms']:>10.2f}")
+
+        if summary["status_codes"]:
+            print("\nStatus Codes:")
+            for code, count in sorted(summary["status_codes"].items()):
+                print(f"  {code}: {count}")
+
+        if summary["errors"]:
+            print("\nTop Errors:")
+            for error, count in list(summary["errors"].items())[:5]:
+                print(f"  {error}: {count}")
+
+        for key, stats in summary["system"].items():
+            print(f"\n{key.capitalize()} Usage: {stats['avg']:.2f}% (Max: {stats['max']:.2f}%)")
+
+        print("=" * 60)
+
+
+def merge_reports(reports: Sequence[LoadReport], name: Optional[str] = None) -> LoadReport:
+    """Merge reports from several workers or machines into one."""
+    if not reports:
+        return LoadReport(name or "load")
+    merged = LoadReport(name or reports[0].name)
+    merged.config = reports[0].config
+    merged.workers = 0
+    for report in reports:
+        merged.merge(report)
+    return merged
+
+
+class ScenarioContext:
+    """
+    State shared by one worker's operations.
+
+    Operations send requests through request(), which records per-request
+    latency and status codes, and keep cross-operation state (auth tokens,
+    created IDs) in state.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, base_url: str, report: LoadReport, rng: random.Random):
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+        self.report = report
+        self.rng = rng
+        self.state: Dict[str, Any] = {}
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        name: Optional[str] = None,
+        expected_status: Sequence[int] = (200, 201, 202, 204),
+        **kwargs: Any
+    ) -> Optional[httpx.Response]:
+        """
+        Send a request and record it.
+
+        Args:
+            method: HTTP method
+            url: Path relative to the base URL, or an absolute URL
+            name: Name to record the request under; defaults to method and path
+            expected_status: Status codes counted as success
+            **kwargs: Passed to httpx
+
+        Returns:
+            The response, or None if the request failed without one
+
+        Raises:
+            RequestFailed: If the status is unexpected or the request errored
+        """
+        name = name or f"{method.upper()} {url.split('?')[0]}"
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.TimeoutException:
+            self.report.record_request(name, _elapsed_us(start), 408, "Request timeout")
+            raise RequestFailed("Request timeout")
+        except httpx.HTTPError as e:
+            error = f"{type(e).__name__}"
+            self.report.record_request(name, _elapsed_us(start), 503, error)
+            raise RequestFailed(error)
+
+        error = None if response.status_code in expected_status else f"HTTP {response.status_code}"
+        self.report.record_request(name, _elapsed_us(start), response.status_code, error)
+        if error:
+            raise RequestFailed(error, response)
+        return response
+
+
+class RequestFailed(Exception):
+    """A scenario request returned an unexpected status or did not complete."""
+
+    def __init__(self, message: str, response: Optional[httpx.Response] = None):
+        super().__init__(message)
+        self.response = response
+
+
+def _elapsed_us(start: float) -> int:
+    return int((time.perf_counter() - start) * 1_000_000)
+
+
+Operation = Callable[[ScenarioContext], Awaitable[Any]]
+
+
+class Scenario:
+    """
+    Weighted mix of operations.
+
+    Each arrival runs one operation chosen by weight. An operation may send
+    several requests; its latency covers all of them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        operations: Sequence[Tuple[str, float, Operation]],
+        setup: Optional[Callable[[ScenarioContext], Awaitable[None]]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize the scenario.
+
+        Args:
+            name: Scenario name
+            operations: (name, weight, coroutine function taking the context)
+            setup: Optional coroutine run once per worker before arrivals start
+            headers: Default request headers
+        """
+        if not operations:
+            raise ValueError("A scenario needs at least one operation")
+        self.name = name
+        self.operations = list(operations)
+        self.setup = setup
+        self.headers = headers or {"Content-Type": "application/json"}
+        self._names = [op[0] for op in self.operations]
+        self._funcs = {op[0]: op[2] for op in self.operations}
+        self._cumulative = []
+        total = 0.0
+        for _, weight, _ in self.operations:
+            total += weight
+            self._cumulative.append(total)
+
+    def pick(self, rng: random.Random) -> Tuple[str, Operation]:
+        name = rng.choices(self._names, cum_weights=self._cumulative)[0]
+        return name, self._funcs[name]
+
+
+class LoadEngine:
+    """
+    Open-loop load generator for one process.
+
+    Arrivals are fired at their scheduled times on a single event loop with
+    one pooled httpx client. An arrival that finds max_in_flight operations
+    still running is dropped and counted rather than delayed, so the offered
+    rate never silently drops.
+    """
+
+    def __init__(
+        self,
+        scenario: Scenario,
+        schedule: ArrivalSchedule,
+        base_url: str,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        timeout: float = DEFAULT_TIMEOUT,
+        http2: bool = False,
+        sample_system: bool = False,
+        drain_timeout: float = DRAIN_TIMEOUT
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            scenario: Operations to run
+            schedule: Arrival schedule
+            base_url: Target base URL
+            max_in_flight: Operations allowed to run at once
+            max_connections: HTTP connection pool size
+            timeout: Per-request timeout in seconds
+            http2: Use HTTP/2 (requires the h2 package)
+            sample_system: Record local CPU and memory once a second (requires psutil)
+            drain_timeout: Seconds to wait for running operations after the last arrival
+        """
+        self.scenario = scenario
+        self.schedule = schedule
+        self.base_url = base_url
+        self.max_in_flight = max_in_flight
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.http2 = http2
+        self.sample_system = sample_system
+        self.drain_timeout = drain_timeout
+
+    async def run(self) -> LoadReport:
+        """Run the schedule to completion and return the report."""
+        report = LoadReport(self.scenario.name)
+        report.config = {
+            "scenario": self.scenario.name,
+            "base_url": self.base_url,
+            "schedule": self.schedule.to_dict(),
+            "max_in_flight": self.max_in_flight,
+            "max_connections": self.max_connections,
+        }
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections
+        )
+        async with httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.scenario.headers,
+            limits=limits,
+            timeout=self.timeout,
+            http2=self.http2
+        ) as client:
+            context = ScenarioContext(client, self.base_url, report, random.Random(self.schedule.seed))
+            if self.scenario.setup:
+                await self.scenario.setup(context)
+
+            sampler = asyncio.create_task(self._sample_system(report)) if self.sample_system else None
+            try:
+                await self._fire_schedule(context, report)
+            finally:
+                if sampler:
+                    sampler.cancel()
+
+        return report
+
+    async def _fire_schedule(self, context: ScenarioContext, report: LoadReport) -> None:
+        loop = asyncio.get_running_loop()
+        in_flight = set()
+
+        report.started_at = time.time()
+        start = loop.time()
+        for offset in self.schedule.offsets():
+            scheduled = start + offset
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                report.max_start_lag_us = max(report.max_start_lag_us, int(-delay * 1_000_000))
+
+            report.scheduled += 1
+            if len(in_flight) >= self.max_in_flight:
+                report.dropped += 1
+                continue
+
+            task = asyncio.create_task(self._run_operation(context, report, scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if in_flight:
+            _, pending = await asyncio.wait(in_flight, timeout=self.drain_timeout)
+            for task in pending:
+                task.cancel()
+            # Let cancelled operations record themselves before the report closes
+            await asyncio.gather(*pending, return_exceptions=True)
+        report.finished_at = time.time()
+
+    async def _run_operation(self, context: ScenarioContext, report: LoadReport, scheduled: float) -> None:
+        name, operation = self.scenario.pick(context.rng)
+        loop = asyncio.get_running_loop()
+        success = True
+        try:
+            await operation(context)
+        except asyncio.CancelledError:
+            # Still running at the drain timeout; its latency is at least this long
+            report.errors[f"{name}: cancelled after drain timeout"] += 1
+            report.record_operation(name, int((loop.time() - scheduled) * 1_000_000), False)
+            raise
+        except RequestFailed:
+            success = False
+        except Exception as e:
+            success = False
+            report.errors[f"{name}: {type(e).__name__}"] += 1
+            logger.debug(f"Operation {name} failed: {e}")
+        # Measured from the scheduled start, including any time waiting for the loop or a connection
+        report.record_operation(name, int((loop.time() - scheduled) * 1_000_000), success)
+
+    async def _sample_system(self, report: LoadReport) -> None:
+        try:
+            import psutil
+        except ImportError:
+            logger.warning("psutil is not installed; skipping system metrics")
+            return
+        while True:
+            report.system["cpu"].append(psutil.cpu_percent(interval=None))
+            report.system["memory"].append(psutil.virtual_memory().percent)
+            await asyncio.sleep(1)
+
+
+def _run_worker(args: Tuple[Callable[[], Scenario], ArrivalSchedule, str, Dict[str, Any]]) -> Dict[str, Any]:
+    build_scenario, schedule, base_url, engine_kwargs = args
+    engine = LoadEngine(build_scenario(), schedule, base_url, **engine_kwargs)
+    return asyncio.run(engine.run()).to_dict()
+
+
+def run_workers(
+    build_scenario: Callable[[], Scenario],
+    schedule: ArrivalSchedule,
+    base_url: str,
+    workers: int = 1,
+    **engine_kwargs: Any
+) -> LoadReport:
+    """
+    Run a schedule split across worker processes and merge their reports.
+
+    Args:
+        build_scenario: Picklable callable returning the scenario in each worker
+        schedule: Full arrival schedule; each worker runs 1/workers of the rate
+        base_url: Target base URL
+        workers: Worker processes
+        **engine_kwargs: Passed to LoadEngine; max_in_flight and max_connections
+            are per worker
+
+    Returns:
+        Merged report
+    """
+    if workers <= 1:
+        engine = LoadEngine(build_scenario(), schedule, base_url, **engine_kwargs)
+        return asyncio.run(engine.run())
+
+    jobs = [
+        (build_scenario, schedule.for_worker(index, workers), base_url,
+         dict(engine_kwargs, sample_system=engine_kwargs.get("sample_system", False) and index == 0))
+        for index in range(workers)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        reports = [LoadReport.from_dict(data) for data in executor.map(_run_worker, jobs)]
+
+    merged = merge_reports(reports)
+    merged.config = dict(reports[0].config, schedule=schedule.to_dict(), workers=workers)
+    return merged
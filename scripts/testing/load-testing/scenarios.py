@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Load Scenarios for Maily
+
+Built-in scenarios for the async load engine, plus loading of scenario
+scripts. A scenario script is a Python file defining either
+build_scenario(intensity) returning a Scenario, or a SCENARIO object.
+
+Built-in scenarios:
+- api: dashboard, campaign, template and analytics reads with campaign writes
+- payload: campaign creation with large payloads
+- database: paginated, filtered and write-heavy endpoints
+- cache: cacheable reads mixed with invalidating writes
+- ai_mesh: the AI Mesh Network workflows from tests/performance/ai_mesh_load_test.py
+"""
+
+import copy
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Dict, Optional
+
+from load_engine import RequestFailed, Scenario, ScenarioContext
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+# Test users for authentication
+TEST_USERS = [
+    {
+        "email": f"stress_test_{i}@example.com",
+        "password": f"StressTest{i}!",
+        "name": f"Stress Test User {i}",
+        "company": "Stress Test Inc."
+    } for i in range(1, 1001)
+]
+
+# Large campaign payload
+LARGE_CAMPAIGN = {
+    "name": "Stress Test Campaign",
+    "subject": "Stress Test Subject Line",
+    "from_name": "Stress Tester",
+    "from_email": "stress@justmaily.com",
+    "content": {
+        "type": "html",
+        "value": "<h1>Stress Test Email</h1>" + "<p>This is a stress test paragraph.</p>" * 1000
+    },
+    "settings": {
+        "track_opens": True,
+        "track_clicks": True,
+        "custom_tracking": {
+            "utm_source": "stress_test",
+            "utm_medium": "email",
+            "utm_campaign": "stress_test_campaign"
+        },
+        "advanced": {
+            "throttling": {
+                "enabled": False,
+                "rate": 0
+            },
+            "scheduling": {
+                "timezone": "UTC",
+                "optimal_time": False
+            }
+        }
+    },
+    "recipients": {
+        "segment_id": None,
+        "list_ids": [],
+        "filter": {
+            "conditions": [
+                {"field": "email", "operator": "contains", "value": "@example.com"}
+            ] * 20,
+            "operator": "AND"
+        }
+    },
+    "metadata": {
+        "stress_test": True,
+        "test_id": "stress-test-1",
+        "tags": ["stress", "test", "performance"] + [f"tag_{i}" for i in range(100)]
+    }
+}
+
+# Serialized once so arrivals do not re-encode the payload
+LARGE_CAMPAIGN_BODY = json.dumps(LARGE_CAMPAIGN).encode()
+
+
+async def authenticate(context: ScenarioContext) -> None:
+    """Log in (or register) a test user and use its token for all requests."""
+    user = context.rng.choice(TEST_USERS)
+    for path, body, status in (("/api/auth/login", {"email": user["email"], "password": user["password"]}, 200),
+                               ("/api/auth/register", user, 201)):
+        try:
+            response = await context.request("POST", path, name=f"POST {path}", json=body,
+                                              expected_status=(status,))
+        except RequestFailed:
+            continue
+        token = response.json().get("access_token")
+        if token:
+            context.client.headers["Authorization"] = f"Bearer {token}"
+            return
+    context.report.errors["Authentication failed"] += 1
+
+
+async def _get(path: str, name: str, context: ScenarioContext) -> None:
+    await context.request("GET", path, name=name)
+
+
+async def _post(path: str, name: str, body: bytes, context: ScenarioContext) -> None:
+    await context.request("POST", path, name=name, content=body)
+
+
+async def _create_template(context: ScenarioContext) -> None:
+    await context.request("POST", "/api/templates", name="POST /api/templates", json={
+        "name": f"Stress Test Template {context.rng.randint(1000, 9999)}",
+        "content": "<h1>Stress Test Template</h1>" + "<p>This is a stress test paragraph.</p>" * 100
+    })
+
+
+def api_scenario(intensity: int = 5) -> Scenario:
+    """Mixed API traffic across the main dashboard endpoints."""
+    return Scenario("api", [
+        ("dashboard", 3, partial(_get, "/api/dashboard", "GET /api/dashboard")),
+        ("list_campaigns", 3, partial(_get, "/api/campaigns", "GET /api/campaigns")),
+        ("list_templates", 2, partial(_get, "/api/templates", "GET /api/templates")),
+        ("analytics_summary", 2, partial(_get, "/api/analytics/summary", "GET /api/analytics/summary")),
+        ("create_campaign", 1, partial(_post, "/api/campaigns", "POST /api/campaigns", LARGE_CAMPAIGN_BODY)),
+    ], setup=authenticate)
+
+
+def payload_scenario(intensity: int = 5) -> Scenario:
+    """Campaign creation with payloads that grow with intensity."""
+    campaign = copy.deepcopy(LARGE_CAMPAIGN)
+    campaign["content"]["value"] = (
+        "<h1>Stress Test Email</h1>" + "<p>This is a stress test paragraph.</p>" * (1000 * intensity * 10)
+    )
+    campaign["metadata"]["large_data"] = {f"field_{i}": f"value_{i}" * 10 for i in range(intensity * 100)}
+    # Serialize once; every arrival sends the same bytes
+    body = json.dumps(campaign).encode()
+
+    async def create_large_campaign(context: ScenarioContext) -> None:
+        await context.request("POST", "/api/campaigns", name="POST /api/campaigns (large)", content=body)
+
+    return Scenario("payload", [("create_large_campaign", 1, create_large_campaign)], setup=authenticate)
+
+
+def database_scenario(intensity: int = 5) -> Scenario:
+    """Database-heavy reads, filters and writes."""
+    now = datetime.now()
+    contact_filter = json.dumps({
+        "conditions": [
+            {"field": "email", "operator": "contains", "value": "@example.com"},
+            {"field": "created_at", "operator": "gt", "value": (now - timedelta(days=30)).isoformat()}
+        ],
+        "operator": "AND"
+    })
+    return Scenario("database", [
+        ("paged_campaigns", 2, partial(_get, "/api/campaigns?page=1&per_page=50&sort=created_at&order=desc",
+                                       "GET /api/campaigns (paged)")),
+        ("campaign_analytics", 2, partial(_get, f"/api/analytics/campaigns?start_date={now - timedelta(days=30)}"
+                                                f"&end_date={now}", "GET /api/analytics/campaigns")),
+        ("paged_contacts", 2, partial(_get, "/api/contacts?page=1&per_page=100&sort=email&order=asc",
+                                      "GET /api/contacts (paged)")),
+        ("filtered_contacts", 2, partial(_get, f"/api/contacts?filter={contact_filter}",
+                                         "GET /api/contacts (filtered)")),
+        ("create_campaign", 1, partial(_post, "/api/campaigns", "POST /api/campaigns", LARGE_CAMPAIGN_BODY)),
+        ("create_template", 1, _create_template),
+    ], setup=authenticate)
+
+
+def cache_scenario(intensity: int = 5) -> Scenario:
+    """Cacheable reads with a share of writes that invalidate them."""
+
+    async def setup(context: ScenarioContext) -> None:
+        await authenticate(context)
+        try:
+            response = await context.request("POST", "/api/campaigns", name="POST /api/campaigns",
+                                             content=LARGE_CAMPAIGN_BODY)
+            context.state["campaign_id"] = response.json().get("id")
+        except (RequestFailed, ValueError):
+            context.state["campaign_id"] = None
+
+    async def read_campaign(context: ScenarioContext) -> None:
+        campaign_id = context.state.get("campaign_id")
+        if campaign_id:
+            await context.request("GET", f"/api/campaigns/{campaign_id}", name="GET /api/campaigns/{id}")
+        else:
+            await context.request("GET", "/api/dashboard", name="GET /api/dashboard")
+
+    async def update_campaign(context: ScenarioContext) -> None:
+        campaign_id = context.state.get("campaign_id")
+        if campaign_id:
+            await context.request("PUT", f"/api/campaigns/{campaign_id}", name="PUT /api/campaigns/{id}",
+                                  json={"name": f"Updated Campaign {context.rng.randint(1000, 9999)}"})
+        else:
+            await _create_template(context)
+
+    return Scenario("cache", [
+        ("dashboard", 4, partial(_get, "/api/dashboard", "GET /api/dashboard")),
+        ("analytics_summary", 4, partial(_get, "/api/analytics/summary", "GET /api/analytics/summary")),
+        ("read_campaign", 4, read_campaign),
+        ("create_campaign", 1, partial(_post, "/api/campaigns", "POST /api/campaigns", LARGE_CAMPAIGN_BODY)),
+        ("update_campaign", 1, update_campaign),
+    ], setup=setup)
+
+
+class _MeshClient:
+    """
+    Adapter giving the AI Mesh workflow functions the HttpClient interface
+    they expect, backed by the engine's pooled client and request recording.
+    """
+
+    def __init__(self, context: ScenarioContext):
+        self.context = context
+
+    async def _send(self, method: str, endpoint: str, **kwargs: Any) -> Any:
+        kwargs.pop("timeout", None)
+        path = endpoint[len(self.context.base_url):] if endpoint.startswith(self.context.base_url) else endpoint
+        name = f"{method} " + "/".join(
+            "{id}" if len(part) >= 16 or part.isdigit() else part
+            for part in path.split("?")[0].split("/")
+        )
+        # Status handling is left to the workflow functions
+        return await self.context.request(method, endpoint, name=name, expected_status=range(100, 600), **kwargs)
+
+    async def async_get(self, endpoint: str, **kwargs: Any) -> Any:
+        return await self._send("GET", endpoint, **kwargs)
+
+    async def async_post(self, endpoint: str, **kwargs: Any) -> Any:
+        return await self._send("POST", endpoint, **kwargs)
+
+    async def async_put(self, endpoint: str, **kwargs: Any) -> Any:
+        return await self._send("PUT", endpoint, **kwargs)
+
+    async def async_delete(self, endpoint: str, **kwargs: Any) -> Any:
+        return await self._send("DELETE", endpoint, **kwargs)
+
+
+def _import_ai_mesh_load_test():
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    return importlib.import_module("tests.performance.ai_mesh_load_test")
+
+
+def ai_mesh_scenario(intensity: int = 5, api_key: Optional[str] = None) -> Scenario:
+    """
+    AI Mesh Network traffic built from the workflow steps in ai_mesh_load_test.
+
+    Each arrival runs one step of the user workflow (create a network, add or
+    read memories, submit or process a task) against networks created by
+    earlier arrivals.
+    """
+    mesh = _import_ai_mesh_load_test()
+    settings = (mesh.IntensitySettings.LOW if intensity <= 3
+                else mesh.IntensitySettings.HIGH if intensity >= 8
+                else mesh.IntensitySettings.MEDIUM)
+    api_key = api_key or os.environ.get("AI_MESH_API_KEY", mesh.DEFAULT_API_KEY)
+
+    async def setup(context: ScenarioContext) -> None:
+        context.state["mesh_client"] = _MeshClient(context)
+        context.state["networks"] = deque(maxlen=settings["network_count"] * 10)
+        context.state["tasks"] = deque(maxlen=1000)
+
+    async def network(context: ScenarioContext) -> Optional[str]:
+        if context.state["networks"]:
+            return context.rng.choice(context.state["networks"])
+        return await create_network(context)
+
+    async def create_network(context: ScenarioContext) -> Optional[str]:
+        success, network_id = await mesh.create_network(
+            context.state["mesh_client"], context.base_url, api_key, uuid.uuid4().hex
+        )
+        if not success:
+            raise RequestFailed("create_network failed")
+        context.state["networks"].append(network_id)
+        return network_id
+
+    async def add_memory(context: ScenarioContext) -> None:
+        network_id = await network(context)
+        success, _ = await mesh.add_memory(context.state["mesh_client"], context.base_url, api_key,
+                                           network_id, settings["memory_size"])
+        if not success:
+            raise RequestFailed("add_memory failed")
+
+    async def get_memories(context: ScenarioContext) -> None:
+        network_id = await network(context)
+        if not await mesh.get_memories(context.state["mesh_client"], context.base_url, api_key, network_id):
+            raise RequestFailed("get_memories failed")
+
+    async def search_memories(context: ScenarioContext) -> None:
+        network_id = await network(context)
+        query = context.rng.choice(["test", "important", "decision", "result", "analysis"])
+        if not await mesh.search_memories(context.state["mesh_client"], context.base_url, api_key,
+                                          network_id, query):
+            raise RequestFailed("search_memories failed")
+
+    async def submit_task(context: ScenarioContext) -> None:
+        network_id = await network(context)
+        success, task_id = await mesh.submit_task(context.state["mesh_client"], context.base_url, api_key,
+                                                  network_id, settings["task_complexity"])
+        if not success:
+            raise RequestFailed("submit_task failed")
+        if task_id:
+            context.state["tasks"].append((network_id, task_id))
+
+    async def process_task(context: ScenarioContext) -> None:
+        if not context.state["tasks"]:
+            return await submit_task(context)
+        network_id, task_id = context.state["tasks"].popleft()
+        if not await mesh.process_task(context.state["mesh_client"], context.base_url, api_key,
+                                       network_id, task_id):
+            raise RequestFailed("process_task failed")
+
+    # Weights follow the per-network mix of the original user workflow
+    return Scenario("ai_mesh", [
+        ("create_network", 1, create_network),
+        ("add_memory", settings["memories_per_network"], add_memory),
+        ("get_memories", 1, get_memories),
+        ("search_memories", 1, search_memories),
+        ("submit_task", settings["tasks_per_network"], submit_task),
+        ("process_task", settings["tasks_per_network"], process_task),
+    ], setup=setup)
+
+
+BUILTIN_SCENARIOS = {
+    "api": api_scenario,
+    "payload": payload_scenario,
+    "database": database_scenario,
+    "cache": cache_scenario,
+    "ai_mesh": ai_mesh_scenario,
+}
+
+
+def load_scenario(name_or_path: str, intensity: int = 5) -> Scenario:
+    """
+    Build a built-in scenario or load one from a scenario script.
+
+    Args:
+        name_or_path: Built-in scenario name or path to a .py scenario script
+        intensity: Intensity level (1-10) passed to the scenario builder
+
+    Returns:
+        The scenario
+    """
+    if name_or_path in BUILTIN_SCENARIOS:
+        return BUILTIN_SCENARIOS[name_or_path](intensity)
+
+    if not name_or_path.endswith(".py") or not os.path.exists(name_or_path):
+        raise ValueError(f"Unknown scenario: {name_or_path}")
+
+    module_name = f"maily_scenario_{os.path.splitext(os.path.basename(name_or_path))[0]}"
+    spec = importlib.util.spec_from_file_location(module_name, name_or_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    if hasattr(module, "build_scenario"):
+        return module.build_scenario(intensity)
+    if isinstance(getattr(module, "SCENARIO", None), Scenario):
+        return module.SCENARIO
+    raise ValueError(f"{name_or_path} defines neither build_scenario() nor SCENARIO")
+
+
+class ScenarioBuilder:
+    """Picklable scenario factory for worker processes."""
+
+    def __init__(self, name_or_path: str, intensity: int = 5):
+        self.name_or_path = name_or_path
+        self.intensity = intensity
+
+    def __call__(self) -> Scenario:
+        return load_scenario(self.name_or_path, self.intensity)
@@ -15,6 +15,7 @@ Usage:
 
 import argparse
 import asyncio
+import contextlib
 import json
 import logging
 import random
@@ -24,11 +25,14 @@ import uuid
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 import statistics
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MaxNLocator
 import httpx
-from packages.error_handling.python.http_client import HttpClient
+
+try:
+    from packages.error_handling.python.http_client import HttpClient
+except ImportError:
+    # The workflow steps only need an object with async_get/async_post/...;
+    # the async load engine passes its own client
+    HttpClient = None
 
 # Configure logging
 logging.basicConfig(
@@ -83,7 +87,7 @@ successful_operations = {
     "search_memory": 0
 }
 
-# Semaphore to limit concurrent API calls
+# Semaphore to limit concurrent API calls; None means no limit
 api_semaphore = None
 
 class IntensitySettings:
@@ -147,7 +151,7 @@ async def make_api_request(
     response_data = {}
     
     # Use semaphore to limit concurrent requests
-    async with api_semaphore:
+    async with api_semaphore or contextlib.nullcontext():
         try:
             # Make request using the appropriate method based on the HTTP verb
             if method.upper() == "GET":
@@ -560,6 +564,9 @@ async def run_load_test(args):
 
 def generate_charts():
     """Generate charts from test results"""
+    import numpy as np
+    import matplotlib.pyplot as plt
+
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
     # Create a new figure for operation counts
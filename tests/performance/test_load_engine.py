@@ -0,0 +1,163 @@
+"""
+Unit tests for the open-loop load engine and its HDR histogram.
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "scripts", "testing", "load-testing"
+))
+
+from load_engine import ArrivalSchedule, HdrHistogram, LoadEngine, LoadReport, RequestFailed, Scenario
+
+
+class TestHdrHistogram:
+    """Tests for HdrHistogram."""
+
+    def test_percentiles_keep_three_significant_figures(self):
+        """Percentiles are within the configured relative precision."""
+        histogram = HdrHistogram()
+        for value in range(1, 100001):
+            histogram.record(value)
+
+        assert histogram.total == 100000
+        assert histogram.min == 1
+        assert histogram.max == 100000
+        for percentile, expected in ((50, 50000), (90, 90000), (99, 99000), (99.9, 99900)):
+            assert abs(histogram.percentile(percentile) - expected) <= expected * 0.001
+        assert histogram.percentile(100) == 100000
+        assert histogram.mean == pytest.approx(50000.5)
+
+    def test_small_values_are_exact(self):
+        """Values below the sub-bucket count map to their own bucket."""
+        histogram = HdrHistogram()
+        for value in (0, 1, 2, 3, 1000):
+            histogram.record(value)
+
+        assert histogram.percentile(20) == 0
+        assert histogram.percentile(60) == 2
+        assert histogram.percentile(100) == 1000
+
+    def test_merge_matches_recording_everything_in_one(self):
+        """Merging histograms gives the same counts as a single histogram."""
+        first, second, combined = HdrHistogram(), HdrHistogram(), HdrHistogram()
+        for value in range(0, 5000, 7):
+            first.record(value)
+            combined.record(value)
+        for value in range(100, 90000, 13):
+            second.record(value)
+            combined.record(value)
+
+        merged = first.merge(second)
+
+        assert merged.counts == combined.counts
+        assert (merged.total, merged.min, merged.max, merged.sum) == (
+            combined.total, combined.min, combined.max, combined.sum
+        )
+        with pytest.raises(ValueError):
+            merged.merge(HdrHistogram(significant_figures=2))
+
+    def test_round_trips_through_a_dict(self):
+        """Serialized histograms restore with identical percentiles."""
+        histogram = HdrHistogram()
+        for value in (120, 450, 450, 9800, 1200000):
+            histogram.record(value)
+
+        restored = HdrHistogram.from_dict(histogram.to_dict())
+
+        assert restored.counts == histogram.counts
+        assert restored.percentile(99) == histogram.percentile(99)
+        assert restored.mean == histogram.mean
+
+
+class TestLoadEngine:
+    """Tests for LoadEngine."""
+
+    @staticmethod
+    def make_engine(operations, rate=200.0, duration=0.1, **kwargs):
+        return LoadEngine(
+            Scenario("test", operations),
+            ArrivalSchedule.constant(rate, duration),
+            "http://load-engine.invalid",
+            **kwargs
+        )
+
+    @pytest.mark.asyncio
+    async def test_every_arrival_is_recorded(self):
+        """Completed and failed operations are counted with their latency."""
+        async def ok(context):
+            await asyncio.sleep(0)
+
+        async def rejected(context):
+            raise RequestFailed("HTTP 500")
+
+        engine = self.make_engine([("ok", 1, ok), ("rejected", 1, rejected)])
+        arrivals = len(list(engine.schedule.offsets()))
+        report = await engine.run()
+
+        assert report.scheduled == arrivals
+        assert report.completed + report.failed == arrivals
+        assert report.failed == report.operations["rejected"].total
+        assert report.dropped == 0
+
+    @pytest.mark.asyncio
+    async def test_latency_is_measured_from_the_scheduled_start(self):
+        """A stalled loop shows up as latency instead of a lower rate."""
+        async def blocking(context):
+            # Hold the loop so later arrivals start behind schedule
+            time.sleep(0.02)
+
+        engine = self.make_engine([("blocking", 1, blocking)], rate=100.0, duration=0.1)
+        arrivals = len(list(engine.schedule.offsets()))
+        report = await engine.run()
+
+        assert report.scheduled == arrivals
+        assert report.max_start_lag_us > 0
+        assert report.operations["blocking"].max >= 50000
+
+    @pytest.mark.asyncio
+    async def test_arrivals_over_max_in_flight_are_dropped(self):
+        """Arrivals are dropped, not delayed, when too many are running."""
+        async def slow(context):
+            await asyncio.sleep(0.05)
+
+        engine = self.make_engine([("slow", 1, slow)], max_in_flight=2)
+        arrivals = len(list(engine.schedule.offsets()))
+        report = await engine.run()
+
+        assert report.scheduled == arrivals
+        assert report.completed == arrivals - report.dropped
+        assert report.dropped > 0
+
+    @pytest.mark.asyncio
+    async def test_operations_cancelled_at_drain_timeout_count_as_failed(self):
+        """Operations still running after the drain timeout keep their latency."""
+        async def hung(context):
+            await asyncio.sleep(60)
+
+        engine = self.make_engine([("hung", 1, hung)], drain_timeout=0.05)
+        arrivals = len(list(engine.schedule.offsets()))
+        report = await engine.run()
+
+        assert report.scheduled == arrivals
+        assert report.failed == arrivals
+        assert report.completed == 0
+        assert report.operations["hung"].total == arrivals
+        assert report.operations["hung"].min >= 50000
+        assert report.errors["hung: cancelled after drain timeout"] == arrivals
+
+    def test_reports_merge_counters_and_histograms(self):
+        """Merged reports add histograms and counters."""
+        first, second = LoadReport("a"), LoadReport("b")
+        first.record_operation("op", 1000, True)
+        second.record_operation("op", 3000, False)
+
+        merged = first.merge(second)
+
+        assert merged.operations["op"].total == 2
+        assert (merged.completed, merged.failed) == (1, 1)